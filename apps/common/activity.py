@@ -0,0 +1,277 @@
+"""
+活動フィード（変更フィード）
+
+タスク・バグ・レビュー・レビュー指摘の変更履歴（django-simple-history）と、
+タスク・バグのコメントを1本の時系列（新しい順）にまとめる。
+- 履歴はモデルごとに1ページ分を (history_date, history_id) の降順・LIMIT で取得し、直前の版を
+  もう1クエリで取得して項目差分を求める（apps.common.history.previous_versions）。
+  詳細画面のタイムライン（1件の対象に限定）は LAG ウィンドウ関数で1クエリで取得する（with_previous_values）。
+  担当者名・更新者名も JOIN で取得するため N+1 は発生しない
+- 各ソースから limit + 1 件ずつ取得し、heapq.merge で (日時, ソース順, ID) の降順に併合する
+- ページングはカーソル方式。最後の項目の (日時, ソース順, ID) を不透明な文字列として返し、
+  次ページでは各ソースをそのキーより前の行に限定する（OFFSET を使わない）
+"""
+import base64
+import heapq
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.apps import apps
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+
+from .history import field_changes, previous_alias, previous_versions, with_previous_values
+
+# 対象が1件に限定され、履歴の件数が少ないスコープ（ウィンドウ関数で直前の版を求める）
+OBJECT_SCOPES = ('task', 'bug', 'review')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# フィードの対象（並び順はソース順として同時刻の項目の並べ替えに使う）
+# scope: 対象の絞り込みキー（project / task / bug / review）と、そのソースでの検索項目
+SOURCES = (
+    {
+        'kind': 'task',
+        'model': 'tasks.Task',
+        'number': 'task_number',
+        'title': 'title',
+        'fields': ('title', 'status', 'priority', 'assignee__display_name', 'planned_start_date',
+                   'planned_end_date', 'actual_start_date', 'actual_end_date', 'estimated_hours',
+                   'progress_rate', 'is_deleted'),
+        'scope': {'project': 'project_id', 'task': 'id'},
+        'url': ('tasks:task_detail', 'id'),
+    },
+    {
+        'kind': 'bug',
+        'model': 'quality.Bug',
+        'number': 'bug_number',
+        'title': 'title',
+        'fields': ('title', 'status', 'priority', 'severity', 'assignee__display_name',
+                   'fixed_version', 'fixed_date', 'verified_date', 'is_deleted'),
+        'scope': {'project': 'project_id', 'bug': 'id'},
+        'url': ('quality:bug_detail', 'id'),
+    },
+    {
+        'kind': 'review',
+        'model': 'reviews.Review',
+        'number': 'review_number',
+        'title': 'title',
+        'fields': ('title', 'status', 'conclusion', 'scheduled_at', 'actual_start_at',
+                   'actual_end_at', 'location', 'is_deleted'),
+        'scope': {'project': 'project_id', 'review': 'id'},
+        'url': ('reviews:review_detail', 'id'),
+    },
+    {
+        'kind': 'review_issue',
+        'model': 'reviews.ReviewIssue',
+        'number': 'issue_number',
+        'title': 'description',
+        'fields': ('status', 'severity', 'assignee__display_name', 'verifier__display_name',
+                   'resolved_at', 'verified_at', 'is_deleted'),
+        'scope': {'project': 'review__project_id', 'review': 'review_id'},
+        'url': ('reviews:review_detail', 'review_id'),
+    },
+    {
+        'kind': 'task_comment',
+        'model': 'tasks.TaskComment',
+        'number': 'task__task_number',
+        'title': 'task__title',
+        'comment': True,
+        'scope': {'project': 'task__project_id', 'task': 'task_id'},
+        'url': ('tasks:task_detail', 'task_id'),
+    },
+    {
+        'kind': 'bug_comment',
+        'model': 'quality.BugComment',
+        'number': 'bug__bug_number',
+        'title': 'bug__title',
+        'comment': True,
+        'scope': {'project': 'bug__project_id', 'bug': 'bug_id'},
+        'url': ('quality:bug_detail', 'bug_id'),
+    },
+)
+
+KIND_LABELS = {
+    'task': 'タスク',
+    'bug': 'バグ',
+    'review': 'レビュー',
+    'review_issue': 'レビュー指摘',
+    'task_comment': 'タスクコメント',
+    'bug_comment': 'バグコメント',
+}
+
+ACTIONS = {'+': 'created', '~': 'updated', '-': 'deleted'}
+
+
+def encode_cursor(item):
+    """項目の並び順キーをカーソル文字列に変換"""
+    key = f"{item['at'].isoformat()}|{item['rank']}|{item['pk']}"
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """カーソル文字列を (日時, ソース順, ID) に変換（不正な値は None）"""
+    if not cursor:
+        return None
+    try:
+        moment, rank, pk = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        moment = parse_datetime(moment)
+        if moment is None:
+            return None
+        # 履歴ID は設定により UUID のため文字列のまま条件に渡す
+        return moment, int(rank), pk
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _cursor_filter(date_field, pk_field, rank, cursor):
+    """並び順キーが cursor より前（古い）の行に限定する条件"""
+    moment, cursor_rank, cursor_pk = cursor
+    if rank < cursor_rank:
+        return Q(**{f'{date_field}__lte': moment})
+    if rank > cursor_rank:
+        return Q(**{f'{date_field}__lt': moment})
+    return Q(**{f'{date_field}__lt': moment}) | Q(**{date_field: moment, f'{pk_field}__lt': cursor_pk})
+
+
+def _display_value(model, field, value):
+    """差分表示用の値（選択肢は表示名、日付は ISO 形式）"""
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return 'はい' if value else 'いいえ'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value.normalize(), 'f')
+    choices = dict(model._meta.get_field(field).flatchoices) if '__' not in field else {}
+    return str(choices.get(value, value))
+
+
+def _field_label(model, field):
+    return str(model._meta.get_field(field.split('__')[0]).verbose_name)
+
+
+def _history_items(source, rank, filters, cursor, limit, per_object=False):
+    model = apps.get_model(source['model'])
+    fields = source['fields']
+    url_name, url_field = source['url']
+    history = model.history.filter(**filters)
+    if cursor:
+        history = history.filter(_cursor_filter('history_date', 'history_id', rank, cursor))
+    columns = ('history_id', 'history_date', 'history_type', 'history_change_reason',
+               'history_user__display_name', 'id', url_field, source['number'], source['title'], *fields)
+    if per_object:
+        rows = (
+            with_previous_values(history, fields)
+            .order_by('-history_date', '-history_id')
+            .values(*columns, *map(previous_alias, fields), 'prev_history_id')
+        )[:limit]
+    else:
+        rows = previous_versions(
+            model, list(history.order_by('-history_date', '-history_id').values(*columns)[:limit]), fields
+        )
+
+    items = []
+    for row in rows:
+        changes = field_changes(row, fields)
+        action = ACTIONS[row['history_type']]
+        if action == 'updated' and any(field == 'is_deleted' and new for field, _, new in changes):
+            action = 'deleted'
+        items.append({
+            'kind': source['kind'],
+            'rank': rank,
+            'pk': row['history_id'],
+            'object_id': row['id'],
+            'at': row['history_date'],
+            'action': action,
+            'user': row['history_user__display_name'] or '',
+            'label': f"{row[source['number']]} {row[source['title']][:50]}",
+            'url': reverse(url_name, args=[row[url_field]]),
+            'reason': row['history_change_reason'] or '',
+            'comment': '',
+            'changes': [
+                {
+                    'field': _field_label(model, field),
+                    'old': _display_value(model, field, old),
+                    'new': _display_value(model, field, new),
+                }
+                for field, old, new in changes
+            ],
+        })
+    return items
+
+
+def _comment_items(source, rank, filters, cursor, limit):
+    model = apps.get_model(source['model'])
+    url_name, url_field = source['url']
+    comments = model.objects.filter(**filters)
+    if cursor:
+        comments = comments.filter(_cursor_filter('created_at', 'pk', rank, cursor))
+    rows = comments.order_by('-created_at', '-pk').values(
+        'pk', 'created_at', 'comment', 'user__display_name', url_field, source['number'], source['title']
+    )[:limit]
+    return [
+        {
+            'kind': source['kind'],
+            'rank': rank,
+            'pk': row['pk'],
+            'object_id': row[url_field],
+            'at': row['created_at'],
+            'action': 'commented',
+            'user': row['user__display_name'] or '',
+            'label': f"{row[source['number']]} {row[source['title']][:50]}",
+            'url': reverse(url_name, args=[row[url_field]]),
+            'reason': '',
+            'comment': row['comment'],
+            'changes': [],
+        }
+        for row in rows
+    ]
+
+
+def _sort_key(item):
+    return item['at'], item['rank'], item['pk']
+
+
+def change_feed(scope=None, scope_id=None, cursor=None, limit=DEFAULT_LIMIT):
+    """変更フィードの1ページ分
+
+    Args:
+        scope: None（全体）/ 'project' / 'task' / 'bug' / 'review'
+        scope_id: scope のID
+        cursor: 前ページの next_cursor
+        limit: 1ページの件数（最大 MAX_LIMIT）
+
+    Returns:
+        {'items': [新しい順の項目], 'next_cursor': 次ページのカーソル（最終ページは None）}
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    position = decode_cursor(cursor)
+
+    streams = []
+    for rank, source in enumerate(SOURCES):
+        if scope is not None and scope not in source['scope']:
+            continue
+        filters = {source['scope'][scope]: scope_id} if scope is not None else {}
+        if source.get('comment'):
+            streams.append(_comment_items(source, rank, filters, position, limit + 1))
+        else:
+            streams.append(_history_items(source, rank, filters, position, limit + 1, scope in OBJECT_SCOPES))
+
+    merged = list(islice(heapq.merge(*streams, key=_sort_key, reverse=True), limit + 1))
+    items = merged[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(merged) > limit else None
+    for item in items:
+        item['kind_label'] = KIND_LABELS[item['kind']]
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def object_timeline(scope, scope_id, limit=DEFAULT_LIMIT):
+    """詳細画面のタイムライン（1件のタスク・バグ・レビューと、そのコメント・指摘の変更）"""
+    return change_feed(scope, scope_id, limit=limit)['items']
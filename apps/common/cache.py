@@ -0,0 +1,118 @@
+"""
+画面用ペイロードのフラグメントキャッシュ
+
+キャッシュキーは (名前空間, プロジェクトID, プロジェクト版数, フィルター条件) で構成する。
+データ更新時はプロジェクト版数が加算されるため、古いキーは参照されなくなり
+有効期限切れで自然に消える（明示的な削除や走査は行わない）。
+"""
+import hashlib
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.projects.versioning import get_project_version
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'payload_metrics'
+
+
+def _get_cache():
+    return caches[getattr(settings, 'PAYLOAD_CACHE_ALIAS', 'default')]
+
+
+def _params_digest(params):
+    """フィルター条件を順序に依存しない短いハッシュに変換"""
+    items = sorted((str(key), str(value)) for key, value in (params or {}).items() if value not in (None, ''))
+    raw = '&'.join(f'{key}={value}' for key, value in items)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def build_cache_key(namespace, params=None, project_id=None):
+    """版数付きキャッシュキーを生成する
+
+    project_id 未指定（全プロジェクト対象）の場合は全体版数を使用する。
+    """
+    version = get_project_version(project_id)
+    scope = project_id if project_id else 'all'
+    return f'payload:{namespace}:{scope}:v{version}:{_params_digest(params)}'
+
+
+def _record(namespace, outcome):
+    """ヒット/ミス件数を記録"""
+    cache = _get_cache()
+    key = f'{METRICS_PREFIX}:{namespace}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # キーが未作成（または追い出し済み）の場合
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_or_build(namespace, builder, params=None, project_id=None, timeout=None):
+    """キャッシュ済みペイロードを返す。なければ builder() で生成して保存する
+
+    Args:
+        namespace: ペイロード種別（'gantt', 'calendar', 'dashboard' など）
+        builder: ペイロードを生成する引数なしの関数（pickle 可能な値を返すこと）
+        params: キャッシュキーに含めるフィルター条件
+        project_id: 対象プロジェクトID（None の場合は全体版数で無効化）
+        timeout: 有効期限（秒）。省略時は PAYLOAD_CACHE_TIMEOUT
+    """
+    cache = _get_cache()
+    key = build_cache_key(namespace, params, project_id)
+    payload = cache.get(key)
+    if payload is not None:
+        _record(namespace, 'hit')
+        return payload
+
+    _record(namespace, 'miss')
+    payload = builder()
+    if timeout is None:
+        timeout = getattr(settings, 'PAYLOAD_CACHE_TIMEOUT', 300)
+    cache.set(key, payload, timeout)
+    logger.debug('payload cache miss: %s', key)
+    return payload
+
+
+async def aget_or_build(namespace, builder, params=None, project_id=None, timeout=None):
+    """get_or_build の非同期版（async ビュー用）
+
+    builder は引数なしのコルーチン関数。版数の取得とヒット/ミス件数の記録は
+    DB・アトミック操作を伴うため sync_to_async で実行する。
+    """
+    cache = _get_cache()
+    key = await sync_to_async(build_cache_key)(namespace, params, project_id)
+    payload = await cache.aget(key)
+    if payload is not None:
+        await sync_to_async(_record)(namespace, 'hit')
+        return payload
+
+    await sync_to_async(_record)(namespace, 'miss')
+    payload = await builder()
+    if timeout is None:
+        timeout = getattr(settings, 'PAYLOAD_CACHE_TIMEOUT', 300)
+    await cache.aset(key, payload, timeout)
+    logger.debug('payload cache miss: %s', key)
+    return payload
+
+
+def get_cache_metrics(namespaces):
+    """名前空間ごとのヒット/ミス件数とヒット率を返す"""
+    cache = _get_cache()
+    keys = [f'{METRICS_PREFIX}:{ns}:{outcome}' for ns in namespaces for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    metrics = {}
+    for namespace in namespaces:
+        hits = values.get(f'{METRICS_PREFIX}:{namespace}:hit', 0)
+        misses = values.get(f'{METRICS_PREFIX}:{namespace}:miss', 0)
+        total = hits + misses
+        metrics[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return metrics
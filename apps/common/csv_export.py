@@ -0,0 +1,137 @@
+"""
+CSV出力共通処理（ストリーミング）
+
+行データはイテレータで受け取り、一定行数ごとにまとめて出力する。
+QuerySet は values_list(...).iterator() で渡すことで、PostgreSQL では
+サーバーサイドカーソルで読み進めるため、件数によらずメモリ使用量は一定になる。
+"""
+import csv
+import zlib
+from datetime import datetime
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.views import View
+
+from .mixins import ReplicaReadMixin
+
+# 1チャンクあたりの行数
+CHUNK_ROWS = 1000
+# サーバーサイドカーソルから1回に取得する行数
+ITERATOR_CHUNK_SIZE = 2000
+
+# 出力対象（export_csv コマンドとバックグラウンド出力で共用）
+EXPORT_DATASETS = {
+    'tasks': 'apps.tasks.exports.export_tasks',
+    'task_history': 'apps.tasks.exports.export_task_history',
+    'bugs': 'apps.quality.exports.export_bugs',
+    'bug_history': 'apps.quality.exports.export_bug_history',
+    'test_executions': 'apps.quality.exports.export_test_executions',
+    'review_issues': 'apps.reviews.exports.export_review_issues',
+}
+
+
+class _Echo:
+    """csv.writer の書き込み先（書き込んだ文字列をそのまま返す）"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows, chunk_rows=CHUNK_ROWS):
+    """ヘッダーと行データからCSVのバイト列チャンクを順に生成"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header).encode('utf-8')
+
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= chunk_rows:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """バイト列チャンクを逐次 gzip 圧縮する"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_queryset(queryset, columns):
+    """(フィールド名, 見出し) のリストから (ヘッダー, 行イテレータ) を生成"""
+    fields = [field for field, _ in columns]
+    header = [label for _, label in columns]
+    # 行はレスポンスの送信時（ビューの処理後）に読むため、読み取り先（レプリカ）をここで確定する
+    rows = queryset.using(queryset.db).values_list(*fields).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    return header, rows
+
+
+def streaming_csv_response(filename, header, rows, compress=False):
+    """CSVをストリーミングで返すHTTPレスポンスを生成"""
+    chunks = iter_csv(header, rows)
+    if compress:
+        response = StreamingHttpResponse(gzip_chunks(chunks), content_type='application/gzip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv.gz"'
+    else:
+        response = StreamingHttpResponse(chunks, content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def write_csv(stream, header, rows, compress=False):
+    """CSVをファイル（バイナリストリーム）に書き出し、出力行数を返す"""
+    count = 0
+
+    def counted(iterable):
+        nonlocal count
+        for row in iterable:
+            count += 1
+            yield row
+
+    chunks = iter_csv(header, counted(rows))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    for chunk in chunks:
+        stream.write(chunk)
+    return count
+
+
+class CsvExportView(LoginRequiredMixin, ReplicaReadMixin, View):
+    """CSVストリーミング出力ビューの基底クラス
+
+    サブクラスは filename_prefix と export_function（request.GET と user を受け取り
+    (header, rows) を返す関数を staticmethod で指定）を定義する。
+    ?compress=gzip で gzip 圧縮して返す。
+    ?background=1 の場合はバックグラウンド処理（csv_export）に登録し、処理状況画面へ移動する。
+    この場合 filename_prefix は EXPORT_DATASETS のキーと一致させる。
+    """
+    filename_prefix = 'export'
+    export_function = None
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('background'):
+            return self.enqueue_export(request)
+        header, rows = self.export_function(request.GET, request.user)
+        filename = f"{self.filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        compress = request.GET.get('compress') == 'gzip'
+        return streaming_csv_response(filename, header, rows, compress=compress)
+
+    def enqueue_export(self, request):
+        from apps.jobs.queue import enqueue
+
+        params = request.GET.dict()
+        params.pop('background')
+        compress = params.pop('compress', '') == 'gzip'
+        job, _ = enqueue(
+            'csv_export',
+            {'dataset': self.filename_prefix, 'params': params, 'compress': compress},
+            user=request.user,
+        )
+        return redirect('jobs:job_detail', pk=job.pk)
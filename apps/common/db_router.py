@@ -0,0 +1,109 @@
+"""
+読み取り専用レプリカへの振り分け
+
+settings.REPLICA_DATABASE にレプリカの DB エイリアスを設定すると、次の読み取りをレプリカで行う。
+- ReplicaReadMixin を付けたビュー（ダッシュボード・ガント・カレンダー・帳票・CSV出力など）の GET
+- use_replica=True で登録したバックグラウンド処理（apps.jobs.registry.register）
+それ以外の読み取りと、すべての書き込みはプライマリ（default）で行う。
+トランザクション中の読み取りも、書き込みと同じ接続で行うためプライマリに送る。
+
+レプリカは遅延があるため、更新リクエスト（POST など）の後 REPLICA_STICKY_SECONDS 秒間は
+そのブラウザの読み取りをすべてプライマリで行う（replica_stickiness_middleware、read-your-writes）。
+他のユーザーには遅延分だけ古い内容が見えることがあり、ペイロードキャッシュ（apps.common.cache）に
+載った場合は最大 PAYLOAD_CACHE_TIMEOUT 秒残る。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+STICKY_COOKIE = 'replica_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# 現在の読み取り先（None はプライマリ）
+_read_alias = ContextVar('replica_read_alias', default=None)
+# 直近に更新したブラウザからのリクエストかどうか
+_pinned = ContextVar('replica_pinned', default=False)
+
+
+def replica_alias():
+    """設定されたレプリカの DB エイリアス（未設定の場合は None）"""
+    return getattr(settings, 'REPLICA_DATABASE', None) or None
+
+
+@contextmanager
+def use_replica():
+    """ブロック内の読み取りをレプリカで行う（レプリカ未設定・更新直後の場合はプライマリのまま）"""
+    alias = None if _pinned.get() else replica_alias()
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def pin_to_primary(pinned=True):
+    """ブロック内では use_replica を無効にする"""
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """use_replica のブロック内の読み取りをレプリカに振り分けるルーター"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # レプリカから読んだインスタンスの保存もプライマリに送る
+        # （None を返すとインスタンスの読み込み元が使われる）
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # レプリカはプライマリの複製のため、どちらから読んだインスタンス同士も関連付けてよい
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # レプリカにはプライマリから複製されるため、マイグレーションは適用しない
+        if db == replica_alias() and db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+
+@sync_and_async_middleware
+def replica_stickiness_middleware(get_response):
+    """更新リクエストの後、一定時間はそのブラウザの読み取りをプライマリで行うミドルウェア"""
+
+    def pin(request, response):
+        if request.method not in SAFE_METHODS and replica_alias():
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with pin_to_primary(STICKY_COOKIE in request.COOKIES):
+                response = await get_response(request)
+            return pin(request, response)
+
+        markcoroutinefunction(middleware)
+    else:
+        def middleware(request):
+            with pin_to_primary(STICKY_COOKIE in request.COOKIES):
+                response = get_response(request)
+            return pin(request, response)
+
+    return middleware
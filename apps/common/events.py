@@ -0,0 +1,246 @@
+"""
+プロジェクト単位の変更イベント（Server-Sent Events 配信用）
+
+Task / Bug / Review などの保存・削除シグナルから、コミット後にプロジェクトのチャネル
+（'project:<ID>'）へ変更内容を発行する。画面はイベントを受けて該当行だけを差し替える。
+
+ブローカーは settings.EVENT_BROKER で切り替える。
+- InMemoryBroker（既定）: 同一プロセス内で配信する。runserver や ASGI ワーカー1つの構成向け
+- CacheBroker          : Django キャッシュ経由で配信する。Redis / Memcached などの共有キャッシュを
+                          使えば複数プロセス間で配信でき、locmem ならローカルでもそのまま動く
+どちらも直近のイベントを保持し、再接続時は Last-Event-ID 以降を再送する。
+"""
+import abc
+import asyncio
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'apps.common.events.InMemoryBroker'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+# モデルごとの (種別, project_id 取得関数, シリアライズ関数)
+_tracked = {}
+
+
+def project_channel(project_id):
+    return f'project:{project_id}'
+
+
+class Subscription(abc.ABC):
+    """購読1件分（再送分を返した後、新着を待つ）。新着の待ち方はブローカーごとに _wait で実装する"""
+
+    def __init__(self, replay=()):
+        self._replay = deque(replay)
+
+    async def next_event(self, timeout):
+        """次のイベント（timeout 秒以内に届かなければ None）"""
+        if self._replay:
+            return self._replay.popleft()
+        return await self._wait(timeout)
+
+    @abc.abstractmethod
+    async def _wait(self, timeout):
+        """新着イベントを timeout 秒まで待つ（届かなければ None）"""
+
+    def close(self):
+        pass
+
+
+class _QueueSubscription(Subscription):
+
+    def __init__(self, broker, channel, replay):
+        super().__init__(replay)
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def _wait(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class InMemoryBroker:
+    """同一プロセス内のブローカー
+
+    発行はリクエスト処理スレッド、購読はイベントループ上で行われるため、
+    購読側のキューへは call_soon_threadsafe で渡す。
+    """
+
+    def __init__(self, buffer_size=200):
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._buffers = defaultdict(lambda: deque(maxlen=buffer_size))
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            event = {**event, 'id': next(self._sequence)}
+            self._buffers[channel].append(event)
+            subscribers = list(self._subscribers[channel])
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+            except RuntimeError:
+                # 切断済み（イベントループ終了済み）の購読
+                self._unsubscribe(subscription)
+        return event
+
+    def subscribe(self, channel, last_event_id=None):
+        """購読を開始する（イベントループ上で呼び出すこと）"""
+        with self._lock:
+            replay = [] if last_event_id is None else [
+                event for event in self._buffers[channel] if event['id'] > last_event_id
+            ]
+            subscription = _QueueSubscription(self, channel, replay)
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def replay(self, channel, last_event_id):
+        """last_event_id より後の保持中イベント"""
+        with self._lock:
+            return [event for event in self._buffers[channel] if event['id'] > last_event_id]
+
+    def latest_id(self, channel):
+        """チャネルの最新イベントID（未発行は 0）"""
+        with self._lock:
+            buffer = self._buffers.get(channel)
+            return buffer[-1]['id'] if buffer else 0
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers[subscription.channel].discard(subscription)
+
+
+class _CacheSubscription(Subscription):
+
+    def __init__(self, broker, channel, last_event_id):
+        super().__init__()
+        self.broker = broker
+        self.channel = channel
+        self.last_event_id = last_event_id
+
+    async def _wait(self, timeout):
+        if self.last_event_id is None:
+            # 再送なしの購読は現在の連番以降を待つ
+            self.last_event_id = await sync_to_async(self.broker.latest_id)(self.channel)
+        deadline = time.monotonic() + timeout
+        while True:
+            events = await sync_to_async(self.broker.replay)(self.channel, self.last_event_id)
+            if events:
+                self.last_event_id = events[-1]['id']
+                self._replay.extend(events[1:])
+                return events[0]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.broker.poll_interval, remaining))
+
+
+class CacheBroker:
+    """Django キャッシュ経由のブローカー（購読側はポーリング）
+
+    チャネルごとに連番カウンタ（incr）と、連番をキーにしたイベントを保存する。
+    保持件数を超えた古いイベントは有効期限で消えるに任せる。
+    """
+
+    def __init__(self, alias='default', buffer_size=200, timeout=600, poll_interval=1.0):
+        self.cache = caches[alias]
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def _key(self, channel, suffix):
+        return f'events:{channel}:{suffix}'
+
+    def latest_id(self, channel):
+        """チャネルの最新イベントID（未発行は 0）"""
+        return self.cache.get(self._key(channel, 'seq'), 0)
+
+    def publish(self, channel, event):
+        seq_key = self._key(channel, 'seq')
+        self.cache.add(seq_key, 0, None)
+        event = {**event, 'id': self.cache.incr(seq_key)}
+        self.cache.set(self._key(channel, event['id']), event, self.timeout)
+        return event
+
+    def subscribe(self, channel, last_event_id=None):
+        return _CacheSubscription(self, channel, last_event_id)
+
+    def replay(self, channel, last_event_id):
+        current = self.latest_id(channel)
+        first = max(last_event_id + 1, current - self.buffer_size + 1)
+        if first > current:
+            return []
+        found = self.cache.get_many([self._key(channel, seq) for seq in range(first, current + 1)])
+        return [found[key] for key in sorted(found, key=lambda key: int(key.rsplit(':', 1)[1]))]
+
+
+def get_broker():
+    """設定されたブローカー（プロセス内で1つ）"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(settings, 'EVENT_BROKER', DEFAULT_BROKER))
+                _broker = broker_class(**getattr(settings, 'EVENT_BROKER_OPTIONS', {}))
+    return _broker
+
+
+def publish_project_event(project_id, event):
+    """プロジェクトのチャネルへ、トランザクションのコミット後に発行する"""
+    if not project_id:
+        return
+    transaction.on_commit(lambda: get_broker().publish(project_channel(project_id), event))
+
+
+def publish_instances(instances, action='saved'):
+    """track_project_events 登録済みモデルのインスタンスの変更を発行する
+
+    bulk_update などシグナルを発行しない一括更新の後に呼び出す。
+    """
+    for instance in instances:
+        kind, get_project_id, serialize = _tracked[type(instance)]
+        publish_project_event(get_project_id(instance), {
+            'type': kind, 'action': action, 'data': serialize(instance),
+        })
+
+
+def track_project_events(model, kind, get_project_id, serialize):
+    """モデルの保存・削除時にプロジェクトの変更イベントを発行するシグナルを登録する
+
+    Args:
+        model: 対象モデルクラス
+        kind: イベント種別（SSE の event 名。例: 'task'）
+        get_project_id: インスタンスから project_id を返す関数
+        serialize: インスタンスから画面の差し替えに必要な値の辞書を返す関数
+    """
+    _tracked[model] = (kind, get_project_id, serialize)
+
+    def _on_save(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        publish_instances([instance], 'deleted' if getattr(instance, 'is_deleted', False) else 'saved')
+
+    def _on_delete(sender, instance, **kwargs):
+        publish_instances([instance], 'deleted')
+
+    uid = f'project_events_{model._meta.label_lower}'
+    post_save.connect(_on_save, sender=model, weak=False, dispatch_uid=f'{uid}_save')
+    post_delete.connect(_on_delete, sender=model, weak=False, dispatch_uid=f'{uid}_delete')
@@ -0,0 +1,147 @@
+"""
+変更履歴（django-simple-history）からの時点指定クエリ
+
+as_of_queryset は指定日時時点の各レコードの最新履歴を1クエリで返す。
+- PostgreSQL: SELECT DISTINCT ON (id) ... WHERE history_date <= X ORDER BY id, history_date DESC
+- その他: id ごとの最新 history_id を相関サブクエリで求める
+（simple_history の HistoricalQuerySet.latest_of_each を使用）
+
+どちらも (id, history_date) の複合インデックスで id ごとの最新行を引けるよう、
+対象モデルでは HistoricalRecords の代わりに IndexedHistoricalRecords を使う。
+
+with_previous_values / previous_versions / field_changes は版ごとの項目差分を求める。
+- with_previous_values: 直前の版の値を LAG ウィンドウ関数で同じ行に付与する（追加のクエリなし）。
+  ウィンドウ関数は ORDER BY・LIMIT より前に絞り込み後の全行に対して評価されるため、
+  1件のレコードの履歴など行数の少ない範囲に使う
+- previous_versions: 取得済みの版（1ページ分）の直前の版を1クエリで取得する。
+  (id, history_date) のインデックスで版ごとに直前の1行を引くため、履歴全体の件数によらない
+"""
+from datetime import datetime, time
+
+from django.db import models
+from django.db.models import F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from simple_history.models import HistoricalRecords
+
+
+class IndexedHistoricalRecords(HistoricalRecords):
+    """履歴テーブルに (id, history_date) の複合インデックスを追加する HistoricalRecords"""
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        meta_fields['indexes'] = tuple(meta_fields.get('indexes', ())) + (
+            models.Index(fields=(model._meta.pk.attname, 'history_date')),
+        )
+        return meta_fields
+
+
+def parse_as_of(value):
+    """?as_of= の値を日時に変換（日付のみの場合はその日の終わり、不正な値は None）"""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.max)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def as_of_queryset(model, moment, **scope):
+    """model の moment 時点の状態を履歴モデルの QuerySet として返す
+
+    物理削除済み（history_type='-'）のレコードは含まない。論理削除（is_deleted）は呼び出し側で除外する。
+
+    Args:
+        model: HistoricalRecords を持つモデル
+        moment: 基準日時
+        scope: 絞り込み条件（例: project_id=1）。一度でも条件に該当したレコードに限定して
+               最新履歴を求めた後、時点の状態にも同じ条件を適用する
+    """
+    history = model.history.filter(history_date__lte=moment)
+    if scope:
+        history = history.filter(id__in=model.history.filter(**scope).values('id'))
+    return history.latest_of_each().exclude(history_type='-').filter(**scope)
+
+
+def previous_alias(field):
+    return 'prev_' + field.replace('__', '_')
+
+
+def with_previous_values(history, fields):
+    """履歴 QuerySet の各行に、同じレコードの直前の版の値を付与する
+
+    fields には 'status' のような項目名のほか 'assignee__display_name' のような参照先も指定できる。
+    ウィンドウ関数は WHERE 句の適用後に評価されるため、直前の版を除外する条件
+    （history_date の下限など）は付けないこと。上限や LIMIT は問題ない。
+    """
+    def previous(expression):
+        return Window(
+            Lag(expression),
+            partition_by=[F('id')],
+            order_by=[F('history_date').asc(), F('history_id').asc()],
+        )
+
+    annotations = {previous_alias(field): previous(field) for field in fields}
+    annotations['prev_history_id'] = previous('history_id')
+    return history.annotate(**annotations)
+
+
+def previous_versions(model, rows, fields):
+    """取得済みの版それぞれに、同じレコードの直前の版の値を付与する（1クエリ）
+
+    Args:
+        model: HistoricalRecords を持つモデル
+        rows: 履歴の values() の辞書のリスト（'id', 'history_date', 'history_id' を含むこと）
+        fields: 直前の値を求める項目（with_previous_values と同じ形式）
+
+    各行に with_previous_values と同じ別名（previous_alias）と 'prev_history_id' を追加して返す。
+    """
+    previous_id = model.history.filter(id=OuterRef('id')).filter(
+        Q(history_date__lt=OuterRef('history_date'))
+        | Q(history_date=OuterRef('history_date'), history_id__lt=OuterRef('history_id'))
+    ).order_by('-history_date', '-history_id').values('history_id')[:1]
+    page = model.history.filter(history_id__in=[row['history_id'] for row in rows])
+    previous_rows = model.history.filter(
+        history_id__in=page.annotate(previous_id=Subquery(previous_id)).values('previous_id')
+    ).values('id', 'history_date', 'history_id', *fields) if rows else []
+
+    # レコードごとの直前の版の候補（取得した版の直前の版は必ず含まれる）
+    candidates = {}
+    for previous in previous_rows:
+        candidates.setdefault(previous['id'], []).append(previous)
+    for row in rows:
+        key = (row['history_date'], row['history_id'])
+        earlier = [
+            previous for previous in candidates.get(row['id'], ())
+            if (previous['history_date'], previous['history_id']) < key
+        ]
+        previous = max(earlier, key=lambda item: (item['history_date'], item['history_id']), default=None)
+        row['prev_history_id'] = previous['history_id'] if previous else None
+        for field in fields:
+            row[previous_alias(field)] = previous[field] if previous else None
+    return rows
+
+
+def field_changes(row, fields):
+    """with_previous_values・previous_versions で取得した行（values() の辞書）の変更項目
+
+    Returns:
+        [(項目, 変更前, 変更後)]（最初の版は空リスト）
+    """
+    if row['prev_history_id'] is None:
+        return []
+    changes = []
+    for field in fields:
+        old, new = row[previous_alias(field)], row[field]
+        if old != new:
+            changes.append((field, old, new))
+    return changes
@@ -0,0 +1,37 @@
+"""
+共通のバックグラウンド処理
+"""
+from datetime import datetime
+
+from django.utils.module_loading import import_string
+
+from apps.jobs.registry import register
+from .csv_export import EXPORT_DATASETS, write_csv
+
+# 進捗メッセージを更新する行数の間隔
+PROGRESS_ROWS = 10000
+
+
+@register('csv_export', 'CSV出力', use_replica=True)
+def run_csv_export(context):
+    """CSVを結果ファイルに出力する
+
+    params: {'dataset': EXPORT_DATASETS のキー, 'params': 絞り込み条件, 'compress': gzip 圧縮するか}
+    """
+    dataset = context.params['dataset']
+    compress = context.params.get('compress', False)
+    export_function = import_string(EXPORT_DATASETS[dataset])
+    header, rows = export_function(context.params.get('params', {}), context.user)
+
+    def reported(iterable):
+        for index, row in enumerate(iterable, 1):
+            if index % PROGRESS_ROWS == 0:
+                context.progress(0, f'{index}件出力しました')
+            yield row
+
+    filename = f"{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    if compress:
+        filename += '.gz'
+    with context.result_file(filename) as stream:
+        count = write_csv(stream, header, reported(rows), compress=compress)
+    return {'rows': count}
@@ -0,0 +1,72 @@
+"""
+大量データ向けJSONシリアライズ
+
+- orjson がインストールされていれば使用し、なければ標準 json にフォールバックする
+- 行数が多い場合は列指向形式 {"id": [...], "start_date": [...]} で出力し、
+  キー名の繰り返しを省いてペイロードを小さくする
+- テンプレートへ埋め込むため <, >, & はエスケープする
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 任意依存
+    orjson = None
+
+# この行数を超えたら列指向形式で出力する
+COLUMNAR_THRESHOLD = 2000
+
+_HTML_ESCAPES = (
+    ('<', '\\u003C'),
+    ('>', '\\u003E'),
+    ('&', '\\u0026'),
+)
+
+
+def dumps(data):
+    """JSON文字列に変換（区切り文字の空白なし）"""
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def dumps_for_html(data):
+    """<script> 内に埋め込めるJSON文字列に変換"""
+    # str.translate は大きな文字列で遅いため replace を使う
+    text = dumps(data)
+    for char, escaped in _HTML_ESCAPES:
+        if char in text:
+            text = text.replace(char, escaped)
+    return text
+
+
+def iso_date(value):
+    """日付・日時を 'YYYY-MM-DD' に変換（strftime を使わず文字列を切り出す）"""
+    if value is None:
+        return None
+    return str(value)[:10]
+
+
+def to_columnar(rows, columns):
+    """タプルのリストを列指向の辞書に変換"""
+    if not rows:
+        return {column: [] for column in columns}
+    return dict(zip(columns, map(list, zip(*rows))))
+
+
+def to_records(rows, columns):
+    """タプルのリストを辞書のリストに変換"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def encode_rows(rows, columns, threshold=None):
+    """行データをテンプレート埋め込み用JSONに変換
+
+    threshold を超える行数の場合は列指向形式、それ以外は辞書のリストで出力する。
+    受け取り側は static/js/payload.js の expandColumnar() で同じ形に戻せる。
+    """
+    if threshold is None:
+        threshold = COLUMNAR_THRESHOLD
+    if len(rows) > threshold:
+        return dumps_for_html(to_columnar(rows, columns))
+    return dumps_for_html(to_records(rows, columns))
@@ -0,0 +1,47 @@
+"""
+CSV出力コマンド（BI連携用）
+
+使い方:
+    python manage.py export_csv tasks --output tasks.csv
+    python manage.py export_csv bugs --filter project=1 --filter status=NEW --gzip -o bugs.csv.gz
+    python manage.py export_csv task_history --filter since=2025-04-01 > history.csv
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from apps.common.csv_export import EXPORT_DATASETS, write_csv
+
+
+class Command(BaseCommand):
+    help = 'タスク・バグ・テスト実行・指摘事項・履歴をCSVで出力します'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORT_DATASETS), help='出力対象')
+        parser.add_argument('-o', '--output', help='出力先ファイル（省略時は標準出力）')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='KEY=VALUE',
+            help='一覧画面と同じ絞り込み条件（例: project=1, status=NEW）'
+        )
+        parser.add_argument('--gzip', action='store_true', help='gzip 圧縮して出力')
+    
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'--filter は KEY=VALUE 形式で指定してください: {item}')
+            params[key] = value
+        
+        export_function = import_string(EXPORT_DATASETS[options['dataset']])
+        header, rows = export_function(params, None)
+        
+        if options['output']:
+            with open(options['output'], 'wb') as stream:
+                count = write_csv(stream, header, rows, compress=options['gzip'])
+            self.stderr.write(self.style.SUCCESS(f"{count}件を {options['output']} に出力しました"))
+        else:
+            count = write_csv(sys.stdout.buffer, header, rows, compress=options['gzip'])
+            sys.stdout.flush()
+            self.stderr.write(self.style.SUCCESS(f'{count}件を出力しました'))
@@ -0,0 +1,111 @@
+"""
+月単位パーティションの保守コマンド（PostgreSQL のみ）
+
+先の月のパーティションを作成し、保持期間を過ぎた古いパーティションを切り離す。
+cron 等で月1回以上実行する（作成漏れの月の行は既定パーティションに入り、次回の作成時に移される）。
+
+使い方:
+    python manage.py manage_partitions                          # 当月から3か月先まで作成
+    python manage.py manage_partitions --ahead 6 --dry-run
+    python manage.py manage_partitions --retain 24 --archive-schema archive   # 24か月より前を archive スキーマへ移動
+    python manage.py manage_partitions --table test_executions --retain 12 --drop
+    python manage.py manage_partitions --verify                 # 代表的なクエリが読むパーティションを表示
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.common.history import as_of_queryset
+from apps.common.partitions import (
+    DEFAULT_AHEAD_MONTHS, PARTITIONED_TABLES, create_partition, detach_partition, existing_months,
+    is_partitioned, is_supported, list_partitions, partition_name, plan_partitions, touched_partitions,
+)
+
+
+def _verification_queries():
+    from apps.quality.models import Bug, TestExecution
+    from apps.tasks.models import Task
+
+    now = timezone.now()
+    recent = now - timedelta(days=30)
+    return [
+        ('tasks_historicaltask', '直近30日の変更履歴',
+         Task.history.filter(history_date__gte=recent).values('history_id')),
+        ('tasks_historicaltask', '変更フィードの1ページ目（新しい順50件）',
+         Task.history.order_by('-history_date').values('history_id')[:50]),
+        ('tasks_historicaltask', '30日前時点の状態（as_of）',
+         as_of_queryset(Task, recent).values('id')),
+        ('quality_historicalbug', '直近30日の変更履歴',
+         Bug.history.filter(history_date__gte=recent).values('history_id')),
+        ('test_executions', '直近30日の実行結果',
+         TestExecution.all_objects.filter(executed_at__gte=recent).values('id')),
+    ]
+
+
+class Command(BaseCommand):
+    help = '履歴・テスト実行テーブルの月単位パーティションを作成・切り離します（PostgreSQL のみ）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table', action='append', default=[], choices=sorted(PARTITIONED_TABLES),
+            help='対象テーブル（複数指定可、省略時はすべて）'
+        )
+        parser.add_argument(
+            '--ahead', type=int, default=DEFAULT_AHEAD_MONTHS,
+            help=f'当月から何か月先まで作成するか（既定: {DEFAULT_AHEAD_MONTHS}）'
+        )
+        parser.add_argument('--retain', type=int, help='当月を含めて残す月数（省略時は切り離さない）')
+        parser.add_argument('--archive-schema', help='切り離したパーティションの移動先スキーマ')
+        parser.add_argument('--drop', action='store_true', help='切り離したパーティションを削除する')
+        parser.add_argument('--dry-run', action='store_true', help='対象を表示するだけで変更しない')
+        parser.add_argument('--verify', action='store_true', help='代表的なクエリが読むパーティションを表示する')
+
+    def handle(self, *args, **options):
+        if not is_supported(connection):
+            raise CommandError('パーティションは PostgreSQL でのみ利用できます')
+        if options['drop'] and options['archive_schema']:
+            raise CommandError('--drop と --archive-schema は同時に指定できません')
+        if options['retain'] is not None and options['retain'] < 1:
+            raise CommandError('--retain は1以上を指定してください')
+
+        tables = options['table'] or sorted(PARTITIONED_TABLES)
+        if options['verify']:
+            self.verify(tables)
+            return
+
+        today = timezone.localdate()
+        for table in tables:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if not is_partitioned(cursor, table):
+                    self.stderr.write(self.style.WARNING(f'{table} はパーティションテーブルではありません（migrate を実行してください）'))
+                    continue
+                create, detach = plan_partitions(
+                    existing_months(cursor, table), today, options['ahead'], options['retain']
+                )
+                for month in create:
+                    if not options['dry_run']:
+                        create_partition(cursor, table, PARTITIONED_TABLES[table], month)
+                    self.stdout.write(f'作成: {partition_name(table, month)}')
+                for month in detach:
+                    if not options['dry_run']:
+                        detach_partition(cursor, table, month, options['archive_schema'], options['drop'])
+                    self.stdout.write(f'切り離し: {partition_name(table, month)}')
+                if not create and not detach:
+                    self.stdout.write(f'{table}: 変更はありません')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('--dry-run のため変更していません'))
+
+    def verify(self, tables):
+        """EXPLAIN ANALYZE で各クエリが実際に読んだパーティションを表示する"""
+        with connection.cursor() as cursor:
+            partition_counts = {table: len(list_partitions(cursor, table)) for table in tables}
+        for table, label, queryset in _verification_queries():
+            if table not in tables:
+                continue
+            touched = [name for name in touched_partitions(queryset) if name.startswith(table + '_')]
+            self.stdout.write(
+                f'{table} {label}: {len(touched)} / {partition_counts[table]} パーティション'
+                f" ({', '.join(touched) or 'なし'})"
+            )
@@ -0,0 +1,50 @@
+"""
+ビュー共通の Mixin
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin
+
+from .db_router import SAFE_METHODS, use_replica
+
+
+def _is_authenticated(request):
+    # request.user は遅延評価（初回アクセスでセッション・ユーザーを DB から読む）
+    return request.user.is_authenticated
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """async def のハンドラを持つビュー用の LoginRequiredMixin
+
+    LoginRequiredMixin の dispatch は同期処理で request.user を評価するため、
+    ASGI のイベントループ上では SynchronousOnlyOperation になる。
+    ユーザーの読み込みを sync_to_async で行ってからハンドラを呼び出す。
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not await sync_to_async(_is_authenticated)(request):
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaReadMixin:
+    """GET などの読み取り専用リクエストの読み取りをレプリカで行うビュー用 Mixin
+
+    settings.REPLICA_DATABASE が未設定の場合や、更新直後のブラウザからのリクエストではプライマリで読む
+    （apps.common.db_router）。テンプレートの描画で発生するクエリもレプリカで行うため、
+    TemplateResponse はブロック内で描画してから返す。
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        if getattr(self, 'view_is_async', False):
+            return self._replica_adispatch(request, *args, **kwargs)
+        with use_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+    async def _replica_adispatch(self, request, *args, **kwargs):
+        with use_replica():
+            return await super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,348 @@
+"""
+月単位のレンジパーティション（PostgreSQL）
+
+件数が増え続け、主に直近の期間で検索される次のテーブルを日時列の月単位でパーティション分割する。
+- tasks_historicaltask / quality_historicalbug: history_date
+- test_executions: executed_at
+パーティション名は <テーブル>_pYYYYMM（月の境界は settings.TIME_ZONE）、範囲外の行は <テーブル>_default に入る。
+
+パーティションテーブルの主キー・一意制約にはパーティションキーを含める必要があるため、
+DB 上の主キーは (主キー列, 日時列) になる。Django からは従来どおり単独の主キーとして扱う
+（履歴ID は UUID、テスト実行ID は連番のため一意性は保たれる）。
+パーティションテーブルを参照する外部キーは作れないため、TestCase.latest_execution は db_constraint=False とする。
+
+既存テーブルの変換はマイグレーション（PartitionByMonth）で行い、以降は manage_partitions コマンドで
+先の月のパーティション作成と、古いパーティションの切り離し（アーカイブ用スキーマへの移動・削除）を行う。
+PostgreSQL 以外（SQLite など）では何もしない。
+"""
+import json
+import re
+from datetime import datetime
+
+from django.db import connection as default_connection, connections
+from django.db.migrations.operations.base import Operation
+from django.utils import timezone
+
+PARTITIONED_TABLES = {
+    'tasks_historicaltask': 'history_date',
+    'quality_historicalbug': 'history_date',
+    'test_executions': 'executed_at',
+}
+
+# 当月から何か月先までパーティションを作成しておくか
+DEFAULT_AHEAD_MONTHS = 3
+
+_MONTH_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def is_supported(connection=None):
+    return (connection or default_connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    """日付・日時をその月の1日（date）に変換"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    """月初日 month の count か月後（負数で前）の月初日"""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def month_range(first, last):
+    """first から last まで（両端を含む）の月初日のリスト"""
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def partition_month(name):
+    """パーティション名から月初日を求める（既定パーティションなどは None）"""
+    match = _MONTH_SUFFIX.search(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1).date()
+
+
+def plan_partitions(existing_months, today, ahead=DEFAULT_AHEAD_MONTHS, retain=None):
+    """作成・切り離しの対象月を求める
+
+    Args:
+        existing_months: 作成済みパーティションの月初日
+        today: 基準日
+        ahead: 当月から何か月先まで作成しておくか
+        retain: 当月を含めて何か月分を残すか（None は切り離さない）
+
+    Returns:
+        (作成する月のリスト, 切り離す月のリスト)
+    """
+    current = month_start(today)
+    existing = set(existing_months)
+    create = [month for month in month_range(current, add_months(current, ahead)) if month not in existing]
+    detach = []
+    if retain:
+        oldest = add_months(current, -(retain - 1))
+        detach = sorted(month for month in existing if month < oldest)
+    return create, detach
+
+
+def _literal(month):
+    """月初（TIME_ZONE の 0 時）の timestamptz リテラル"""
+    moment = timezone.make_aware(datetime(month.year, month.month, 1))
+    return "'%s'" % moment.isoformat()
+
+
+def _regclass(cursor, table):
+    cursor.execute('SELECT to_regclass(%s)::oid', [table])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table]
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, table):
+    """パーティション名のリスト（既定パーティションを含む）"""
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def existing_months(cursor, table):
+    return [month for month in map(partition_month, list_partitions(cursor, table)) if month]
+
+
+def create_partition(cursor, table, column, month):
+    """月のパーティションを作成する
+
+    既定パーティションにその月の行がある場合は、既定パーティションを一旦切り離して行を移す。
+    """
+    qn = default_connection.ops.quote_name
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    lower, upper = _literal(month), _literal(add_months(month, 1))
+    in_range = f'{qn(column)} >= {lower} AND {qn(column)} < {upper}'
+
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE {in_range})')
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM ({lower}) TO ({upper})')
+        return name
+
+    cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}')
+    cursor.execute(f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM ({lower}) TO ({upper})')
+    cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(default)} WHERE {in_range}')
+    cursor.execute(f'DELETE FROM {qn(default)} WHERE {in_range}')
+    cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT')
+    return name
+
+
+def detach_partition(cursor, table, month, archive_schema=None, drop=False):
+    """月のパーティションを切り離し、アーカイブ用スキーマへ移動するか削除する
+
+    どちらも指定しない場合は、同じスキーマの通常のテーブルとして残す。
+    """
+    qn = default_connection.ops.quote_name
+    name = partition_name(table, month)
+    cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+    if drop:
+        cursor.execute(f'DROP TABLE {qn(name)}')
+    elif archive_schema:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {qn(archive_schema)}')
+        cursor.execute(f'ALTER TABLE {qn(name)} SET SCHEMA {qn(archive_schema)}')
+    return name
+
+
+def _table_definition(cursor, table):
+    """変換時に作り直す定義（主キー列・インデックス・外部キー・連番）"""
+    oid = _regclass(cursor, table)
+    cursor.execute(
+        'SELECT a.attname FROM pg_index i '
+        'JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) '
+        'WHERE i.indrelid = %s AND i.indisprimary ORDER BY a.attnum',
+        [oid],
+    )
+    pk_columns = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i '
+        'WHERE i.indrelid = %s AND NOT i.indisprimary ORDER BY i.indexrelid',
+        [oid],
+    )
+    # パーティションテーブルのインデックス定義は "ON ONLY" になるため外す
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s AND contype = 'f' ORDER BY conname",
+        [oid],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT attname, attidentity <> '' FROM pg_attribute "
+        "WHERE attrelid = %s AND attnum > 0 AND NOT attisdropped "
+        "AND (attidentity <> '' OR pg_get_serial_sequence(%s, attname) IS NOT NULL)",
+        [oid, table],
+    )
+    sequences = cursor.fetchall()
+    return pk_columns, indexes, foreign_keys, sequences
+
+
+def _rebuild_table(cursor, table, pk_columns, partition_clause, before_copy=None):
+    """table を同じ列構成の新しいテーブルに作り直す（インデックス・外部キー・連番は引き継ぐ）"""
+    qn = default_connection.ops.quote_name
+    _, indexes, foreign_keys, sequences = _table_definition(cursor, table)
+    new = f'{table}__new'
+
+    cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(
+        f'CREATE TABLE {qn(new)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+        f'INCLUDING STORAGE INCLUDING COMMENTS){partition_clause}'
+    )
+    cursor.execute(
+        f'ALTER TABLE {qn(new)} ADD CONSTRAINT {qn(new + "_pkey")} '
+        f'PRIMARY KEY ({", ".join(map(qn, pk_columns))})'
+    )
+    if before_copy:
+        before_copy(new)
+    cursor.execute(f'INSERT INTO {qn(new)} SELECT * FROM {qn(table)}')
+
+    # 連番（IDENTITY / serial）は旧テーブルと一緒に削除されるため、新しいテーブル所有の連番に付け替える
+    serials = {}
+    for column, identity in sequences:
+        if not identity:
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, column])
+            serials[column] = cursor.fetchone()[0]
+            cursor.execute(f'ALTER SEQUENCE {serials[column]} OWNED BY NONE')
+    cursor.execute(f'DROP TABLE {qn(table)}')
+    cursor.execute(f'ALTER TABLE {qn(new)} RENAME TO {qn(table)}')
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME CONSTRAINT {qn(new + "_pkey")} TO {qn(table + "_pkey")}')
+
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+    for column, identity in sequences:
+        if identity:
+            sequence = qn(f'{table}_{column}_seq')
+            cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {qn(table)}.{qn(column)}')
+        else:
+            sequence = serials[column]
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.{qn(column)}')
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(column)} SET DEFAULT nextval('{sequence}'::regclass)")
+        cursor.execute(
+            f"SELECT setval('{sequence}'::regclass, COALESCE((SELECT MAX({qn(column)}) FROM {qn(table)}), 0) + 1, false)"
+        )
+
+
+def partition_table(cursor, table, column, ahead=DEFAULT_AHEAD_MONTHS):
+    """既存のテーブルを月単位のレンジパーティションテーブルに変換する
+
+    既存行の最古の月から ahead か月先までのパーティションと既定パーティションを作成し、行を移す。
+    """
+    if is_partitioned(cursor, table):
+        return
+    qn = default_connection.ops.quote_name
+    pk_columns, _, _, _ = _table_definition(cursor, table)
+    cursor.execute(f'SELECT MIN({qn(column)}) FROM {qn(table)}')
+    oldest = cursor.fetchone()[0]
+    current = month_start(timezone.now())
+    months = month_range(min(month_start(oldest), current) if oldest else current, add_months(current, ahead))
+
+    def create_partitions(new):
+        cursor.execute(f'CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(new)} DEFAULT')
+        for month in months:
+            cursor.execute(
+                f'CREATE TABLE {qn(partition_name(table, month))} PARTITION OF {qn(new)} '
+                f'FOR VALUES FROM ({_literal(month)}) TO ({_literal(add_months(month, 1))})'
+            )
+
+    key_columns = pk_columns + [column] if column not in pk_columns else pk_columns
+    _rebuild_table(cursor, table, key_columns, f' PARTITION BY RANGE ({qn(column)})', create_partitions)
+
+
+def unpartition_table(cursor, table, column):
+    """パーティションテーブルを通常のテーブルに戻す（切り離し済みのパーティションの行は戻らない）"""
+    if not is_partitioned(cursor, table):
+        return
+    pk_columns, _, _, _ = _table_definition(cursor, table)
+    _rebuild_table(cursor, table, [name for name in pk_columns if name != column], '')
+
+
+class PartitionByMonth(Operation):
+    """テーブルを月単位のレンジパーティションに変換するマイグレーション操作（PostgreSQL のみ）
+
+    モデルの状態は変えない。逆方向では通常のテーブルに戻す。
+    """
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, table, column, ahead=DEFAULT_AHEAD_MONTHS):
+        self.table = table
+        self.column = column
+        self.ahead = ahead
+
+    def deconstruct(self):
+        kwargs = {'table': self.table, 'column': self.column}
+        if self.ahead != DEFAULT_AHEAD_MONTHS:
+            kwargs['ahead'] = self.ahead
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_supported(schema_editor.connection):
+            with schema_editor.connection.cursor() as cursor:
+                partition_table(cursor, self.table, self.column, self.ahead)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if is_supported(schema_editor.connection):
+            with schema_editor.connection.cursor() as cursor:
+                unpartition_table(cursor, self.table, self.column)
+
+    def describe(self):
+        return f'Partition {self.table} by month on {self.column}'
+
+
+def touched_partitions(queryset):
+    """クエリの実行で実際に読まれたテーブル（パーティション）名の一覧
+
+    EXPLAIN ANALYZE の実行計画から、1回以上実行されたスキャンの対象を集める。
+    実行時のパーティション除外（LIMIT による打ち切りを含む）も反映される。
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    touched = set()
+
+    def walk(node):
+        if node.get('Relation Name') and node.get('Actual Loops', 0) > 0:
+            touched.add(node['Relation Name'])
+        for child in node.get('Plans', ()):
+            walk(child)
+
+    for entry in plan:
+        walk(entry['Plan'])
+    return sorted(touched)
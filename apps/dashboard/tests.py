@@ -1,3 +1,290 @@
-from django.test import TestCase
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+
+from apps.accounts.models import User
+from apps.common.activity import change_feed, decode_cursor
+from apps.common.cache import get_cache_metrics
+from apps.common.db_router import STICKY_COOKIE, pin_to_primary, replica_stickiness_middleware, use_replica
+from apps.common.mixins import ReplicaReadMixin
+from apps.projects.models import Milestone, Project
+from apps.quality.models import Bug, BugComment
+from apps.reviews.models import Review, ReviewIssue
+from apps.tasks.models import Task, TaskComment
+
+
+class PayloadCacheTest(TestCase):
+    """ガント・ダッシュボードのペイロードキャッシュのテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー',
+            is_staff=True
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        # 全体版数はコミット後に加算されるため、書き込みは on_commit を実行して確認する
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                project_code='PRJ001',
+                name='テストプロジェクト',
+                start_date=today,
+                end_date=today + timedelta(days=90)
+            )
+            self.task = Task.objects.create(
+                project=self.project,
+                title='設計',
+                planned_start_date=today,
+                planned_end_date=today + timedelta(days=3)
+            )
+    
+    def test_gantt_payload_cached_until_project_changes(self):
+        """ガントデータがキャッシュされ、タスク更新で再生成されること"""
+        url = reverse('tasks:task_gantt') + f'?project={self.project.pk}'
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['tasks_count'], 1)
+        self.assertEqual(get_cache_metrics(['gantt'])['gantt'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        
+        Task.objects.create(
+            project=self.project,
+            title='実装',
+            planned_start_date=self.task.planned_start_date,
+            planned_end_date=self.task.planned_end_date
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.context['tasks_count'], 2)
+        self.assertEqual(get_cache_metrics(['gantt'])['gantt']['misses'], 2)
+    
+    def test_stats_api(self):
+        """統計 API が件数を返し、キャッシュされること"""
+        url = reverse('dashboard:dashboard_stats_api')
+        self.assertEqual(self.client.get(url).json()['total_tasks'], 1)
+        self.assertEqual(self.client.get(url).json()['total_projects'], 1)
+        self.assertEqual(get_cache_metrics(['dashboard'])['dashboard'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+    
+    def test_dashboard_uses_global_version(self):
+        """ダッシュボードが全体版数で無効化されること"""
+        url = reverse('dashboard:dashboard')
+        response = self.client.get(url)
+        self.assertEqual(response.context['stats']['total_tasks'], 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.is_deleted = True
+            self.task.save()
+        response = self.client.get(url)
+        self.assertEqual(response.context['stats']['total_tasks'], 0)
+        
+        response = self.client.get(reverse('dashboard:cache_metrics'))
+        self.assertEqual(response.json()['dashboard']['misses'], 2)
+    
+    def test_milestone_widget(self):
+        """未達成マイルストーンが集計済みの値で表示され、タスクの変更で更新されること"""
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            milestone = Milestone.objects.create(
+                project=self.project, name='設計完了', target_date=today + timedelta(days=1)
+            )
+        url = reverse('dashboard:dashboard')
+        response = self.client.get(url)
+        self.assertEqual(response.context['milestone_counts'], {'open': 1, 'delayed': 0})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.milestone = milestone
+            self.task.save()
+        response = self.client.get(url)
+        self.assertEqual(response.context['milestone_counts'], {'open': 1, 'delayed': 1})
+        row = response.context['upcoming_milestones'][0]
+        self.assertEqual((row['name'], row['forecast_date'], row['task_count']), ('設計完了', self.task.planned_end_date, 1))
+        self.assertContains(response, '遅延 1件')
+
+
+class ActivityFeedTest(TestCase):
+    """変更フィードのテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=today,
+            end_date=today + timedelta(days=90)
+        )
+        other = Project.objects.create(
+            project_code='PRJ002',
+            name='別プロジェクト',
+            start_date=today,
+            end_date=today + timedelta(days=90)
+        )
+        self.task = Task.objects.create(
+            project=self.project,
+            title='設計',
+            planned_start_date=today,
+            planned_end_date=today + timedelta(days=3)
+        )
+        self.task.status = Task.StatusChoices.IN_PROGRESS
+        self.task.assignee = self.user
+        self.task.save()
+        TaskComment.objects.create(task=self.task, user=self.user, comment='着手しました')
+        self.bug = Bug.objects.create(
+            project=self.project, bug_number='BUG1', title='不具合', description='詳細'
+        )
+        BugComment.objects.create(bug=self.bug, user=self.user, comment='再現しました')
+        self.review = Review.objects.create(
+            project=self.project, review_number='RV1', title='設計レビュー',
+            target_description='設計書', scheduled_at=timezone.now()
+        )
+        ReviewIssue.objects.create(review=self.review, issue_number='1', description='誤記')
+        Task.objects.create(
+            project=other,
+            title='別件',
+            planned_start_date=today,
+            planned_end_date=today + timedelta(days=3)
+        )
+    
+    def test_project_feed_merges_sources_with_diffs(self):
+        """プロジェクトの履歴とコメントが新しい順に併合され、項目差分が付くこと"""
+        feed = change_feed('project', self.project.pk)
+        kinds = [item['kind'] for item in feed['items']]
+        self.assertEqual(
+            kinds, ['review_issue', 'review', 'bug_comment', 'bug', 'task_comment', 'task', 'task']
+        )
+        self.assertIsNone(feed['next_cursor'])
+        
+        update = feed['items'][5]
+        self.assertEqual(update['action'], 'updated')
+        changes = {change['field']: (change['old'], change['new']) for change in update['changes']}
+        self.assertEqual(changes['ステータス'], ('未着手', '進行中'))
+        self.assertEqual(changes['担当者'], ('', 'テストユーザー'))
+        self.assertEqual(feed['items'][6]['action'], 'created')
+        self.assertEqual(feed['items'][6]['changes'], [])
+    
+    def test_queries_per_source(self):
+        """履歴はソースごとに2クエリ（1ページ分と直前の版）、コメントは1クエリで取得されること（N+1 なし）"""
+        with self.assertNumQueries(10):
+            change_feed('project', self.project.pk)
+        # 詳細画面のタイムラインはウィンドウ関数で1クエリ
+        with self.assertNumQueries(2):
+            change_feed('task', self.task.pk)
+    
+    def test_cursor_pagination(self):
+        """カーソルで重複・欠落なくページングできること"""
+        expected = [
+            (item['kind'], item['pk'], item['changes']) for item in change_feed('project', self.project.pk)['items']
+        ]
+        seen = []
+        cursor = None
+        while True:
+            feed = change_feed('project', self.project.pk, cursor=cursor, limit=2)
+            seen.extend((item['kind'], item['pk'], item['changes']) for item in feed['items'])
+            cursor = feed['next_cursor']
+            if cursor is None:
+                break
+            self.assertIsNotNone(decode_cursor(cursor))
+        self.assertEqual(seen, expected)
+    
+    def test_object_timeline(self):
+        """詳細画面のタイムラインに対象の履歴とコメントが表示されること"""
+        self.assertEqual(
+            [item['changes'] for item in change_feed('task', self.task.pk)['items'] if item['kind'] == 'task'],
+            [item['changes'] for item in change_feed('project', self.project.pk)['items'] if item['kind'] == 'task'],
+        )
+        response = self.client.get(reverse('quality:bug_detail', args=[self.bug.pk]))
+        self.assertEqual([item['kind'] for item in response.context['timeline']], ['bug_comment', 'bug'])
+        self.assertContains(response, '再現しました')
+        
+        response = self.client.get(reverse('reviews:review_detail', args=[self.review.pk]))
+        self.assertEqual([item['kind'] for item in response.context['timeline']], ['review_issue', 'review'])
+    
+    def test_api(self):
+        """API が JSON でフィードを返すこと"""
+        response = self.client.get(reverse('dashboard:activity_api') + f'?project={self.project.pk}&limit=3')
+        data = response.json()
+        self.assertEqual(len(data['items']), 3)
+        self.assertIsNotNone(data['next_cursor'])
+        
+        response = self.client.get(reverse('dashboard:activity') + f'?cursor={data["next_cursor"]}')
+        self.assertEqual(response.status_code, 200)
+
+
+class _ReadAliasView(ReplicaReadMixin, View):
+    """読み取り先の DB エイリアスを返す（テスト用）"""
+
+    def get(self, request):
+        return HttpResponse(router.db_for_read(Task))
+
+    def post(self, request):
+        return HttpResponse(router.db_for_read(Task))
+
+
+class _AsyncReadAliasView(ReplicaReadMixin, View):
+
+    async def get(self, request):
+        return HttpResponse(router.db_for_read(Task))
+
+
+@override_settings(REPLICA_DATABASE='replica', REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTest(SimpleTestCase):
+    """読み取り専用レプリカへの振り分けのテスト"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_router(self):
+        """use_replica のブロック内の読み取りのみレプリカに送り、書き込みは常にプライマリに送ること"""
+        self.assertEqual(router.db_for_read(Task), 'default')
+        with use_replica():
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertEqual(router.db_for_write(Task), 'default')
+            with pin_to_primary():
+                self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'tasks'))
+        self.assertTrue(router.allow_migrate('default', 'tasks'))
+
+        with override_settings(REPLICA_DATABASE=None), use_replica():
+            self.assertEqual(router.db_for_read(Task), 'default')
+
+    def test_read_only_views(self):
+        """ReplicaReadMixin のビューは GET のみレプリカで読むこと（async ビューを含む）"""
+        view = _ReadAliasView.as_view()
+        self.assertEqual(view(self.factory.get('/')).content, b'replica')
+        self.assertEqual(view(self.factory.post('/')).content, b'default')
+
+        async_view = _AsyncReadAliasView.as_view()
+        response = async_to_sync(async_view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+
+    def test_read_your_writes(self):
+        """更新リクエストの後は、Cookie の有効期間中そのブラウザの読み取りをプライマリで行うこと"""
+        middleware = replica_stickiness_middleware(_ReadAliasView.as_view())
+
+        response = middleware(self.factory.post('/'))
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(middleware(request).content, b'default')
+
+        response = middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
 
-# Create your tests here.
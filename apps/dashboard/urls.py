@@ -5,4 +5,8 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
+    path('api/stats/', views.DashboardStatsApiView.as_view(), name='dashboard_stats_api'),
+    path('activity/', views.ActivityFeedView.as_view(), name='activity'),
+    path('activity/api/', views.ActivityFeedApiView.as_view(), name='activity_api'),
+    path('cache-metrics/', views.CacheMetricsView.as_view(), name='cache_metrics'),
 ]
@@ -1,47 +1,83 @@
 from django.views.generic import TemplateView
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse
+from django.views import View
 from django.db.models import Count, Q, Avg
-from apps.projects.models import Project
+from apps.projects.models import Milestone, Project
 from apps.tasks.models import Task
+from apps.tasks.evm import compute_project_indicators
 from apps.quality.models import Bug, TestCase
 from apps.reviews.models import Review
+from apps.common.activity import DEFAULT_LIMIT, change_feed
+from apps.common.cache import aget_or_build, get_cache_metrics, get_or_build
+from apps.common.mixins import AsyncLoginRequiredMixin, ReplicaReadMixin
 from datetime import datetime, timedelta
 from django.utils import timezone
 import json
 
+# ダッシュボードに表示する未達成マイルストーンの件数
+MILESTONE_WIDGET_LIMIT = 10
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+
+def _stat_querysets(now):
+    """統計カードの件数ごとの QuerySet"""
+    # 今月のレビュー数の起点
+    first_day = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'total_projects': Project.objects.filter(is_deleted=False),
+        'total_tasks': Task.objects.filter(is_deleted=False),
+        'in_progress_tasks': Task.objects.filter(
+            is_deleted=False,
+            status=Task.StatusChoices.IN_PROGRESS
+        ),
+        'total_bugs': Bug.objects.filter(is_deleted=False),
+        'open_bugs': Bug.objects.filter(
+            is_deleted=False,
+            status__in=[Bug.StatusChoices.NEW, Bug.StatusChoices.IN_PROGRESS]
+        ),
+        'total_reviews': Review.objects.filter(is_deleted=False),
+        'reviews_this_month': Review.objects.filter(
+            is_deleted=False,
+            scheduled_at__gte=first_day
+        ),
+    }
+
+
+class DashboardView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     """ダッシュボード（拡張版）"""
     template_name = 'dashboard/dashboard_enhanced.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
+        now = timezone.now()
         
-        # 基本統計
-        stats = {}
-        stats['total_projects'] = Project.objects.filter(is_deleted=False).count()
-        stats['total_tasks'] = Task.objects.filter(is_deleted=False).count()
-        stats['in_progress_tasks'] = Task.objects.filter(
-            is_deleted=False,
-            status=Task.StatusChoices.IN_PROGRESS
-        ).count()
-        stats['total_bugs'] = Bug.objects.filter(is_deleted=False).count()
-        stats['open_bugs'] = Bug.objects.filter(
-            is_deleted=False,
-            status__in=[Bug.StatusChoices.NEW, Bug.StatusChoices.IN_PROGRESS]
-        ).count()
-        stats['total_reviews'] = Review.objects.filter(is_deleted=False).count()
+        # 集計値・グラフ用JSONはデータ版数と日付でキャッシュ
+        context.update(get_or_build(
+            'dashboard',
+            lambda: self._build_payload(now),
+            params={'date': timezone.localdate(now).isoformat()},
+        ))
         
-        # 今月のレビュー数
-        now = timezone.now()
-        first_day = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        stats['reviews_this_month'] = Review.objects.filter(
-            is_deleted=False,
-            scheduled_at__gte=first_day
-        ).count()
+        # 最近のタスク
+        context['recent_tasks'] = Task.objects.filter(
+            is_deleted=False
+        ).select_related('project').order_by('-updated_at')[:5]
+        
+        # 最近のバグ
+        context['recent_bugs'] = Bug.objects.filter(
+            is_deleted=False
+        ).select_related('project').order_by('-created_at')[:5]
+        
+        return context
+    
+    def _build_payload(self, now):
+        """統計カードとグラフ用データを生成"""
+        payload = {}
+        
+        # 基本統計
+        stats = {name: queryset.count() for name, queryset in _stat_querysets(now).items()}
         
-        context['stats'] = stats
+        payload['stats'] = stats
         
         # タスクステータス分布
         task_status = Task.objects.filter(is_deleted=False).values('status').annotate(count=Count('id'))
@@ -50,7 +86,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         for item in task_status:
             task_status_labels.append(dict(Task.StatusChoices.choices).get(item['status']))
             task_status_data.append(item['count'])
-        context['task_status_data'] = json.dumps({
+        payload['task_status_data'] = json.dumps({
             'labels': task_status_labels,
             'data': task_status_data
         })
@@ -62,7 +98,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         for item in bug_severity:
             bug_severity_labels.append(dict(Bug.SeverityChoices.choices).get(item['severity']))
             bug_severity_data.append(item['count'])
-        context['bug_severity_data'] = json.dumps({
+        payload['bug_severity_data'] = json.dumps({
             'labels': bug_severity_labels,
             'data': bug_severity_data
         })
@@ -70,12 +106,36 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # プロジェクト進捗
         projects = Project.objects.filter(is_deleted=False)[:5]
         project_labels = [p.name for p in projects]
-        project_data = [p.progress_rate if p.progress_rate else 0 for p in projects]
-        context['project_progress_data'] = json.dumps({
+        project_data = [float(p.progress_rate or 0) for p in projects]
+        payload['project_progress_data'] = json.dumps({
             'labels': project_labels,
             'data': project_data
         })
         
+        # 進行中プロジェクトの SPI / CPI
+        active_projects = list(Project.objects.filter(
+            is_deleted=False, status=Project.StatusChoices.IN_PROGRESS
+        ).order_by('project_code')[:10])
+        indicators = compute_project_indicators(active_projects, timezone.localdate(now))
+        payload['evm_data'] = json.dumps({
+            'labels': [p.name for p in active_projects],
+            'spi': [indicators[p.pk]['spi'] for p in active_projects],
+            'cpi': [indicators[p.pk]['cpi'] for p in active_projects],
+        })
+        
+        # 未達成マイルストーン（目標日の近い順。進捗率・達成見込日はタスクの変更時に集計済みの値）
+        milestones = Milestone.objects.filter(project__is_deleted=False).exclude(
+            status=Milestone.StatusChoices.ACHIEVED
+        )
+        payload['milestone_counts'] = milestones.aggregate(
+            open=Count('id'),
+            delayed=Count('id', filter=Q(status=Milestone.StatusChoices.DELAYED)),
+        )
+        payload['upcoming_milestones'] = list(milestones.order_by('target_date', 'pk').values(
+            'name', 'project_id', 'project__name', 'target_date', 'forecast_date', 'status',
+            'progress_rate', 'task_count', 'completed_task_count',
+        )[:MILESTONE_WIDGET_LIMIT])
+        
         # 月別タスク完了数（過去6ヶ月）
         completion_labels = []
         completion_data = []
@@ -96,19 +156,75 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             completion_labels.append(month_start.strftime('%Y/%m'))
             completion_data.append(count)
         
-        context['task_completion_data'] = json.dumps({
+        payload['task_completion_data'] = json.dumps({
             'labels': completion_labels,
             'data': completion_data
         })
         
-        # 最近のタスク
-        context['recent_tasks'] = Task.objects.filter(
-            is_deleted=False
-        ).select_related('project').order_by('-updated_at')[:5]
+        return payload
+
+
+class DashboardStatsApiView(AsyncLoginRequiredMixin, ReplicaReadMixin, View):
+    """統計カードの件数 API（JSON、async）"""
+    
+    async def get(self, request):
+        now = timezone.now()
         
-        # 最近のバグ
-        context['recent_bugs'] = Bug.objects.filter(
-            is_deleted=False
-        ).select_related('project').order_by('-created_at')[:5]
+        async def build():
+            return {name: await queryset.acount() for name, queryset in _stat_querysets(now).items()}
         
+        stats = await aget_or_build(
+            'dashboard', build,
+            params={'date': timezone.localdate(now).isoformat(), 'format': 'api'},
+        )
+        return JsonResponse(stats)
+
+
+class CacheMetricsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """ペイロードキャッシュのヒット/ミス件数（管理者のみ）"""
+    namespaces = ['dashboard', 'gantt', 'calendar', 'quality_report', 'bug_flow', 'evm', 'resource_load', 'baseline', 'wbs_tree']
+    
+    def test_func(self):
+        return self.request.user.is_staff
+    
+    def get(self, request):
+        return JsonResponse(get_cache_metrics(self.namespaces))
+
+
+class ActivityFeedMixin:
+    """変更フィードのパラメータ解釈（?project=&cursor=&limit=）"""
+    
+    def get_feed(self):
+        project_id = self.request.GET.get('project')
+        project_id = int(project_id) if project_id and project_id.isdigit() else None
+        limit = self.request.GET.get('limit')
+        limit = int(limit) if limit and limit.isdigit() else DEFAULT_LIMIT
+        feed = change_feed(
+            'project' if project_id else None, project_id,
+            cursor=self.request.GET.get('cursor'), limit=limit,
+        )
+        feed['project_id'] = project_id
+        return feed
+
+
+class ActivityFeedView(LoginRequiredMixin, ReplicaReadMixin, ActivityFeedMixin, TemplateView):
+    """活動フィード"""
+    template_name = 'dashboard/activity.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_feed())
+        context['projects'] = Project.objects.all()
         return context
+
+
+class ActivityFeedApiView(LoginRequiredMixin, ReplicaReadMixin, ActivityFeedMixin, View):
+    """活動フィード API（JSON）"""
+    
+    def get(self, request):
+        feed = self.get_feed()
+        items = [
+            {key: value for key, value in item.items() if key not in ('rank', 'pk')}
+            for item in feed['items']
+        ]
+        return JsonResponse({'items': items, 'next_cursor': feed['next_cursor']})
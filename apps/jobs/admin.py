@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'attempts', 'max_attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['key', 'worker']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'heartbeat_at']
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = 'バックグラウンド処理'
+    
+    def ready(self):
+        # 各アプリの jobs.py で登録された処理を読み込む
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('jobs')
@@ -0,0 +1,108 @@
+"""
+バックグラウンド処理のワーカー
+
+待機中の処理を取得し、プロセスプールで並行実行する。常駐させる場合は systemd 等で起動する。
+複数サーバーで同時に起動してもよい（処理の取得は条件付き UPDATE で排他される）。
+
+使い方:
+    python manage.py run_jobs                       # CPU数のプロセスで常駐
+    python manage.py run_jobs --processes 4 --poll 2
+    python manage.py run_jobs --processes 0 --once  # 同じプロセスで実行可能な処理だけ実行して終了（cron 向け）
+    python manage.py run_jobs --kind csv_export
+"""
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from apps.jobs.queue import claim_jobs, execute_job, heartbeat, requeue_stale, run_pending
+from apps.jobs.registry import registered_kinds
+
+
+def _execute_job(job_id):
+    """子プロセスでの実行
+
+    リクエスト外ではリクエスト開始・終了時の接続の整理（CONN_MAX_AGE・CONN_HEALTH_CHECKS）が
+    行われないため、処理の前後で期限切れ・切断済みの接続を閉じる。
+    """
+    close_old_connections()
+    try:
+        return execute_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = '待機中のバックグラウンド処理をプロセスプールで実行します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='同時に実行するプロセス数（0 の場合はこのプロセス内で順に実行、既定: CPU数）'
+        )
+        parser.add_argument('--poll', type=float, default=5.0, help='待機中の処理を確認する間隔（秒、既定: 5）')
+        parser.add_argument('--once', action='store_true', help='実行可能な処理がなくなったら終了する')
+        parser.add_argument(
+            '--kind', action='append', default=[], choices=registered_kinds(),
+            help='実行する処理種別（複数指定可、省略時はすべて）'
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        kinds = options['kind'] or None
+        self.stderr.write(f'ワーカー {worker} を起動しました')
+        try:
+            if options['processes'] <= 0:
+                self._run_inline(worker, kinds, options)
+            else:
+                self._run_pool(worker, kinds, options)
+        except KeyboardInterrupt:
+            self.stderr.write('停止しました')
+
+    def _run_inline(self, worker, kinds, options):
+        while True:
+            requeue_stale()
+            count = run_pending(worker, kinds=kinds)
+            if count:
+                self.stderr.write(self.style.SUCCESS(f'{count}件の処理を実行しました'))
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(options['poll'])
+
+    def _run_pool(self, worker, kinds, options):
+        processes = options['processes']
+        # 子プロセスは spawn で起動し、DB 接続を親から引き継がない（初期化時に django.setup を行う）
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        running = {}
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=django.setup) as pool:
+            while True:
+                requeue_stale()
+                for job_id in claim_jobs(worker, processes - len(running), kinds):
+                    running[pool.submit(_execute_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        return
+                    close_old_connections()
+                    time.sleep(options['poll'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    if future.exception() is not None:
+                        # プロセス異常終了時は実行中のまま残り、requeue_stale で回収される
+                        self.stderr.write(self.style.ERROR(f'処理 #{job_id} の実行に失敗しました: {future.exception()}'))
+                    elif future.result():
+                        self.stderr.write(self.style.SUCCESS(f'処理 #{job_id} が完了しました'))
+                    else:
+                        self.stderr.write(self.style.WARNING(f'処理 #{job_id} が失敗しました'))
+                # 実行中の処理は親プロセスが応答日時を更新する（処理関数が進捗を記録しなくても回収されない）
+                heartbeat(list(running.values()))
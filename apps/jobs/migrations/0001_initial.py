@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:13
+
+import apps.jobs.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='処理種別')),
+                ('key', models.CharField(max_length=200, verbose_name='重複判定キー')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='パラメータ')),
+                ('status', models.CharField(choices=[('PENDING', '待機中'), ('RUNNING', '実行中'), ('SUCCEEDED', '完了'), ('FAILED', '失敗')], default='PENDING', max_length=10, verbose_name='ステータス')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='進捗率(%)')),
+                ('message', models.CharField(blank=True, max_length=200, verbose_name='進捗メッセージ')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='実行結果')),
+                ('result_file', models.FileField(blank=True, upload_to=apps.jobs.models.result_upload_to, verbose_name='結果ファイル')),
+                ('error', models.TextField(blank=True, verbose_name='エラー内容')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='実行回数')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='最大実行回数')),
+                ('run_after', models.DateTimeField(verbose_name='実行可能日時')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='実行ワーカー')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='最終応答日時')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='登録日時')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='登録者')),
+            ],
+            options={
+                'verbose_name': 'バックグラウンド処理',
+                'verbose_name_plural': 'バックグラウンド処理',
+                'db_table': 'jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='jobs_status_4cba15_idx'), models.Index(fields=['created_by', '-created_at'], name='jobs_created_c629ef_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('key',), name='unique_active_job_key'),
+        ),
+    ]
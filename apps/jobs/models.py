@@ -0,0 +1,76 @@
+from django.db import models
+from django.db.models import Q
+from apps.accounts.models import User
+
+
+def result_upload_to(instance, filename):
+    return f'jobs/{instance.created_at:%Y/%m}/{instance.pk}/{filename}'
+
+
+class Job(models.Model):
+    """バックグラウンド処理（DB をキューとして使う）"""
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', '待機中'
+        RUNNING = 'RUNNING', '実行中'
+        SUCCEEDED = 'SUCCEEDED', '完了'
+        FAILED = 'FAILED', '失敗'
+
+    ACTIVE_STATUSES = (StatusChoices.PENDING, StatusChoices.RUNNING)
+
+    kind = models.CharField(max_length=50, verbose_name='処理種別')
+    # 同じキーの待機中・実行中の処理は1件のみ（重複登録時は既存の処理を返す）
+    key = models.CharField(max_length=200, verbose_name='重複判定キー')
+    params = models.JSONField(default=dict, blank=True, verbose_name='パラメータ')
+    status = models.CharField(
+        max_length=10,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+        verbose_name='ステータス'
+    )
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='進捗率(%)')
+    message = models.CharField(max_length=200, blank=True, verbose_name='進捗メッセージ')
+    result = models.JSONField(null=True, blank=True, verbose_name='実行結果')
+    result_file = models.FileField(upload_to=result_upload_to, blank=True, verbose_name='結果ファイル')
+    error = models.TextField(blank=True, verbose_name='エラー内容')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='実行回数')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='最大実行回数')
+    run_after = models.DateTimeField(verbose_name='実行可能日時')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='実行ワーカー')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最終応答日時')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='登録日時')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='開始日時')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='終了日時')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name='登録者'
+    )
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = 'バックグラウンド処理'
+        verbose_name_plural = 'バックグラウンド処理'
+        ordering = ['-created_at']
+        indexes = [
+            # ワーカーの取得対象検索（待機中で実行可能日時を過ぎたもの）
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['created_by', '-created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=Q(status__in=['PENDING', 'RUNNING']),
+                name='unique_active_job_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
@@ -0,0 +1,241 @@
+"""
+DB をキューとして使うバックグラウンド処理
+
+- enqueue      : 処理を登録する。同じキーの待機中・実行中の処理があれば新規登録せず既存の処理を返す
+                 （処理状況・結果は登録者本人のみ参照できるため、キーには登録者を含める）
+- claim_jobs   : 実行可能な処理を取得し実行中にする。行ごとに「待機中なら実行中へ」の条件付き UPDATE で
+                 奪い合うため、複数ワーカーが同時に動いても同じ処理を二重に実行しない
+- execute_job  : 登録済みの処理関数を実行する。失敗時は最大実行回数まで待ち時間を倍々にして再試行する
+- requeue_stale: 応答（heartbeat_at）が途絶えた実行中の処理を待機中に戻す（ワーカー停止時の回収）
+
+ワーカーは manage.py run_jobs で起動する。
+"""
+import hashlib
+import json
+import logging
+import tempfile
+import traceback
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.common.db_router import use_replica
+from .models import Job
+from .registry import get_handler, uses_replica
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def default_key(kind, params, user=None):
+    """処理種別・パラメータ・登録者から重複判定キーを生成"""
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f'{kind}:{user.pk if user else ""}:{digest}'
+
+
+def enqueue(kind, params=None, user=None, key=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """処理を登録する
+
+    Args:
+        kind: 処理種別（registry.register で登録済みのもの）
+        params: 処理関数に渡すパラメータ（JSON に変換できる値）
+        user: 登録者
+        key: 重複判定キー（省略時は処理種別・パラメータ・登録者から生成）
+        max_attempts: 最大実行回数
+
+    Returns:
+        (Job, 新規登録したかどうか)
+    """
+    if get_handler(kind) is None:
+        raise ValueError(f'未登録の処理種別です: {kind}')
+    params = params or {}
+    key = key or default_key(kind, params, user)
+    # レプリカで読むビュー（CSV出力など）から呼ばれても、重複判定はプライマリで行う
+    active = Job.objects.using(DEFAULT_DB_ALIAS).filter(key=key, status__in=Job.ACTIVE_STATUSES)
+
+    existing = active.first()
+    if existing is not None:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                kind=kind,
+                key=key,
+                params=params,
+                max_attempts=max_attempts,
+                run_after=timezone.now(),
+                created_by=user,
+            )
+    except IntegrityError:
+        # 同時に登録された場合は一意制約で弾かれるため、先に登録された処理を返す
+        return active.get(), False
+    return job, True
+
+
+def claim_jobs(worker, limit=1, kinds=None):
+    """実行可能な待機中の処理を最大 limit 件取得し、実行中にする
+
+    Returns:
+        取得できた処理IDのリスト
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.StatusChoices.PENDING, run_after__lte=now)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    claimed = []
+    for job_id in candidates.order_by('run_after', 'pk').values_list('pk', flat=True)[:limit]:
+        updated = Job.objects.filter(pk=job_id, status=Job.StatusChoices.PENDING).update(
+            status=Job.StatusChoices.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            progress=0,
+            message='',
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def heartbeat(job_ids):
+    """実行中の処理の応答日時を更新する（ワーカーが定期的に呼び出す）"""
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids, status=Job.StatusChoices.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+
+
+def requeue_stale(timeout=None):
+    """応答が timeout 秒以上途絶えた実行中の処理を回収する
+
+    実行回数が残っていれば待機中に戻し、残っていなければ失敗にする。
+
+    Returns:
+        回収した件数
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'JOB_STALE_TIMEOUT', 600)
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.StatusChoices.RUNNING,
+        heartbeat_at__lt=now - timedelta(seconds=timeout),
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.StatusChoices.PENDING,
+        worker='',
+        run_after=now,
+    )
+    failed = stale.update(
+        status=Job.StatusChoices.FAILED,
+        error='ワーカーの応答が途絶えました',
+        finished_at=now,
+    )
+    return requeued + failed
+
+
+class JobContext:
+    """処理関数に渡す実行中の処理の情報"""
+
+    def __init__(self, job):
+        self.job = job
+        self.params = job.params
+        self.user = job.created_by
+
+    def _running(self):
+        return Job.objects.filter(
+            pk=self.job.pk, status=Job.StatusChoices.RUNNING, attempts=self.job.attempts
+        )
+
+    def progress(self, percent, message=''):
+        """進捗率（0〜100）と進捗メッセージを記録する"""
+        self._running().update(
+            progress=max(0, min(int(percent), 100)),
+            message=message[:200],
+            heartbeat_at=timezone.now(),
+        )
+
+    @contextmanager
+    def result_file(self, filename):
+        """結果ファイルの書き込み先（バイナリ）を返し、書き終えたら MEDIA_ROOT 配下に保存する
+
+            with context.result_file('tasks.csv') as stream:
+                write_csv(stream, header, rows)
+        """
+        with tempfile.TemporaryFile() as stream:
+            yield stream
+            stream.seek(0)
+            self.job.result_file.save(filename, File(stream), save=False)
+        self._running().update(result_file=self.job.result_file.name)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, 'JOB_RETRY_DELAY', 60) * 2 ** max(attempts - 1, 0))
+
+
+def execute_job(job_id):
+    """実行中にした処理を実行する（ワーカープロセスから呼び出す）
+
+    Returns:
+        成功したかどうか
+    """
+    job = Job.objects.select_related('created_by').get(pk=job_id)
+    context = JobContext(job)
+    handler = get_handler(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'未登録の処理種別です: {job.kind}')
+        with use_replica() if uses_replica(job.kind) else nullcontext():
+            result = handler(context)
+    except Exception:
+        logger.exception('バックグラウンド処理に失敗しました: %s', job)
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            context._running().update(
+                status=Job.StatusChoices.PENDING,
+                worker='',
+                error=traceback.format_exc(),
+                run_after=now + _retry_delay(job.attempts),
+            )
+        else:
+            context._running().update(
+                status=Job.StatusChoices.FAILED,
+                error=traceback.format_exc(),
+                finished_at=now,
+            )
+        return False
+
+    now = timezone.now()
+    context._running().update(
+        status=Job.StatusChoices.SUCCEEDED,
+        progress=100,
+        result=result,
+        error='',
+        finished_at=now,
+        heartbeat_at=now,
+    )
+    return True
+
+
+def run_pending(worker, limit=None, kinds=None):
+    """実行可能な処理を同じプロセス内で順に実行する（--processes 0 やテスト用）
+
+    Returns:
+        実行した件数
+    """
+    count = 0
+    while limit is None or count < limit:
+        job_ids = claim_jobs(worker, 1, kinds)
+        if not job_ids:
+            break
+        execute_job(job_ids[0])
+        count += 1
+    return count
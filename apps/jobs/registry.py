@@ -0,0 +1,43 @@
+"""
+バックグラウンド処理の登録
+
+各アプリの jobs.py で処理関数を登録する（JobsConfig.ready で自動的に読み込む）。
+
+    @register('csv_export', 'CSV出力')
+    def run_csv_export(context):
+        ...
+
+処理関数は JobContext を受け取り、実行結果（JSON に変換できる値）を返す。
+例外を送出した場合は再試行され、最大実行回数に達すると失敗となる。
+集計・出力のみの処理は use_replica=True で登録すると、読み取りをレプリカで行う（apps.common.db_router）。
+"""
+
+_handlers = {}
+
+
+def register(kind, label, use_replica=False):
+    """処理関数を登録するデコレーター"""
+    def decorator(func):
+        _handlers[kind] = (func, label, use_replica)
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    """登録済みの処理関数（未登録の場合は None）"""
+    entry = _handlers.get(kind)
+    return entry[0] if entry else None
+
+
+def get_label(kind):
+    entry = _handlers.get(kind)
+    return entry[1] if entry else kind
+
+
+def uses_replica(kind):
+    entry = _handlers.get(kind)
+    return entry[2] if entry else False
+
+
+def registered_kinds():
+    return sorted(_handlers)
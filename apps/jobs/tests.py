@@ -0,0 +1,182 @@
+import io
+import shutil
+import tempfile
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.jobs.models import Job
+from apps.jobs.queue import claim_jobs, enqueue, requeue_stale, run_pending
+from apps.jobs.registry import register
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+
+@register('always_fails', '失敗する処理（テスト用）')
+def run_always_fails(context):
+    raise RuntimeError('処理に失敗しました')
+
+
+class JobQueueTest(TestCase):
+    """バックグラウンド処理のテスト"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='jobuser',
+            email='jobuser@example.com',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='処理ユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=date(2025, 4, 1),
+            end_date=date(2025, 9, 30),
+            created_by=self.user
+        )
+        for title in ('設計', '実装'):
+            Task.objects.create(
+                project=self.project,
+                title=title,
+                planned_start_date=date(2025, 4, 1),
+                planned_end_date=date(2025, 4, 4)
+            )
+
+    def test_enqueue_deduplicates_active_jobs(self):
+        """同じキーの待機中・実行中の処理は重複登録されず、終了後は新規登録されること"""
+        params = {'dataset': 'tasks', 'params': {'project': str(self.project.pk)}}
+        job, created = enqueue('csv_export', params, user=self.user)
+        self.assertTrue(created)
+
+        again, created = enqueue('csv_export', dict(params), user=self.user)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+
+        claim_jobs('worker-1')
+        again, created = enqueue('csv_export', params, user=self.user)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+
+        Job.objects.filter(pk=job.pk).update(status=Job.StatusChoices.SUCCEEDED)
+        again, created = enqueue('csv_export', params, user=self.user)
+        self.assertTrue(created)
+        self.assertNotEqual(again.pk, job.pk)
+
+        with self.assertRaises(ValueError):
+            enqueue('unknown_kind')
+
+    def test_enqueue_is_per_user(self):
+        """同じパラメータでも登録者が異なれば別の処理として登録され、それぞれ参照できること"""
+        other = User.objects.create_user(
+            username='otheruser', password='testpass123', employee_id='EMP002', display_name='別ユーザー'
+        )
+        query = {'project': self.project.pk, 'assignee': 'me', 'background': '1'}
+        self.client.get(reverse('tasks:task_export_csv'), query)
+        self.client.force_login(other)
+        response = self.client.get(reverse('tasks:task_export_csv'), query)
+
+        mine, theirs = Job.objects.order_by('pk')
+        self.assertEqual((mine.created_by, theirs.created_by), (self.user, other))
+        self.assertRedirects(response, reverse('jobs:job_detail', args=[theirs.pk]))
+
+    def test_claim_is_exclusive(self):
+        """取得済みの処理は他のワーカーに取得されないこと"""
+        job, _ = enqueue('rebuild_bug_flow', {})
+        self.assertEqual(claim_jobs('worker-1', 5), [job.pk])
+        self.assertEqual(claim_jobs('worker-2', 5), [])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.RUNNING)
+        self.assertEqual(job.worker, 'worker-1')
+        self.assertEqual(job.attempts, 1)
+
+    def test_background_csv_export(self):
+        """CSV出力をバックグラウンドで実行し、結果ファイルをダウンロードできること"""
+        response = self.client.get(
+            reverse('tasks:task_export_csv'), {'project': self.project.pk, 'background': '1'}
+        )
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('jobs:job_detail', args=[job.pk]))
+        self.assertEqual(job.params['dataset'], 'tasks')
+        self.assertEqual(job.params['params'], {'project': str(self.project.pk)})
+
+        status = self.client.get(reverse('jobs:job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], 'PENDING')
+        self.assertFalse(status['finished'])
+
+        self.assertEqual(run_pending('test-worker'), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.result, {'rows': 2})
+        self.assertTrue(job.result_file.name.startswith('jobs/'))
+
+        status = self.client.get(reverse('jobs:job_status', args=[job.pk])).json()
+        self.assertTrue(status['finished'])
+        self.assertTrue(status['has_file'])
+
+        response = self.client.get(reverse('jobs:job_download', args=[job.pk]))
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('タスク番号', content.splitlines()[0])
+        self.assertEqual(len(content.splitlines()), 3)
+
+        # 他のユーザーの処理は参照できない
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123', employee_id='EMP002'
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('jobs:job_status', args=[job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('jobs:job_download', args=[job.pk])).status_code, 404)
+
+    def test_retry_then_fail(self):
+        """失敗した処理は待ち時間を置いて再試行され、最大実行回数で失敗になること"""
+        job, _ = enqueue('always_fails', max_attempts=2)
+
+        with self.assertLogs('apps.jobs.queue', 'ERROR'):
+            run_pending('test-worker')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('処理に失敗しました', job.error)
+        # 待ち時間中は取得されない
+        self.assertEqual(run_pending('test-worker'), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('apps.jobs.queue', 'ERROR'):
+            run_pending('test-worker')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_requeue_stale(self):
+        """応答が途絶えた実行中の処理が待機中に戻されること"""
+        job, _ = enqueue('rebuild_bug_flow', {})
+        claim_jobs('worker-1')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale(timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.PENDING)
+        self.assertEqual(job.worker, '')
+
+    def test_run_jobs_command(self):
+        """run_jobs --processes 0 --once で実行可能な処理を実行して終了すること"""
+        job, _ = enqueue('quality_snapshot', {'date': '2025-04-01'})
+        call_command('run_jobs', processes=0, once=True, stderr=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.StatusChoices.SUCCEEDED)
+        self.assertEqual(job.result['date'], '2025-04-01')
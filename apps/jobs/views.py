@@ -0,0 +1,89 @@
+import os
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, Http404, JsonResponse
+from django.views import View
+from django.views.generic import DetailView, ListView
+
+from .models import Job
+from .registry import get_label
+
+
+class JobAccessMixin(LoginRequiredMixin):
+    """登録者本人（スタッフは全件）の処理に限定する"""
+
+    def get_queryset(self):
+        queryset = Job.objects.select_related('created_by')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+
+def job_status(job):
+    """処理状況のポーリング用の値"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'label': get_label(job.kind),
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'message': job.message,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': job.result,
+        'has_file': bool(job.result_file),
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'finished': not job.is_active,
+    }
+
+
+class JobListView(JobAccessMixin, ListView):
+    """バックグラウンド処理一覧"""
+    model = Job
+    template_name = 'jobs/job_list.html'
+    context_object_name = 'jobs'
+    paginate_by = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for job in context['jobs']:
+            job.label = get_label(job.kind)
+        return context
+
+
+class JobDetailView(JobAccessMixin, DetailView):
+    """バックグラウンド処理の状況（実行中は定期的に更新）"""
+    model = Job
+    template_name = 'jobs/job_detail.html'
+    context_object_name = 'job'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['label'] = get_label(self.object.kind)
+        context['error'] = job_status(self.object)['error']
+        return context
+
+
+class JobStatusView(JobAccessMixin, View):
+    """処理状況のJSON（詳細画面からポーリングする）"""
+
+    def get(self, request, pk):
+        job = self.get_queryset().filter(pk=pk).first()
+        if job is None:
+            raise Http404
+        return JsonResponse(job_status(job))
+
+
+class JobDownloadView(JobAccessMixin, View):
+    """結果ファイルのダウンロード"""
+
+    def get(self, request, pk):
+        job = self.get_queryset().filter(pk=pk, status=Job.StatusChoices.SUCCEEDED).first()
+        if job is None or not job.result_file:
+            raise Http404
+        try:
+            stream = job.result_file.open('rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(stream, as_attachment=True, filename=os.path.basename(job.result_file.name))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
-from .models import Project, ProjectMember, Milestone
+from .models import Holiday, Milestone, Project, ProjectMember, WorkCalendar
 
 
 class ProjectMemberInline(admin.TabularInline):
@@ -45,6 +45,21 @@ class ProjectMemberAdmin(admin.ModelAdmin):
 
 @admin.register(Milestone)
 class MilestoneAdmin(admin.ModelAdmin):
-    list_display = ['name', 'project', 'target_date', 'status', 'order']
+    list_display = ['name', 'project', 'target_date', 'forecast_date', 'progress_rate', 'status', 'order']
     list_filter = ['status', 'project']
     search_fields = ['name', 'project__name']
+    # 紐づくタスクからの集計値
+    readonly_fields = ['forecast_date', 'progress_rate', 'task_count', 'completed_task_count']
+
+
+class HolidayInline(admin.TabularInline):
+    model = Holiday
+    extra = 1
+    fields = ['date', 'name']
+
+
+@admin.register(WorkCalendar)
+class WorkCalendarAdmin(admin.ModelAdmin):
+    list_display = ['name', 'project', 'working_weekdays', 'inherit_default', 'updated_at']
+    search_fields = ['name', 'project__name']
+    inlines = [HolidayInline]
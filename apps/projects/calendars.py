@@ -0,0 +1,213 @@
+"""
+稼働日カレンダー
+
+稼働日マスクと稼働日累積配列を事前計算し、稼働日の加算・期間内の稼働日数を O(1) で求める。
+- mask[i]       : 基準日 + i 日が稼働日か
+- cumulative[i] : 基準日から i 日目の前日までの稼働日数（cumulative[0] = 0）
+- workdays[k]   : k 番目の稼働日（基準日からの日数）
+
+計算対象期間（RANGE_START〜RANGE_END）外の日付は曜日のみで計算する（休日は考慮しない）。
+誤入力の年などで期間外の日付が含まれても例外にはしない。
+
+カレンダーは (カレンダーID, 更新日時) をキーにプロセス内でキャッシュする。
+休日の登録・削除時はカレンダーの更新日時を更新するため、次回参照時に作り直される。
+"""
+import threading
+from datetime import date
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Holiday, Project, WorkCalendar
+from .versioning import bump_project_version, bump_project_versions
+
+# 計算対象期間（休日を反映する期間）
+RANGE_START = date(1990, 1, 1)
+RANGE_END = date(2100, 12, 31)
+
+DEFAULT_WORKING_WEEKDAYS = '01234'
+
+
+class BusinessCalendar:
+    """稼働日計算（日付は date、配列版の引数は日序数）"""
+
+    def __init__(self, working_weekdays=DEFAULT_WORKING_WEEKDAYS, holidays=(),
+                 start=RANGE_START, end=RANGE_END):
+        self.working_weekdays = ''.join(sorted(set(working_weekdays)))
+        self.origin = start.toordinal()
+        length = end.toordinal() - self.origin + 1
+
+        weekdays = (np.arange(length) + start.weekday()) % 7
+        mask = np.isin(weekdays, [int(c) for c in self.working_weekdays])
+        holiday_index = np.array(
+            [d.toordinal() - self.origin for d in holidays if start <= d <= end], dtype=np.int64
+        )
+        mask[holiday_index] = False
+
+        self.holidays = frozenset(holidays)
+        self.mask = mask
+        self.cumulative = np.concatenate(([0], np.cumsum(mask)))
+        self.workdays = np.flatnonzero(mask)
+
+        # 計算対象期間外用の曜日パターン（日序数 0 から始まる7日周期。日序数 1 は月曜）
+        week = np.isin((np.arange(7) + 6) % 7, [int(c) for c in self.working_weekdays])
+        self._week_prefix = np.concatenate(([0], np.cumsum(week)))
+        self._week_offsets = np.flatnonzero(week)
+        self.end = self.origin + len(mask)
+
+    def _weekday_count(self, ordinals):
+        """日序数 0 から ordinals の前日までの稼働曜日の日数（休日は考慮しない）"""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        return ordinals // 7 * self._week_prefix[-1] + self._week_prefix[ordinals % 7]
+
+    def _count_before(self, ordinals):
+        """ordinals（日序数）の前日までの通算稼働日数（計算対象期間内は休日を考慮する）"""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        return (
+            self._weekday_count(np.minimum(ordinals, self.origin))
+            + self.cumulative[np.clip(ordinals - self.origin, 0, len(self.mask))]
+            + self._weekday_count(np.maximum(ordinals, self.end)) - self._weekday_count(self.end)
+        )
+
+    def _nth_workday(self, position):
+        """通算 position 番目（0 始まり）の稼働日の日序数（_count_before の逆関数）"""
+        before = int(self._weekday_count(self.origin))
+        after = before + int(self.cumulative[-1])
+        if before <= position < after:
+            return self.origin + int(self.workdays[position - before])
+        if not len(self._week_offsets):
+            raise ValueError('稼働曜日が設定されていません')
+        if position >= after:
+            position += int(self._weekday_count(self.end)) - after
+        weeks, index = divmod(position, len(self._week_offsets))
+        return weeks * 7 + int(self._week_offsets[index])
+
+    def _date(self, ordinal):
+        return date.fromordinal(min(max(int(ordinal), 1), date.max.toordinal()))
+
+    def is_working_day(self, day):
+        ordinal = day.toordinal()
+        if self.origin <= ordinal < self.end:
+            return bool(self.mask[ordinal - self.origin])
+        return str(day.weekday()) in self.working_weekdays
+
+    def working_days_between(self, start, end):
+        """start〜end（両端含む）の稼働日数"""
+        if end < start:
+            return 0
+        return int(self._count_before(end.toordinal() + 1) - self._count_before(start.toordinal()))
+
+    def working_day_number(self, day):
+        """day 以前の最後の稼働日の通し番号（非稼働日は直前の稼働日と同じ番号）
+
+        2つの日付の番号の差は、add_working_days で前の日付から後の日付へ移るのに必要な稼働日数になる。
+        """
+        return int(self._count_before(day.toordinal() + 1)) - 1
+
+    def add_working_days(self, day, days):
+        """day から days 稼働日後（負の場合は前）の稼働日
+
+        day が非稼働日の場合、days=0 は次の稼働日、正の値は次の稼働日を1日目として数える。
+        """
+        ordinal = day.toordinal()
+        if days > 0 or (days == 0 and not self.is_working_day(day)):
+            position = int(self._count_before(ordinal + 1)) - 1 + days
+            if days == 0:
+                position += 1
+        else:
+            position = int(self._count_before(ordinal)) + days
+        return self._date(self._nth_workday(position))
+
+    def next_working_day(self, day):
+        """day 以降で最初の稼働日（day が稼働日ならそのまま）"""
+        return self.add_working_days(day, 0)
+
+    def end_date(self, start, duration):
+        """start から duration 稼働日かかる作業の終了日"""
+        return self.add_working_days(self.next_working_day(start), max(duration, 1) - 1)
+
+    def workday_mask(self, origin, length):
+        """origin（日序数）から length 日分の稼働日マスク"""
+        ordinals = np.arange(origin, origin + length)
+        mask = np.isin((ordinals + 6) % 7, [int(c) for c in self.working_weekdays])
+        begin, end = max(origin, self.origin), min(origin + length, self.end)
+        if begin < end:
+            mask[begin - origin:end - origin] = self.mask[begin - self.origin:end - self.origin]
+        return mask
+
+    def working_days_between_array(self, starts, ends):
+        """working_days_between の配列版（日序数の配列を受け取る）"""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.maximum(np.asarray(ends, dtype=np.int64), starts - 1)
+        return self._count_before(ends + 1) - self._count_before(starts)
+
+    def holidays_between(self, start, end):
+        """start〜end の休日"""
+        return sorted(d for d in self.holidays if start <= d <= end)
+
+
+# {カレンダーIDのタプル: (更新日時のタプル, BusinessCalendar)}
+_cache = {}
+_lock = threading.Lock()
+
+
+def _calendar_rows(project_id):
+    """対象プロジェクトのカレンダーと標準カレンダーの行"""
+    scope = Q(project__isnull=True)
+    if project_id:
+        scope |= Q(project_id=project_id)
+    rows = {
+        row['project_id']: row
+        for row in WorkCalendar.objects.filter(scope).values(
+            'id', 'project_id', 'working_weekdays', 'inherit_default', 'updated_at'
+        )
+    }
+    return rows.get(project_id) if project_id else None, rows.get(None)
+
+
+def get_calendar(project_id=None):
+    """プロジェクトの稼働日カレンダーを返す（未設定の場合は標準カレンダー）"""
+    own, default = _calendar_rows(project_id)
+    rows = [row for row in (own, default) if row]
+    if own and not own['inherit_default']:
+        rows = [own]
+
+    calendar_ids = tuple(row['id'] for row in rows)
+    token = tuple(row['updated_at'] for row in rows)
+    cached = _cache.get(calendar_ids)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    weekdays = rows[0]['working_weekdays'] if rows else DEFAULT_WORKING_WEEKDAYS
+    holidays = list(
+        Holiday.objects.filter(calendar_id__in=calendar_ids).values_list('date', flat=True).distinct()
+    ) if calendar_ids else []
+    calendar = BusinessCalendar(weekdays, holidays)
+    with _lock:
+        _cache[calendar_ids] = (token, calendar)
+    return calendar
+
+
+def clear_calendar_cache():
+    """プロセス内キャッシュを破棄する"""
+    with _lock:
+        _cache.clear()
+
+
+def bump_calendar_versions(project_id):
+    """カレンダー変更時の版数加算（標準カレンダーは全プロジェクトが対象）"""
+    if project_id:
+        bump_project_version(project_id)
+    else:
+        bump_project_versions(Project.objects.values_list('id', flat=True))
+
+
+def touch_calendar(calendar_id):
+    """休日の変更後に呼び出し、カレンダーの更新日時と関連プロジェクトの版数を更新する
+
+    一括登録などシグナルを経由しない変更の後は明示的に呼び出すこと。
+    """
+    WorkCalendar.objects.filter(pk=calendar_id).update(updated_at=timezone.now())
+    project_id = WorkCalendar.objects.filter(pk=calendar_id).values_list('project_id', flat=True).first()
+    bump_calendar_versions(project_id)
@@ -58,6 +58,12 @@ class MilestoneForm(forms.ModelForm):
         self.fields['description'].required = False
         self.fields['actual_date'].required = False
         self.fields['criteria'].required = False
+        
+        # タスクが紐づいている場合、ステータス・達成日はタスクから計算する
+        if self.instance.pk and self.instance.is_derived:
+            for name in ('status', 'actual_date'):
+                self.fields[name].disabled = True
+                self.fields[name].help_text = '紐づくタスクから自動計算されます'
         self.fields['order'].initial = 1
     
     def clean(self):
@@ -0,0 +1,86 @@
+"""
+休日のCSV取り込みコマンド
+
+「日付,名称」形式のCSV（内閣府の syukujitsu.csv など）を稼働日カレンダーに登録する。
+1行目が日付として解釈できない場合は見出し行として読み飛ばす。登録済みの日付は無視する。
+
+使い方:
+    python manage.py import_holidays syukujitsu.csv --encoding cp932
+    python manage.py import_holidays company_holidays.csv --project 1
+"""
+import csv
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.projects.calendars import touch_calendar
+from apps.projects.models import Holiday, Project, WorkCalendar
+
+DATE_FORMATS = ['%Y/%m/%d', '%Y-%m-%d']
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class Command(BaseCommand):
+    help = 'CSVファイルから休日を稼働日カレンダーに登録します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='「日付,名称」形式のCSVファイル')
+        parser.add_argument(
+            '--project', type=int, metavar='ID',
+            help='登録先プロジェクトID（省略時は標準カレンダー、未作成の場合は作成する）'
+        )
+        parser.add_argument('--encoding', default='utf-8-sig', help='文字コード（既定: utf-8-sig）')
+
+    def handle(self, *args, **options):
+        calendar = self._get_calendar(options['project'])
+
+        holidays = []
+        try:
+            with open(options['csv_file'], encoding=options['encoding'], newline='') as f:
+                for line_number, row in enumerate(csv.reader(f), start=1):
+                    if not row or not row[0].strip():
+                        continue
+                    day = parse_date(row[0])
+                    if day is None:
+                        if line_number == 1:
+                            continue
+                        raise CommandError(f'{line_number}行目: 日付を解釈できません: {row[0]}')
+                    name = row[1].strip() if len(row) > 1 else ''
+                    holidays.append(Holiday(calendar=calendar, date=day, name=name))
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'CSVファイルを読み込めません: {e}')
+
+        with transaction.atomic():
+            before = calendar.holidays.count()
+            Holiday.objects.bulk_create(holidays, batch_size=1000, ignore_conflicts=True)
+            created = calendar.holidays.count() - before
+            # bulk_create はシグナルを発行しないため明示的に更新する
+            touch_calendar(calendar.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{calendar.name} に休日を {created} 件登録しました（読み込み {len(holidays)} 件）'
+        ))
+
+    def _get_calendar(self, project_id):
+        if project_id is None:
+            calendar, _ = WorkCalendar.objects.get_or_create(
+                project__isnull=True, defaults={'name': '標準カレンダー'}
+            )
+            return calendar
+
+        project = Project.objects.filter(pk=project_id).first()
+        if project is None:
+            raise CommandError(f'プロジェクトが見つかりません: {project_id}')
+        calendar, _ = WorkCalendar.objects.get_or_create(
+            project=project, defaults={'name': f'{project.name} カレンダー'}
+        )
+        return calendar
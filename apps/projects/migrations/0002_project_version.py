@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def create_version_rows(apps, schema_editor):
+    """既存プロジェクトと全体の版数行を作成"""
+    Project = apps.get_model('projects', 'Project')
+    ProjectVersion = apps.get_model('projects', 'ProjectVersion')
+    
+    rows = [ProjectVersion(project_id=None)]
+    rows += [ProjectVersion(project_id=pk) for pk in Project.objects.values_list('pk', flat=True)]
+    ProjectVersion.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0, verbose_name='版数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('project', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='data_version', to='projects.project', verbose_name='プロジェクト')),
+            ],
+            options={
+                'verbose_name': 'プロジェクト版数',
+                'verbose_name_plural': 'プロジェクト版数',
+                'db_table': 'project_versions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='projectversion',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('project', 0), name='project_versions_unique_scope'),
+        ),
+        migrations.RunPython(create_version_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def create_default_calendar(apps, schema_editor):
+    """標準カレンダー（月〜金稼働）を作成"""
+    WorkCalendar = apps.get_model('projects', 'WorkCalendar')
+    if not WorkCalendar.objects.filter(project__isnull=True).exists():
+        WorkCalendar.objects.create(name='標準カレンダー', working_weekdays='01234')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='カレンダー名')),
+                ('working_weekdays', models.CharField(default='01234', help_text='稼働する曜日の番号（月曜=0〜日曜=6）を並べた文字列。例: 01234（月〜金）', max_length=7, verbose_name='稼働曜日')),
+                ('inherit_default', models.BooleanField(default=True, verbose_name='標準カレンダーの休日を含める')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('project', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='work_calendar', to='projects.project', verbose_name='プロジェクト')),
+            ],
+            options={
+                'verbose_name': '稼働日カレンダー',
+                'verbose_name_plural': '稼働日カレンダー',
+                'db_table': 'work_calendars',
+            },
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('name', models.CharField(blank=True, max_length=100, verbose_name='名称')),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='projects.workcalendar', verbose_name='カレンダー')),
+            ],
+            options={
+                'verbose_name': '休日',
+                'verbose_name_plural': '休日',
+                'db_table': 'holidays',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workcalendar',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('project', 0), name='work_calendars_unique_scope'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='holiday',
+            unique_together={('calendar', 'date')},
+        ),
+        migrations.RunPython(create_default_calendar, migrations.RunPython.noop),
+    ]
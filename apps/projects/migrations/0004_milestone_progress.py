@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_work_calendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='milestone',
+            name='completed_task_count',
+            field=models.IntegerField(default=0, verbose_name='完了タスク数'),
+        ),
+        migrations.AddField(
+            model_name='milestone',
+            name='forecast_date',
+            field=models.DateField(blank=True, null=True, verbose_name='達成見込日'),
+        ),
+        migrations.AddField(
+            model_name='milestone',
+            name='progress_rate',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='進捗率(%)'),
+        ),
+        migrations.AddField(
+            model_name='milestone',
+            name='task_count',
+            field=models.IntegerField(default=0, verbose_name='タスク数'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['status', 'target_date'], name='milestones_status_5bec16_idx'),
+        ),
+    ]
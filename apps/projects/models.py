@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from simple_history.models import HistoricalRecords
 from apps.accounts.models import User
@@ -178,6 +179,12 @@ class Milestone(AbstractBaseModel):
     criteria = models.TextField(blank=True, verbose_name='達成基準')
     order = models.IntegerField(default=0, verbose_name='表示順')
     
+    # 紐づくタスクからの集計値（apps.tasks.milestones がタスクの変更時に更新する）
+    forecast_date = models.DateField(null=True, blank=True, verbose_name='達成見込日')
+    progress_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='進捗率(%)')
+    task_count = models.IntegerField(default=0, verbose_name='タスク数')
+    completed_task_count = models.IntegerField(default=0, verbose_name='完了タスク数')
+    
     objects = ActiveManager()
     all_objects = models.Manager()
     
@@ -188,7 +195,124 @@ class Milestone(AbstractBaseModel):
         ordering = ['order', 'target_date']
         indexes = [
             models.Index(fields=['project', 'target_date']),
+            # ダッシュボードの未達成マイルストーン（目標日順）
+            models.Index(fields=['status', 'target_date']),
         ]
     
     def __str__(self):
         return f"{self.project.project_code} - {self.name}"
+    
+    @property
+    def is_derived(self):
+        """ステータス・達成日を紐づくタスクから計算しているか"""
+        return self.task_count > 0
+    
+    @property
+    def delay_days(self):
+        """達成見込日の目標日からの遅れ（日数。遅れがない場合は 0）"""
+        if self.forecast_date is None or self.forecast_date <= self.target_date:
+            return 0
+        return (self.forecast_date - self.target_date).days
+
+
+class ProjectVersion(models.Model):
+    """プロジェクトデータ版数（キャッシュ無効化用）
+
+    プロジェクト配下のデータが更新されるたびに version を加算する。
+    project が NULL の行は全プロジェクト共通の版数を表す。
+    """
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='data_version',
+        verbose_name='プロジェクト'
+    )
+    version = models.BigIntegerField(default=0, verbose_name='版数')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新日時')
+    
+    class Meta:
+        db_table = 'project_versions'
+        verbose_name = 'プロジェクト版数'
+        verbose_name_plural = 'プロジェクト版数'
+        constraints = [
+            # 全体版数（project=NULL）の行は1件のみ
+            models.UniqueConstraint(
+                Coalesce('project', 0),
+                name='project_versions_unique_scope'
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.project_id if self.project_id else 'global'
+        return f"{scope}: v{self.version}"
+
+
+class WorkCalendar(models.Model):
+    """稼働日カレンダー
+
+    project が NULL の行は全社共通の標準カレンダー（1件のみ）。
+    プロジェクト別カレンダーは、inherit_default が True の場合は標準カレンダーの休日に
+    自身の休日を追加したものとして扱う。
+    """
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='work_calendar',
+        verbose_name='プロジェクト'
+    )
+    name = models.CharField(max_length=100, verbose_name='カレンダー名')
+    working_weekdays = models.CharField(
+        max_length=7,
+        default='01234',
+        verbose_name='稼働曜日',
+        help_text='稼働する曜日の番号（月曜=0〜日曜=6）を並べた文字列。例: 01234（月〜金）'
+    )
+    inherit_default = models.BooleanField(default=True, verbose_name='標準カレンダーの休日を含める')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新日時')
+    
+    class Meta:
+        db_table = 'work_calendars'
+        verbose_name = '稼働日カレンダー'
+        verbose_name_plural = '稼働日カレンダー'
+        constraints = [
+            # 標準カレンダー（project=NULL）は1件のみ
+            models.UniqueConstraint(
+                Coalesce('project', 0),
+                name='work_calendars_unique_scope'
+            ),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        if not self.working_weekdays or any(
+            c not in '0123456' for c in self.working_weekdays
+        ) or len(set(self.working_weekdays)) != len(self.working_weekdays):
+            raise ValidationError('稼働曜日は 0〜6 の数字を重複なく指定してください')
+
+
+class Holiday(models.Model):
+    """休日（祝日・会社休日）"""
+    calendar = models.ForeignKey(
+        WorkCalendar,
+        on_delete=models.CASCADE,
+        related_name='holidays',
+        verbose_name='カレンダー'
+    )
+    date = models.DateField(verbose_name='日付')
+    name = models.CharField(max_length=100, blank=True, verbose_name='名称')
+    
+    class Meta:
+        db_table = 'holidays'
+        verbose_name = '休日'
+        verbose_name_plural = '休日'
+        ordering = ['date']
+        unique_together = [['calendar', 'date']]
+    
+    def __str__(self):
+        return f"{self.date} {self.name}"
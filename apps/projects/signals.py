@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .calendars import bump_calendar_versions, touch_calendar
+from .models import Holiday, Milestone, Project, ProjectMember, WorkCalendar
+from .versioning import track_project_version
+
+
+track_project_version(Project, lambda instance: instance.pk)
+track_project_version(Milestone, lambda instance: instance.project_id)
+track_project_version(ProjectMember, lambda instance: instance.project_id)
+
+
+@receiver(post_save, sender=WorkCalendar)
+@receiver(post_delete, sender=WorkCalendar)
+def work_calendar_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_calendar_versions(instance.project_id)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def holiday_changed(sender, instance, raw=False, **kwargs):
+    """休日の変更をカレンダーの更新日時に反映し、計算済みカレンダーを作り直させる"""
+    if raw:
+        return
+    touch_calendar(instance.calendar_id)
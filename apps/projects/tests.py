@@ -1,8 +1,14 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from apps.accounts.models import User
-from apps.projects.models import Project, ProjectMember
+from apps.common.events import CacheBroker, InMemoryBroker, get_broker, project_channel
+from apps.projects.calendars import BusinessCalendar, get_calendar
+from apps.projects.models import Holiday, Project, ProjectMember, Milestone, WorkCalendar
+from apps.projects.versioning import get_project_version
+from apps.tasks.models import Task, TaskDependency
 
 
 class UserModelTest(TestCase):
@@ -74,3 +80,270 @@ class ProjectModelTest(TestCase):
         member = self.project.members.first()
         self.assertEqual(member.user, self.user)
         self.assertEqual(member.role, 'PM')
+
+
+class ProjectVersionTest(TestCase):
+    """プロジェクト版数のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        today = timezone.now().date()
+        # 全体版数はコミット後に加算されるため、準備データの加算も実行しておく
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                project_code='PRJ001',
+                name='テストプロジェクト',
+                start_date=today,
+                end_date=today + timedelta(days=90)
+            )
+            self.other = Project.objects.create(
+                project_code='PRJ002',
+                name='別プロジェクト',
+                start_date=today,
+                end_date=today + timedelta(days=90)
+            )
+    
+    def _create_task(self, title):
+        today = timezone.now().date()
+        return Task.objects.create(
+            project=self.project,
+            title=title,
+            planned_start_date=today,
+            planned_end_date=today + timedelta(days=5)
+        )
+    
+    def test_task_write_bumps_only_own_project(self):
+        """タスク更新で自プロジェクトと全体の版数のみ加算され、全体版数はコミット後に1回だけ加算されること"""
+        before = get_project_version(self.project.pk)
+        other_before = get_project_version(self.other.pk)
+        global_before = get_project_version()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self._create_task('タスク1')
+            self.assertEqual(get_project_version(self.project.pk), before + 1)
+            self.assertEqual(get_project_version(self.other.pk), other_before)
+            
+            task.title = 'タスク1（更新）'
+            task.save()
+            self.assertEqual(get_project_version(self.project.pk), before + 2)
+            # 全体版数はコミット後に加算する
+            self.assertEqual(get_project_version(), global_before)
+        self.assertEqual(get_project_version(), global_before + 1)
+    
+    def test_related_models_bump_version(self):
+        """依存関係・マイルストーン・メンバーの更新で版数が加算されること"""
+        first = self._create_task('タスク1')
+        second = self._create_task('タスク2')
+        
+        version = get_project_version(self.project.pk)
+        dependency = TaskDependency.objects.create(predecessor=first, successor=second)
+        self.assertEqual(get_project_version(self.project.pk), version + 1)
+        
+        dependency.delete()
+        self.assertEqual(get_project_version(self.project.pk), version + 2)
+        
+        Milestone.objects.create(
+            project=self.project,
+            name='リリース',
+            target_date=timezone.now().date()
+        )
+        ProjectMember.objects.create(project=self.project, user=self.user)
+        self.assertEqual(get_project_version(self.project.pk), version + 4)
+    
+    def test_project_delete_cascades(self):
+        """プロジェクトの物理削除で版数行も削除されること"""
+        self._create_task('タスク1')
+        project_id = self.project.pk
+        self.project.delete()
+        self.assertEqual(get_project_version(project_id), 0)
+
+
+
+class BusinessCalendarTest(TestCase):
+    """稼働日カレンダーのテスト"""
+    
+    def setUp(self):
+        # 2025-04-29（火）は祝日
+        self.calendar = BusinessCalendar('01234', [date(2025, 4, 29)])
+    
+    def test_working_days_between(self):
+        """土日・休日を除き、両端を含めて数えること"""
+        self.assertEqual(self.calendar.working_days_between(date(2025, 4, 1), date(2025, 4, 4)), 4)
+        self.assertEqual(self.calendar.working_days_between(date(2025, 4, 25), date(2025, 5, 2)), 5)
+        self.assertEqual(self.calendar.working_days_between(date(2025, 4, 26), date(2025, 4, 27)), 0)
+        self.assertEqual(self.calendar.working_days_between(date(2025, 4, 4), date(2025, 4, 1)), 0)
+    
+    def test_add_working_days(self):
+        """週末・休日をまたいで稼働日を加算・減算できること"""
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 25), 1), date(2025, 4, 28))
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 28), 1), date(2025, 4, 30))
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 30), -2), date(2025, 4, 25))
+        # 非稼働日起点
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 26), 0), date(2025, 4, 28))
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 26), 1), date(2025, 4, 28))
+        self.assertEqual(self.calendar.add_working_days(date(2025, 4, 26), -1), date(2025, 4, 25))
+        self.assertEqual(self.calendar.end_date(date(2025, 4, 25), 3), date(2025, 4, 30))
+    
+    def test_outside_range_uses_weekdays(self):
+        """計算対象期間外の日付は例外にせず、曜日のみで計算すること"""
+        # 2100-12-31（金）〜2101-01-04（火）
+        self.assertEqual(self.calendar.working_days_between(date(2100, 12, 31), date(2101, 1, 4)), 3)
+        self.assertEqual(self.calendar.working_days_between(date(2205, 4, 1), date(2205, 4, 30)), 22)
+        self.assertTrue(self.calendar.is_working_day(date(2205, 4, 2)))
+        self.assertEqual(self.calendar.add_working_days(date(2100, 12, 31), 1), date(2101, 1, 3))
+        self.assertEqual(self.calendar.add_working_days(date(2101, 1, 3), -1), date(2100, 12, 31))
+        self.assertEqual(self.calendar.add_working_days(date(1989, 12, 29), 1), date(1990, 1, 1))
+        self.assertEqual(self.calendar.end_date(date(9999, 12, 30), 5), date(9999, 12, 31))
+        
+        origin = date(2100, 12, 30).toordinal()
+        self.assertEqual(list(self.calendar.workday_mask(origin, 7)), [True, True, False, False, True, True, True])
+        self.assertEqual(
+            list(self.calendar.working_days_between_array([origin, origin], [origin + 6, origin - 1])), [5, 0]
+        )
+    
+    def test_project_calendar_inherits_holidays(self):
+        """プロジェクトカレンダーが標準カレンダーの休日を引き継ぐこと"""
+        project = Project.objects.create(
+            project_code='PRJ001', name='カレンダー', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        default = WorkCalendar.objects.get(project__isnull=True)
+        Holiday.objects.create(calendar=default, date=date(2025, 4, 29), name='昭和の日')
+        own = WorkCalendar.objects.create(project=project, name='土曜稼働', working_weekdays='012345')
+        Holiday.objects.create(calendar=own, date=date(2025, 5, 2), name='創立記念日')
+        
+        calendar = get_calendar(project.pk)
+        self.assertTrue(calendar.is_working_day(date(2025, 4, 26)))
+        self.assertFalse(calendar.is_working_day(date(2025, 4, 29)))
+        self.assertFalse(calendar.is_working_day(date(2025, 5, 2)))
+        self.assertTrue(get_calendar().is_working_day(date(2025, 5, 2)))
+        
+        own.inherit_default = False
+        own.save()
+        self.assertTrue(get_calendar(project.pk).is_working_day(date(2025, 4, 29)))
+    
+    def test_holiday_change_invalidates_cache(self):
+        """休日の登録・削除で計算済みカレンダーが作り直され、版数が加算されること"""
+        project = Project.objects.create(
+            project_code='PRJ001', name='カレンダー', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        self.assertTrue(get_calendar(project.pk).is_working_day(date(2025, 4, 29)))
+        
+        version = get_project_version(project.pk)
+        holiday = Holiday.objects.create(
+            calendar=WorkCalendar.objects.get(project__isnull=True), date=date(2025, 4, 29)
+        )
+        self.assertFalse(get_calendar(project.pk).is_working_day(date(2025, 4, 29)))
+        self.assertGreater(get_project_version(project.pk), version)
+        
+        holiday.delete()
+        self.assertTrue(get_calendar(project.pk).is_working_day(date(2025, 4, 29)))
+
+
+class ProjectEventTest(TestCase):
+    """プロジェクト変更イベント配信のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=today,
+            end_date=today + timedelta(days=90)
+        )
+        self.channel = project_channel(self.project.pk)
+        self.start_id = get_broker().latest_id(self.channel)
+    
+    def _create_task(self):
+        return Task.objects.create(
+            project=self.project,
+            title='設計',
+            planned_start_date=date(2024, 4, 1),
+            planned_end_date=date(2024, 4, 3)
+        )
+    
+    def test_published_after_commit(self):
+        """タスクの保存がコミット後にプロジェクトのチャネルへ発行されること"""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            task = self._create_task()
+        self.assertEqual(get_broker().replay(self.channel, self.start_id), [])
+        
+        for callback in callbacks:
+            callback()
+        events = get_broker().replay(self.channel, self.start_id)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['type'], 'task')
+        self.assertEqual(events[0]['action'], 'saved')
+        self.assertEqual(events[0]['data']['id'], task.pk)
+        self.assertEqual(events[0]['data']['end_date'], '2024-04-04')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            task.is_deleted = True
+            task.save()
+        self.assertEqual(get_broker().replay(self.channel, events[0]['id'])[0]['action'], 'deleted')
+    
+    def test_stream_replays_since_last_event_id(self):
+        """WSGI では Last-Event-ID 以降の保持中イベントを返して切断すること"""
+        url = reverse('projects:project_events', args=[self.project.pk])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(f'id: {self.start_id}', b''.join(response.streaming_content).decode())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_task()
+        response = self.client.get(url, HTTP_LAST_EVENT_ID=str(self.start_id))
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: task', body)
+        self.assertIn('設計', body)
+    
+    @override_settings(EVENT_STREAM_TIMEOUT=1, EVENT_STREAM_KEEPALIVE=0.1)
+    async def test_live_stream(self):
+        """ASGI では接続を保持して新着イベントを配信すること"""
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.user)
+        response = await client.get(reverse('projects:project_events', args=[self.project.pk]))
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        
+        await sync_to_async(get_broker().publish)(self.channel, {'type': 'task', 'action': 'saved', 'data': {'id': 1}})
+        chunk = await anext(chunks)
+        while chunk.startswith(b':'):
+            chunk = await anext(chunks)
+        self.assertIn(b'event: task', chunk)
+        await chunks.aclose()
+    
+    async def test_in_memory_broker(self):
+        """別スレッドからの発行を購読側が受け取れること"""
+        broker = InMemoryBroker()
+        first = broker.publish('c', {'type': 'task'})
+        subscription = broker.subscribe('c', last_event_id=0)
+        self.assertEqual(await subscription.next_event(timeout=1), first)
+        self.assertIsNone(await subscription.next_event(timeout=0.05))
+        
+        await sync_to_async(broker.publish, thread_sensitive=False)('c', {'type': 'bug'})
+        self.assertEqual((await subscription.next_event(timeout=1))['type'], 'bug')
+        subscription.close()
+        self.assertEqual(broker._subscribers['c'], set())
+    
+    async def test_cache_broker(self):
+        """キャッシュ経由のブローカーで再送と新着の受信ができること"""
+        broker = CacheBroker(poll_interval=0.01)
+        channel = f'test:{self.project.pk}'
+        start = broker.latest_id(channel)
+        broker.publish(channel, {'type': 'task'})
+        broker.publish(channel, {'type': 'bug'})
+        subscription = broker.subscribe(channel, last_event_id=start)
+        self.assertEqual((await subscription.next_event(timeout=1))['type'], 'task')
+        self.assertEqual((await subscription.next_event(timeout=1))['type'], 'bug')
+        self.assertIsNone(await subscription.next_event(timeout=0.05))
@@ -10,6 +10,7 @@ urlpatterns = [
     path('<int:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
     path('<int:pk>/update/', views.ProjectUpdateView.as_view(), name='project_update'),
     path('<int:pk>/delete/', views.ProjectDeleteView.as_view(), name='project_delete'),
+    path('<int:pk>/events/', views.ProjectEventStreamView.as_view(), name='project_events'),
     
     # メンバー管理
     path('<int:project_pk>/members/', views.ProjectMemberListView.as_view(), name='member_list'),
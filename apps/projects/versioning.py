@@ -0,0 +1,96 @@
+"""
+プロジェクト版数（キャッシュ無効化用カウンタ）
+
+プロジェクト配下のデータが書き込まれるたびに版数を加算する。
+キャッシュキーを (project_id, version) とすることで、無効化時に
+キャッシュを走査する必要がなくなる。
+全体版数（project が NULL の行）はトランザクションのコミット後に1回だけ加算する。
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+
+from .models import ProjectVersion
+
+
+def _bump(scope_project_id, create=True):
+    """版数の行を1つ加算する（行が存在しない場合は create 指定時のみ作成してから加算し直す）"""
+    queryset = ProjectVersion.objects.filter(
+        Q(project_id=scope_project_id) if scope_project_id else Q(project__isnull=True)
+    )
+    if queryset.update(version=F('version') + 1) or not create:
+        return
+    ProjectVersion.objects.get_or_create(project_id=scope_project_id)
+    queryset.update(version=F('version') + 1)
+
+
+def _schedule_global_bump():
+    """全体版数の加算をトランザクションのコミット後に1回だけ予約する
+
+    全体行はすべての書き込みが共有するため、トランザクション内で更新すると書き込みが直列化され、
+    複数プロジェクトを更新する処理どうしでデッドロックしうる。コミット後に自動コミットで加算する。
+    ロールバックされた予約は on_commit の一覧から取り除かれるため、次の書き込みで予約し直す。
+    """
+    connection = transaction.get_connection()
+    if any(getattr(entry[1], 'global_version_pending', False) for entry in connection.run_on_commit):
+        return
+
+    def bump_global_version():
+        bump_global_version.global_version_pending = False
+        _bump(None)
+
+    bump_global_version.global_version_pending = True
+    transaction.on_commit(bump_global_version)
+
+
+def bump_project_version(project_id, create=True):
+    """プロジェクト版数を1つ加算し、全体版数の加算をコミット後に予約する
+
+    行が存在しない場合のみ作成してから加算し直す（版数は単調増加であればよい）。
+    削除時はカスケード削除中のプロジェクトに行を作らないよう create=False とする。
+    """
+    if not project_id:
+        return
+    _bump(project_id, create)
+    _schedule_global_bump()
+
+
+def bump_project_versions(project_ids):
+    """複数プロジェクトの版数を加算する（一括更新処理用）
+
+    行ロックの順序をそろえるため、プロジェクトID の昇順に加算する。
+    """
+    for project_id in sorted({project_id for project_id in project_ids if project_id}):
+        bump_project_version(project_id)
+
+
+def get_project_version(project_id=None):
+    """版数を取得する（project_id 省略時は全体版数）
+
+    一意インデックスによる1行参照のみで取得する。
+    """
+    queryset = ProjectVersion.objects.filter(
+        Q(project_id=project_id) if project_id else Q(project__isnull=True)
+    )
+    version = queryset.values_list('version', flat=True).first()
+    return version or 0
+
+
+def track_project_version(model, get_project_id):
+    """モデルの保存・削除時にプロジェクト版数を加算するシグナルを登録する
+
+    Args:
+        model: 対象モデルクラス
+        get_project_id: インスタンスから project_id を返す関数
+    """
+    def _on_save(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        bump_project_version(get_project_id(instance))
+
+    def _on_delete(sender, instance, **kwargs):
+        bump_project_version(get_project_id(instance), create=False)
+
+    uid = f'project_version_{model._meta.label_lower}'
+    post_save.connect(_on_save, sender=model, weak=False, dispatch_uid=f'{uid}_save')
+    post_delete.connect(_on_delete, sender=model, weak=False, dispatch_uid=f'{uid}_delete')
@@ -1,7 +1,16 @@
+import time
+
+from django.conf import settings
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect
+from apps.common.events import get_broker, project_channel
+from apps.common.json_payload import dumps
+from apps.common.mixins import AsyncLoginRequiredMixin
 from .models import Project, ProjectMember, Milestone
 from .forms import ProjectForm, MilestoneForm
 
@@ -191,3 +200,57 @@ class MilestoneDeleteView(LoginRequiredMixin, DeleteView):
         self.object.is_deleted = True
         self.object.save()
         return super().delete(request, *args, **kwargs)
+
+
+class ProjectEventStreamView(AsyncLoginRequiredMixin, View):
+    """プロジェクトの変更イベント配信（Server-Sent Events）
+    
+    ASGI で動作している場合は接続を保持して新着を配信し、一定時間で切断する
+    （EventSource が Last-Event-ID 付きで自動的に再接続する）。
+    WSGI では応答を保持できないため、Last-Event-ID 以降の保持中イベントだけを返して切断する
+    （retry の間隔で再接続するため、ポーリングとして動作する）。
+    """
+    
+    async def get(self, request, pk):
+        if not await Project.objects.filter(pk=pk, is_deleted=False).aexists():
+            raise Http404
+        
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        channel = project_channel(pk)
+        if isinstance(request, ASGIRequest):
+            stream = self._live_stream(channel, last_event_id)
+        else:
+            stream = self._replay_stream(channel, last_event_id)
+        
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @staticmethod
+    def _format(event):
+        return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event)}\n\n"
+    
+    async def _live_stream(self, channel, last_event_id):
+        keepalive = getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15)
+        deadline = time.monotonic() + getattr(settings, 'EVENT_STREAM_TIMEOUT', 300)
+        subscription = get_broker().subscribe(channel, last_event_id)
+        try:
+            yield f"retry: {getattr(settings, 'EVENT_STREAM_RETRY', 3000)}\n\n"
+            while time.monotonic() < deadline:
+                event = await subscription.next_event(timeout=keepalive)
+                yield ': keepalive\n\n' if event is None else self._format(event)
+        finally:
+            # 期限切れ・クライアント切断のいずれでも購読を解除する
+            subscription.close()
+    
+    def _replay_stream(self, channel, last_event_id):
+        yield f"retry: {getattr(settings, 'EVENT_STREAM_POLL_RETRY', 10000)}\n\n"
+        broker = get_broker()
+        if last_event_id is None:
+            # 初回接続は現在位置だけを通知し、次回の再接続から差分を受け取る
+            yield f"id: {broker.latest_id(channel)}\n\n"
+            return
+        for event in broker.replay(channel, last_event_id):
+            yield self._format(event)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
-from .models import Bug, BugComment, TestCase, TestExecution, QualityMetric
+from .models import Bug, BugComment, BugDailyFlow, TestCase, TestExecution, TestRun, QualityMetric
 
 
 class BugCommentInline(admin.TabularInline):
@@ -42,6 +42,13 @@ class BugAdmin(SimpleHistoryAdmin):
     )
 
 
+@admin.register(BugDailyFlow)
+class BugDailyFlowAdmin(admin.ModelAdmin):
+    list_display = ['project', 'severity', 'day', 'opened', 'fixed', 'verified', 'reopened', 'closed']
+    list_filter = ['severity', 'project']
+    date_hierarchy = 'day'
+
+
 @admin.register(BugComment)
 class BugCommentAdmin(admin.ModelAdmin):
     list_display = ['bug', 'user', 'created_at']
@@ -79,6 +86,14 @@ class TestCaseAdmin(SimpleHistoryAdmin):
     )
 
 
+@admin.register(TestRun)
+class TestRunAdmin(admin.ModelAdmin):
+    list_display = ['run_number', 'name', 'project', 'status', 'total_count', 'passed_count', 'failed_count']
+    list_filter = ['status', 'project']
+    search_fields = ['run_number', 'name', 'build_version']
+    readonly_fields = ['total_count', 'passed_count', 'failed_count', 'not_executed_count', 'not_applicable_count']
+
+
 @admin.register(TestExecution)
 class TestExecutionAdmin(admin.ModelAdmin):
     list_display = ['test_case', 'executor', 'executed_at', 'result', 'execution_time']
@@ -5,3 +5,6 @@ class QualityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.quality'
     verbose_name = '品質管理'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
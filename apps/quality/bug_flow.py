@@ -0,0 +1,165 @@
+"""
+バグ日次推移（BugDailyFlow）の更新・集計
+
+- Bug の登録・ステータス変更・削除時に、該当日の行の件数を1加算する（シグナルから呼び出し）
+- 一括更新などシグナルを経由しない変更は rebuild_bug_flow（履歴テーブルから再集計）で補正する
+- 推移グラフは BugDailyFlow のみを参照する
+
+未解決のバグは品質メトリクス（apps.quality.metrics）と同じく、削除されていない OPEN_STATUSES のバグとする。
+- closed   : 未解決から外れた（修正・確認・却下・保留・削除など遷移先によらない）
+- reopened : 未解決から外れたバグが再び未解決に戻った
+- 未解決以外のステータスで登録されたバグは、起票と同時に closed を加算する
+- 未解決のバグのプロジェクト・重要度が変わった場合は、変更前の行に closed、変更後の行に reopened を加算する
+残件数（バーンダウン）は 起票 + 再オープン - クローズ の累計とし、未解決のバグ件数と一致する。
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .metrics import OPEN_STATUSES
+from .models import Bug, BugDailyFlow
+
+EVENT_FIELDS = ['opened', 'fixed', 'verified', 'reopened', 'closed']
+
+STATUS_EVENTS = {
+    Bug.StatusChoices.FIXED: 'fixed',
+    Bug.StatusChoices.VERIFIED: 'verified',
+}
+
+
+def is_open(status, is_deleted=False):
+    """未解決のバグか（削除されたバグは未解決に含めない）"""
+    return not is_deleted and status in OPEN_STATUSES
+
+
+def transition_events(previous, current):
+    """バグの状態の変化に対応するイベント
+
+    Args:
+        previous: 変更前の (プロジェクトID, 重要度, ステータス, 削除フラグ)（None は新規登録）
+        current: 変更後の (プロジェクトID, 重要度, ステータス, 削除フラグ)
+
+    Returns:
+        {(プロジェクトID, 重要度): [イベント名]}
+        未解決のままプロジェクト・重要度が変わった場合は、変更前の行に closed、変更後の行に reopened を加算する
+    """
+    project_id, severity, status, deleted = current
+    key = (project_id, severity)
+    events = {key: []}
+    if previous is None:
+        events[key].append('opened')
+        previous_key, previous_status, was_open = key, None, True
+    else:
+        previous_key, previous_status = previous[:2], previous[2]
+        was_open = is_open(previous_status, previous[3])
+    if status != previous_status and status in STATUS_EVENTS:
+        events[key].append(STATUS_EVENTS[status])
+    now_open = is_open(status, deleted)
+    if previous_key != key:
+        if was_open:
+            events[previous_key] = ['closed']
+        if now_open:
+            events[key].append('reopened')
+    elif was_open and not now_open:
+        events[key].append('closed')
+    elif not was_open and now_open:
+        events[key].append('reopened')
+    return events
+
+
+def record_bug_flow(project_id, severity, day, events):
+    """該当日の行の件数を加算（行がなければ作成）"""
+    if not events:
+        return
+    counts = Counter(events)
+    queryset = BugDailyFlow.objects.filter(project_id=project_id, severity=severity, day=day)
+    if queryset.update(**{event: F(event) + count for event, count in counts.items()}):
+        return
+    try:
+        with transaction.atomic():
+            BugDailyFlow.objects.create(project_id=project_id, severity=severity, day=day, **counts)
+    except IntegrityError:
+        # 同時に作成された場合は加算に切り替える
+        queryset.update(**{event: F(event) + count for event, count in counts.items()})
+
+
+def rebuild_bug_flow(project_ids=None):
+    """バグ履歴から BugDailyFlow を再集計する
+
+    Returns:
+        登録した行数
+    """
+    project_ids = {int(project_id) for project_id in project_ids or ()}
+    history = Bug.history.all()
+    if project_ids:
+        # プロジェクトを移動したバグの移動前後の履歴も含める（集計は対象プロジェクトの行のみ）
+        history = history.filter(id__in=Bug.history.filter(project_id__in=project_ids).values('id'))
+    rows = history.order_by('id', 'history_date', 'history_id').values_list(
+        'id', 'project_id', 'severity', 'status', 'is_deleted', 'history_type', 'history_date'
+    ).iterator(chunk_size=5000)
+
+    totals = Counter()
+    current_id = previous = None
+    for bug_id, project_id, severity, status, is_deleted, history_type, history_date in rows:
+        if bug_id != current_id:
+            current_id, previous = bug_id, None
+        # 物理削除の履歴（'-'）は削除済みとして扱う
+        state = (project_id, severity, status, is_deleted or history_type == '-')
+        day = timezone.localdate(history_date)
+        for (event_project_id, event_severity), events in transition_events(previous, state).items():
+            for event in events:
+                totals[(event_project_id, event_severity, day, event)] += 1
+        previous = state
+
+    flows = {}
+    for (project_id, severity, day, event), count in totals.items():
+        if project_ids and project_id not in project_ids:
+            continue
+        key = (project_id, severity, day)
+        if key not in flows:
+            flows[key] = BugDailyFlow(project_id=project_id, severity=severity, day=day)
+        setattr(flows[key], event, count)
+
+    with transaction.atomic():
+        existing = BugDailyFlow.objects.all()
+        if project_ids:
+            existing = existing.filter(project_id__in=project_ids)
+        existing.delete()
+        BugDailyFlow.objects.bulk_create(flows.values(), batch_size=1000)
+    return len(flows)
+
+
+def get_bug_flow_series(date_from, date_to, project_id=None, severity=None):
+    """日別の起票/修正/確認/再オープン/クローズ件数と残件数の系列を返す"""
+    queryset = BugDailyFlow.objects.all()
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    if severity:
+        queryset = queryset.filter(severity=severity)
+
+    # 期間開始前の残件数
+    before = queryset.filter(day__lt=date_from).aggregate(
+        opened=Sum('opened'), reopened=Sum('reopened'), closed=Sum('closed')
+    )
+    remaining = (before['opened'] or 0) + (before['reopened'] or 0) - (before['closed'] or 0)
+
+    daily = {
+        row['day']: row
+        for row in queryset.filter(day__gte=date_from, day__lte=date_to)
+        .values('day').annotate(**{field: Sum(field) for field in EVENT_FIELDS}).order_by()
+    }
+
+    series = {'labels': [], 'remaining': [], **{field: [] for field in EVENT_FIELDS}}
+    day = date_from
+    while day <= date_to:
+        row = daily.get(day, {})
+        for field in EVENT_FIELDS:
+            series[field].append(row.get(field) or 0)
+        remaining += series['opened'][-1] + series['reopened'][-1] - series['closed'][-1]
+        series['remaining'].append(remaining)
+        series['labels'].append(day.isoformat())
+        day += timedelta(days=1)
+    return series
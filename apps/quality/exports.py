@@ -0,0 +1,91 @@
+"""
+品質管理のCSV出力定義
+
+各関数は (params, user) を受け取り (ヘッダー, 行イテレータ) を返す。
+"""
+from apps.common.csv_export import export_queryset
+from apps.common.history import as_of_queryset, parse_as_of
+from .filters import filter_bugs, filter_test_executions
+from .models import Bug, TestExecution
+
+BUG_COLUMNS = [
+    ('id', 'ID'),
+    ('project__project_code', 'プロジェクトコード'),
+    ('bug_number', 'バグ番号'),
+    ('title', 'タイトル'),
+    ('status', 'ステータス'),
+    ('priority', '優先度'),
+    ('severity', '重要度'),
+    ('category', 'カテゴリ'),
+    ('module', 'モジュール'),
+    ('reporter__username', '報告者'),
+    ('assignee__username', '担当者'),
+    ('found_version', '発見バージョン'),
+    ('fixed_version', '修正バージョン'),
+    ('found_date', '発見日'),
+    ('fixed_date', '修正日'),
+    ('verified_date', '確認日'),
+    ('related_task_id', '関連タスクID'),
+]
+
+BUG_HISTORY_COLUMNS = [
+    ('history_id', '履歴ID'),
+    ('history_date', '履歴日時'),
+    ('history_type', '履歴種別'),
+    ('history_user__username', '更新者'),
+    ('id', 'バグID'),
+    ('project_id', 'プロジェクトID'),
+    ('bug_number', 'バグ番号'),
+    ('status', 'ステータス'),
+    ('priority', '優先度'),
+    ('severity', '重要度'),
+    ('assignee_id', '担当者ID'),
+    ('fixed_date', '修正日'),
+    ('verified_date', '確認日'),
+    ('is_deleted', '削除フラグ'),
+]
+
+TEST_EXECUTION_COLUMNS = [
+    ('id', 'ID'),
+    ('test_case__project__project_code', 'プロジェクトコード'),
+    ('test_case__test_case_number', 'テストケース番号'),
+    ('test_case__category', 'テストカテゴリ'),
+    ('executor__username', '実行者'),
+    ('executed_at', '実行日時'),
+    ('result', '結果'),
+    ('execution_time', '実行時間(分)'),
+    ('related_bug_id', '関連バグID'),
+]
+
+
+def export_bugs(params, user=None):
+    """バグ一覧（BugListView と同じ絞り込み条件、as_of 指定時はその時点の状態）"""
+    as_of = parse_as_of(params.get('as_of'))
+    if as_of:
+        scope = {'project_id': params['project']} if params.get('project') else {}
+        queryset = as_of_queryset(Bug, as_of, **scope).filter(is_deleted=False)
+    else:
+        queryset = Bug.objects.all()
+    queryset = filter_bugs(queryset, params).order_by('id')
+    return export_queryset(queryset, BUG_COLUMNS)
+
+
+def export_bug_history(params, user=None):
+    """バグ変更履歴（project / since / until で絞り込み）"""
+    queryset = Bug.history.all()
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    since = params.get('since')
+    if since:
+        queryset = queryset.filter(history_date__date__gte=since)
+    until = params.get('until')
+    if until:
+        queryset = queryset.filter(history_date__date__lte=until)
+    return export_queryset(queryset.order_by('history_date', 'id'), BUG_HISTORY_COLUMNS)
+
+
+def export_test_executions(params, user=None):
+    """テスト実行結果"""
+    queryset = filter_test_executions(TestExecution.objects.all(), params).order_by('pk')
+    return export_queryset(queryset, TEST_EXECUTION_COLUMNS)
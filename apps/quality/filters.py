@@ -0,0 +1,40 @@
+def filter_bugs(queryset, params):
+    """バグの絞り込み条件を適用（一覧画面・CSV出力で共通）"""
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    
+    priority = params.get('priority')
+    if priority:
+        queryset = queryset.filter(priority=priority)
+    
+    return queryset
+
+
+def filter_test_executions(queryset, params):
+    """テスト実行の絞り込み条件を適用"""
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(test_case__project_id=project_id)
+    
+    test_case_id = params.get('test_case')
+    if test_case_id:
+        queryset = queryset.filter(test_case_id=test_case_id)
+    
+    result = params.get('result')
+    if result:
+        queryset = queryset.filter(result=result)
+    
+    executed_from = params.get('executed_from')
+    if executed_from:
+        queryset = queryset.filter(executed_at__date__gte=executed_from)
+    
+    executed_to = params.get('executed_to')
+    if executed_to:
+        queryset = queryset.filter(executed_at__date__lte=executed_to)
+    
+    return queryset
@@ -0,0 +1,12 @@
+from django import forms
+
+
+class TestRunResultUploadForm(forms.Form):
+    """テスト結果一括登録フォーム"""
+    
+    result_file = forms.FileField(
+        label='結果ファイル（CSV / JSON）',
+        help_text='列: test_case_number, result（PASSED / FAILED / NOT_EXECUTED / NOT_APPLICABLE）, '
+                  'actual_result, execution_time, notes',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'})
+    )
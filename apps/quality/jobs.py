@@ -0,0 +1,25 @@
+"""
+品質管理のバックグラウンド処理
+"""
+from datetime import date
+
+from django.utils import timezone
+
+from apps.jobs.registry import register
+from .bug_flow import rebuild_bug_flow
+from .snapshots import save_snapshot
+
+
+@register('quality_snapshot', '品質メトリクススナップショット')
+def run_quality_snapshot(context):
+    """params: {'date': 測定日（省略時は当日）, 'projects': [プロジェクトID]}"""
+    measured_at = context.params.get('date')
+    measured_at = date.fromisoformat(measured_at) if measured_at else timezone.localdate()
+    count = save_snapshot(measured_at, context.params.get('projects') or None)
+    return {'date': measured_at.isoformat(), 'count': count}
+
+
+@register('rebuild_bug_flow', 'バグ推移の再集計')
+def run_rebuild_bug_flow(context):
+    """params: {'projects': [プロジェクトID]}"""
+    return {'count': rebuild_bug_flow(context.params.get('projects') or None)}
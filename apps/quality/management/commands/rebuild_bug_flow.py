@@ -0,0 +1,26 @@
+"""
+バグ日次推移（BugDailyFlow）の再集計コマンド
+
+導入時の初期データ作成や、一括更新などシグナルを経由しない変更の補正に使用する。
+
+使い方:
+    python manage.py rebuild_bug_flow
+    python manage.py rebuild_bug_flow --project 1
+"""
+from django.core.management.base import BaseCommand
+
+from apps.quality.bug_flow import rebuild_bug_flow
+
+
+class Command(BaseCommand):
+    help = 'バグ履歴からバグ日次推移を再集計します'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project', action='append', type=int, default=[], metavar='ID',
+            help='対象プロジェクトID（複数指定可、省略時は全プロジェクト）'
+        )
+    
+    def handle(self, *args, **options):
+        count = rebuild_bug_flow(options['project'] or None)
+        self.stdout.write(self.style.SUCCESS(f'バグ日次推移を {count} 行登録しました'))
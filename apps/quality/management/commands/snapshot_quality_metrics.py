@@ -0,0 +1,38 @@
+"""
+品質メトリクスの日次スナップショット登録コマンド
+
+cron 等で1日1回実行する。同日に再実行した場合は置き換える。
+
+使い方:
+    python manage.py snapshot_quality_metrics
+    python manage.py snapshot_quality_metrics --date 2025-04-01 --project 1 --project 2
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.quality.snapshots import save_snapshot
+
+
+class Command(BaseCommand):
+    help = 'プロジェクト別の品質メトリクスを集計し、QualityMetric に登録します'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='測定日（YYYY-MM-DD、省略時は当日）')
+        parser.add_argument(
+            '--project', action='append', type=int, default=[], metavar='ID',
+            help='対象プロジェクトID（複数指定可、省略時は全プロジェクト）'
+        )
+    
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                measured_at = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"日付の形式が正しくありません: {options['date']}")
+        else:
+            measured_at = timezone.localdate()
+        
+        count = save_snapshot(measured_at, options['project'] or None)
+        self.stdout.write(self.style.SUCCESS(f'{measured_at} の品質メトリクスを {count} 件登録しました'))
@@ -0,0 +1,127 @@
+"""
+プロジェクト別品質メトリクス
+
+集計はテーブルごとに GROUP BY project の1クエリで行う（プロジェクト数によらずクエリ数は一定）。
+- テスト: TestCase.latest_result（最新実行ポインタ）を (project, latest_result) インデックスで集計する。
+  再実行による重複は発生しない
+- バグ: (project, status, found_date, fixed_date) インデックスで状態別件数と修正所要日数を集計する
+"""
+from datetime import timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+
+from apps.projects.models import Project
+from .models import Bug, TestCase, TestExecution
+
+OPEN_STATUSES = [
+    Bug.StatusChoices.NEW,
+    Bug.StatusChoices.IN_PROGRESS,
+    Bug.StatusChoices.REOPENED,
+]
+
+# 欠陥密度の基準（テストケース100件あたりのバグ件数）
+DEFECT_DENSITY_BASE = 100
+
+
+def _bug_counts(project_ids):
+    """プロジェクト別のバグ件数・修正所要日数の合計"""
+    Status = Bug.StatusChoices
+    queryset = Bug.objects.all()
+    if project_ids:
+        queryset = queryset.filter(project_id__in=project_ids)
+    fix_duration = ExpressionWrapper(F('fixed_date') - F('found_date'), output_field=DurationField())
+    fixed_with_date = Q(fixed_date__isnull=False)
+    return {
+        row['project_id']: row
+        for row in queryset.values('project_id').annotate(
+            total_bugs=Count('id'),
+            open_bugs=Count('id', filter=Q(status__in=OPEN_STATUSES)),
+            fixed_bugs=Count('id', filter=Q(status=Status.FIXED)),
+            verified_bugs=Count('id', filter=Q(status=Status.VERIFIED)),
+            fix_count=Count('id', filter=fixed_with_date),
+            fix_duration_total=Sum(fix_duration, filter=fixed_with_date),
+        ).order_by()
+    }
+
+
+def _test_counts(project_ids):
+    """プロジェクト別のテストケース件数（最新結果別）"""
+    Result = TestExecution.ResultChoices
+    queryset = TestCase.objects.all()
+    if project_ids:
+        queryset = queryset.filter(project_id__in=project_ids)
+    return {
+        row['project_id']: row
+        for row in queryset.values('project_id').annotate(
+            total_testcases=Count('id'),
+            passed_tests=Count('id', filter=Q(latest_result=Result.PASSED)),
+            failed_tests=Count('id', filter=Q(latest_result=Result.FAILED)),
+            not_applicable_tests=Count('id', filter=Q(latest_result=Result.NOT_APPLICABLE)),
+        ).order_by()
+    }
+
+
+def _percentage(numerator, denominator):
+    if not denominator:
+        return None
+    return round(numerator * 100 / denominator, 1)
+
+
+def _derive(row):
+    """件数から率・平均値を算出して row に追加"""
+    executed = row['passed_tests'] + row['failed_tests']
+    applicable = row['total_testcases'] - row['not_applicable_tests']
+    row['executed_tests'] = executed
+    row['pass_rate'] = _percentage(row['passed_tests'], executed)
+    row['execution_rate'] = _percentage(executed, applicable)
+    row['defect_density'] = (
+        round(row['total_bugs'] * DEFECT_DENSITY_BASE / row['total_testcases'], 2)
+        if row['total_testcases'] else None
+    )
+    duration = row['fix_duration_total'] or timedelta()
+    row['mean_time_to_fix'] = (
+        round(duration.total_seconds() / 86400 / row['fix_count'], 1)
+        if row['fix_count'] else None
+    )
+    return row
+
+
+_COUNT_FIELDS = [
+    'total_bugs', 'open_bugs', 'fixed_bugs', 'verified_bugs', 'fix_count',
+    'total_testcases', 'passed_tests', 'failed_tests', 'not_applicable_tests',
+]
+
+
+def compute_quality_metrics(project_ids=None):
+    """プロジェクト別の品質メトリクスと全体合計を返す
+
+    Args:
+        project_ids: 対象プロジェクトIDのリスト（None の場合は全プロジェクト）
+
+    Returns:
+        {'projects': [プロジェクト別の辞書, ...], 'summary': 合計の辞書}
+        率は%（分母が0の場合は None）、mean_time_to_fix は日数
+    """
+    bugs = _bug_counts(project_ids)
+    tests = _test_counts(project_ids)
+
+    projects = Project.objects.all()
+    if project_ids:
+        projects = projects.filter(id__in=project_ids)
+
+    rows = []
+    summary = {field: 0 for field in _COUNT_FIELDS}
+    summary['fix_duration_total'] = timedelta()
+    for project_id, project_code, name in projects.values_list('id', 'project_code', 'name').order_by('project_code'):
+        row = {'project_id': project_id, 'project_code': project_code, 'project_name': name}
+        bug_row = bugs.get(project_id, {})
+        test_row = tests.get(project_id, {})
+        for field in _COUNT_FIELDS:
+            row[field] = bug_row.get(field) or test_row.get(field) or 0
+            summary[field] += row[field]
+        row['fix_duration_total'] = bug_row.get('fix_duration_total')
+        if row['fix_duration_total']:
+            summary['fix_duration_total'] += row['fix_duration_total']
+        rows.append(_derive(row))
+
+    return {'projects': rows, 'summary': _derive(summary)}
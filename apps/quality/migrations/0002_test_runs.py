@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def backfill_latest_execution(apps, schema_editor):
+    """既存テストケースの最新実行ポインタを設定"""
+    TestCase = apps.get_model('quality', 'TestCase')
+    TestExecution = apps.get_model('quality', 'TestExecution')
+    
+    latest = TestExecution.objects.filter(
+        test_case=OuterRef('pk'),
+        is_deleted=False
+    ).order_by('-id')
+    TestCase.objects.update(
+        latest_execution_id=Subquery(latest.values('id')[:1]),
+        latest_result=Coalesce(Subquery(latest.values('result')[:1]), Value(''))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0002_project_version'),
+        ('quality', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='削除フラグ')),
+                ('run_number', models.CharField(max_length=20, verbose_name='テストラン番号')),
+                ('name', models.CharField(max_length=200, verbose_name='テストラン名')),
+                ('description', models.TextField(blank=True, verbose_name='説明')),
+                ('build_version', models.CharField(blank=True, max_length=50, verbose_name='対象バージョン')),
+                ('status', models.CharField(choices=[('PLANNED', '計画中'), ('IN_PROGRESS', '実施中'), ('COMPLETED', '完了')], default='PLANNED', max_length=20, verbose_name='ステータス')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('total_count', models.IntegerField(default=0, verbose_name='実施ケース数')),
+                ('passed_count', models.IntegerField(default=0, verbose_name='成功数')),
+                ('failed_count', models.IntegerField(default=0, verbose_name='失敗数')),
+                ('not_executed_count', models.IntegerField(default=0, verbose_name='未実施数')),
+                ('not_applicable_count', models.IntegerField(default=0, verbose_name='N/A数')),
+            ],
+            options={
+                'verbose_name': 'テストラン',
+                'verbose_name_plural': 'テストラン',
+                'db_table': 'test_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='latest_execution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quality.testexecution', verbose_name='最新実行'),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='latest_result',
+            field=models.CharField(blank=True, max_length=20, verbose_name='最新結果'),
+        ),
+        migrations.AddIndex(
+            model_name='testcase',
+            index=models.Index(fields=['project', 'latest_result'], name='test_cases_project_08dddf_idx'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='作成者'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_runs', to='projects.project'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='updated_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='更新者'),
+        ),
+        migrations.AddField(
+            model_name='testexecution',
+            name='test_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='executions', to='quality.testrun', verbose_name='テストラン'),
+        ),
+        migrations.AddIndex(
+            model_name='testexecution',
+            index=models.Index(fields=['test_run', 'test_case'], name='test_execut_test_ru_427216_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testrun',
+            index=models.Index(fields=['project', 'status'], name='test_runs_project_7f9d9c_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='testrun',
+            unique_together={('project', 'run_number')},
+        ),
+        migrations.RunPython(backfill_latest_execution, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quality', '0002_test_runs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['project', 'status', 'found_date', 'fixed_date'], name='bugs_project_1de2ef_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='bug',
+            name='bugs_project_c94c41_idx',
+        ),
+    ]
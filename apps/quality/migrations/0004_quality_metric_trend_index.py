@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quality', '0003_quality_metric_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qualitymetric',
+            index=models.Index(fields=['project', 'metric_type', 'measured_at'], name='quality_met_project_2762c2_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_version'),
+        ('quality', '0004_quality_metric_trend_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugDailyFlow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('severity', models.CharField(choices=[('HIGH', '高'), ('MEDIUM', '中'), ('LOW', '低')], max_length=10, verbose_name='重要度')),
+                ('day', models.DateField(verbose_name='日付')),
+                ('opened', models.PositiveIntegerField(default=0, verbose_name='起票数')),
+                ('fixed', models.PositiveIntegerField(default=0, verbose_name='修正数')),
+                ('verified', models.PositiveIntegerField(default=0, verbose_name='確認数')),
+                ('reopened', models.PositiveIntegerField(default=0, verbose_name='再オープン数')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bug_daily_flows', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'バグ日次推移',
+                'verbose_name_plural': 'バグ日次推移',
+                'db_table': 'bug_daily_flows',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['project', 'day'], name='bug_daily_f_project_1cf57d_idx'), models.Index(fields=['day'], name='bug_daily_f_day_98ecc6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bugdailyflow',
+            constraint=models.UniqueConstraint(fields=('project', 'severity', 'day'), name='bug_daily_flows_unique_day'),
+        ),
+    ]
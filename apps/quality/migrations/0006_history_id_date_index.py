@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quality', '0005_bug_daily_flow'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalbug',
+            index=models.Index(fields=['id', 'history_date'], name='quality_his_id_39e1a3_idx'),
+        ),
+    ]
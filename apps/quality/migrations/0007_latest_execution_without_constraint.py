@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quality', '0006_history_id_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='testcase',
+            name='latest_execution',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quality.testexecution', verbose_name='最新実行'),
+        ),
+    ]
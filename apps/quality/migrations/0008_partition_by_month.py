@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from apps.common.partitions import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+    """バグ履歴・テスト実行を月単位のレンジパーティションに変換（PostgreSQL のみ）"""
+
+    dependencies = [
+        ('quality', '0007_latest_execution_without_constraint'),
+    ]
+
+    operations = [
+        PartitionByMonth(table='quality_historicalbug', column='history_date'),
+        PartitionByMonth(table='test_executions', column='executed_at'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quality', '0008_partition_by_month'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bugdailyflow',
+            name='closed',
+            field=models.PositiveIntegerField(default=0, verbose_name='クローズ数'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from simple_history.models import HistoricalRecords
+from apps.common.history import IndexedHistoricalRecords
 from apps.accounts.models import User
 from apps.projects.models import AbstractBaseModel, ActiveManager, Project
 from apps.tasks.models import Task
@@ -141,7 +142,7 @@ class Bug(AbstractBaseModel):
     
     objects = ActiveManager()
     all_objects = models.Manager()
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
     
     class Meta:
         db_table = 'bugs'
@@ -149,7 +150,8 @@ class Bug(AbstractBaseModel):
         verbose_name_plural = 'バグ'
         ordering = ['-found_date', '-priority']
         indexes = [
-            models.Index(fields=['project', 'status']),
+            # 品質メトリクス集計用（状態別件数・修正所要日数）
+            models.Index(fields=['project', 'status', 'found_date', 'fixed_date']),
             models.Index(fields=['assignee', 'status']),
             models.Index(fields=['priority', 'status']),
         ]
@@ -159,6 +161,49 @@ class Bug(AbstractBaseModel):
         return f"{self.bug_number} - {self.title}"
 
 
+class BugDailyFlow(models.Model):
+    """バグ日次推移（ファクトテーブル）
+
+    プロジェクト・重要度・日付ごとの起票/修正/確認/再オープン/クローズ件数。
+    Bug のステータス変更時に加算する（apps.quality.bug_flow）。
+    """
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='bug_daily_flows'
+    )
+    severity = models.CharField(
+        max_length=10,
+        choices=Bug.SeverityChoices.choices,
+        verbose_name='重要度'
+    )
+    day = models.DateField(verbose_name='日付')
+    opened = models.PositiveIntegerField(default=0, verbose_name='起票数')
+    fixed = models.PositiveIntegerField(default=0, verbose_name='修正数')
+    verified = models.PositiveIntegerField(default=0, verbose_name='確認数')
+    reopened = models.PositiveIntegerField(default=0, verbose_name='再オープン数')
+    closed = models.PositiveIntegerField(default=0, verbose_name='クローズ数')
+    
+    class Meta:
+        db_table = 'bug_daily_flows'
+        verbose_name = 'バグ日次推移'
+        verbose_name_plural = 'バグ日次推移'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'severity', 'day'],
+                name='bug_daily_flows_unique_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'day']),
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} {self.severity} {self.day}"
+
+
 class BugComment(AbstractBaseModel):
     """バグコメント"""
     bug = models.ForeignKey(
@@ -246,9 +291,26 @@ class TestCase(AbstractBaseModel):
         verbose_name='関連タスク'
     )
     
+    # 最新実行結果（TestExecution 登録時に更新）
+    # test_executions は月単位のパーティションテーブルのため DB の外部キー制約は持たない（apps.common.partitions）
+    latest_execution = models.ForeignKey(
+        'TestExecution',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='最新実行'
+    )
+    latest_result = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name='最新結果'
+    )
+    
     objects = ActiveManager()
     all_objects = models.Manager()
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=['latest_execution', 'latest_result'])
     
     class Meta:
         db_table = 'test_cases'
@@ -257,6 +319,7 @@ class TestCase(AbstractBaseModel):
         ordering = ['test_case_number']
         indexes = [
             models.Index(fields=['project', 'category']),
+            models.Index(fields=['project', 'latest_result']),
         ]
         unique_together = [['project', 'test_case_number']]
     
@@ -264,6 +327,68 @@ class TestCase(AbstractBaseModel):
         return f"{self.test_case_number} - {self.title}"
 
 
+class TestRun(AbstractBaseModel):
+    """テストラン（実行サイクル）"""
+    
+    class StatusChoices(models.TextChoices):
+        PLANNED = 'PLANNED', '計画中'
+        IN_PROGRESS = 'IN_PROGRESS', '実施中'
+        COMPLETED = 'COMPLETED', '完了'
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='test_runs'
+    )
+    run_number = models.CharField(max_length=20, verbose_name='テストラン番号')
+    name = models.CharField(max_length=200, verbose_name='テストラン名')
+    description = models.TextField(blank=True, verbose_name='説明')
+    build_version = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='対象バージョン'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PLANNED,
+        verbose_name='ステータス'
+    )
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='開始日時')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='終了日時')
+    
+    # 集計（テストケースごとのラン内最新結果。結果登録時に更新）
+    total_count = models.IntegerField(default=0, verbose_name='実施ケース数')
+    passed_count = models.IntegerField(default=0, verbose_name='成功数')
+    failed_count = models.IntegerField(default=0, verbose_name='失敗数')
+    not_executed_count = models.IntegerField(default=0, verbose_name='未実施数')
+    not_applicable_count = models.IntegerField(default=0, verbose_name='N/A数')
+    
+    objects = ActiveManager()
+    all_objects = models.Manager()
+    
+    class Meta:
+        db_table = 'test_runs'
+        verbose_name = 'テストラン'
+        verbose_name_plural = 'テストラン'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project', 'status']),
+        ]
+        unique_together = [['project', 'run_number']]
+    
+    def __str__(self):
+        return f"{self.run_number} - {self.name}"
+    
+    @property
+    def pass_rate(self):
+        """成功率(%)（N/A を除く）"""
+        denominator = self.total_count - self.not_applicable_count
+        if denominator <= 0:
+            return 0
+        return round(self.passed_count * 100 / denominator, 1)
+
+
 class TestExecution(AbstractBaseModel):
     """テスト実行"""
     
@@ -278,6 +403,14 @@ class TestExecution(AbstractBaseModel):
         on_delete=models.CASCADE, 
         related_name='executions'
     )
+    test_run = models.ForeignKey(
+        TestRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='executions',
+        verbose_name='テストラン'
+    )
     executor = models.ForeignKey(
         User, 
         on_delete=models.SET_NULL, 
@@ -328,6 +461,7 @@ class TestExecution(AbstractBaseModel):
         indexes = [
             models.Index(fields=['test_case', 'executed_at']),
             models.Index(fields=['executor', 'result']),
+            models.Index(fields=['test_run', 'test_case']),
         ]
     
     def __str__(self):
@@ -368,6 +502,8 @@ class QualityMetric(AbstractBaseModel):
         indexes = [
             models.Index(fields=['project', 'measured_at']),
             models.Index(fields=['metric_type', 'measured_at']),
+            # 推移グラフ用（プロジェクト・指標ごとの系列）
+            models.Index(fields=['project', 'metric_type', 'measured_at']),
         ]
     
     def __str__(self):
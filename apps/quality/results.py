@@ -0,0 +1,178 @@
+"""
+テストラン・テスト実行結果の登録処理
+
+- 結果ファイル（CSV/JSON）を検証し、TestExecution を bulk_create で一括登録する
+- TestCase.latest_execution / latest_result（最新実行ポインタ）を維持し、
+  ケース単位の最新結果を相関サブクエリなしで参照できるようにする
+- TestRun の集計値（成功数・失敗数など）を登録時に更新する
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from apps.projects.versioning import bump_project_version
+from .models import TestCase, TestExecution, TestRun
+
+RESULT_FIELDS = ['test_case_number', 'result', 'actual_result', 'execution_time', 'notes']
+
+# 結果ファイルの文字コード（先頭から順に試す。Excel で保存した CSV は cp932）
+ENCODINGS = ('utf-8-sig', 'cp932')
+
+
+class ResultFileError(ValueError):
+    """結果ファイルの内容に誤りがある場合の例外"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('\n'.join(errors))
+
+
+def _decode(raw):
+    for encoding in ENCODINGS:
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ResultFileError(['ファイルの文字コードは UTF-8 または Shift_JIS（cp932）で保存してください'])
+
+
+def parse_result_file(uploaded_file):
+    """CSV/JSON の結果ファイルを辞書のリストに変換
+
+    CSV はヘッダー行に RESULT_FIELDS の列名を持つこと（test_case_number, result は必須）。
+    JSON は同じキーを持つオブジェクトの配列とする。
+    文字コードは UTF-8（BOM 付き可）または cp932（Shift_JIS）とする。
+    """
+    name = getattr(uploaded_file, 'name', '') or ''
+    raw = uploaded_file.read()
+    if isinstance(raw, bytes):
+        raw = _decode(raw)
+
+    if name.lower().endswith('.json'):
+        try:
+            records = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ResultFileError([f'JSONの形式が正しくありません: {e}'])
+        if not isinstance(records, list):
+            raise ResultFileError(['JSONはオブジェクトの配列で指定してください'])
+        return records
+
+    reader = csv.DictReader(io.StringIO(raw))
+    missing = {'test_case_number', 'result'} - set(reader.fieldnames or [])
+    if missing:
+        raise ResultFileError([f"CSVに必須列がありません: {', '.join(sorted(missing))}"])
+    return list(reader)
+
+
+def build_executions(test_run, records, executor):
+    """結果レコードを検証し、未保存の TestExecution のリストを返す
+
+    同じテストケースが複数行ある場合は最後の行を採用する。
+    """
+    case_ids = dict(
+        TestCase.objects.filter(project_id=test_run.project_id)
+        .values_list('test_case_number', 'id')
+    )
+    valid_results = set(TestExecution.ResultChoices.values)
+
+    errors = []
+    by_case = {}
+    for line, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append(f'{line}行目: 形式が正しくありません')
+            continue
+        number = str(record.get('test_case_number') or '').strip()
+        result = str(record.get('result') or '').strip().upper()
+        case_id = case_ids.get(number)
+        if case_id is None:
+            errors.append(f'{line}行目: テストケース番号「{number}」が見つかりません')
+            continue
+        if result not in valid_results:
+            errors.append(f'{line}行目: 結果「{result}」は不正です')
+            continue
+
+        execution_time = record.get('execution_time')
+        if execution_time in (None, ''):
+            execution_time = None
+        else:
+            try:
+                execution_time = Decimal(str(execution_time))
+            except InvalidOperation:
+                errors.append(f'{line}行目: 実行時間「{execution_time}」は数値ではありません')
+                continue
+
+        by_case[case_id] = TestExecution(
+            test_case_id=case_id,
+            test_run=test_run,
+            executor=executor,
+            result=result,
+            actual_result=record.get('actual_result') or '',
+            execution_time=execution_time,
+            notes=record.get('notes') or '',
+            created_by=executor,
+        )
+
+    if errors:
+        raise ResultFileError(errors)
+    return list(by_case.values())
+
+
+@transaction.atomic
+def record_executions(test_run, executions):
+    """テスト実行結果を一括登録し、最新実行ポインタとラン集計を更新する"""
+    created = TestExecution.objects.bulk_create(executions, batch_size=1000)
+
+    # bulk_create で主キーが返らないDBの場合はラン内の最新IDを取り直す
+    if any(execution.pk is None for execution in created):
+        latest_ids = dict(
+            TestExecution.objects.filter(test_run=test_run)
+            .values('test_case_id').annotate(last_id=Max('id'))
+            .values_list('test_case_id', 'last_id')
+        )
+        created = list(TestExecution.objects.filter(id__in=latest_ids.values()))
+
+    cases = [
+        TestCase(pk=execution.test_case_id, latest_execution_id=execution.pk, latest_result=execution.result)
+        for execution in created
+    ]
+    TestCase.objects.bulk_update(cases, ['latest_execution', 'latest_result'], batch_size=1000)
+
+    refresh_run_summary(test_run)
+    bump_project_version(test_run.project_id)
+    return created
+
+
+def refresh_run_summary(test_run):
+    """ラン内のテストケースごとの最新結果で集計値を更新する"""
+    latest_ids = (
+        TestExecution.objects.filter(test_run=test_run)
+        .values('test_case_id').annotate(last_id=Max('id')).values('last_id')
+    )
+    Result = TestExecution.ResultChoices
+    summary = TestExecution.objects.filter(id__in=latest_ids).aggregate(
+        total_count=Count('id'),
+        passed_count=Count('id', filter=Q(result=Result.PASSED)),
+        failed_count=Count('id', filter=Q(result=Result.FAILED)),
+        not_executed_count=Count('id', filter=Q(result=Result.NOT_EXECUTED)),
+        not_applicable_count=Count('id', filter=Q(result=Result.NOT_APPLICABLE)),
+    )
+    TestRun.all_objects.filter(pk=test_run.pk).update(**summary)
+    for field, value in summary.items():
+        setattr(test_run, field, value)
+
+
+def refresh_latest_execution(test_case_id):
+    """テストケースの最新実行ポインタを再計算する（実行結果の削除時など）"""
+    latest = (
+        TestExecution.objects.filter(test_case_id=test_case_id)
+        .order_by('-id').values_list('id', 'result').first()
+    )
+    latest_id, latest_result = latest if latest else (None, '')
+    TestCase.all_objects.filter(pk=test_case_id).update(
+        latest_execution_id=latest_id,
+        latest_result=latest_result,
+    )
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.common.events import track_project_events
+from apps.projects.models import Project
+from apps.projects.versioning import track_project_version
+from .models import Bug, TestCase, TestExecution, TestRun
+from .bug_flow import is_open, record_bug_flow, transition_events
+from .results import refresh_latest_execution, refresh_run_summary
+
+
+def _execution_project_id(execution):
+    """テスト実行の所属プロジェクトID"""
+    return TestCase.all_objects.filter(
+        pk=execution.test_case_id
+    ).values_list('project_id', flat=True).first()
+
+
+def _bug_event(bug):
+    """バグ一覧の1行を差し替えるための値"""
+    return {
+        'id': bug.pk,
+        'bug_number': bug.bug_number,
+        'title': bug.title,
+        'status': bug.status,
+        'priority': bug.priority,
+        'severity': bug.severity,
+        'assignee_id': bug.assignee_id,
+    }
+
+
+track_project_version(Bug, lambda instance: instance.project_id)
+track_project_version(TestCase, lambda instance: instance.project_id)
+track_project_version(TestExecution, _execution_project_id)
+track_project_events(Bug, 'bug', lambda instance: instance.project_id, _bug_event)
+
+
+@receiver(post_save, sender=TestExecution, dispatch_uid='test_execution_latest_pointer')
+def update_latest_execution(sender, instance, created, raw=False, **kwargs):
+    """1件登録時に最新実行ポインタとラン集計を更新（一括登録は results で処理）"""
+    if raw:
+        return
+    if created and not instance.is_deleted:
+        # より新しい実行が既に登録されている場合は更新しない
+        TestCase.all_objects.filter(pk=instance.test_case_id).filter(
+            Q(latest_execution__isnull=True) | Q(latest_execution_id__lt=instance.pk)
+        ).update(latest_execution_id=instance.pk, latest_result=instance.result)
+    else:
+        refresh_latest_execution(instance.test_case_id)
+    if instance.test_run_id:
+        refresh_run_summary(TestRun(pk=instance.test_run_id))
+
+
+@receiver(post_delete, sender=TestExecution, dispatch_uid='test_execution_latest_pointer_delete')
+def reset_latest_execution(sender, instance, **kwargs):
+    """実行結果の削除時に最新実行ポインタとラン集計を再計算"""
+    refresh_latest_execution(instance.test_case_id)
+    if instance.test_run_id:
+        refresh_run_summary(TestRun(pk=instance.test_run_id))
+
+
+@receiver(pre_save, sender=Bug, dispatch_uid='bug_flow_previous_status')
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    """更新前のプロジェクト・重要度・ステータス・削除フラグを保持（日次推移の加算用）"""
+    if raw or instance.pk is None:
+        instance._previous_flow_state = None
+        return
+    instance._previous_flow_state = Bug.all_objects.filter(pk=instance.pk).values_list(
+        'project_id', 'severity', 'status', 'is_deleted'
+    ).first()
+
+
+@receiver(post_save, sender=Bug, dispatch_uid='bug_flow_record')
+def update_bug_flow(sender, instance, created, raw=False, **kwargs):
+    """登録・ステータス変更・論理削除・プロジェクトや重要度の変更をバグ日次推移に加算"""
+    if raw:
+        return
+    current = (instance.project_id, instance.severity, instance.status, instance.is_deleted)
+    previous = None if created else getattr(instance, '_previous_flow_state', current)
+    day = timezone.localdate()
+    for (project_id, severity), events in transition_events(previous, current).items():
+        record_bug_flow(project_id, severity, day, events)
+
+
+@receiver(post_delete, sender=Bug, dispatch_uid='bug_flow_record_delete')
+def close_deleted_bug(sender, instance, **kwargs):
+    """未解決のバグの物理削除をクローズとして加算"""
+    if not is_open(instance.status, instance.is_deleted):
+        return
+    project_id, severity, day = instance.project_id, instance.severity, timezone.localdate()
+
+    def record():
+        # プロジェクトごと削除された場合は推移も削除済みのため加算しない
+        if Project.all_objects.filter(pk=project_id).exists():
+            record_bug_flow(project_id, severity, day, ['closed'])
+
+    transaction.on_commit(record)
@@ -0,0 +1,183 @@
+"""
+品質メトリクスの日次スナップショット
+
+プロジェクト別の指標を集計クエリ（GROUP BY）で算出し、QualityMetric に一括登録する。
+推移グラフはスナップショットのみを参照するため、バグ・テスト実行の生データは走査しない。
+
+指標（metric_type）:
+    open_bugs.<重要度>        未解決バグ数（重要度別）
+    pass_rate                 成功率（テストケースごとの最新結果）
+    test_coverage.<カテゴリ>  実行率（カテゴリ別、N/A を除く）
+    review_issue_closure      指摘事項のクローズ率
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.projects.models import Project
+from apps.reviews.models import ReviewIssue
+from .metrics import OPEN_STATUSES
+from .models import Bug, QualityMetric, TestCase, TestExecution
+
+PASS_RATE = 'pass_rate'
+REVIEW_ISSUE_CLOSURE = 'review_issue_closure'
+OPEN_BUGS_PREFIX = 'open_bugs.'
+TEST_COVERAGE_PREFIX = 'test_coverage.'
+
+# 目標値
+TARGETS = {
+    PASS_RATE: Decimal('95'),
+    REVIEW_ISSUE_CLOSURE: Decimal('100'),
+    OPEN_BUGS_PREFIX: Decimal('0'),
+    TEST_COVERAGE_PREFIX: Decimal('100'),
+}
+
+CLOSED_ISSUE_STATUSES = [
+    ReviewIssue.StatusChoices.RESOLVED,
+    ReviewIssue.StatusChoices.VERIFIED,
+    ReviewIssue.StatusChoices.REJECTED,
+]
+
+
+def snapshot_metric_types():
+    """スナップショットで登録する metric_type の一覧"""
+    return (
+        [f'{OPEN_BUGS_PREFIX}{value}' for value in Bug.SeverityChoices.values]
+        + [PASS_RATE]
+        + [f'{TEST_COVERAGE_PREFIX}{value}' for value in TestCase.CategoryChoices.values]
+        + [REVIEW_ISSUE_CLOSURE]
+    )
+
+
+def _rate(numerator, denominator):
+    if not denominator:
+        return Decimal('0')
+    return (Decimal(numerator) * 100 / denominator).quantize(Decimal('0.01'))
+
+
+def _open_bugs(project_ids):
+    """(プロジェクトID, 重要度) ごとの未解決バグ数"""
+    rows = (
+        Bug.objects.filter(project_id__in=project_ids, status__in=OPEN_STATUSES)
+        .values_list('project_id', 'severity').annotate(count=Count('id')).order_by()
+    )
+    return {(project_id, severity): count for project_id, severity, count in rows}
+
+
+def _test_counts(project_ids):
+    """(プロジェクトID, カテゴリ) ごとの (ケース数, 実行済み, 成功, N/A)"""
+    Result = TestExecution.ResultChoices
+    rows = (
+        TestCase.objects.filter(project_id__in=project_ids)
+        .values_list('project_id', 'category')
+        .annotate(
+            total=Count('id'),
+            executed=Count('id', filter=Q(latest_result__in=[Result.PASSED, Result.FAILED])),
+            passed=Count('id', filter=Q(latest_result=Result.PASSED)),
+            not_applicable=Count('id', filter=Q(latest_result=Result.NOT_APPLICABLE)),
+        ).order_by()
+    )
+    return {(row[0], row[1]): row[2:] for row in rows}
+
+
+def _review_issue_counts(project_ids):
+    """プロジェクトごとの (指摘数, クローズ数)"""
+    rows = (
+        ReviewIssue.objects.filter(review__project_id__in=project_ids)
+        .values_list('review__project_id')
+        .annotate(total=Count('id'), closed=Count('id', filter=Q(status__in=CLOSED_ISSUE_STATUSES)))
+        .order_by()
+    )
+    return {project_id: (total, closed) for project_id, total, closed in rows}
+
+
+def build_snapshot(measured_at, project_ids=None):
+    """指定日のスナップショット（未保存の QualityMetric のリスト）を生成"""
+    projects = Project.objects.all()
+    if project_ids:
+        projects = projects.filter(id__in=project_ids)
+    project_ids = list(projects.values_list('id', flat=True))
+
+    open_bugs = _open_bugs(project_ids)
+    tests = _test_counts(project_ids)
+    issues = _review_issue_counts(project_ids)
+    severity_labels = dict(Bug.SeverityChoices.choices)
+    category_labels = dict(TestCase.CategoryChoices.choices)
+
+    metrics = []
+
+    def add(project_id, metric_type, name, target, value, unit):
+        metrics.append(QualityMetric(
+            project_id=project_id,
+            metric_name=name,
+            metric_type=metric_type,
+            target_value=target,
+            actual_value=value,
+            unit=unit,
+            measured_at=measured_at,
+        ))
+
+    for project_id in project_ids:
+        for severity, label in severity_labels.items():
+            add(project_id, f'{OPEN_BUGS_PREFIX}{severity}', f'未解決バグ数（重要度: {label}）',
+                TARGETS[OPEN_BUGS_PREFIX], open_bugs.get((project_id, severity), 0), '件')
+
+        executed_total = passed_total = 0
+        for category, label in category_labels.items():
+            total, executed, passed, not_applicable = tests.get((project_id, category), (0, 0, 0, 0))
+            executed_total += executed
+            passed_total += passed
+            add(project_id, f'{TEST_COVERAGE_PREFIX}{category}', f'テスト実行率（{label}）',
+                TARGETS[TEST_COVERAGE_PREFIX], _rate(executed, total - not_applicable), '%')
+        add(project_id, PASS_RATE, 'テスト成功率', TARGETS[PASS_RATE], _rate(passed_total, executed_total), '%')
+
+        total, closed = issues.get(project_id, (0, 0))
+        add(project_id, REVIEW_ISSUE_CLOSURE, '指摘事項クローズ率',
+            TARGETS[REVIEW_ISSUE_CLOSURE], _rate(closed, total), '%')
+
+    return metrics
+
+
+@transaction.atomic
+def save_snapshot(measured_at, project_ids=None):
+    """指定日のスナップショットを登録（同日の既存スナップショットは置き換える）
+
+    Returns:
+        登録件数
+    """
+    metrics = build_snapshot(measured_at, project_ids)
+    existing = QualityMetric.all_objects.filter(
+        measured_at=measured_at,
+        metric_type__in=snapshot_metric_types(),
+    )
+    if project_ids:
+        existing = existing.filter(project_id__in=project_ids)
+    existing.delete()
+    QualityMetric.objects.bulk_create(metrics, batch_size=1000)
+    return len(metrics)
+
+
+def get_trend_series(project_id, metric_types, date_from=None, date_to=None):
+    """推移グラフ用の系列 {'labels': [日付...], 'series': {metric_type: [値...]}} を返す"""
+    queryset = QualityMetric.objects.filter(project_id=project_id, metric_type__in=metric_types)
+    if date_from:
+        queryset = queryset.filter(measured_at__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(measured_at__lte=date_to)
+    rows = queryset.order_by('measured_at').values_list('measured_at', 'metric_type', 'actual_value')
+
+    labels = []
+    index = {}
+    values = {}
+    for measured_at, metric_type, value in rows:
+        if measured_at not in index:
+            index[measured_at] = len(labels)
+            labels.append(measured_at)
+        values[(measured_at, metric_type)] = float(value)
+
+    series = {
+        metric_type: [values.get((day, metric_type)) for day in labels]
+        for metric_type in metric_types
+    }
+    return {'labels': [day.isoformat() for day in labels], 'series': series}
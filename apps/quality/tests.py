@@ -1,3 +1,433 @@
-from django.test import TestCase
+import io
+import json
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.common.partitions import add_months, partition_month, partition_name, plan_partitions
+from apps.projects.models import Project
+from apps.quality.bug_flow import get_bug_flow_series, rebuild_bug_flow
+from apps.quality.metrics import OPEN_STATUSES, compute_quality_metrics
+from apps.quality.models import Bug, BugDailyFlow, QualityMetric, TestCase as QualityTestCase, TestExecution, TestRun
+from apps.quality.snapshots import get_trend_series, snapshot_metric_types
+from apps.quality.results import ResultFileError, build_executions, parse_result_file, record_executions
+
+
+class TestRunUploadTest(TestCase):
+    """テストラン・結果一括登録のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tester',
+            email='tester@example.com',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テスター'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=timezone.now().date(),
+            end_date=timezone.now().date() + timedelta(days=90),
+            created_by=self.user
+        )
+        self.cases = [
+            QualityTestCase.objects.create(
+                project=self.project,
+                test_case_number=f'TC{i:03d}',
+                title=f'テストケース{i}',
+                test_steps='手順',
+                expected_result='期待結果',
+                created_by=self.user
+            )
+            for i in range(1, 4)
+        ]
+        self.run = TestRun.objects.create(
+            project=self.project,
+            run_number='RUN001',
+            name='回帰テスト',
+            created_by=self.user
+        )
+    
+    def _upload(self, name, content):
+        return self.client.post(
+            reverse('quality:testrun_upload', kwargs={'pk': self.run.pk}),
+            {'result_file': SimpleUploadedFile(name, content.encode('utf-8'))}
+        )
+    
+    def test_csv_upload_creates_executions_and_updates_pointers(self):
+        """CSVアップロードで実行結果が登録され、最新実行ポインタと集計が更新されること"""
+        response = self._upload(
+            'results.csv',
+            'test_case_number,result,execution_time\n'
+            'TC001,PASSED,1.5\n'
+            'TC002,FAILED,\n'
+            'TC003,NOT_APPLICABLE,\n'
+        )
+        self.assertRedirects(response, reverse('quality:testrun_detail', kwargs={'pk': self.run.pk}))
+        self.assertEqual(TestExecution.objects.filter(test_run=self.run).count(), 3)
+        
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.total_count, 3)
+        self.assertEqual(self.run.passed_count, 1)
+        self.assertEqual(self.run.failed_count, 1)
+        self.assertEqual(self.run.pass_rate, 50.0)
+        
+        case = QualityTestCase.objects.get(pk=self.cases[1].pk)
+        self.assertEqual(case.latest_result, 'FAILED')
+        self.assertEqual(case.latest_execution.test_run, self.run)
+    
+    def test_json_upload_keeps_last_row_per_case(self):
+        """JSONで同一ケースが複数ある場合は最後の行が採用されること"""
+        records = [
+            {'test_case_number': 'TC001', 'result': 'failed'},
+            {'test_case_number': 'TC001', 'result': 'passed'},
+        ]
+        self._upload('results.json', json.dumps(records))
+        self.assertEqual(TestExecution.objects.filter(test_run=self.run).count(), 1)
+        self.assertEqual(QualityTestCase.objects.get(pk=self.cases[0].pk).latest_result, 'PASSED')
+    
+    def test_invalid_rows_are_rejected(self):
+        """不正な行が含まれる場合は1件も登録されないこと"""
+        response = self._upload(
+            'results.csv',
+            'test_case_number,result\nTC001,PASSED\nTC999,PASSED\nTC002,UNKNOWN\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['form'].errors['result_file']), 2)
+        self.assertFalse(TestExecution.objects.exists())
+    
+    def test_missing_columns(self):
+        """必須列がないCSVはエラーになること"""
+        with self.assertRaises(ResultFileError):
+            parse_result_file(SimpleUploadedFile('results.csv', b'test_case_number\nTC001\n'))
+    
+    def test_cp932_file(self):
+        """Excel で保存した cp932 の CSV も登録でき、読めない文字コードはエラーになること"""
+        records = parse_result_file(SimpleUploadedFile(
+            'results.csv', 'test_case_number,result,notes\nTC001,PASSED,確認済み\n'.encode('cp932')
+        ))
+        self.assertEqual(records, [{'test_case_number': 'TC001', 'result': 'PASSED', 'notes': '確認済み'}])
+        
+        response = self.client.post(
+            reverse('quality:testrun_upload', kwargs={'pk': self.run.pk}),
+            {'result_file': SimpleUploadedFile('results.csv', b'test_case_number,result\nTC001,PASSED\x81\x7f\n')}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('文字コード', response.context['form'].errors['result_file'][0])
+    
+    def test_single_execution_updates_pointer(self):
+        """1件登録・削除時にも最新実行ポインタが維持されること"""
+        record_executions(self.run, build_executions(
+            self.run, [{'test_case_number': 'TC001', 'result': 'FAILED'}], self.user
+        ))
+        retest = TestExecution.objects.create(
+            test_case=self.cases[0], test_run=self.run, executor=self.user, result='PASSED'
+        )
+        case = QualityTestCase.objects.get(pk=self.cases[0].pk)
+        self.assertEqual(case.latest_execution_id, retest.pk)
+        self.assertEqual(case.latest_result, 'PASSED')
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.passed_count, 1)
+        
+        retest.delete()
+        case.refresh_from_db()
+        self.assertEqual(case.latest_result, 'FAILED')
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.failed_count, 1)
+
+
+class QualityMetricsTest(TestCase):
+    """品質メトリクス集計のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='qa',
+            email='qa@example.com',
+            password='testpass123',
+            employee_id='EMP002',
+            display_name='品質担当'
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='対象', start_date=today,
+            end_date=today + timedelta(days=90), created_by=self.user
+        )
+        self.other = Project.objects.create(
+            project_code='PRJ002', name='対象外', start_date=today,
+            end_date=today + timedelta(days=90), created_by=self.user
+        )
+        cases = [
+            QualityTestCase.objects.create(
+                project=self.project, test_case_number=f'TC{i}', title=f'ケース{i}',
+                test_steps='手順', expected_result='期待結果'
+            )
+            for i in range(4)
+        ]
+        # TC0 は失敗後に再実行で成功（成功1件として数える）
+        for case, result in [(cases[0], 'FAILED'), (cases[0], 'PASSED'), (cases[1], 'FAILED'), (cases[2], 'NOT_APPLICABLE')]:
+            TestExecution.objects.create(test_case=case, executor=self.user, result=result)
+        
+        for i, (status, fix_days) in enumerate([('NEW', None), ('FIXED', 2), ('VERIFIED', 4)]):
+            bug = Bug.objects.create(
+                project=self.project, bug_number=f'BUG{i}', title='不具合',
+                description='詳細', status=status
+            )
+            if fix_days is not None:
+                Bug.objects.filter(pk=bug.pk).update(
+                    found_date=today - timedelta(days=fix_days), fixed_date=today
+                )
+        Bug.objects.create(project=self.other, bug_number='BUG9', title='別件', description='詳細')
+    
+    def test_project_metrics(self):
+        """最新結果に基づく成功率とバグ指標がプロジェクト別に集計されること"""
+        metrics = compute_quality_metrics([self.project.pk])
+        self.assertEqual(len(metrics['projects']), 1)
+        row = metrics['projects'][0]
+        self.assertEqual(row['total_testcases'], 4)
+        self.assertEqual(row['executed_tests'], 2)
+        self.assertEqual(row['pass_rate'], 50.0)
+        self.assertEqual(row['execution_rate'], round(2 * 100 / 3, 1))
+        self.assertEqual(row['open_bugs'], 1)
+        self.assertEqual(row['fixed_bugs'], 1)
+        self.assertEqual(row['verified_bugs'], 1)
+        self.assertEqual(row['defect_density'], 75.0)
+        self.assertEqual(row['mean_time_to_fix'], 3.0)
+    
+    def test_summary_over_all_projects(self):
+        """全プロジェクト合計が算出されること"""
+        summary = compute_quality_metrics()['summary']
+        self.assertEqual(summary['total_bugs'], 4)
+        self.assertEqual(summary['open_bugs'], 2)
+        self.assertEqual(summary['mean_time_to_fix'], 3.0)
+    
+    def test_report_view_project_filter(self):
+        """品質レポートがプロジェクトで絞り込めること"""
+        response = self.client.get(reverse('quality:quality_report'), {'project': self.other.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['metrics']['summary']['total_bugs'], 1)
+        self.assertEqual(len(response.context['recent_bugs']), 1)
+    
+    def test_snapshot_command(self):
+        """スナップショットが一括登録され、同日の再実行で置き換わること"""
+        today = timezone.localdate()
+        call_command('snapshot_quality_metrics', stdout=io.StringIO())
+        call_command('snapshot_quality_metrics', stdout=io.StringIO())
+        
+        per_project = len(snapshot_metric_types())
+        self.assertEqual(QualityMetric.objects.filter(measured_at=today).count(), per_project * 2)
+        metric = QualityMetric.objects.get(project=self.project, metric_type='pass_rate')
+        self.assertEqual(float(metric.actual_value), 50.0)
+        self.assertEqual(
+            QualityMetric.objects.get(project=self.project, metric_type='open_bugs.MEDIUM').actual_value, 1
+        )
+        
+        trend = get_trend_series(self.project.pk, ['pass_rate', 'review_issue_closure'])
+        self.assertEqual(trend['labels'], [today.isoformat()])
+        self.assertEqual(trend['series']['pass_rate'], [50.0])
+        
+        response = self.client.get(reverse('quality:quality_trend'), {'project': self.project.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['has_data'])
+
+
+class BugDailyFlowTest(TestCase):
+    """バグ日次推移のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='qa',
+            email='qa@example.com',
+            password='testpass123',
+            employee_id='EMP003',
+            display_name='品質担当'
+        )
+        self.client.force_login(self.user)
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='対象', start_date=today,
+            end_date=today + timedelta(days=90), created_by=self.user
+        )
+    
+    def _create_bug(self, number, severity='HIGH'):
+        return Bug.objects.create(
+            project=self.project, bug_number=number, title='不具合',
+            description='詳細', severity=severity
+        )
+    
+    def _flow_counts(self):
+        return list(BugDailyFlow.objects.order_by('severity').values_list(
+            'severity', 'opened', 'fixed', 'verified', 'reopened', 'closed'
+        ))
+    
+    def test_status_changes_are_counted(self):
+        """登録・ステータス変更で当日の件数が加算されること"""
+        bug = self._create_bug('BUG1')
+        self._create_bug('BUG2', severity='LOW')
+        for status in ['IN_PROGRESS', 'FIXED', 'REOPENED', 'FIXED', 'VERIFIED']:
+            bug.status = status
+            bug.save()
+        # ステータスが変わらない更新は加算しない
+        bug.title = 'タイトル変更'
+        bug.save()
+        
+        self.assertEqual(self._flow_counts(), [('HIGH', 1, 2, 1, 1, 2), ('LOW', 1, 0, 0, 0, 0)])
+    
+    def _remaining(self):
+        today = timezone.localdate()
+        return get_bug_flow_series(today, today, self.project.pk)['remaining'][-1]
+    
+    def test_closed_without_fix(self):
+        """修正を経ずに未解決から外れたバグも残件数から除かれること"""
+        rejected = self._create_bug('BUG1')
+        verified = self._create_bug('BUG2')
+        deleted = self._create_bug('BUG3')
+        Bug.objects.create(
+            project=self.project, bug_number='BUG4', title='不具合',
+            description='詳細', severity='HIGH', status='REJECTED'
+        )
+        self.assertEqual(self._remaining(), 3)
+        
+        rejected.status = 'REJECTED'
+        rejected.save()
+        verified.status = 'VERIFIED'
+        verified.save()
+        deleted.is_deleted = True
+        deleted.save()
+        self.assertEqual(self._remaining(), 0)
+        
+        # 却下からの再オープンは1回だけ戻る
+        rejected.status = 'REOPENED'
+        rejected.save()
+        rejected.status = 'IN_PROGRESS'
+        rejected.save()
+        self.assertEqual(self._remaining(), 1)
+        self.assertEqual(self._flow_counts(), [('HIGH', 4, 0, 1, 1, 4)])
+        self.assertEqual(self._remaining(), Bug.objects.filter(status__in=OPEN_STATUSES).count())
+    
+    def test_severity_change_moves_open_bug(self):
+        """未解決のバグの重要度を変更すると、重要度ごとの残件数が移り、再集計結果も一致すること"""
+        bug = self._create_bug('BUG1', severity='HIGH')
+        bug.severity = 'LOW'
+        bug.save()
+        today = timezone.localdate()
+        self.assertEqual(get_bug_flow_series(today, today, self.project.pk, 'HIGH')['remaining'], [0])
+        self.assertEqual(get_bug_flow_series(today, today, self.project.pk, 'LOW')['remaining'], [1])
+        bug.status = 'FIXED'
+        bug.save()
+        closed = self._create_bug('BUG2', severity='HIGH')
+        closed.status = 'REJECTED'
+        closed.save()
+        # 解決済みのバグの重要度変更は残件数に影響しない
+        closed.severity = 'LOW'
+        closed.save()
+        
+        for severity in ('HIGH', 'LOW'):
+            series = get_bug_flow_series(today, today, self.project.pk, severity)
+            self.assertEqual(series['remaining'], [0])
+        self.assertEqual(self._flow_counts(), [('HIGH', 2, 0, 0, 0, 2), ('LOW', 0, 1, 0, 1, 1)])
+        
+        incremental = self._flow_counts()
+        BugDailyFlow.objects.all().delete()
+        rebuild_bug_flow([self.project.pk])
+        self.assertEqual(self._flow_counts(), incremental)
+    
+    def test_hard_delete_closes_open_bug(self):
+        """未解決のバグを物理削除するとクローズとして加算されること"""
+        bug = self._create_bug('BUG1')
+        with self.captureOnCommitCallbacks(execute=True):
+            bug.delete()
+        self.assertEqual(self._remaining(), 0)
+    
+    def test_rebuild_matches_incremental(self):
+        """履歴からの再集計結果が逐次加算の結果と一致すること"""
+        bug = self._create_bug('BUG1')
+        self._create_bug('BUG2', severity='LOW')
+        for status in ['FIXED', 'REOPENED', 'FIXED']:
+            bug.status = status
+            bug.save()
+        rejected = self._create_bug('BUG3')
+        rejected.status = 'REJECTED'
+        rejected.save()
+        deleted = self._create_bug('BUG4', severity='LOW')
+        deleted.is_deleted = True
+        deleted.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_bug('BUG5', severity='LOW').delete()
+        incremental = self._flow_counts()
+        
+        BugDailyFlow.objects.all().delete()
+        self.assertEqual(rebuild_bug_flow(), 2)
+        self.assertEqual(self._flow_counts(), incremental)
+    
+    def test_flow_series_and_view(self):
+        """日別系列と残件数が算出され、画面が表示されること"""
+        today = timezone.localdate()
+        BugDailyFlow.objects.create(
+            project=self.project, severity='HIGH', day=today - timedelta(days=10), opened=5
+        )
+        BugDailyFlow.objects.create(
+            project=self.project, severity='HIGH', day=today - timedelta(days=1), opened=1, fixed=3, closed=3
+        )
+        series = get_bug_flow_series(today - timedelta(days=2), today, self.project.pk)
+        self.assertEqual(len(series['labels']), 3)
+        self.assertEqual(series['fixed'], [0, 3, 0])
+        self.assertEqual(series['remaining'], [5, 3, 3])
+        
+        response = self.client.get(reverse('quality:bug_flow'), {'project': self.project.pk, 'days': 30})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_export_as_of(self):
+        """バグCSVを as_of 指定でその時点の状態で出力できること"""
+        bug = self._create_bug('BUG-001')
+        moment = timezone.now()
+        bug.status = Bug.StatusChoices.FIXED
+        bug.save()
+        self._create_bug('BUG-002')
+        
+        response = self.client.get(reverse('quality:bug_export_csv'), {
+            'as_of': moment.isoformat(), 'project': self.project.pk,
+        })
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('BUG-001', lines[1])
+        self.assertIn(',NEW,', lines[1])
+
+
+class PartitionPlanTest(SimpleTestCase):
+    """月単位パーティションの作成・切り離し対象のテスト"""
+
+    def test_add_months_across_year(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+
+    def test_partition_name_round_trip(self):
+        name = partition_name('test_executions', date(2026, 3, 1))
+        self.assertEqual(name, 'test_executions_p202603')
+        self.assertEqual(partition_month(name), date(2026, 3, 1))
+        self.assertIsNone(partition_month('test_executions_default'))
+
+    def test_plan_creates_missing_future_months(self):
+        create, detach = plan_partitions([date(2026, 10, 1), date(2026, 11, 1)], date(2026, 10, 19), ahead=3)
+        self.assertEqual(create, [date(2026, 12, 1), date(2027, 1, 1)])
+        self.assertEqual(detach, [])
+
+    def test_plan_detaches_months_outside_retention(self):
+        existing = [date(2026, month, 1) for month in range(1, 11)]
+        create, detach = plan_partitions(existing, date(2026, 10, 19), ahead=0, retain=6)
+        self.assertEqual(create, [])
+        self.assertEqual(detach, [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)])
+
+    def test_command_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL ではパーティションを作成できるため対象外')
+        with self.assertRaises(CommandError):
+            call_command('manage_partitions', dry_run=True, stdout=io.StringIO())
@@ -7,6 +7,8 @@ urlpatterns = [
     # バグ管理
     path('bugs/', views.BugListView.as_view(), name='bug_list'),
     path('bugs/create/', views.BugCreateView.as_view(), name='bug_create'),
+    path('bugs/export/csv/', views.BugCsvExportView.as_view(), name='bug_export_csv'),
+    path('bugs/history/export/csv/', views.BugHistoryCsvExportView.as_view(), name='bug_history_export_csv'),
     path('bugs/<int:pk>/', views.BugDetailView.as_view(), name='bug_detail'),
     path('bugs/<int:pk>/update/', views.BugUpdateView.as_view(), name='bug_update'),
     path('bugs/<int:pk>/delete/', views.BugDeleteView.as_view(), name='bug_delete'),
@@ -19,7 +21,16 @@ urlpatterns = [
     
     # テスト実行
     path('testcases/<int:testcase_pk>/execute/', views.TestExecutionCreateView.as_view(), name='test_execute'),
+    path('executions/export/csv/', views.TestExecutionCsvExportView.as_view(), name='test_execution_export_csv'),
+    
+    # テストラン
+    path('runs/', views.TestRunListView.as_view(), name='testrun_list'),
+    path('runs/create/', views.TestRunCreateView.as_view(), name='testrun_create'),
+    path('runs/<int:pk>/', views.TestRunDetailView.as_view(), name='testrun_detail'),
+    path('runs/<int:pk>/upload/', views.TestRunResultUploadView.as_view(), name='testrun_upload'),
     
     # 品質レポート
     path('report/', views.QualityReportView.as_view(), name='quality_report'),
+    path('trend/', views.QualityTrendView.as_view(), name='quality_trend'),
+    path('bug-flow/', views.BugFlowView.as_view(), name='bug_flow'),
 ]
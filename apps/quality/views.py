@@ -1,7 +1,25 @@
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from .models import Bug, TestCase, TestExecution
+from django.shortcuts import get_object_or_404
+from django.contrib import messages
+from django.utils import timezone
+from datetime import timedelta
+from apps.common.activity import object_timeline
+from apps.common.cache import get_or_build
+from apps.common.csv_export import CsvExportView
+from apps.common.json_payload import dumps_for_html
+from apps.common.mixins import ReplicaReadMixin
+from .models import Bug, TestCase, TestExecution, TestRun
+from .forms import TestRunResultUploadForm
+from .results import ResultFileError, build_executions, parse_result_file, record_executions
+from .bug_flow import get_bug_flow_series
+from .metrics import compute_quality_metrics
+from .snapshots import (
+    OPEN_BUGS_PREFIX, PASS_RATE, REVIEW_ISSUE_CLOSURE, TEST_COVERAGE_PREFIX, get_trend_series,
+)
+from .filters import filter_bugs
+from .exports import export_bugs, export_bug_history, export_test_executions
 
 
 class BugListView(LoginRequiredMixin, ListView):
@@ -15,17 +33,29 @@ class BugListView(LoginRequiredMixin, ListView):
         queryset = Bug.objects.select_related('project', 'assignee', 'reporter')
         
         # フィルター
-        status = self.request.GET.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        priority = self.request.GET.get('priority')
-        if priority:
-            queryset = queryset.filter(priority=priority)
+        queryset = filter_bugs(queryset, self.request.GET)
         
         return queryset.order_by('-priority', '-found_date')
 
 
+class BugCsvExportView(CsvExportView):
+    """バグ一覧CSV出力（一覧と同じ絞り込み条件）"""
+    filename_prefix = 'bugs'
+    export_function = staticmethod(export_bugs)
+
+
+class BugHistoryCsvExportView(CsvExportView):
+    """バグ変更履歴CSV出力"""
+    filename_prefix = 'bug_history'
+    export_function = staticmethod(export_bug_history)
+
+
+class TestExecutionCsvExportView(CsvExportView):
+    """テスト実行結果CSV出力"""
+    filename_prefix = 'test_executions'
+    export_function = staticmethod(export_test_executions)
+
+
 class BugDetailView(LoginRequiredMixin, DetailView):
     """バグ詳細"""
     model = Bug
@@ -36,6 +66,11 @@ class BugDetailView(LoginRequiredMixin, DetailView):
         return Bug.objects.select_related(
             'project', 'assignee', 'reporter', 'related_task'
         ).prefetch_related('comments__user')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['timeline'] = object_timeline('bug', self.object.pk)
+        return context
 
 
 class BugCreateView(LoginRequiredMixin, CreateView):
@@ -153,29 +188,195 @@ class TestExecutionCreateView(LoginRequiredMixin, CreateView):
                           kwargs={'pk': self.kwargs['testcase_pk']})
 
 
-class QualityReportView(LoginRequiredMixin, TemplateView):
+class TestRunListView(LoginRequiredMixin, ListView):
+    """テストラン一覧"""
+    model = TestRun
+    template_name = 'quality/testrun_list.html'
+    context_object_name = 'testruns'
+    paginate_by = 50
+    
+    def get_queryset(self):
+        queryset = TestRun.objects.select_related('project')
+        project_id = self.request.GET.get('project')
+        if project_id:
+            queryset = queryset.filter(project_id=project_id)
+        return queryset.order_by('-created_at')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        from apps.projects.models import Project
+        context['projects'] = Project.objects.all()
+        return context
+
+
+class TestRunDetailView(LoginRequiredMixin, DetailView):
+    """テストラン詳細"""
+    model = TestRun
+    template_name = 'quality/testrun_detail.html'
+    context_object_name = 'testrun'
+    
+    def get_queryset(self):
+        return TestRun.objects.select_related('project')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['executions'] = self.object.executions.filter(
+            result=TestExecution.ResultChoices.FAILED
+        ).select_related('test_case', 'executor').order_by('test_case__test_case_number')[:200]
+        return context
+
+
+class TestRunCreateView(LoginRequiredMixin, CreateView):
+    """テストラン作成"""
+    model = TestRun
+    template_name = 'quality/testrun_form.html'
+    fields = ['project', 'run_number', 'name', 'description', 'build_version', 'status']
+    
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        return super().form_valid(form)
+    
+    def get_success_url(self):
+        return reverse_lazy('quality:testrun_detail', kwargs={'pk': self.object.pk})
+
+
+class TestRunResultUploadView(LoginRequiredMixin, FormView):
+    """テスト結果一括登録（CSV / JSON）"""
+    form_class = TestRunResultUploadForm
+    template_name = 'quality/testrun_upload.html'
+    
+    def dispatch(self, request, *args, **kwargs):
+        self.testrun = get_object_or_404(TestRun, pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+    
+    def form_valid(self, form):
+        try:
+            records = parse_result_file(form.cleaned_data['result_file'])
+            executions = build_executions(self.testrun, records, self.request.user)
+        except ResultFileError as e:
+            # 先頭20件までを表示
+            for error in e.errors[:20]:
+                form.add_error('result_file', error)
+            return self.form_invalid(form)
+        
+        record_executions(self.testrun, executions)
+        messages.success(self.request, f'{len(executions)}件のテスト結果を登録しました。')
+        return super().form_valid(form)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['testrun'] = self.testrun
+        return context
+    
+    def get_success_url(self):
+        return reverse_lazy('quality:testrun_detail', kwargs={'pk': self.testrun.pk})
+
+
+class QualityReportView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     """品質レポート"""
     template_name = 'quality/quality_report.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        from apps.projects.models import Project
         
-        # バグ統計
-        context['total_bugs'] = Bug.objects.count()
-        context['open_bugs'] = Bug.objects.filter(
-            status__in=['NEW', 'IN_PROGRESS', 'REOPENED']
-        ).count()
-        context['fixed_bugs'] = Bug.objects.filter(status='FIXED').count()
+        project_id = self.request.GET.get('project')
+        project_id = int(project_id) if project_id and project_id.isdigit() else None
         
-        # テスト統計
-        context['total_testcases'] = TestCase.objects.count()
-        context['executed_tests'] = TestExecution.objects.filter(
-            result='PASSED'
-        ).count()
+        # プロジェクト別メトリクス（データ版数でキャッシュ）
+        context['metrics'] = get_or_build(
+            'quality_report',
+            lambda: compute_quality_metrics([project_id] if project_id else None),
+            project_id=project_id,
+        )
+        context['projects'] = Project.objects.all()
+        context['selected_project'] = project_id
         
         # 最新バグ一覧
-        context['recent_bugs'] = Bug.objects.select_related(
-            'project', 'assignee', 'reporter'
-        ).order_by('-found_date')[:10]
+        recent_bugs = Bug.objects.select_related('project', 'assignee', 'reporter')
+        if project_id:
+            recent_bugs = recent_bugs.filter(project_id=project_id)
+        context['recent_bugs'] = recent_bugs.order_by('-found_date')[:10]
+        
+        return context
+
+
+class QualityTrendView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
+    """品質メトリクス推移（日次スナップショット）"""
+    template_name = 'quality/quality_trend.html'
+    period_choices = [30, 90, 180, 365]
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        from apps.projects.models import Project
+        
+        projects = list(Project.objects.all())
+        project_id = self.request.GET.get('project')
+        project_id = int(project_id) if project_id and project_id.isdigit() else None
+        if project_id is None and projects:
+            project_id = projects[0].pk
+        
+        days = self.request.GET.get('days')
+        days = int(days) if days and days.isdigit() and int(days) in self.period_choices else 90
+        date_from = timezone.localdate() - timedelta(days=days)
+        
+        severity_types = [f'{OPEN_BUGS_PREFIX}{value}' for value in Bug.SeverityChoices.values]
+        coverage_types = [f'{TEST_COVERAGE_PREFIX}{value}' for value in TestCase.CategoryChoices.values]
+        trend = get_trend_series(
+            project_id,
+            severity_types + [PASS_RATE] + coverage_types + [REVIEW_ISSUE_CLOSURE],
+            date_from=date_from,
+        )
+        series = trend['series']
+        context['trend_json'] = dumps_for_html({
+            'labels': trend['labels'],
+            'open_bugs': [
+                {'label': label, 'data': series[f'{OPEN_BUGS_PREFIX}{value}']}
+                for value, label in Bug.SeverityChoices.choices
+            ],
+            'rates': [{'label': 'テスト成功率', 'data': series[PASS_RATE]}] + [
+                {'label': f'実行率（{label}）', 'data': series[f'{TEST_COVERAGE_PREFIX}{value}']}
+                for value, label in TestCase.CategoryChoices.choices
+            ],
+            'review_issue_closure': series[REVIEW_ISSUE_CLOSURE],
+        })
+        context['has_data'] = bool(trend['labels'])
+        context['projects'] = projects
+        context['selected_project'] = project_id
+        context['period_choices'] = self.period_choices
+        context['selected_days'] = days
+        return context
+
+
+class BugFlowView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
+    """バグ推移・バーンダウン（バグ日次推移テーブルから集計）"""
+    template_name = 'quality/bug_flow.html'
+    period_choices = [30, 90, 180, 365]
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        from apps.projects.models import Project
         
+        project_id = self.request.GET.get('project')
+        project_id = int(project_id) if project_id and project_id.isdigit() else None
+        severity = self.request.GET.get('severity')
+        if severity not in Bug.SeverityChoices.values:
+            severity = None
+        days = self.request.GET.get('days')
+        days = int(days) if days and days.isdigit() and int(days) in self.period_choices else 90
+        
+        date_to = timezone.localdate()
+        date_from = date_to - timedelta(days=days - 1)
+        context['flow_json'] = get_or_build(
+            'bug_flow',
+            lambda: dumps_for_html(get_bug_flow_series(date_from, date_to, project_id, severity)),
+            params={'severity': severity, 'from': date_from.isoformat(), 'to': date_to.isoformat()},
+            project_id=project_id,
+        )
+        context['projects'] = Project.objects.all()
+        context['severity_choices'] = Bug.SeverityChoices.choices
+        context['period_choices'] = self.period_choices
+        context['selected_project'] = project_id
+        context['selected_severity'] = severity
+        context['selected_days'] = days
         return context
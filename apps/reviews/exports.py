@@ -0,0 +1,41 @@
+"""
+レビュー指摘事項のCSV出力定義
+"""
+from apps.common.csv_export import export_queryset
+from .models import ReviewIssue
+
+REVIEW_ISSUE_COLUMNS = [
+    ('id', 'ID'),
+    ('review__project__project_code', 'プロジェクトコード'),
+    ('review__review_number', 'レビュー番号'),
+    ('review__review_type', 'レビュータイプ'),
+    ('issue_number', '指摘番号'),
+    ('description', '指摘内容'),
+    ('severity', '重要度'),
+    ('status', 'ステータス'),
+    ('reporter__username', '報告者'),
+    ('assignee__username', '担当者'),
+    ('file_name', 'ファイル名'),
+    ('location', '該当箇所'),
+    ('created_at', '登録日時'),
+    ('resolved_at', '対応完了日時'),
+    ('verified_at', '確認日時'),
+]
+
+
+def export_review_issues(params, user=None):
+    """指摘事項（project / review / status / severity で絞り込み）"""
+    queryset = ReviewIssue.objects.all()
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(review__project_id=project_id)
+    review_id = params.get('review')
+    if review_id:
+        queryset = queryset.filter(review_id=review_id)
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    severity = params.get('severity')
+    if severity:
+        queryset = queryset.filter(severity=severity)
+    return export_queryset(queryset.order_by('pk'), REVIEW_ISSUE_COLUMNS)
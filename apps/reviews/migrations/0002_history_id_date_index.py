@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalreview',
+            index=models.Index(fields=['id', 'history_date'], name='reviews_his_id_b0df66_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalreviewissue',
+            index=models.Index(fields=['id', 'history_date'], name='reviews_his_id_e69734_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from simple_history.models import HistoricalRecords
+from apps.common.history import IndexedHistoricalRecords
 from apps.accounts.models import User
 from apps.projects.models import AbstractBaseModel, ActiveManager, Project
 from apps.tasks.models import Task
@@ -102,7 +102,7 @@ class Review(AbstractBaseModel):
     
     objects = ActiveManager()
     all_objects = models.Manager()
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
     
     class Meta:
         db_table = 'reviews'
@@ -258,7 +258,7 @@ class ReviewIssue(AbstractBaseModel):
     
     objects = ActiveManager()
     all_objects = models.Manager()
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
     
     class Meta:
         db_table = 'review_issues'
@@ -0,0 +1,26 @@
+from apps.common.events import track_project_events
+from apps.projects.versioning import track_project_version
+from .models import Review, ReviewIssue
+
+
+def _issue_project_id(issue):
+    """指摘事項の所属プロジェクトID"""
+    return Review.all_objects.filter(
+        pk=issue.review_id
+    ).values_list('project_id', flat=True).first()
+
+
+def _review_event(review):
+    """レビュー一覧の1行を差し替えるための値"""
+    return {
+        'id': review.pk,
+        'review_number': review.review_number,
+        'title': review.title,
+        'status': review.status,
+        'scheduled_at': review.scheduled_at.isoformat() if review.scheduled_at else None,
+    }
+
+
+track_project_version(Review, lambda instance: instance.project_id)
+track_project_version(ReviewIssue, _issue_project_id)
+track_project_events(Review, 'review', lambda instance: instance.project_id, _review_event)
@@ -14,4 +14,5 @@ urlpatterns = [
     # 指摘事項
     path('<int:review_pk>/issues/create/', views.ReviewIssueCreateView.as_view(), name='issue_create'),
     path('<int:review_pk>/issues/<int:pk>/update/', views.ReviewIssueUpdateView.as_view(), name='issue_update'),
+    path('issues/export/csv/', views.ReviewIssueCsvExportView.as_view(), name='issue_export_csv'),
 ]
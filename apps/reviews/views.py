@@ -1,7 +1,10 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from apps.common.activity import object_timeline
+from apps.common.csv_export import CsvExportView
 from .models import Review, ReviewIssue
+from .exports import export_review_issues
 
 
 class ReviewListView(LoginRequiredMixin, ListView):
@@ -25,6 +28,14 @@ class ReviewDetailView(LoginRequiredMixin, DetailView):
         return Review.objects.select_related('project').prefetch_related(
             'participants__user', 'issues__reporter', 'issues__assignee'
         )
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['open_issue_count'] = sum(
+            1 for issue in self.object.issues.all() if issue.status == ReviewIssue.StatusChoices.OPEN
+        )
+        context['timeline'] = object_timeline('review', self.object.pk)
+        return context
 
 
 class ReviewCreateView(LoginRequiredMixin, CreateView):
@@ -97,3 +108,9 @@ class ReviewIssueUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('reviews:review_detail', 
                           kwargs={'pk': self.kwargs['review_pk']})
+
+
+class ReviewIssueCsvExportView(CsvExportView):
+    """指摘事項CSV出力"""
+    filename_prefix = 'review_issues'
+    export_function = staticmethod(export_review_issues)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
-from .models import Task, TaskDependency, TaskComment, SystemCategory, MajorCategory, MinorCategory
+from .models import Baseline, Task, TaskDependency, TaskComment, SystemCategory, MajorCategory, MinorCategory
 
 
 @admin.register(SystemCategory)
@@ -90,3 +90,11 @@ class TaskCommentAdmin(admin.ModelAdmin):
     list_display = ['task', 'user', 'created_at']
     list_filter = ['created_at']
     search_fields = ['task__title', 'user__display_name', 'comment']
+
+
+@admin.register(Baseline)
+class BaselineAdmin(admin.ModelAdmin):
+    list_display = ('name', 'project', 'storage', 'task_count', 'created_at', 'created_by')
+    list_filter = ('project', 'storage')
+    search_fields = ('name', 'project__name')
+    readonly_fields = ('task_count', 'created_at', 'created_by')
@@ -0,0 +1,169 @@
+"""
+スケジュールベースライン
+
+プロジェクトのタスク日程・見積工数をベースラインとして保存し、現在の計画との差異を算出する。
+保存形式:
+- ROWS : BaselineTask に1タスク1行で一括登録する。差異レポートは baseline_tasks と tasks の
+         1回の JOIN で取得する
+- BLOB : 列指向JSON（日付は日序数）を zlib 圧縮して Baseline.data に保存する。
+         タスク数が多い場合に容量を抑えられる。差異レポートは展開後に現在のタスクを1クエリで取得する
+ベースラインは取得後の計画の変更に影響されない。タスクを物理削除しても BaselineTask は残り
+（外部キー制約なし）、差異レポートでは現在の値がない削除済みのタスクとして扱う。
+"""
+import json
+import zlib
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.common.json_payload import dumps, to_columnar
+from apps.projects.versioning import bump_project_version
+from .models import Baseline, BaselineTask, Task
+
+BLOB_COLUMNS = ('task_id', 'start', 'end', 'hours')
+
+CURRENT_FIELDS = ('planned_start_date', 'planned_end_date', 'estimated_hours')
+
+
+def encode_blob(rows):
+    """(タスクID, 開始日, 終了日, 工数) のリストを圧縮列形式に変換"""
+    columnar = to_columnar(
+        [(task_id, start.toordinal(), end.toordinal(), float(hours or 0)) for task_id, start, end, hours in rows],
+        BLOB_COLUMNS,
+    )
+    return zlib.compress(dumps(columnar).encode('utf-8'))
+
+
+def decode_blob(data):
+    """圧縮列形式を {タスクID: (開始日, 終了日, 工数)} に展開"""
+    columnar = json.loads(zlib.decompress(bytes(data)))
+    return {
+        task_id: (date.fromordinal(start), date.fromordinal(end), Decimal(str(hours)))
+        for task_id, start, end, hours in zip(*(columnar[column] for column in BLOB_COLUMNS))
+    }
+
+
+@transaction.atomic
+def capture_baseline(project, name, user=None, storage=Baseline.StorageChoices.ROWS, description=''):
+    """プロジェクトの現在の計画をベースラインとして保存する
+
+    Returns:
+        作成した Baseline
+    """
+    rows = list(
+        Task.objects.filter(project=project).order_by('pk')
+        .values_list('pk', 'planned_start_date', 'planned_end_date', 'estimated_hours')
+    )
+    baseline = Baseline.objects.create(
+        project=project,
+        name=name,
+        description=description,
+        storage=storage,
+        task_count=len(rows),
+        created_by=user,
+        data=encode_blob(rows) if storage == Baseline.StorageChoices.BLOB else None,
+    )
+    if storage == Baseline.StorageChoices.ROWS:
+        BaselineTask.objects.bulk_create(
+            [
+                BaselineTask(baseline=baseline, task_id=task_id, planned_start_date=start,
+                             planned_end_date=end, estimated_hours=hours)
+                for task_id, start, end, hours in rows
+            ],
+            batch_size=1000,
+        )
+    bump_project_version(project.pk)
+    return baseline
+
+
+def baseline_dates(baseline):
+    """{タスクID: (開始日, 終了日)}（ガントのベースライン表示用）"""
+    if baseline.storage == Baseline.StorageChoices.BLOB:
+        return {task_id: (start, end) for task_id, (start, end, _) in decode_blob(baseline.data).items()}
+    return {
+        task_id: (start, end)
+        for task_id, start, end in baseline.entries.values_list('task_id', 'planned_start_date', 'planned_end_date')
+    }
+
+
+def _variance_rows(baseline):
+    """(タスクID, タスク番号, タイトル, 削除済み, 基準開始, 基準終了, 基準工数, 現在開始, 現在終了, 現在工数)
+
+    物理削除されたタスクはタスク番号・タイトル・現在の値が None で、削除済みとする。
+    """
+    if baseline.storage == Baseline.StorageChoices.ROWS:
+        rows = baseline.entries.order_by(F('task__task_number').asc(nulls_last=True), 'task_id').values_list(
+            'task_id', 'task__task_number', 'task__title', 'task__is_deleted',
+            'planned_start_date', 'planned_end_date', 'estimated_hours',
+            *(f'task__{field}' for field in CURRENT_FIELDS),
+        )
+        return [
+            (task_id, number, title, deleted is not False, *values)
+            for task_id, number, title, deleted, *values in rows
+        ]
+
+    planned = decode_blob(baseline.data)
+    current = Task.all_objects.filter(pk__in=list(planned)).order_by('task_number').values_list(
+        'pk', 'task_number', 'title', 'is_deleted', *CURRENT_FIELDS
+    )
+    rows = [(pk, number, title, deleted, *planned.pop(pk), *values) for pk, number, title, deleted, *values in current]
+    rows.extend(
+        (pk, None, None, True, *values, None, None, None) for pk, values in sorted(planned.items())
+    )
+    return rows
+
+
+def compute_variance(baseline):
+    """ベースラインと現在の計画の差異
+
+    差異は 現在 - ベースライン（日数はカレンダー日、正の値は遅れ）。
+
+    Returns:
+        {'rows': [タスクごとの辞書], 'summary': {...}}
+    """
+    rows = []
+    summary = {
+        'task_count': 0, 'delayed': 0, 'ahead': 0, 'deleted': 0, 'max_delay': 0,
+        'baseline_hours': Decimal('0'), 'current_hours': Decimal('0'),
+    }
+    for (task_id, task_number, title, deleted, baseline_start, baseline_end, baseline_hours,
+         current_start, current_end, current_hours) in _variance_rows(baseline):
+        removed = task_number is None
+        end_variance = None if removed else (current_end - baseline_end).days
+        rows.append({
+            'task_id': task_id,
+            'task_number': task_number,
+            'title': title,
+            'deleted': deleted,
+            'baseline_start': baseline_start,
+            'baseline_end': baseline_end,
+            'current_start': current_start,
+            'current_end': current_end,
+            'start_variance': None if removed else (current_start - baseline_start).days,
+            'end_variance': end_variance,
+            'baseline_hours': baseline_hours,
+            'current_hours': current_hours,
+            'hours_variance': None if removed else current_hours - baseline_hours,
+        })
+        summary['task_count'] += 1
+        summary['baseline_hours'] += baseline_hours
+        if deleted:
+            summary['deleted'] += 1
+            continue
+        summary['current_hours'] += current_hours
+        if end_variance > 0:
+            summary['delayed'] += 1
+            summary['max_delay'] = max(summary['max_delay'], end_variance)
+        elif end_variance < 0:
+            summary['ahead'] += 1
+
+    # ベースライン取得後に追加されたタスク
+    added = Task.objects.filter(project_id=baseline.project_id)
+    if baseline.storage == Baseline.StorageChoices.ROWS:
+        added = added.exclude(baseline_entries__baseline=baseline)
+    else:
+        added = added.exclude(pk__in=[row['task_id'] for row in rows])
+    summary['added'] = added.count()
+    return {'rows': rows, 'summary': summary}
@@ -0,0 +1,217 @@
+"""
+EVM（アーンドバリューマネジメント）計算
+
+タスクの見積工数・実績工数・進捗率・予定/実績日から、日別の累積値を算出する。
+- PV（計画価値）: 見積工数を予定開始日〜予定終了日に均等配分
+- EV（出来高）  : 見積工数 × 進捗率 を実績開始日〜実績終了日（未完了は基準日）に均等配分
+- AC（実コスト）: 実績工数を EV と同じ期間に均等配分
+
+日別配分はタスクごとのループではなく、NumPy の差分配列（開始日に +日割り額、
+終了日の翌日に -日割り額 を加算して累積和）でまとめて計算する。
+プロジェクトに予算が設定されている場合は 予算 / BAC を単価として金額に換算する。
+日別系列の長さは基準日にも比例するため、基準日はプロジェクトの期間の前後 AS_OF_MARGIN に収める（clamp_as_of）。
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Task
+
+TASK_FIELDS = (
+    'id', 'parent_id', 'project_id', 'estimated_hours', 'actual_hours', 'progress_rate',
+    'planned_start_date', 'planned_end_date', 'actual_start_date', 'actual_end_date',
+)
+
+# 実績日が未設定であることを表す序数
+NO_DATE = -1
+
+# 基準日として指定できる、プロジェクト・タスクの期間の前後の日数
+AS_OF_MARGIN = timedelta(days=90)
+
+
+def _ordinals(values):
+    return np.fromiter((d.toordinal() if d else NO_DATE for d in values), dtype=np.int64, count=len(values))
+
+
+def load_task_arrays(queryset):
+    """タスクを列ごとの NumPy 配列として読み込む（日付は日序数）"""
+    rows = list(queryset.values_list(*TASK_FIELDS))
+    columns = list(zip(*rows)) if rows else [()] * len(TASK_FIELDS)
+    count = len(rows)
+    return {
+        'id': np.fromiter(columns[0], dtype=np.int64, count=count),
+        'parent_id': np.fromiter((p or 0 for p in columns[1]), dtype=np.int64, count=count),
+        'project_id': np.fromiter(columns[2], dtype=np.int64, count=count),
+        'estimated_hours': np.fromiter((float(v or 0) for v in columns[3]), dtype=np.float64, count=count),
+        'actual_hours': np.fromiter((float(v or 0) for v in columns[4]), dtype=np.float64, count=count),
+        'progress_rate': np.fromiter((float(v or 0) for v in columns[5]), dtype=np.float64, count=count),
+        'planned_start': _ordinals(columns[6]),
+        'planned_end': _ordinals(columns[7]),
+        'actual_start': _ordinals(columns[8]),
+        'actual_end': _ordinals(columns[9]),
+    }
+
+
+def subtree_mask(ids, parent_ids, root_id):
+    """root_id とその配下（WBS サブツリー）のタスクを True とするマスク"""
+    mask = ids == root_id
+    frontier = mask
+    while frontier.any():
+        frontier = np.isin(parent_ids, ids[frontier]) & ~mask
+        mask |= frontier
+    return mask
+
+
+def _select(arrays, mask):
+    return {key: values[mask] for key, values in arrays.items()}
+
+
+def _earned_window(arrays, as_of):
+    """EV・AC を配分する期間（開始, 終了）の日序数"""
+    start = np.where(arrays['actual_start'] != NO_DATE, arrays['actual_start'], arrays['planned_start'])
+    end = np.where(arrays['actual_end'] != NO_DATE, arrays['actual_end'], as_of)
+    start = np.minimum(start, as_of)
+    return start, np.maximum(end, start)
+
+
+def _spread(start, end, amounts, origin, length):
+    """金額を start〜end（両端含む）に均等配分し、日別累積値を返す"""
+    daily_amount = amounts / (end - start + 1)
+    diff = np.zeros(length + 1)
+    np.add.at(diff, np.clip(start - origin, 0, length), daily_amount)
+    np.add.at(diff, np.clip(end - origin + 1, 0, length), -daily_amount)
+    return np.cumsum(np.cumsum(diff[:-1]))
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 3) if denominator else None
+
+
+def evm_indicators(bac, pv, ev, ac):
+    """基準日時点の累積値から各指標を算出"""
+    spi = _ratio(ev, pv)
+    cpi = _ratio(ev, ac)
+    eac = round(bac / cpi, 2) if cpi else None
+    return {
+        'bac': round(bac, 2),
+        'pv': round(pv, 2),
+        'ev': round(ev, 2),
+        'ac': round(ac, 2),
+        'sv': round(ev - pv, 2),
+        'cv': round(ev - ac, 2),
+        'spi': spi,
+        'cpi': cpi,
+        'eac': eac,
+        'vac': round(bac - eac, 2) if eac is not None else None,
+    }
+
+
+def evm_series(arrays, as_of, rate=1.0):
+    """日別の PV/EV/AC 累積系列と基準日時点の指標を算出
+
+    Args:
+        arrays: load_task_arrays の戻り値（絞り込み済み）
+        as_of: 基準日の日序数
+        rate: 工数1時間あたりの金額（金額換算しない場合は 1）
+    """
+    if not len(arrays['id']):
+        return {'dates': [], 'pv': [], 'ev': [], 'ac': [], 'indicators': evm_indicators(0, 0, 0, 0)}
+
+    planned_start = arrays['planned_start']
+    planned_end = np.maximum(arrays['planned_end'], planned_start)
+    earned_start, earned_end = _earned_window(arrays, as_of)
+
+    origin = int(min(planned_start.min(), earned_start.min()))
+    last = int(max(planned_end.max(), earned_end.max(), as_of))
+    length = last - origin + 1
+
+    estimated = arrays['estimated_hours'] * rate
+    pv = _spread(planned_start, planned_end, estimated, origin, length)
+    ev = _spread(earned_start, earned_end, estimated * arrays['progress_rate'] / 100, origin, length)
+    ac = _spread(earned_start, earned_end, arrays['actual_hours'] * rate, origin, length)
+
+    as_of_index = min(max(as_of - origin, -1), length - 1)
+    current = [float(series[as_of_index]) if as_of_index >= 0 else 0.0 for series in (pv, ev, ac)]
+
+    # EV・AC は基準日より後を出力しない
+    actual_length = as_of_index + 1
+    return {
+        'dates': [date.fromordinal(day).isoformat() for day in range(origin, last + 1)],
+        'pv': np.round(pv, 2).tolist(),
+        'ev': np.round(ev[:actual_length], 2).tolist(),
+        'ac': np.round(ac[:actual_length], 2).tolist(),
+        'indicators': evm_indicators(float(estimated.sum()), *current),
+    }
+
+
+def _hour_rate(budget, bac_hours):
+    if budget and bac_hours:
+        return float(Decimal(budget)) / bac_hours
+    return 1.0
+
+
+def clamp_as_of(project, as_of):
+    """基準日をプロジェクト（予定・実績日を含むタスク）の期間の前後 AS_OF_MARGIN までに収める"""
+    span = Task.objects.filter(project=project).aggregate(
+        first_planned=Min('planned_start_date'), first_actual=Min('actual_start_date'),
+        last_planned=Max('planned_end_date'), last_actual=Max('actual_end_date'),
+    )
+    first = min(d for d in (project.start_date, span['first_planned'], span['first_actual']) if d)
+    last = max(d for d in (project.end_date, span['last_planned'], span['last_actual']) if d)
+    return min(max(as_of, first - AS_OF_MARGIN), last + AS_OF_MARGIN)
+
+
+def compute_evm(project, root_task_id=None, as_of=None):
+    """プロジェクト（または WBS サブツリー）の EVM を算出
+
+    Returns:
+        {'dates', 'pv', 'ev', 'ac', 'indicators', 'unit', 'as_of'}
+    """
+    as_of = as_of or timezone.localdate()
+    arrays = load_task_arrays(Task.objects.filter(project=project))
+    rate = _hour_rate(project.budget, float(arrays['estimated_hours'].sum()))
+    if root_task_id:
+        arrays = _select(arrays, subtree_mask(arrays['id'], arrays['parent_id'], root_task_id))
+
+    result = evm_series(arrays, as_of.toordinal(), rate)
+    result['unit'] = '円' if project.budget else 'h'
+    result['as_of'] = as_of.isoformat()
+    return result
+
+
+def compute_project_indicators(projects, as_of=None):
+    """複数プロジェクトの基準日時点の指標をまとめて算出（日別系列は作らない）
+
+    Returns:
+        {プロジェクトID: 指標の辞書}
+    """
+    as_of = (as_of or timezone.localdate()).toordinal()
+    projects = list(projects)
+    arrays = load_task_arrays(Task.objects.filter(project__in=projects))
+    project_ids = np.array([project.pk for project in projects], dtype=np.int64)
+    index = np.searchsorted(np.sort(project_ids), arrays['project_id'])
+    order = np.argsort(project_ids)
+    size = len(projects)
+
+    estimated = arrays['estimated_hours']
+    planned_start = arrays['planned_start']
+    planned_end = np.maximum(arrays['planned_end'], planned_start)
+    planned_ratio = np.clip((as_of - planned_start + 1) / (planned_end - planned_start + 1), 0, 1)
+
+    totals = {
+        'bac': np.bincount(index, weights=estimated, minlength=size),
+        'pv': np.bincount(index, weights=estimated * planned_ratio, minlength=size),
+        'ev': np.bincount(index, weights=estimated * arrays['progress_rate'] / 100, minlength=size),
+        'ac': np.bincount(index, weights=arrays['actual_hours'], minlength=size),
+    }
+
+    result = {}
+    for position, project_pos in enumerate(order):
+        project = projects[project_pos]
+        bac = float(totals['bac'][position])
+        rate = _hour_rate(project.budget, bac)
+        result[project.pk] = evm_indicators(*(float(totals[key][position]) * rate for key in ('bac', 'pv', 'ev', 'ac')))
+    return result
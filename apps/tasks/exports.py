@@ -0,0 +1,81 @@
+"""
+タスクのCSV出力定義
+
+各関数は (params, user) を受け取り (ヘッダー, 行イテレータ) を返す。
+行は values_list(...).iterator() で取得するため、件数によらずメモリ使用量は一定。
+"""
+from apps.common.csv_export import export_queryset
+from apps.common.history import as_of_queryset, parse_as_of
+from .filters import filter_tasks
+from .models import Task
+
+TASK_COLUMNS = [
+    ('id', 'ID'),
+    ('project__project_code', 'プロジェクトコード'),
+    ('task_number', 'タスク番号'),
+    ('wbs_code', 'WBSコード'),
+    ('parent_id', '親タスクID'),
+    ('title', 'タイトル'),
+    ('system_category__name', 'システム名'),
+    ('major_category__name', '大分類'),
+    ('minor_category__name', '中分類'),
+    ('assignee__username', '担当者'),
+    ('status', 'ステータス'),
+    ('priority', '優先度'),
+    ('planned_start_date', '開始予定日'),
+    ('planned_end_date', '終了予定日'),
+    ('actual_start_date', '開始実績日'),
+    ('actual_end_date', '終了実績日'),
+    ('estimated_hours', '見積工数(h)'),
+    ('actual_hours', '実績工数(h)'),
+    ('progress_rate', '進捗率(%)'),
+    ('updated_at', '更新日時'),
+]
+
+TASK_HISTORY_COLUMNS = [
+    ('history_id', '履歴ID'),
+    ('history_date', '履歴日時'),
+    ('history_type', '履歴種別'),
+    ('history_user__username', '更新者'),
+    ('id', 'タスクID'),
+    ('project_id', 'プロジェクトID'),
+    ('task_number', 'タスク番号'),
+    ('title', 'タイトル'),
+    ('assignee_id', '担当者ID'),
+    ('status', 'ステータス'),
+    ('planned_start_date', '開始予定日'),
+    ('planned_end_date', '終了予定日'),
+    ('actual_start_date', '開始実績日'),
+    ('actual_end_date', '終了実績日'),
+    ('estimated_hours', '見積工数(h)'),
+    ('actual_hours', '実績工数(h)'),
+    ('progress_rate', '進捗率(%)'),
+    ('is_deleted', '削除フラグ'),
+]
+
+
+def export_tasks(params, user=None):
+    """タスク一覧（TaskListView と同じ絞り込み条件、as_of 指定時はその時点の状態）"""
+    as_of = parse_as_of(params.get('as_of'))
+    if as_of:
+        scope = {'project_id': params['project']} if params.get('project') else {}
+        queryset = as_of_queryset(Task, as_of, **scope).filter(is_deleted=False)
+    else:
+        queryset = Task.objects.all()
+    queryset = filter_tasks(queryset, params, user).order_by('id')
+    return export_queryset(queryset, TASK_COLUMNS)
+
+
+def export_task_history(params, user=None):
+    """タスク変更履歴（project / since / until で絞り込み）"""
+    queryset = Task.history.all()
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    since = params.get('since')
+    if since:
+        queryset = queryset.filter(history_date__date__gte=since)
+    until = params.get('until')
+    if until:
+        queryset = queryset.filter(history_date__date__lte=until)
+    return export_queryset(queryset.order_by('history_date', 'id'), TASK_HISTORY_COLUMNS)
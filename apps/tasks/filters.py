@@ -0,0 +1,39 @@
+def filter_tasks(queryset, params, user=None):
+    """タスクの絞り込み条件を適用（一覧画面・CSV出力で共通）
+
+    Args:
+        queryset: タスクのQuerySet
+        params: request.GET 相当の辞書
+        user: assignee=me 指定時に使用するログインユーザー
+    """
+    project_id = params.get('project')
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    
+    system_category_id = params.get('system_category')
+    if system_category_id:
+        queryset = queryset.filter(system_category_id=system_category_id)
+    
+    major_category_id = params.get('major_category')
+    if major_category_id:
+        queryset = queryset.filter(major_category_id=major_category_id)
+    
+    minor_category_id = params.get('minor_category')
+    if minor_category_id:
+        queryset = queryset.filter(minor_category_id=minor_category_id)
+    
+    milestone_id = params.get('milestone')
+    if milestone_id:
+        queryset = queryset.filter(milestone_id=milestone_id)
+    
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+    
+    assignee = params.get('assignee')
+    if assignee == 'me':
+        queryset = queryset.filter(assignee=user)
+    elif assignee:
+        queryset = queryset.filter(assignee_id=assignee)
+    
+    return queryset
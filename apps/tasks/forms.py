@@ -1,7 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from .models import Task, TaskComment, SystemCategory, MajorCategory, MinorCategory
-from apps.projects.models import Project
+from apps.projects.models import Milestone, Project
 from apps.accounts.models import User
 
 
@@ -12,7 +12,7 @@ class TaskForm(forms.ModelForm):
         model = Task
         fields = [
             'project', 'system_category', 'major_category', 'minor_category',
-            'parent', 'title', 'description',
+            'parent', 'milestone', 'title', 'description',
             'assignee', 'status', 'priority', 'planned_start_date',
             'planned_end_date', 'actual_start_date', 'actual_end_date',
             'estimated_hours', 'actual_hours', 'progress_rate'
@@ -23,6 +23,7 @@ class TaskForm(forms.ModelForm):
             'major_category': forms.Select(attrs={'class': 'form-select', 'id': 'id_major_category'}),
             'minor_category': forms.Select(attrs={'class': 'form-select', 'id': 'id_minor_category'}),
             'parent': forms.Select(attrs={'class': 'form-select'}),
+            'milestone': forms.Select(attrs={'class': 'form-select', 'id': 'id_milestone'}),
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'assignee': forms.Select(attrs={'class': 'form-select'}),
@@ -56,6 +57,7 @@ class TaskForm(forms.ModelForm):
         self.fields['project'].empty_label = '選択してください'
         
         # 初期状態では空のクエリセット
+        self.fields['milestone'].queryset = Milestone.objects.none()
         self.fields['system_category'].queryset = SystemCategory.objects.none()
         self.fields['major_category'].queryset = MajorCategory.objects.none()
         self.fields['minor_category'].queryset = MinorCategory.objects.none()
@@ -64,6 +66,7 @@ class TaskForm(forms.ModelForm):
         if 'project' in self.data:
             try:
                 project_id = int(self.data.get('project'))
+                self.fields['milestone'].queryset = Milestone.objects.filter(project_id=project_id)
                 self.fields['system_category'].queryset = SystemCategory.objects.filter(
                     project_id=project_id, is_deleted=False
                 ).order_by('order', 'name')
@@ -71,6 +74,7 @@ class TaskForm(forms.ModelForm):
                 pass
         elif self.instance.pk:
             # 編集時
+            self.fields['milestone'].queryset = Milestone.objects.filter(project=self.instance.project)
             self.fields['system_category'].queryset = SystemCategory.objects.filter(
                 project=self.instance.project, is_deleted=False
             ).order_by('order', 'name')
@@ -118,6 +122,9 @@ class TaskForm(forms.ModelForm):
         self.fields['parent'].empty_label = 'なし'
         self.fields['parent'].required = False
         
+        self.fields['milestone'].empty_label = 'なし'
+        self.fields['milestone'].required = False
+        
         # 任意項目の設定
         self.fields['description'].required = False
         self.fields['actual_start_date'].required = False
@@ -0,0 +1,413 @@
+"""
+ガントチャートの編集内容の一括保存
+
+dhtmlxGantt でドラッグ・入力した変更（開始日・日数・進捗・親・依存関係）を1回の POST でまとめて受け取り、
+すべてを検証してから1トランザクションで適用する。
+1. 変更するタスクを select_for_update で読み込み、変更をメモリ上のインスタンスに反映する
+2. 親子の循環はプロジェクト全体の親の対応表（values_list の1クエリ）で、依存関係の循環は既存の依存関係
+   （他のプロジェクトを経由するものを含む）に追加・削除を反映したグラフで検出する。
+   Task.clean（日付・分類の整合性）と TaskDependency.clean も適用する
+3. 1件でもエラーがあれば何も更新せず、変更ごとのエラーを返す
+4. タスクは bulk_update_with_history、依存関係は bulk_create と delete で一括更新する
+5. 親を変更したタスクは移動先の子の末尾へまとめて移動し（move_tasks）、WBS コードを採番し直す
+6. reschedule 指定時は、日程を変更したタスクの後続タスクを自動リスケジュールする
+
+日数は稼働日数で、終了予定日は稼働日カレンダー（apps.projects.calendars）から求める。
+開始日が非稼働日の場合は次の稼働日に寄せる。
+
+変更内容の形式（dhtmlxGantt のデータ形式に合わせる。親の 0 はルート、依存関係の type は "0"〜"3"）:
+    {
+        "tasks": [{"id": 1, "start_date": "2025-04-01", "duration": 3, "progress": 0.5, "parent": 0}],
+        "links": {
+            "added": [{"id": "画面上の仮ID", "source": 1, "target": 2, "type": "0", "lag": 0}],
+            "deleted": [10]
+        },
+        "reschedule": true
+    }
+tasks の各要素は id 以外の項目を省略できる（省略した項目は変更しない）。
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from apps.common.events import publish_instances
+from apps.projects.calendars import get_calendar
+from apps.projects.versioning import bump_project_version
+from .milestones import refresh_task_milestones
+from .models import Task, TaskDependency
+from .numbering import WbsNumberingError, move_tasks
+from .scheduling import ScheduleCycleError, _topological_order, apply_reschedule, plan_reschedule
+
+CHANGE_REASON = 'ガントチャートでの編集'
+
+# 1回の保存で受け付ける変更（タスク・依存関係の追加・削除の合計）の上限
+MAX_BATCH_SIZE = 1000
+
+# dhtmlxGantt の依存関係の種別（"0": 終了-開始 〜 "3": 開始-終了）
+LINK_TYPES = ('FS', 'SS', 'FF', 'SF')
+
+# Task.clean が参照する関連（分類の整合性チェック用）
+CLEAN_RELATED = (
+    'project', 'system_category__project', 'major_category__system_category', 'minor_category__major_category',
+)
+
+
+class GanttEditError(Exception):
+    """ガントチャートの変更を保存できない
+
+    Attributes:
+        errors: [{'kind': 'task' | 'link' | 'batch', 'id': タスクID・依存関係ID（画面上の仮ID）, 'message'}]
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(error['message'] for error in errors))
+
+
+def link_type(dependency_type):
+    """TaskDependency.dependency_type を dhtmlxGantt の種別（"0"〜"3"）に変換する"""
+    return str(LINK_TYPES.index(dependency_type))
+
+
+class _Errors(list):
+
+    def add(self, kind, item_id, message):
+        self.append({'kind': kind, 'id': item_id, 'message': message})
+
+
+def _parse_id(value):
+    """正の整数ID（bool・小数・文字列の数値以外は None）"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    return value if isinstance(value, int) and value > 0 else None
+
+
+def _parse_parent(value):
+    """親タスクID（0・空・null はルート = None）。不正な値は ValueError"""
+    if value in (0, '0', '', None):
+        return None
+    parent_id = _parse_id(value)
+    if parent_id is None:
+        raise ValueError('親タスクの指定が正しくありません')
+    return parent_id
+
+
+def _parse_task(item):
+    """tasks の1要素を {'id', 'start_date', 'duration', 'progress', 'parent'}（指定された項目のみ）に変換"""
+    task_id = _parse_id(item.get('id')) if isinstance(item, dict) else None
+    if task_id is None:
+        raise ValueError('タスクIDが正しくありません')
+    change = {'id': task_id}
+    if 'start_date' in item:
+        try:
+            change['start_date'] = date.fromisoformat(str(item['start_date'])[:10])
+        except ValueError:
+            raise ValueError('開始日の形式が正しくありません') from None
+    if 'duration' in item:
+        duration = item['duration']
+        if isinstance(duration, bool) or not isinstance(duration, int) or duration < 1:
+            raise ValueError('日数は1以上の整数で指定してください')
+        change['duration'] = duration
+    if 'progress' in item:
+        progress = item['progress']
+        if isinstance(progress, bool) or not isinstance(progress, (int, float)) or not 0 <= progress <= 1:
+            raise ValueError('進捗は0〜1の数値で指定してください')
+        change['progress'] = Decimal(str(round(progress * 100, 2)))
+    if 'parent' in item:
+        change['parent'] = _parse_parent(item['parent'])
+    return change
+
+
+def _parse_link(item):
+    """links.added の1要素を (画面上の仮ID, 前提タスクID, 後続タスクID, 依存タイプ, 遅延日数) に変換"""
+    if not isinstance(item, dict):
+        raise ValueError('依存関係の形式が正しくありません')
+    source, target = _parse_id(item.get('source')), _parse_id(item.get('target'))
+    if source is None or target is None:
+        raise ValueError('依存関係のタスクIDが正しくありません')
+    try:
+        dependency_type = LINK_TYPES[int(item.get('type', 0))]
+    except (TypeError, ValueError, IndexError):
+        raise ValueError('依存関係の種別が正しくありません') from None
+    lag = item.get('lag') or 0
+    if isinstance(lag, bool) or not isinstance(lag, int):
+        raise ValueError('遅延日数は整数で指定してください')
+    return item.get('id'), source, target, dependency_type, lag
+
+
+def parse_changes(payload):
+    """POST された JSON（dict）を検証し、(タスクの変更, 追加する依存関係, 削除する依存関係ID, 後続の自動調整) を返す
+
+    Raises:
+        GanttEditError: 形式が正しくない場合
+    """
+    errors = _Errors()
+    if not isinstance(payload, dict):
+        raise GanttEditError([{'kind': 'batch', 'id': None, 'message': '変更内容の形式が正しくありません'}])
+    items = payload.get('tasks') or []
+    links = payload.get('links') or {}
+    if not isinstance(items, list) or not isinstance(links, dict):
+        raise GanttEditError([{'kind': 'batch', 'id': None, 'message': '変更内容の形式が正しくありません'}])
+    added_items = links.get('added') or []
+    deleted_items = links.get('deleted') or []
+    if not isinstance(added_items, list) or not isinstance(deleted_items, list):
+        raise GanttEditError([{'kind': 'batch', 'id': None, 'message': '変更内容の形式が正しくありません'}])
+    if len(items) + len(added_items) + len(deleted_items) > MAX_BATCH_SIZE:
+        raise GanttEditError([{
+            'kind': 'batch', 'id': None,
+            'message': f'一度に保存できる変更は{MAX_BATCH_SIZE}件までです',
+        }])
+
+    changes = {}
+    for item in items:
+        try:
+            change = _parse_task(item)
+        except ValueError as e:
+            errors.add('task', item.get('id') if isinstance(item, dict) else None, str(e))
+            continue
+        # 同じタスクが複数回含まれる場合は後の変更で上書きする
+        changes.setdefault(change['id'], {}).update(change)
+
+    added = []
+    for item in added_items:
+        try:
+            added.append(_parse_link(item))
+        except ValueError as e:
+            errors.add('link', item.get('id') if isinstance(item, dict) else None, str(e))
+
+    deleted = set()
+    for value in deleted_items:
+        dependency_id = _parse_id(value)
+        if dependency_id is None:
+            errors.add('link', value, '削除する依存関係のIDが正しくありません')
+        else:
+            deleted.add(dependency_id)
+
+    if errors:
+        raise GanttEditError(errors)
+    return list(changes.values()), added, deleted, bool(payload.get('reschedule'))
+
+
+def _ancestor_ids(parent_of, task_id):
+    """parent_of（{タスクID: 親タスクID}）を辿った祖先のID（近い順）。循環している場合は None"""
+    ancestors = []
+    parent_id = parent_of.get(task_id)
+    while parent_id is not None:
+        if parent_id == task_id or parent_id in ancestors:
+            return None
+        ancestors.append(parent_id)
+        parent_id = parent_of.get(parent_id)
+    return ancestors
+
+
+def _validate_tasks(project_id, changes, errors):
+    """タスクの変更をメモリ上のインスタンスに反映して検証する
+
+    Returns:
+        ({タスクID: Task}, {タスクID: 移動先の親タスクID}, 日程を変更したタスクID)
+    """
+    parent_of = dict(Task.objects.filter(project_id=project_id).values_list('id', 'parent_id'))
+    change_ids = [change['id'] for change in changes]
+    tasks = (
+        Task.objects.select_for_update(of=('self',))
+        .select_related(*CLEAN_RELATED)
+        .filter(project_id=project_id)
+        .in_bulk(change_ids)
+    )
+    calendar = get_calendar(project_id)
+
+    moves = {}
+    rescheduled = set()
+    for change in changes:
+        task = tasks.get(change['id'])
+        if task is None:
+            errors.add('task', change['id'], 'タスクが見つかりません')
+            continue
+        if 'start_date' in change or 'duration' in change:
+            start = change.get('start_date', task.planned_start_date)
+            if start is None:
+                errors.add('task', task.pk, '開始日を指定してください')
+                continue
+            duration = change.get('duration')
+            if duration is None:
+                end = task.planned_end_date or start
+                duration = calendar.working_days_between(task.planned_start_date or start, end)
+            try:
+                start = calendar.next_working_day(start)
+                end = calendar.end_date(start, duration)
+            except ValueError as e:
+                errors.add('task', task.pk, str(e))
+                continue
+            if (start, end) != (task.planned_start_date, task.planned_end_date):
+                task.planned_start_date, task.planned_end_date = start, end
+                rescheduled.add(task.pk)
+        if 'progress' in change:
+            task.progress_rate = change['progress']
+        if 'parent' in change and change['parent'] != task.parent_id:
+            if change['parent'] is not None and change['parent'] not in parent_of:
+                errors.add('task', task.pk, '親タスクが見つかりません')
+                continue
+            moves[task.pk] = change['parent']
+            parent_of[task.pk] = change['parent']
+
+    # 移動後の親子関係全体で循環を確認してから、Task.clean が辿る親をメモリ上のインスタンスにつなぐ
+    cyclic = {task_id for task_id in moves if _ancestor_ids(parent_of, task_id) is None}
+    for task_id in sorted(cyclic):
+        errors.add('task', task_id, '自分自身または配下のタスクを親にすることはできません')
+    ancestor_ids = set()
+    for task_id in tasks:
+        if task_id not in cyclic:
+            ancestor_ids.update(_ancestor_ids(parent_of, task_id) or ())
+    instances = dict(tasks)
+    instances.update(Task.objects.only('id', 'parent_id').in_bulk(ancestor_ids - set(tasks)))
+    for instance in instances.values():
+        parent_id = parent_of.get(instance.pk)
+        instance.parent = instances.get(parent_id) if parent_id not in cyclic else None
+
+    for task in tasks.values():
+        if task.pk in cyclic:
+            continue
+        try:
+            task.clean()
+        except ValidationError as e:
+            for message in e.messages:
+                errors.add('task', task.pk, message)
+    return tasks, moves, rescheduled
+
+
+def _validate_links(project_id, added, deleted, errors):
+    """依存関係の追加・削除を検証する（追加・削除後のグラフで循環を確認）
+
+    Returns:
+        追加する TaskDependency のリスト（画面上の仮IDを gantt_id に保持）
+    """
+    # 他のプロジェクトを経由する循環も検出するため、依存関係でつながるプロジェクトを順に読み込む
+    existing = {}
+    own = set()
+    pending = {project_id}
+    loaded = set()
+    while pending:
+        loaded |= pending
+        dependencies = TaskDependency.objects.filter(
+            Q(successor__project_id__in=pending) | Q(predecessor__project_id__in=pending)
+        ).values_list('id', 'predecessor_id', 'successor_id', 'predecessor__project_id', 'successor__project_id')
+        reached = set()
+        for dependency_id, predecessor_id, successor_id, predecessor_project, successor_project in dependencies:
+            existing[dependency_id] = (predecessor_id, successor_id)
+            if successor_project == project_id:
+                own.add(dependency_id)
+            reached.update((predecessor_project, successor_project))
+        pending = reached - loaded
+    for dependency_id in sorted(deleted - own):
+        errors.add('link', dependency_id, '削除する依存関係が見つかりません')
+
+    pairs = {pair for dependency_id, pair in existing.items() if dependency_id not in deleted}
+    endpoints = {task_id for _, source, target, _, _ in added for task_id in (source, target)}
+    tasks = Task.objects.select_related('project').filter(project_id=project_id).in_bulk(endpoints)
+    dependencies = []
+    for gantt_id, source, target, dependency_type, lag in added:
+        if source not in tasks or target not in tasks:
+            errors.add('link', gantt_id, '依存関係のタスクが見つかりません')
+            continue
+        dependency = TaskDependency(
+            predecessor=tasks[source], successor=tasks[target], dependency_type=dependency_type, lag_days=lag
+        )
+        try:
+            dependency.clean()
+        except ValidationError as e:
+            errors.add('link', gantt_id, ' '.join(e.messages))
+            continue
+        if (source, target) in pairs:
+            errors.add('link', gantt_id, '同じタスク間の依存関係が既に登録されています')
+            continue
+        pairs.add((source, target))
+        dependency.gantt_id = gantt_id
+        dependencies.append(dependency)
+
+    if dependencies or deleted:
+        successors = defaultdict(list)
+        nodes = set()
+        for source, target in pairs:
+            successors[source].append((target, None, None))
+            nodes.update((source, target))
+        try:
+            _topological_order(nodes, successors)
+        except ScheduleCycleError:
+            errors.add('batch', None, 'タスクの依存関係が循環しています')
+    return dependencies
+
+
+@transaction.atomic
+def apply_changes(project_id, changes, added=(), deleted=(), reschedule=False, user=None):
+    """ガントチャートの変更を検証し、すべて正しければ1トランザクションで保存する
+
+    Args:
+        project_id: プロジェクトID（対象はこのプロジェクトのタスク・依存関係のみ）
+        changes, added, deleted, reschedule: parse_changes の結果
+        user: 更新者
+
+    Returns:
+        {'task_ids': 画面の行を差し替えるタスクID, 'links': {画面上の仮ID: 依存関係ID}, 'rescheduled': 後続の調整件数}
+
+    Raises:
+        GanttEditError: 検証エラー（何も更新しない）
+    """
+    errors = _Errors()
+    deleted = set(deleted)
+    tasks, moves, rescheduled = _validate_tasks(project_id, changes, errors)
+    dependencies = _validate_links(project_id, added, deleted, errors)
+    if errors:
+        raise GanttEditError(errors)
+
+    now = timezone.now()
+    updated = list(tasks.values())
+    for task in updated:
+        task.updated_at = now
+        if user is not None:
+            task.updated_by = user
+    if updated:
+        # 親の変更は move_tasks で WBS コードとともに更新する
+        bulk_update_with_history(
+            updated, Task,
+            ['planned_start_date', 'planned_end_date', 'progress_rate', 'updated_at', 'updated_by'],
+            batch_size=500,
+            default_user=user,
+            default_change_reason=CHANGE_REASON,
+        )
+    created = TaskDependency.objects.bulk_create(dependencies)
+    if deleted:
+        TaskDependency.objects.filter(pk__in=deleted).delete()
+    # bulk_update・bulk_create はシグナルを発行しないため版数・マイルストーンの集計値を明示的に更新する
+    bump_project_version(project_id)
+    refresh_task_milestones(updated)
+    publish_instances(updated)
+
+    if moves:
+        try:
+            move_tasks(project_id, moves, user=user)
+        except WbsNumberingError as e:
+            raise GanttEditError([{'kind': 'batch', 'id': None, 'message': str(e)}]) from e
+
+    task_ids = set(tasks)
+    shifted = 0
+    if reschedule and (rescheduled or created):
+        roots = rescheduled | {dependency.predecessor_id for dependency in created}
+        try:
+            plan = plan_reschedule(roots)
+        except ScheduleCycleError as e:
+            raise GanttEditError([{'kind': 'batch', 'id': None, 'message': str(e)}]) from e
+        shifted = apply_reschedule(plan, user)
+        task_ids.update(change['task'].pk for change in plan)
+    return {
+        'task_ids': task_ids,
+        'links': {dependency.gantt_id: dependency.pk for dependency in created},
+        'rescheduled': shifted,
+    }
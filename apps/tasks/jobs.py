@@ -0,0 +1,12 @@
+"""
+タスクのバックグラウンド処理
+"""
+from apps.jobs.registry import register
+from .scheduling import reschedule
+
+
+@register('reschedule', '後続タスクの日程再計算')
+def run_reschedule(context):
+    """params: {'tasks': [起点のタスクID]}"""
+    changes = reschedule(context.params['tasks'], user=context.user)
+    return {'updated': len(changes)}
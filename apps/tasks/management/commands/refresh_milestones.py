@@ -0,0 +1,27 @@
+"""
+マイルストーンの集計値（進捗率・達成見込日・ステータス）の再計算コマンド
+
+未完了タスクの達成見込日は日付の経過で変わるため、日次で実行する。
+導入時の初期データ作成や、シグナルを経由しない変更の補正にも使用する。
+
+使い方:
+    python manage.py refresh_milestones
+    python manage.py refresh_milestones --project 1
+"""
+from django.core.management.base import BaseCommand
+
+from apps.tasks.milestones import refresh_all_milestones
+
+
+class Command(BaseCommand):
+    help = '紐づくタスクからマイルストーンの進捗率・達成見込日・ステータスを再計算します'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project', action='append', type=int, default=[], metavar='ID',
+            help='対象プロジェクトID（複数指定可、省略時は全プロジェクト）'
+        )
+    
+    def handle(self, *args, **options):
+        count = refresh_all_milestones(options['project'] or None)
+        self.stdout.write(self.style.SUCCESS(f'マイルストーンを {count} 件更新しました'))
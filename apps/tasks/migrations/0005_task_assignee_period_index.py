@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_convert_task_numbers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'planned_start_date', 'planned_end_date'], name='tasks_assigne_4715a9_idx'),
+        ),
+    ]
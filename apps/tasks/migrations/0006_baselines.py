@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0003_work_calendar'),
+        ('tasks', '0005_task_assignee_period_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Baseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='ベースライン名')),
+                ('description', models.TextField(blank=True, verbose_name='説明')),
+                ('storage', models.CharField(choices=[('ROWS', '行形式'), ('BLOB', '圧縮列形式')], default='ROWS', max_length=4, verbose_name='保存形式')),
+                ('task_count', models.IntegerField(default=0, verbose_name='タスク数')),
+                ('data', models.BinaryField(blank=True, null=True, verbose_name='圧縮データ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='取得日時')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_baselines', to=settings.AUTH_USER_MODEL, verbose_name='取得者')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='baselines', to='projects.project', verbose_name='プロジェクト')),
+            ],
+            options={
+                'verbose_name': 'ベースライン',
+                'verbose_name_plural': 'ベースライン',
+                'db_table': 'baselines',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BaselineTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('planned_start_date', models.DateField(verbose_name='開始予定日')),
+                ('planned_end_date', models.DateField(verbose_name='終了予定日')),
+                ('estimated_hours', models.DecimalField(decimal_places=2, default=0, max_digits=6, verbose_name='見積工数(h)')),
+                ('baseline', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='tasks.baseline', verbose_name='ベースライン')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='baseline_entries', to='tasks.task', verbose_name='タスク')),
+            ],
+            options={
+                'verbose_name': 'ベースラインタスク',
+                'verbose_name_plural': 'ベースラインタスク',
+                'db_table': 'baseline_tasks',
+                'unique_together': {('baseline', 'task')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='baseline',
+            index=models.Index(fields=['project', '-created_at'], name='baselines_project_9d7b57_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_baselines'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicaltask',
+            index=models.Index(fields=['id', 'history_date'], name='tasks_histo_id_acda05_idx'),
+        ),
+    ]
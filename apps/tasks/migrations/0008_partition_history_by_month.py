@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from apps.common.partitions import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+    """タスク履歴を月単位のレンジパーティションに変換（PostgreSQL のみ）"""
+
+    dependencies = [
+        ('tasks', '0007_history_id_date_index'),
+    ]
+
+    operations = [
+        PartitionByMonth(table='tasks_historicaltask', column='history_date'),
+    ]
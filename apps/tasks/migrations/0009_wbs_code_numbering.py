@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:39
+
+import re
+import sys
+from datetime import date
+
+from django.db import migrations, models
+
+
+# 採番規則はマイグレーション作成時点のもの（apps.tasks.numbering / apps.tasks.wbs）を写している。
+# 履歴上のマイグレーションが変わらないよう、アプリのコードは import しない。
+SEGMENT_WIDTH = 4
+MAX_SIBLINGS = 10 ** SEGMENT_WIDTH - 1
+_NUMBER = re.compile(r'(\d+)')
+
+
+def _sort_key(code):
+    """WBS コードの並び順キー（数字部分は数値として比較: 1.2 < 1.10。未設定は末尾）"""
+    parts = tuple(
+        (0, int(part), '') if part.isdigit() else (1, 0, part)
+        for part in _NUMBER.split(code or '') if part
+    )
+    return (not parts, parts)
+
+
+def _plan_codes(rows, max_length):
+    """(id, parent_id, wbs_code, planned_start_date) の行から {タスクID: WBS コード} を求める
+
+    兄弟の順番は現在の WBS コード順 → 開始予定日 → ID。親が対象外（削除済み・別プロジェクト）の
+    タスクと、親子が循環していてルートから辿れないタスクはルートとして扱う。
+    """
+    keys = {row[0]: (_sort_key(row[2]), row[3] or date.max, row[0]) for row in rows}
+    children = {}
+    for task_id, parent_id, _, _ in rows:
+        children.setdefault(parent_id if parent_id in keys else None, []).append(task_id)
+    for siblings in children.values():
+        siblings.sort(key=keys.__getitem__)
+
+    codes = {}
+    visited = set()
+
+    def walk(task_ids, prefix, start=1):
+        stack = [(task_ids, prefix, start)]
+        while stack:
+            task_ids, prefix, start = stack.pop()
+            for number, task_id in enumerate((task_id for task_id in task_ids if task_id not in visited), start):
+                if number > MAX_SIBLINGS:
+                    raise ValueError(f'同じ親の下のタスクが{MAX_SIBLINGS}件を超えています')
+                code = f'{prefix}{number:0{SEGMENT_WIDTH}d}'
+                if len(code) > max_length:
+                    raise ValueError('WBS の階層が深すぎます')
+                visited.add(task_id)
+                codes[task_id] = code
+                stack.append((children.get(task_id, []), code + '.', 1))
+
+    roots = children.get(None, [])
+    walk(roots, '')
+    root_count = len(roots)
+    for task_id in sorted(keys, key=keys.__getitem__):
+        if task_id not in visited:
+            # 循環していてルートから辿れないタスクは、ルートの末尾に加える
+            root_count += 1
+            walk([task_id], '', root_count)
+    return codes
+
+
+def number_wbs_codes(apps, schema_editor):
+    """既存タスクの WBS コードをゼロ埋めの階層番号に採番し直す（兄弟の順番は現在の WBS コード順）"""
+    Task = apps.get_model('tasks', 'Task')
+    max_length = Task._meta.get_field('wbs_code').max_length
+    project_ids = Task.objects.filter(is_deleted=False).values_list('project_id', flat=True).distinct()
+    for project_id in project_ids:
+        rows = Task.objects.filter(project_id=project_id, is_deleted=False).order_by().values_list(
+            'id', 'parent_id', 'wbs_code', 'planned_start_date'
+        )
+        try:
+            codes = _plan_codes(list(rows), max_length)
+        except ValueError as e:
+            sys.stdout.write(f'プロジェクトID {project_id}: WBS コードを採番できませんでした（{e}）\n')
+            continue
+        tasks = list(Task.objects.filter(project_id=project_id, is_deleted=False).only('id', 'wbs_code', 'level'))
+        for task in tasks:
+            task.wbs_code = codes[task.pk]
+            task.level = task.wbs_code.count('.') + 1
+        Task.objects.bulk_update(tasks, ['wbs_code', 'level'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_partition_history_by_month'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'wbs_code'], name='tasks_project_e90cad_idx'),
+        ),
+        # 元の WBS コードは変更履歴に残らないため、逆方向では何もしない
+        migrations.RunPython(number_wbs_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_milestone_progress'),
+        ('tasks', '0009_wbs_code_numbering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicaltask',
+            name='milestone',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.milestone', verbose_name='マイルストーン'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='milestone',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tasks', to='projects.milestone', verbose_name='マイルストーン'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_milestone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='baselinetask',
+            name='task',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='baseline_entries', to='tasks.task', verbose_name='タスク'),
+        ),
+    ]
@@ -0,0 +1,126 @@
+"""
+マイルストーンの進捗（紐づくタスクからの集計）
+
+Task.milestone で紐づけたタスクから次の値を求め、Milestone に保存する。
+- 進捗率      : タスクの進捗率の見積工数による加重平均（見積工数が未入力の場合は単純平均）
+- 達成見込日  : 完了タスクは実績終了日、未完了タスクは終了予定日（過ぎている・未入力の場合は今日）の最大値
+- ステータス  : すべて完了で「達成」（達成日は実績終了日の最大値）、達成見込日が目標日を過ぎる場合は「遅延」
+紐づくタスクがないマイルストーンのステータス・達成日は、これまでどおり手入力の値を使う。
+
+タスクの保存・削除時にシグナルから、そのタスクの（変更前と変更後の）マイルストーンだけを集計し直す。
+bulk_update などシグナルを経由しない更新の後は refresh_milestones を明示的に呼び出す。
+未完了タスクの達成見込日は日付の経過で変わるため、refresh_milestones コマンドで日次に集計し直す。
+画面・ダッシュボードは保存済みの値のみを参照する。
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.projects.models import Milestone
+from apps.projects.versioning import bump_project_versions
+from .models import Task
+
+DERIVED_FIELDS = ['status', 'actual_date', 'forecast_date', 'progress_rate', 'task_count', 'completed_task_count']
+
+_CENT = Decimal('0.01')
+
+
+def _summaries(milestone_ids):
+    """マイルストーンごとの紐づくタスクの集計（1クエリ）"""
+    completed = Q(status=Task.StatusChoices.COMPLETED)
+    rows = (
+        Task.objects.filter(milestone_id__in=milestone_ids).order_by().values('milestone_id')
+        .annotate(
+            task_count=Count('id'),
+            completed_task_count=Count('id', filter=completed),
+            hours=Sum('estimated_hours'),
+            earned=Sum(F('estimated_hours') * F('progress_rate')),
+            average=Avg('progress_rate'),
+            last_open_end=Max('planned_end_date', filter=~completed),
+            last_completed_end=Max(Coalesce('actual_end_date', 'planned_end_date'), filter=completed),
+        )
+    )
+    return {row['milestone_id']: row for row in rows}
+
+
+def derive_values(milestone, summary, today):
+    """マイルストーンの集計値（DERIVED_FIELDS の辞書。紐づくタスクがない場合はステータス・達成日を含まない）"""
+    if not summary:
+        return {'forecast_date': None, 'progress_rate': Decimal(0), 'task_count': 0, 'completed_task_count': 0}
+
+    hours = Decimal(str(summary['hours'] or 0))
+    if hours > 0:
+        progress = Decimal(str(summary['earned'] or 0)) / hours
+    else:
+        progress = Decimal(str(summary['average'] or 0))
+
+    if summary['task_count'] == summary['completed_task_count']:
+        status = Milestone.StatusChoices.ACHIEVED
+        actual = forecast = summary['last_completed_end']
+    else:
+        forecast = max(summary['last_open_end'] or today, today)
+        if summary['last_completed_end']:
+            forecast = max(forecast, summary['last_completed_end'])
+        if forecast > milestone.target_date:
+            status = Milestone.StatusChoices.DELAYED
+        else:
+            status = Milestone.StatusChoices.NOT_STARTED
+        actual = None
+    return {
+        'status': status,
+        'actual_date': actual,
+        'forecast_date': forecast,
+        'progress_rate': progress.quantize(_CENT),
+        'task_count': summary['task_count'],
+        'completed_task_count': summary['completed_task_count'],
+    }
+
+
+def refresh_milestones(milestone_ids, today=None):
+    """指定したマイルストーンの集計値を紐づくタスクから計算し直し、変わったものだけ一括更新する
+
+    Returns:
+        更新件数
+    """
+    milestone_ids = {milestone_id for milestone_id in milestone_ids if milestone_id}
+    if not milestone_ids:
+        return 0
+    today = today or timezone.localdate()
+    summaries = _summaries(milestone_ids)
+
+    changed = []
+    for milestone in Milestone.all_objects.filter(pk__in=milestone_ids):
+        values = derive_values(milestone, summaries.get(milestone.pk), today)
+        if all(getattr(milestone, field) == value for field, value in values.items()):
+            continue
+        for field, value in values.items():
+            setattr(milestone, field, value)
+        changed.append(milestone)
+    if changed:
+        Milestone.all_objects.bulk_update(changed, DERIVED_FIELDS, batch_size=500)
+        # bulk_update はシグナルを発行しないため版数を明示的に加算する
+        bump_project_versions({milestone.project_id for milestone in changed})
+    return len(changed)
+
+
+def refresh_task_milestones(tasks, today=None):
+    """一括更新したタスクが紐づくマイルストーンを集計し直す"""
+    return refresh_milestones({task.milestone_id for task in tasks}, today)
+
+
+def refresh_all_milestones(project_ids=None, today=None, chunk_size=500):
+    """全マイルストーン（project_ids 指定時はそのプロジェクトのみ）を集計し直す（日次の達成見込日の更新など）
+
+    Returns:
+        更新件数
+    """
+    queryset = Milestone.objects.all()
+    if project_ids:
+        queryset = queryset.filter(project_id__in=project_ids)
+    milestone_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    return sum(
+        refresh_milestones(milestone_ids[start:start + chunk_size], today)
+        for start in range(0, len(milestone_ids), chunk_size)
+    )
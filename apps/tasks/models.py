@@ -1,8 +1,8 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-from simple_history.models import HistoricalRecords
+from apps.common.history import IndexedHistoricalRecords
 from apps.accounts.models import User
-from apps.projects.models import AbstractBaseModel, ActiveManager, Project
+from apps.projects.models import AbstractBaseModel, ActiveManager, Milestone, Project
 
 
 class SystemCategory(AbstractBaseModel):
@@ -164,6 +164,14 @@ class Task(AbstractBaseModel):
         related_name='subtasks',
         verbose_name='親タスク'
     )
+    milestone = models.ForeignKey(
+        Milestone,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='tasks',
+        verbose_name='マイルストーン'
+    )
     task_number = models.CharField(max_length=20, verbose_name='タスク番号')
     title = models.CharField(max_length=200, verbose_name='タイトル')
     description = models.TextField(blank=True, verbose_name='説明')
@@ -232,7 +240,7 @@ class Task(AbstractBaseModel):
     
     objects = ActiveManager()
     all_objects = models.Manager()
-    history = HistoricalRecords()
+    history = IndexedHistoricalRecords()
     
     class Meta:
         db_table = 'tasks'
@@ -243,9 +251,13 @@ class Task(AbstractBaseModel):
             models.Index(fields=['project', 'status']),
             models.Index(fields=['assignee', 'status']),
             models.Index(fields=['planned_start_date', 'planned_end_date']),
+            # 担当者別負荷（期間で絞り込み）
+            models.Index(fields=['assignee', 'planned_start_date', 'planned_end_date']),
             models.Index(fields=['system_category']),
             models.Index(fields=['major_category']),
             models.Index(fields=['minor_category']),
+            # WBS の表示順（ゼロ埋めの WBS コードの昇順がツリー順）
+            models.Index(fields=['project', 'wbs_code']),
         ]
         unique_together = [['project', 'task_number']]
     
@@ -278,6 +290,13 @@ class Task(AbstractBaseModel):
                     # 最初のタスク
                     self.task_number = "001"
         
+        # WBS コードの自動採番（親の子の末尾）
+        if not self.pk and not self.wbs_code:
+            from .numbering import code_level, next_wbs_code
+            
+            self.wbs_code = next_wbs_code(self.project_id, self.parent)
+            self.level = code_level(self.wbs_code)
+        
         # ステータス自動更新
         old_status = None
         if self.pk:
@@ -406,3 +425,81 @@ class TaskComment(AbstractBaseModel):
     
     def __str__(self):
         return f"{self.task.task_number} - {self.user.display_name}"
+
+
+class Baseline(models.Model):
+    """スケジュールベースライン（取得時点のタスク日程・工数のスナップショット）"""
+    
+    class StorageChoices(models.TextChoices):
+        ROWS = 'ROWS', '行形式'
+        BLOB = 'BLOB', '圧縮列形式'
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='baselines',
+        verbose_name='プロジェクト'
+    )
+    name = models.CharField(max_length=100, verbose_name='ベースライン名')
+    description = models.TextField(blank=True, verbose_name='説明')
+    storage = models.CharField(
+        max_length=4,
+        choices=StorageChoices.choices,
+        default=StorageChoices.ROWS,
+        verbose_name='保存形式'
+    )
+    task_count = models.IntegerField(default=0, verbose_name='タスク数')
+    # 保存形式が BLOB の場合のみ使用（zlib 圧縮した列指向JSON）
+    data = models.BinaryField(null=True, blank=True, editable=False, verbose_name='圧縮データ')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='取得日時')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='created_baselines',
+        verbose_name='取得者'
+    )
+    
+    class Meta:
+        db_table = 'baselines'
+        verbose_name = 'ベースライン'
+        verbose_name_plural = 'ベースライン'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.project.name} - {self.name}"
+
+
+class BaselineTask(models.Model):
+    """ベースラインのタスク行（保存形式が ROWS の場合）"""
+    baseline = models.ForeignKey(
+        Baseline,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        verbose_name='ベースライン'
+    )
+    # タスクの物理削除後も行を残すため外部キー制約を付けない（null は差異レポートの LEFT JOIN 用）
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='baseline_entries',
+        verbose_name='タスク'
+    )
+    planned_start_date = models.DateField(verbose_name='開始予定日')
+    planned_end_date = models.DateField(verbose_name='終了予定日')
+    estimated_hours = models.DecimalField(max_digits=6, decimal_places=2, default=0, verbose_name='見積工数(h)')
+    
+    class Meta:
+        db_table = 'baseline_tasks'
+        verbose_name = 'ベースラインタスク'
+        verbose_name_plural = 'ベースラインタスク'
+        unique_together = [['baseline', 'task']]
+    
+    def __str__(self):
+        return f"{self.baseline.name} - {self.task_id}"
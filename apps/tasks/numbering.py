@@ -0,0 +1,292 @@
+"""
+WBS コードの自動採番
+
+WBS コードは親のコードに兄弟内の順番を連結した階層番号（1, 1.1, 1.1.2）で、
+各階層を WBS_SEGMENT_WIDTH 桁にゼロ埋めして保存する（0001.0001.0002）。
+文字列の昇順がそのまま WBS の表示順（先行順）になるため、Task.Meta.ordering の wbs_code と
+(project, wbs_code) インデックスの走査だけでツリー順に並ぶ。画面では format_wbs_code でゼロを除いて表示する。
+level は WBS コードの階層数（ルートが 1）。
+
+- 新規タスク        : 親の子の末尾の番号を振る（Task.save）
+- 並べ替え・移動    : move_task。移動元と移動先の親の共通の祖先の配下だけを採番し直す
+- 複数タスクの移動  : move_tasks。移動後の親子関係全体で1回だけ採番する（移動の順番に依存しない）
+- 全体の採番し直し  : renumber_wbs（兄弟の順番は現在の WBS コード順 → 開始予定日 → ID）
+採番はメモリ上の WBS ツリー（apps.tasks.wbs）で行い、コード・階層が変わったタスクのみ
+bulk_update_with_history で一括更新する。
+"""
+from django.db import transaction
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from apps.common.events import publish_instances
+from apps.projects.versioning import bump_project_version
+from .models import Task
+from .wbs import WBS_SEGMENT_WIDTH, build_wbs_tree, is_padded_wbs_code
+
+CHANGE_REASON = 'WBSコードの採番'
+
+MAX_SIBLINGS = 10 ** WBS_SEGMENT_WIDTH - 1
+
+# 移動元の親を指定しない場合（ツリー上の現在の親を移動元とする）
+_CURRENT_PARENT = object()
+
+
+class WbsNumberingError(Exception):
+    """WBS コードを採番できない（兄弟数・階層数の上限超過、循環する移動など）"""
+
+
+def code_level(code):
+    """WBS コードの階層数（ゼロ埋め形式でない場合は 0）"""
+    return code.count('.') + 1 if is_padded_wbs_code(code) else 0
+
+
+def _max_length():
+    return Task._meta.get_field('wbs_code').max_length
+
+
+def _task_id(tree, position):
+    return None if position is None else int(tree.ids[position])
+
+
+def _children(tree, position, order):
+    """行 position（None はルート）の子の行番号。order に親タスクIDがあればその並びを使う"""
+    parent_id = _task_id(tree, position)
+    if parent_id in order:
+        return [tree.position(task_id) for task_id in order[parent_id]]
+    return list(tree.child_positions(position))
+
+
+def plan_wbs_codes(tree, parent=None, order=None):
+    """行 parent（None はプロジェクト全体）の配下の WBS コードを求める
+
+    Args:
+        tree: WbsTree
+        parent: 採番する範囲の親の行番号（親自身のコードは変えない）
+        order: {親タスクID（ルートは None）: [子タスクID, ...]} 兄弟の並びの差し替え
+
+    Returns:
+        {タスクID: WBS コード}
+    """
+    order = order or {}
+    max_length = _max_length()
+    prefix = '' if parent is None else tree.code(parent) + '.'
+    codes = {}
+    stack = [(parent, prefix)]
+    while stack:
+        position, prefix = stack.pop()
+        children = _children(tree, position, order)
+        if len(children) > MAX_SIBLINGS:
+            raise WbsNumberingError(f'同じ親の下のタスクが{MAX_SIBLINGS}件を超えています')
+        for number, child in enumerate(children, 1):
+            code = f'{prefix}{number:0{WBS_SEGMENT_WIDTH}d}'
+            if len(code) > max_length:
+                raise WbsNumberingError('WBS の階層が深すぎます')
+            codes[int(tree.ids[child])] = code
+            stack.append((child, code + '.'))
+    return codes
+
+
+def _scope(tree, position):
+    """採番範囲の親として使える行番号（親のコードがゼロ埋め形式でない場合はプロジェクト全体）"""
+    if position is not None and is_padded_wbs_code(tree.code(position)):
+        return position
+    return None
+
+
+def _common_ancestor(tree, first, second):
+    """2つの行の共通の祖先（自身を含む。None はルート）"""
+    if first is None or second is None:
+        return None
+    ancestors = set()
+    position = first
+    while position >= 0:
+        ancestors.add(position)
+        position = int(tree.parents[position])
+    position = second
+    while position >= 0:
+        if position in ancestors:
+            return position
+        position = int(tree.parents[position])
+    return None
+
+
+@transaction.atomic
+def _apply(project_id, tree, codes, parents=None, user=None):
+    """コード・階層（と移動したタスクの親）が変わったタスクのみ一括更新する
+
+    Returns:
+        更新件数
+    """
+    parents = parents or {}
+    levels = dict(Task.objects.filter(project_id=project_id).values_list('id', 'level'))
+    changed = [
+        task_id for task_id, code in codes.items()
+        if task_id in parents
+        or code != tree.code(tree.position(task_id))
+        or levels.get(task_id) != code_level(code)
+    ]
+    if not changed:
+        return 0
+
+    now = timezone.now()
+    tasks = list(Task.objects.in_bulk(changed).values())
+    for task in tasks:
+        task.wbs_code = codes[task.pk]
+        task.level = code_level(task.wbs_code)
+        if task.pk in parents:
+            task.parent_id = parents[task.pk]
+        task.updated_at = now
+        if user is not None:
+            task.updated_by = user
+    bulk_update_with_history(
+        tasks, Task,
+        ['wbs_code', 'level', 'parent', 'updated_at', 'updated_by'],
+        batch_size=500,
+        default_user=user,
+        default_change_reason=CHANGE_REASON,
+    )
+    # bulk_update はシグナルを発行しないため版数を明示的に加算する
+    bump_project_version(project_id)
+    publish_instances([task for task in tasks if task.pk in parents])
+    return len(tasks)
+
+
+def renumber_wbs(project_id, parent_id=None, user=None):
+    """parent_id の配下（None はプロジェクト全体）の WBS コードを採番し直す
+
+    兄弟の順番は現在の WBS コード順を保つ。
+
+    Returns:
+        更新件数
+    """
+    tree = build_wbs_tree(project_id)
+    scope = None
+    if parent_id is not None:
+        scope = tree.position(parent_id)
+        if scope is None:
+            raise WbsNumberingError('指定した親タスクが見つかりません')
+    scope = _scope(tree, scope)
+    return _apply(project_id, tree, plan_wbs_codes(tree, scope), user=user)
+
+
+def move_task(task, parent=None, index=None, user=None, previous_parent_id=_CURRENT_PARENT):
+    """タスクを配下ごと parent（None はルート）の子の index 番目（None は末尾）へ移動する
+
+    同じ親の中での並べ替えにも使う。移動元と移動先の親の共通の祖先の配下だけを採番し直す。
+    フォームなどで親を保存済みの場合は、移動元の番号を詰めるため previous_parent_id に元の親を指定する。
+
+    Returns:
+        更新件数
+    """
+    if parent is not None and parent.project_id != task.project_id:
+        raise WbsNumberingError('異なるプロジェクトのタスクの下には移動できません')
+    tree = build_wbs_tree(task.project_id)
+    position = tree.position(task.pk)
+    if position is None:
+        raise WbsNumberingError('移動するタスクが見つかりません')
+    new_parent = None
+    if parent is not None:
+        new_parent = tree.position(parent.pk)
+        if new_parent is None:
+            raise WbsNumberingError('移動先の親タスクが見つかりません')
+        if new_parent in tree.subtree(position):
+            raise WbsNumberingError('自分自身または配下のタスクの下には移動できません')
+
+    if previous_parent_id is _CURRENT_PARENT:
+        old_parent = int(tree.parents[position])
+        old_parent = None if old_parent < 0 else old_parent
+    else:
+        old_parent = tree.position(previous_parent_id) if previous_parent_id else None
+
+    siblings = [int(tree.ids[child]) for child in tree.child_positions(new_parent) if child != position]
+    index = len(siblings) if index is None else max(0, min(index, len(siblings)))
+    siblings.insert(index, task.pk)
+    order = {_task_id(tree, new_parent): siblings}
+    if old_parent != new_parent:
+        order[_task_id(tree, old_parent)] = [
+            int(tree.ids[child]) for child in tree.child_positions(old_parent) if child != position
+        ]
+
+    current_parent = int(tree.parents[position])
+    parents = {}
+    if (None if current_parent < 0 else current_parent) != new_parent:
+        parents[task.pk] = _task_id(tree, new_parent)
+    scope = _scope(tree, _common_ancestor(tree, old_parent, new_parent))
+    return _apply(task.project_id, tree, plan_wbs_codes(tree, scope, order), parents, user)
+
+
+def move_tasks(project_id, parents, user=None):
+    """複数のタスクを配下ごとそれぞれの親（None はルート）の子の末尾へまとめて移動する
+
+    移動後の親子関係全体で1回だけ採番するため、結果は移動の順番に依存しない。
+    同じ親の下へ移動するタスクは、移動前の WBS の順に並べる。
+
+    Args:
+        project_id: プロジェクトID
+        parents: {タスクID: 移動先の親タスクID（None はルート）}
+
+    Returns:
+        更新件数
+    """
+    tree = build_wbs_tree(project_id)
+    moved = {}
+    scope = _CURRENT_PARENT
+    for task_id, parent_id in parents.items():
+        position = tree.position(task_id)
+        if position is None:
+            raise WbsNumberingError('移動するタスクが見つかりません')
+        new_parent = None
+        if parent_id is not None:
+            new_parent = tree.position(parent_id)
+            if new_parent is None:
+                raise WbsNumberingError('移動先の親タスクが見つかりません')
+        old_parent = int(tree.parents[position])
+        old_parent = None if old_parent < 0 else old_parent
+        if old_parent == new_parent:
+            continue
+        moved[position] = new_parent
+        for parent in (old_parent, new_parent):
+            scope = parent if scope is _CURRENT_PARENT else _common_ancestor(tree, scope, parent)
+    if not moved:
+        return 0
+
+    order = {}
+    for position, new_parent in sorted(moved.items()):
+        old_parent = int(tree.parents[position])
+        for parent in (None if old_parent < 0 else old_parent, new_parent):
+            parent_id = _task_id(tree, parent)
+            if parent_id not in order:
+                order[parent_id] = [
+                    int(tree.ids[child]) for child in tree.child_positions(parent) if child not in moved
+                ]
+        order[_task_id(tree, new_parent)].append(int(tree.ids[position]))
+
+    codes = plan_wbs_codes(tree, _scope(tree, scope), order)
+    moved_ids = {int(tree.ids[position]): _task_id(tree, new_parent) for position, new_parent in moved.items()}
+    # 移動後の親子関係が循環しているタスクは採番範囲から辿れない
+    if set(moved_ids) - set(codes):
+        raise WbsNumberingError('自分自身または配下のタスクの下には移動できません')
+    return _apply(project_id, tree, codes, moved_ids, user)
+
+
+def next_wbs_code(project_id, parent=None):
+    """parent（None はルート）の子の末尾に追加するタスクの WBS コード
+
+    親のコードがゼロ埋め形式でない場合や番号が上限に達している場合は空文字（renumber_wbs で採番する）。
+    """
+    prefix = ''
+    if parent is not None:
+        if not is_padded_wbs_code(parent.wbs_code):
+            return ''
+        prefix = parent.wbs_code + '.'
+    siblings = Task.objects.filter(project_id=project_id, parent=parent, wbs_code__startswith=prefix)
+    numbers = [
+        int(code[len(prefix):])
+        for code in siblings.values_list('wbs_code', flat=True)
+        if len(code) == len(prefix) + WBS_SEGMENT_WIDTH and code[len(prefix):].isdigit()
+    ]
+    number = max(numbers, default=0) + 1
+    code = f'{prefix}{number:0{WBS_SEGMENT_WIDTH}d}'
+    if number > MAX_SIBLINGS or len(code) > _max_length():
+        return ''
+    return code
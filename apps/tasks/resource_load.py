@@ -0,0 +1,115 @@
+"""
+担当者別の負荷（リソースローディング）
+
+各タスクの見積工数を予定開始日〜予定終了日の稼働日に均等配分し、担当者×日で合計する。
+配分は NumPy の差分配列で行う（担当者ごと・タスクごとのループなし）:
+- 稼働日は稼働日カレンダー（apps.projects.calendars、休日を含む）のマスクを使う
+- 稼働日累積配列 W（W[i] = 期間先頭から i 日目の前日までの稼働日数）から
+  タスクの稼働日数を W[終了+1] - W[開始] で求める
+- 担当者×日の差分配列の開始日に +日割り工数、終了日の翌日に -日割り工数 を加算し、
+  累積和をとって非稼働日を 0 にする
+週単位は月曜始まりに揃えて (担当者, 週, 7) に reshape して合計する。
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from apps.accounts.models import User
+from apps.projects.calendars import get_calendar
+from .models import Task
+
+# 1日あたりの稼働可能時間
+DAILY_CAPACITY_HOURS = 8
+
+
+def distribute_hours(user_index, start, end, hours, user_count, origin, length, workdays):
+    """工数を稼働日に均等配分し、(担当者, 日) の負荷配列を返す
+
+    Args:
+        user_index: タスクごとの担当者の行番号
+        start, end: タスクごとの開始日・終了日（origin からの日数、両端含む）
+        hours: タスクごとの工数
+        workdays: 稼働日マスク（長さ length）
+    """
+    cumulative = np.concatenate(([0], np.cumsum(workdays)))
+    end = np.maximum(end, start)
+    days = cumulative[end + 1] - cumulative[start]
+    # 稼働日を含まないタスクは開始日に計上する
+    no_workday = days == 0
+    rate = hours / np.where(no_workday, 1, days)
+
+    diff = np.zeros((user_count, length + 1))
+    np.add.at(diff, (user_index, start), rate)
+    np.add.at(diff, (user_index, end + 1), -rate)
+    load = np.cumsum(diff[:, :-1], axis=1) * workdays
+
+    if no_workday.any():
+        np.add.at(load, (user_index[no_workday], start[no_workday]), hours[no_workday])
+    return load
+
+
+def compute_resource_load(date_from, date_to, project_id=None, department=None, scale='week'):
+    """担当者別の負荷を算出
+
+    Args:
+        date_from, date_to: 表示期間（scale='week' の場合は月曜〜日曜に拡張）
+        scale: 'day' または 'week'
+
+    Returns:
+        {'users': [[ID, 表示名, 部署], ...], 'periods': [期間開始日, ...],
+         'hours': [[担当者ごとの負荷], ...], 'capacity': [期間ごとの稼働可能時間]}
+    """
+    if scale == 'week':
+        date_from -= timedelta(days=date_from.weekday())
+        date_to += timedelta(days=6 - date_to.weekday())
+
+    users = User.objects.filter(is_active=True)
+    if department:
+        users = users.filter(department=department)
+    users = list(users.order_by('department', 'display_name').values_list('id', 'display_name', 'department'))
+    user_ids = np.array([row[0] for row in users], dtype=np.int64)
+
+    tasks = Task.objects.filter(
+        assignee_id__in=user_ids.tolist(),
+        planned_start_date__lte=date_to,
+        planned_end_date__gte=date_from,
+    )
+    if project_id:
+        tasks = tasks.filter(project_id=project_id)
+    rows = list(tasks.values_list('assignee_id', 'planned_start_date', 'planned_end_date', 'estimated_hours'))
+
+    # プロジェクト未指定時は標準カレンダーで配分する
+    calendar = get_calendar(project_id)
+    
+    # タスク期間全体を含む範囲で配分し、表示期間を切り出す
+    window_start, window_end = date_from.toordinal(), date_to.toordinal()
+    if rows:
+        assignee, starts, ends, hours = zip(*rows)
+        start = np.fromiter((d.toordinal() for d in starts), dtype=np.int64, count=len(rows))
+        end = np.fromiter((d.toordinal() for d in ends), dtype=np.int64, count=len(rows))
+        origin = min(int(start.min()), window_start)
+        length = max(int(end.max()), window_end) - origin + 1
+        order = np.argsort(user_ids)
+        user_index = order[np.searchsorted(user_ids[order], np.array(assignee, dtype=np.int64))]
+        load = distribute_hours(
+            user_index, start - origin, end - origin,
+            np.fromiter((float(h or 0) for h in hours), dtype=np.float64, count=len(rows)),
+            len(users), origin, length, calendar.workday_mask(origin, length),
+        )[:, window_start - origin:window_end - origin + 1]
+    else:
+        load = np.zeros((len(users), window_end - window_start + 1))
+
+    workdays = calendar.workday_mask(window_start, window_end - window_start + 1)
+    capacity = workdays * DAILY_CAPACITY_HOURS
+    periods = [date.fromordinal(day) for day in range(window_start, window_end + 1)]
+    if scale == 'week':
+        load = load.reshape(len(users), -1, 7).sum(axis=2)
+        capacity = capacity.reshape(-1, 7).sum(axis=1)
+        periods = periods[::7]
+
+    return {
+        'users': [list(row) for row in users],
+        'periods': [day.isoformat() for day in periods],
+        'hours': np.round(load, 1).tolist(),
+        'capacity': capacity.tolist(),
+    }
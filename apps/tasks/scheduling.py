@@ -0,0 +1,226 @@
+"""
+後続タスクの自動リスケジュール（フォワード方向）
+
+日付が変更されたタスクを起点に、TaskDependency をたどって影響を受ける後続タスクのみを対象とする。
+1. プロジェクトの依存関係（ID と種別・遅延日数のみ）を1クエリで読み込み、起点から幅優先探索で
+   下流のサブグラフを求める。他のプロジェクトの後続タスクに到達した場合は、そのプロジェクトの
+   依存関係を追加で読み込んで探索を続ける（プロジェクトをまたぐ依存関係も追従する）
+2. サブグラフと、その前提タスクを1クエリで読み込む
+3. トポロジカル順に各タスクの最早開始日を計算する（メモリ内）
+4. 変更のあったタスクのみ bulk_update_with_history で一括更新する
+
+日付は各タスクのプロジェクトの稼働日カレンダー（apps.projects.calendars）で計算し、遅延日数は稼働日数として扱う。
+後続タスクは前に倒さず、依存関係を満たさない場合のみ後ろへずらす（稼働日数の期間は維持）。
+着手済み・完了のタスクは移動しない。
+"""
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from apps.common.events import publish_instances
+from apps.projects.calendars import get_calendar
+from apps.projects.versioning import bump_project_versions
+from .milestones import refresh_task_milestones
+from .models import Task, TaskDependency
+
+DependencyType = TaskDependency.DependencyTypeChoices
+
+CHANGE_REASON = '前提タスクの日程変更に伴う自動リスケジュール'
+
+
+class ScheduleCycleError(Exception):
+    """依存関係が循環している"""
+
+
+def _downstream(successors, roots):
+    """roots から到達できるタスクID（roots 自身は他の起点から到達できる場合のみ含む）"""
+    reached = set()
+    queue = deque(roots)
+    while queue:
+        task_id = queue.popleft()
+        for successor_id, _, _ in successors.get(task_id, ()):
+            if successor_id not in reached:
+                reached.add(successor_id)
+                queue.append(successor_id)
+    return reached
+
+
+def _topological_order(nodes, successors):
+    """nodes（サブグラフ）のトポロジカル順"""
+    indegree = dict.fromkeys(nodes, 0)
+    for task_id in nodes:
+        for successor_id, _, _ in successors.get(task_id, ()):
+            if successor_id in indegree:
+                indegree[successor_id] += 1
+
+    queue = deque(task_id for task_id, degree in indegree.items() if degree == 0)
+    order = []
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for successor_id, _, _ in successors.get(task_id, ()):
+            if successor_id in indegree:
+                indegree[successor_id] -= 1
+                if indegree[successor_id] == 0:
+                    queue.append(successor_id)
+
+    if len(order) != len(nodes):
+        raise ScheduleCycleError('タスクの依存関係が循環しているため、日程を再計算できません')
+    return order
+
+
+def _effective_dates(task):
+    """前提タスクとして参照する (開始日, 終了日)（実績日があれば実績日）"""
+    return (
+        task.actual_start_date or task.planned_start_date,
+        task.actual_end_date or task.planned_end_date,
+    )
+
+
+def _earliest_start(task, constraints, tasks, calendar):
+    """前提タスクの制約を満たす最早開始日（制約がない場合は None）"""
+    duration = max(calendar.working_days_between(task.planned_start_date, task.planned_end_date), 1)
+    candidates = []
+    for predecessor_id, dependency_type, lag in constraints:
+        predecessor_start, predecessor_end = _effective_dates(tasks[predecessor_id])
+        if dependency_type == DependencyType.FINISH_TO_START:
+            candidates.append(calendar.add_working_days(predecessor_end, 1 + lag))
+        elif dependency_type == DependencyType.START_TO_START:
+            candidates.append(calendar.add_working_days(predecessor_start, lag))
+        else:
+            # 終了日の制約は、期間を維持したときの開始日に換算する
+            base = predecessor_end if dependency_type == DependencyType.FINISH_TO_FINISH else predecessor_start
+            earliest_end = calendar.add_working_days(base, lag)
+            candidates.append(calendar.add_working_days(earliest_end, -(duration - 1)))
+    return max(candidates) if candidates else None, duration
+
+
+def plan_reschedule(task_ids):
+    """日程変更されたタスクを起点に後続タスクの新しい日程を計算する（DB は更新しない）
+
+    Args:
+        task_ids: 日程が変更されたタスクのID
+
+    Returns:
+        変更のあるタスクごとの辞書のリスト（トポロジカル順）
+        {'task', 'old_start', 'old_end', 'new_start', 'new_end', 'shift'（稼働日数）}
+
+    Raises:
+        ScheduleCycleError: 依存関係が循環している場合
+    """
+    roots = set(task_ids)
+    pending = set(Task.objects.filter(id__in=roots).values_list('project_id', flat=True))
+    if not pending:
+        return []
+
+    successors = defaultdict(list)
+    predecessors = defaultdict(list)
+    project_of = {}
+    loaded = set()
+    seen = set()
+    affected = set()
+    while pending:
+        loaded |= pending
+        # 読み込むプロジェクトの後続タスクへの依存関係と、そこから他のプロジェクトへ出る依存関係
+        dependencies = TaskDependency.objects.filter(
+            Q(successor__project_id__in=pending) | Q(predecessor__project_id__in=pending),
+            predecessor__is_deleted=False,
+            successor__is_deleted=False,
+        ).values_list('id', 'predecessor_id', 'successor_id', 'successor__project_id', 'dependency_type', 'lag_days')
+        for dependency_id, predecessor_id, successor_id, project_id, dependency_type, lag in dependencies:
+            if dependency_id in seen:
+                continue
+            seen.add(dependency_id)
+            project_of[successor_id] = project_id
+            successors[predecessor_id].append((successor_id, dependency_type, lag))
+            predecessors[successor_id].append((predecessor_id, dependency_type, lag))
+        affected = _downstream(successors, roots)
+        pending = {project_of[task_id] for task_id in affected} - loaded
+
+    if not affected:
+        return []
+    order = _topological_order(roots | affected, successors)
+
+    needed = set(affected) | roots
+    for task_id in affected:
+        needed.update(predecessor_id for predecessor_id, _, _ in predecessors[task_id])
+    tasks = Task.objects.select_related('assignee', 'project').in_bulk(needed)
+
+    calendars = {}
+    changes = []
+    for task_id in order:
+        task = tasks.get(task_id)
+        if task_id not in affected or task is None or task.actual_start_date or task.actual_end_date:
+            continue
+        calendar = calendars.get(task.project_id)
+        if calendar is None:
+            calendar = calendars[task.project_id] = get_calendar(task.project_id)
+
+        constraints = [row for row in predecessors[task_id] if row[0] in tasks]
+        earliest_start, duration = _earliest_start(task, constraints, tasks, calendar)
+        if earliest_start is None or earliest_start <= task.planned_start_date:
+            continue
+
+        new_start = calendar.next_working_day(earliest_start)
+        change = {
+            'task': task,
+            'old_start': task.planned_start_date,
+            'old_end': task.planned_end_date,
+            'new_start': new_start,
+            'new_end': calendar.end_date(new_start, duration),
+            'shift': calendar.working_day_number(new_start) - calendar.working_day_number(task.planned_start_date),
+        }
+        # 後続の計算で新しい日程を参照できるよう、メモリ上のインスタンスに反映する
+        task.planned_start_date = change['new_start']
+        task.planned_end_date = change['new_end']
+        changes.append(change)
+    return changes
+
+
+@transaction.atomic
+def apply_reschedule(changes, user=None):
+    """plan_reschedule の結果を一括更新する（履歴レコードも一括作成）
+
+    Returns:
+        更新件数
+    """
+    if not changes:
+        return 0
+    now = timezone.now()
+    tasks = []
+    for change in changes:
+        task = change['task']
+        task.planned_start_date = change['new_start']
+        task.planned_end_date = change['new_end']
+        task.updated_at = now
+        if user is not None:
+            task.updated_by = user
+        tasks.append(task)
+
+    bulk_update_with_history(
+        tasks, Task,
+        ['planned_start_date', 'planned_end_date', 'updated_at', 'updated_by'],
+        batch_size=500,
+        default_user=user,
+        default_change_reason=CHANGE_REASON,
+    )
+    # bulk_update はシグナルを発行しないため版数・マイルストーンの集計値を明示的に更新する
+    bump_project_versions(task.project_id for task in tasks)
+    refresh_task_milestones(tasks)
+    publish_instances(tasks)
+    return len(tasks)
+
+
+def reschedule(task_ids, user=None, dry_run=False):
+    """後続タスクを再計算し、dry_run でなければ更新する
+
+    Returns:
+        plan_reschedule の結果
+    """
+    changes = plan_reschedule(task_ids)
+    if not dry_run:
+        apply_reschedule(changes, user)
+    return changes
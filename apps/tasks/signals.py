@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.common.events import track_project_events
+from apps.common.json_payload import iso_date
+from apps.projects.models import Milestone
+from apps.projects.versioning import track_project_version
+from .milestones import refresh_milestones
+from .models import Baseline, Task, TaskDependency
+
+
+def _dependency_project_id(dependency):
+    """依存関係の所属プロジェクトID（前提タスクのプロジェクト）"""
+    return Task.all_objects.filter(
+        pk=dependency.predecessor_id
+    ).values_list('project_id', flat=True).first()
+
+
+track_project_version(Task, lambda instance: instance.project_id)
+track_project_version(TaskDependency, _dependency_project_id)
+track_project_version(Baseline, lambda instance: instance.project_id)
+
+
+def _task_event(task):
+    """ガント・カレンダーの1行を差し替えるための値（終了日は翌日＝排他的終了日）"""
+    return {
+        'id': task.pk,
+        'text': f"{task.task_number} - {task.title}",
+        'start_date': iso_date(task.planned_start_date),
+        'end_date': iso_date(task.planned_end_date + timedelta(days=1)) if task.planned_end_date else None,
+        'progress': float(task.progress_rate or 0) / 100,
+        'status': task.status,
+        'assignee_id': task.assignee_id,
+    }
+
+
+track_project_events(Task, 'task', lambda instance: instance.project_id, _task_event)
+
+
+@receiver(pre_save, sender=Task, dispatch_uid='task_previous_milestone')
+def remember_previous_milestone(sender, instance, raw=False, **kwargs):
+    """更新前のマイルストーンを保持（紐づけの変更時に変更前のマイルストーンも集計し直すため）"""
+    if raw or instance.pk is None:
+        instance._previous_milestone_id = None
+        return
+    instance._previous_milestone_id = Task.all_objects.filter(
+        pk=instance.pk
+    ).values_list('milestone_id', flat=True).first()
+
+
+@receiver(post_save, sender=Task, dispatch_uid='task_milestone_progress')
+def update_milestone_progress(sender, instance, raw=False, **kwargs):
+    """タスクの保存時に、紐づく（紐づいていた）マイルストーンの集計値を更新"""
+    if raw:
+        return
+    refresh_milestones({instance.milestone_id, getattr(instance, '_previous_milestone_id', None)})
+
+
+@receiver(post_delete, sender=Task, dispatch_uid='task_milestone_progress_delete')
+def reset_milestone_progress(sender, instance, **kwargs):
+    refresh_milestones([instance.milestone_id])
+
+
+@receiver(post_save, sender=Milestone, dispatch_uid='milestone_progress')
+def update_milestone_status(sender, instance, raw=False, **kwargs):
+    """目標日の変更で遅延の判定が変わるため、マイルストーンの保存時にも集計値を更新"""
+    if raw:
+        return
+    refresh_milestones([instance.pk])
@@ -1,5 +1,7 @@
 from django import template
 
+from apps.tasks.wbs import format_wbs_code
+
 register = template.Library()
 
 
@@ -51,3 +53,9 @@ def get_priority_badge_class(priority):
         'URGENT': 'bg-danger',
     }
     return priority_classes.get(priority, 'bg-secondary')
+
+
+@register.filter
+def wbs_label(code):
+    """WBS コードの表示用文字列（ゼロ埋めを除く）"""
+    return format_wbs_code(code)
@@ -1,3 +1,1136 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.common import json_payload
+from apps.common.history import as_of_queryset
+from apps.projects.calendars import get_calendar
+from apps.projects.forms import MilestoneForm
+from apps.projects.models import Holiday, Milestone, Project, WorkCalendar
+from apps.tasks.baselines import capture_baseline, compute_variance
+from apps.tasks.evm import AS_OF_MARGIN, clamp_as_of, compute_evm, compute_project_indicators
+from apps.tasks.milestones import refresh_all_milestones
+from apps.tasks.models import Baseline, SystemCategory, Task, TaskDependency
+from apps.tasks.resource_load import compute_resource_load
+from apps.tasks.scheduling import ScheduleCycleError, plan_reschedule, reschedule
+from apps.tasks.numbering import WbsNumberingError, move_task, renumber_wbs
+from apps.tasks.wbs import TreeState, WbsTree, build_wbs_tree, format_wbs_code
+
+
+class GanttPayloadTest(TestCase):
+    """ガント・カレンダー用ペイロードのテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=date(2025, 4, 1),
+            end_date=date(2025, 9, 30)
+        )
+        Task.objects.create(
+            project=self.project,
+            title='設計</script>',
+            planned_start_date=date(2025, 4, 1),
+            planned_end_date=date(2025, 4, 4),
+            progress_rate=25
+        )
+        Task.objects.create(
+            project=self.project,
+            title='レビュー',
+            planned_start_date=date(2025, 4, 7),
+            planned_end_date=date(2025, 4, 7)
+        )
+    
+    def test_gantt_rows(self):
+        """行形式で出力され、期間は稼働日数（最低1日）になること"""
+        response = self.client.get(reverse('tasks:task_gantt'))
+        payload = response.context['tasks_json']
+        self.assertNotIn('</script>', payload)
+        
+        rows = sorted(json.loads(payload), key=lambda row: row['start_date'])
+        self.assertEqual(rows[0]['text'], '001 - 設計</script>')
+        self.assertEqual(rows[0]['start_date'], '2025-04-01')
+        self.assertEqual(rows[0]['duration'], 4)
+        self.assertAlmostEqual(rows[0]['progress'], 0.25)
+        self.assertEqual(rows[1]['duration'], 1)
+    
+    def test_date_outside_calendar_range(self):
+        """年を誤入力したタスクがあってもガントチャートを表示できること"""
+        Task.objects.create(
+            project=self.project, title='誤入力',
+            planned_start_date=date(2025, 4, 1), planned_end_date=date(2205, 4, 1)
+        )
+        self.assertEqual(self.client.get(reverse('tasks:task_gantt')).status_code, 200)
+        response = self.client.get(reverse('tasks:task_gantt_api'), {'project': self.project.pk})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_large_payload_is_columnar(self):
+        """しきい値を超えると列指向形式で出力されること"""
+        with mock.patch.object(json_payload, 'COLUMNAR_THRESHOLD', 1):
+            response = self.client.get(reverse('tasks:task_calendar'))
+        payload = json.loads(response.context['events_json'])
+        self.assertEqual(
+            set(payload),
+            {'id', 'title', 'start', 'end', 'color', 'progress', 'status'}
+        )
+        self.assertEqual(sorted(payload['end']), ['2025-04-05', '2025-04-08'])
+    
+    async def test_async_api(self):
+        """ASGI リクエストで async の JSON API がガント・カレンダーと同じ行を返すこと"""
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.user)
+        
+        response = await client.get(reverse('tasks:task_gantt_api') + f'?project={self.project.pk}')
+        payload = response.json()
+        self.assertEqual(payload['count'], 2)
+        self.assertEqual(sorted(payload['tasks']['duration']), [1, 4])
+        
+        response = await client.get(reverse('tasks:task_calendar_api') + f'?project={self.project.pk}')
+        self.assertEqual(sorted(response.json()['events']['end']), ['2025-04-05', '2025-04-08'])
+        
+        response = await client.get(reverse('tasks:ajax_load_system_categories') + f'?project_id={self.project.pk}')
+        self.assertEqual(response.json(), [])
+    
+    def test_async_api_requires_login(self):
+        """未ログインではログイン画面へリダイレクトされること"""
+        self.client.logout()
+        response = self.client.get(reverse('tasks:task_gantt_api'))
+        self.assertEqual(response.status_code, 302)
+
+
+class TaskCsvExportTest(TestCase):
+    """タスクCSV出力のテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='テストプロジェクト',
+            start_date=date(2025, 4, 1),
+            end_date=date(2025, 9, 30)
+        )
+        for title, status in [('設計', 'COMPLETED'), ('実装', 'NOT_STARTED'), ('試験', 'NOT_STARTED')]:
+            Task.objects.create(
+                project=self.project,
+                title=title,
+                status=status,
+                assignee=self.user if title == '実装' else None,
+                planned_start_date=date(2025, 4, 1),
+                planned_end_date=date(2025, 4, 30)
+            )
+    
+    def _read(self, response):
+        return b''.join(response.streaming_content)
+    
+    def test_export_honours_list_filters(self):
+        """一覧画面と同じ絞り込み条件で出力されること"""
+        response = self.client.get(reverse('tasks:task_export_csv') + '?assignee=me')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = self._read(response).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('実装', lines[1])
+    
+    def test_export_gzip(self):
+        """gzip 指定時は圧縮して出力されること"""
+        response = self.client.get(reverse('tasks:task_export_csv') + '?compress=gzip&status=NOT_STARTED')
+        self.assertIn('.csv.gz', response['Content-Disposition'])
+        lines = gzip.decompress(self._read(response)).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+    
+    def test_export_as_of(self):
+        """as_of 指定時はその時点の状態で出力されること"""
+        moment = timezone.now()
+        task = Task.objects.get(title='試験')
+        task.status = 'IN_PROGRESS'
+        task.save()
+        Task.objects.create(
+            project=self.project, title='運用', planned_start_date=date(2025, 5, 1), planned_end_date=date(2025, 5, 31)
+        )
+        
+        response = self.client.get(reverse('tasks:task_export_csv'), {
+            'as_of': moment.isoformat(), 'status': 'NOT_STARTED', 'project': self.project.pk,
+        })
+        lines = self._read(response).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('試験', lines[2])
+        self.assertIn('PRJ001', lines[2])
+    
+    def test_history_command(self):
+        """管理コマンドで変更履歴を出力できること"""
+        with tempfile.NamedTemporaryFile(suffix='.csv') as output:
+            call_command(
+                'export_csv', 'task_history', '--filter', f'project={self.project.pk}',
+                '--output', output.name, stderr=io.StringIO()
+            )
+            lines = open(output.name, encoding='utf-8').read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('履歴ID,履歴日時'))
+
+
+class EvmTest(TestCase):
+    """EVM計算のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='EVMプロジェクト',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 3, 31),
+            status='IN_PROGRESS',
+        )
+        # 10h を10日間で計画、40%完了、実績8h
+        self.parent = Task.objects.create(
+            project=self.project, title='設計',
+            planned_start_date=date(2025, 1, 1), planned_end_date=date(2025, 1, 10),
+            actual_start_date=date(2025, 1, 1),
+            estimated_hours=10, actual_hours=8, progress_rate=40,
+        )
+        self.child = Task.objects.create(
+            project=self.project, parent=self.parent, title='詳細設計',
+            planned_start_date=date(2025, 1, 6), planned_end_date=date(2025, 1, 15),
+            estimated_hours=20,
+        )
+        self.as_of = date(2025, 1, 5)
+    
+    def test_project_evm(self):
+        """基準日時点の PV/EV/AC と SPI/CPI が算出されること"""
+        result = compute_evm(self.project, as_of=self.as_of)
+        indicators = result['indicators']
+        self.assertEqual(indicators['bac'], 30)
+        self.assertEqual(indicators['pv'], 5)
+        self.assertEqual(indicators['ev'], 4)
+        self.assertEqual(indicators['ac'], 8)
+        self.assertEqual(indicators['spi'], 0.8)
+        self.assertEqual(indicators['cpi'], 0.5)
+        self.assertEqual(indicators['eac'], 60)
+        self.assertEqual(result['unit'], 'h')
+        
+        # PV は計画終了日まで、EV/AC は基準日まで
+        self.assertEqual(result['dates'][0], '2025-01-01')
+        self.assertEqual(result['dates'][-1], '2025-01-15')
+        self.assertEqual(result['pv'][-1], 30)
+        self.assertEqual(len(result['ev']), 5)
+        self.assertEqual(result['ac'][-1], 8)
+    
+    def test_wbs_subtree(self):
+        """WBS サブツリーのタスクのみ集計されること"""
+        indicators = compute_evm(self.project, root_task_id=self.child.pk, as_of=self.as_of)['indicators']
+        self.assertEqual(indicators['bac'], 20)
+        self.assertEqual(indicators['pv'], 0)
+        self.assertIsNone(indicators['spi'])
+    
+    def test_budget_conversion_and_batch_indicators(self):
+        """予算設定時は金額換算され、一括算出と個別算出が一致すること"""
+        self.project.budget = 300000
+        self.project.save()
+        result = compute_evm(self.project, as_of=self.as_of)
+        self.assertEqual(result['unit'], '円')
+        self.assertEqual(result['indicators']['pv'], 50000)
+        
+        batch = compute_project_indicators([self.project], as_of=self.as_of)
+        self.assertEqual(batch[self.project.pk], result['indicators'])
+    
+    def test_api(self):
+        """EVM API が JSON を返すこと"""
+        response = self.client.get(reverse('tasks:evm_api'), {
+            'project': self.project.pk, 'as_of': '2025-01-05'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['indicators']['spi'], 0.8)
+        
+        self.assertEqual(self.client.get(reverse('tasks:evm_api')).status_code, 400)
+        response = self.client.get(reverse('tasks:evm'), {'project': self.project.pk})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_as_of_is_clamped_to_project_span(self):
+        """基準日はプロジェクトの期間の前後 AS_OF_MARGIN に収められること"""
+        response = self.client.get(reverse('tasks:evm_api'), {
+            'project': self.project.pk, 'as_of': '9999-12-31'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['as_of'], (self.project.end_date + AS_OF_MARGIN).isoformat())
+        self.assertEqual(response.json()['dates'][-1], response.json()['as_of'])
+        
+        self.assertEqual(clamp_as_of(self.project, date(1, 1, 1)), self.project.start_date - AS_OF_MARGIN)
+        self.assertEqual(clamp_as_of(self.project, self.as_of), self.as_of)
+
+
+class WbsTreeTest(TestCase):
+    """WBS ツリーのテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='WBSプロジェクト',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 3, 31),
+        )
+        
+        def create(code, parent=None):
+            return Task.objects.create(
+                project=self.project, parent=parent, title=f'作業{code}', wbs_code=code,
+                planned_start_date=date(2025, 1, 1), planned_end_date=date(2025, 1, 10),
+            )
+        
+        # 登録順と WBS コード順を変えておく
+        self.second = create('2')
+        self.first = create('1')
+        self.first_10 = create('1.10', self.first)
+        self.first_2 = create('1.2', self.first)
+        self.first_2_1 = create('1.2.1', self.first_2)
+    
+    def test_preorder_and_subtree(self):
+        """先行順（WBS コードの数値順）に並び、サブツリーが連続区間になること"""
+        tree = build_wbs_tree(self.project.pk)
+        self.assertEqual(
+            tree.ids.tolist(),
+            [self.first.pk, self.first_2.pk, self.first_2_1.pk, self.first_10.pk, self.second.pk]
+        )
+        self.assertEqual(tree.depths.tolist(), [0, 1, 2, 1, 0])
+        first = tree.position(self.first.pk)
+        self.assertEqual(list(tree.subtree(first)), [0, 1, 2, 3])
+        self.assertEqual([int(tree.ids[p]) for p in tree.child_positions(first)], [self.first_2.pk, self.first_10.pk])
+        self.assertEqual(tree.ancestor_ids(tree.position(self.first_2_1.pk)), [self.first_2.pk, self.first.pk])
+    
+    def test_visible_positions_skip_collapsed(self):
+        """折りたたんだ行の配下を読み飛ばし、展開した行の配下を含めること"""
+        tree = build_wbs_tree(self.project.pk)
+        visible = lambda state, parent=None: [int(tree.ids[p]) for p in tree.visible_positions(state, parent)]
+        self.assertEqual(visible(TreeState(expand_depth=0)), [self.first.pk, self.second.pk])
+        self.assertEqual(
+            visible(TreeState(expand_depth=1)),
+            [self.first.pk, self.first_2.pk, self.first_10.pk, self.second.pk]
+        )
+        state = TreeState(expanded=[self.first_2.pk], collapsed=[self.first.pk])
+        self.assertEqual(visible(state), [self.first.pk, self.second.pk])
+        self.assertEqual(
+            visible(state, tree.position(self.first.pk)),
+            [self.first_2.pk, self.first_2_1.pk, self.first_10.pk]
+        )
+    
+    def test_orphans_and_cycles_become_roots(self):
+        """親がツリーにないタスク・循環しているタスクもルートとして含まれること"""
+        rows = [
+            (1, None, '1', '001', 'a', 'NOT_STARTED', 0, None, None, None),
+            (2, 99, '2', '002', 'b', 'NOT_STARTED', 0, None, None, None),
+            (3, 4, '3', '003', 'c', 'NOT_STARTED', 0, None, None, None),
+            (4, 3, '4', '004', 'd', 'NOT_STARTED', 0, None, None, None),
+        ]
+        tree = WbsTree.build(rows)
+        self.assertEqual(tree.ids.tolist(), [1, 2, 3, 4])
+        self.assertEqual(tree.parents.tolist(), [-1, -1, -1, 2])
+        self.assertEqual(tree.subtree_ends.tolist(), [1, 2, 4, 4])
+    
+    def test_views_and_state(self):
+        """画面・API が表示行を返し、開閉状態がセッションに保存されること"""
+        response = self.client.get(reverse('tasks:task_tree'), {'project': self.project.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['tree_count'], 5)
+        
+        api = reverse('tasks:task_tree_api')
+        nodes = self.client.get(api, {'project': self.project.pk}).json()['nodes']
+        self.assertEqual(nodes['id'], [self.first.pk, self.first_2.pk, self.first_10.pk, self.second.pk])
+        self.assertEqual(nodes['children'], [2, 1, 0, 0])
+        
+        response = self.client.post(reverse('tasks:task_tree_state'), {
+            'project': self.project.pk, 'task': self.first.pk, 'open': '0',
+        })
+        self.assertEqual(response.status_code, 200)
+        nodes = self.client.get(api, {'project': self.project.pk}).json()['nodes']
+        self.assertEqual(nodes['id'], [self.first.pk, self.second.pk])
+        
+        # 展開時の子の読み込みとサブツリー全体
+        nodes = self.client.get(api, {'project': self.project.pk, 'parent': self.first.pk}).json()['nodes']
+        self.assertEqual(nodes['id'], [self.first_2.pk, self.first_10.pk])
+        nodes = self.client.get(api, {'project': self.project.pk, 'root': self.first_2.pk}).json()['nodes']
+        self.assertEqual(nodes['id'], [self.first_2.pk, self.first_2_1.pk])
+        
+        # タスク詳細からの遷移では祖先を展開する
+        response = self.client.get(reverse('tasks:task_tree'), {'project': self.project.pk, 'focus': self.first_2_1.pk})
+        self.assertEqual(response.context['focus'], self.first_2_1.pk)
+        self.assertEqual(
+            [node['id'] for node in json.loads(response.context['nodes_json'])],
+            [self.first.pk, self.first_2.pk, self.first_2_1.pk, self.first_10.pk, self.second.pk]
+        )
+        
+        self.assertEqual(self.client.get(api).status_code, 400)
+        self.assertEqual(self.client.get(api, {'project': self.project.pk, 'parent': 999999}).status_code, 404)
+    
+    def test_tree_rebuilt_after_task_change(self):
+        """タスクの追加でキャッシュ済みのツリーが作り直されること"""
+        api = reverse('tasks:task_tree_api')
+        self.assertEqual(self.client.get(api, {'project': self.project.pk}).json()['total'], 5)
+        Task.objects.create(
+            project=self.project, title='追加', wbs_code='3',
+            planned_start_date=date(2025, 1, 1), planned_end_date=date(2025, 1, 10),
+        )
+        self.assertEqual(self.client.get(api, {'project': self.project.pk}).json()['total'], 6)
+
+
+class WbsNumberingTest(TestCase):
+    """WBS コード採番のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            employee_id='EMP001',
+            display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001',
+            name='WBSプロジェクト',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 3, 31),
+        )
+        self.design = self.create('設計')
+        self.basic = self.create('基本設計', self.design)
+        self.detail = self.create('詳細設計', self.design)
+        self.detail_db = self.create('DB設計', self.detail)
+        self.build = self.create('製造')
+    
+    def create(self, title, parent=None, **fields):
+        return Task.objects.create(
+            project=self.project, parent=parent, title=title,
+            planned_start_date=date(2025, 1, 1), planned_end_date=date(2025, 1, 10), **fields
+        )
+    
+    def codes(self):
+        """WBS コード順（DB の並び）のタイトルと表示用コード"""
+        return [
+            (title, format_wbs_code(code), level)
+            for title, code, level in Task.objects.filter(project=self.project).order_by('wbs_code').values_list(
+                'title', 'wbs_code', 'level'
+            )
+        ]
+    
+    def test_new_tasks_are_appended(self):
+        """新規タスクに親の子の末尾の番号がゼロ埋めで振られ、コード順がツリー順になること"""
+        self.assertEqual(Task.objects.get(pk=self.detail_db.pk).wbs_code, '0001.0002.0001')
+        self.assertEqual(self.codes(), [
+            ('設計', '1', 1), ('基本設計', '1.1', 2), ('詳細設計', '1.2', 2), ('DB設計', '1.2.1', 3), ('製造', '2', 1),
+        ])
+    
+    def test_renumber_free_codes(self):
+        """手入力のコードを、数値順の並びを保ってゼロ埋めの階層番号に採番し直すこと"""
+        Task.objects.filter(pk=self.design.pk).update(wbs_code='10')
+        Task.objects.filter(pk=self.build.pk).update(wbs_code='9')
+        Task.objects.filter(pk=self.basic.pk).update(wbs_code='10.2')
+        Task.objects.filter(pk=self.detail.pk).update(wbs_code='10.1')
+        renumber_wbs(self.project.pk, user=self.user)
+        self.assertEqual(self.codes(), [
+            ('製造', '1', 1), ('設計', '2', 1), ('詳細設計', '2.1', 2), ('DB設計', '2.1.1', 3), ('基本設計', '2.2', 2),
+        ])
+        self.assertEqual(renumber_wbs(self.project.pk), 0)
+    
+    def test_reorder_updates_only_affected_range(self):
+        """同じ親の中の並べ替えでは、その親の配下だけを更新すること"""
+        history_count = Task.history.count()
+        updated = move_task(self.detail, self.design, 0, user=self.user)
+        self.assertEqual(updated, 3)
+        self.assertEqual(self.codes(), [
+            ('設計', '1', 1), ('詳細設計', '1.1', 2), ('DB設計', '1.1.1', 3), ('基本設計', '1.2', 2), ('製造', '2', 1),
+        ])
+        # 変更履歴も一括で作成される
+        self.assertEqual(Task.history.count(), history_count + 3)
+    
+    def test_move_subtree_closes_gap(self):
+        """配下ごと別の親へ移動し、移動元の番号を詰めること"""
+        move_task(self.detail, self.build, user=self.user)
+        self.assertEqual(self.codes(), [
+            ('設計', '1', 1), ('基本設計', '1.1', 2), ('製造', '2', 1), ('詳細設計', '2.1', 2), ('DB設計', '2.1.1', 3),
+        ])
+        self.assertEqual(Task.objects.get(pk=self.detail.pk).parent_id, self.build.pk)
+        
+        # 親を保存済みの場合（タスク編集画面）
+        Task.objects.filter(pk=self.basic.pk).update(parent=self.build)
+        move_task(Task.objects.get(pk=self.basic.pk), self.build, previous_parent_id=self.design.pk)
+        self.assertEqual(self.codes(), [
+            ('設計', '1', 1), ('製造', '2', 1), ('詳細設計', '2.1', 2), ('DB設計', '2.1.1', 3), ('基本設計', '2.2', 2),
+        ])
+    
+    def test_move_into_own_subtree_is_rejected(self):
+        """自分の配下への移動はエラーになること"""
+        with self.assertRaises(WbsNumberingError):
+            move_task(self.design, self.detail_db)
+    
+    def test_move_view(self):
+        """移動 API で並べ替えられ、WBS ツリーにも反映されること"""
+        api = reverse('tasks:task_tree_api')
+        self.client.get(api, {'project': self.project.pk})
+        response = self.client.post(reverse('tasks:task_move', args=[self.build.pk]), {'parent': '', 'index': '0'})
+        self.assertEqual(response.status_code, 200)
+        nodes = self.client.get(api, {'project': self.project.pk, 'depth': '0'}).json()['nodes']
+        self.assertEqual(nodes['id'], [self.build.pk, self.design.pk])
+        self.assertEqual(nodes['wbs_code'], ['1', '2'])
+        
+        response = self.client.post(reverse('tasks:task_move', args=[self.design.pk]), {'parent': self.basic.pk})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResourceLoadTest(TestCase):
+    """担当者別負荷のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='dev1', password='testpass123', employee_id='EMP001',
+            display_name='開発者1', department='開発部'
+        )
+        self.other = User.objects.create_user(
+            username='qa1', password='testpass123', employee_id='EMP002',
+            display_name='品質1', department='品質部'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='負荷', start_date=date(2025, 1, 1), end_date=date(2025, 3, 31)
+        )
+        for start, end, hours in [
+            (date(2025, 1, 6), date(2025, 1, 10), 40),   # 月〜金: 8h/日
+            (date(2025, 1, 9), date(2025, 1, 14), 16),   # 木〜翌火（稼働日4日）: 4h/日
+            (date(2025, 1, 11), date(2025, 1, 12), 8),   # 土日のみ: 開始日に計上
+        ]:
+            Task.objects.create(
+                project=self.project, title='作業', assignee=self.user,
+                planned_start_date=start, planned_end_date=end, estimated_hours=hours,
+            )
+        Task.objects.create(
+            project=self.project, title='試験', assignee=self.other,
+            planned_start_date=date(2025, 1, 6), planned_end_date=date(2025, 1, 6), estimated_hours=5,
+        )
+    
+    def test_weekly_load(self):
+        """稼働日に配分され、週単位で合計されること"""
+        result = compute_resource_load(date(2025, 1, 8), date(2025, 1, 14), department='開発部')
+        self.assertEqual(result['periods'], ['2025-01-06', '2025-01-13'])
+        self.assertEqual([row[0] for row in result['users']], [self.user.pk])
+        self.assertEqual(result['hours'], [[56.0, 8.0]])
+        self.assertEqual(result['capacity'], [40, 40])
+    
+    def test_daily_load(self):
+        """日単位では非稼働日が0（稼働日のないタスクを除く）になること"""
+        result = compute_resource_load(date(2025, 1, 9), date(2025, 1, 13), scale='day')
+        users = [row[0] for row in result['users']]
+        hours = result['hours'][users.index(self.user.pk)]
+        self.assertEqual(hours, [12.0, 12.0, 8.0, 0.0, 4.0])
+        self.assertEqual(result['capacity'], [8, 8, 0, 0, 8])
+    
+    def test_holiday_excluded(self):
+        """休日は稼働日から除かれ、工数が残りの稼働日に配分されること"""
+        Holiday.objects.create(
+            calendar=WorkCalendar.objects.get(project__isnull=True), date=date(2025, 1, 13), name='成人の日'
+        )
+        result = compute_resource_load(date(2025, 1, 9), date(2025, 1, 14), scale='day')
+        users = [row[0] for row in result['users']]
+        hours = result['hours'][users.index(self.user.pk)]
+        self.assertEqual(hours, [13.3, 13.3, 8.0, 0.0, 0.0, 5.3])
+        self.assertEqual(result['capacity'], [8, 8, 0, 0, 0, 8])
+    
+    def test_view(self):
+        """ヒートマップ画面が表示されること"""
+        response = self.client.get(reverse('tasks:resource_load'), {
+            'project': self.project.pk, 'start': '2025-01-06', 'weeks': 4
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('開発部', list(response.context['departments']))
+    
+    def test_view_start_outside_calendar_range(self):
+        """カレンダーの計算対象期間外の開始日は今日からの表示になること"""
+        for start in ['2101-01-01', '9999-12-25', '0001-01-01']:
+            response = self.client.get(reverse('tasks:resource_load'), {'start': start, 'weeks': 52})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['start'], timezone.localdate())
+
+
+
+class RescheduleTest(TestCase):
+    """後続タスクの自動リスケジュールのテスト"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123', employee_id='EMP001', display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='リスケ', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        # 2025-04-29（火）は祝日
+        Holiday.objects.create(calendar=WorkCalendar.objects.get(project__isnull=True), date=date(2025, 4, 29))
+        self.design = self._task('設計', date(2025, 4, 21), date(2025, 4, 25))
+        self.build = self._task('実装', date(2025, 4, 28), date(2025, 5, 2))     # 稼働日4日
+        self.review = self._task('レビュー', date(2025, 4, 28), date(2025, 4, 28))
+        self.test = self._task('試験', date(2025, 5, 7), date(2025, 5, 8))
+        self.other = self._task('無関係', date(2025, 4, 28), date(2025, 4, 30))
+        TaskDependency.objects.create(predecessor=self.design, successor=self.build)
+        TaskDependency.objects.create(predecessor=self.design, successor=self.review, dependency_type='SS', lag_days=5)
+        TaskDependency.objects.create(predecessor=self.build, successor=self.test, dependency_type='FF', lag_days=4)
+    
+    def _task(self, title, start, end):
+        return Task.objects.create(
+            project=self.project, title=title, planned_start_date=start, planned_end_date=end
+        )
+    
+    def _slip_design(self, end):
+        self.design.planned_end_date = end
+        self.design.save()
+    
+    def test_dry_run(self):
+        """稼働日ベースで下流のみ再計算され、dry_run では更新されないこと"""
+        self._slip_design(date(2025, 4, 28))
+        changes = reschedule([self.design.pk], dry_run=True)
+        
+        result = {change['task'].pk: (change['new_start'], change['new_end']) for change in changes}
+        self.assertEqual(result, {
+            # FS: 祝日を避けて 4/30 開始、稼働日4日を維持
+            self.build.pk: (date(2025, 4, 30), date(2025, 5, 5)),
+            # FF（遅延4稼働日）: 実装終了 5/5 + 4 = 5/9 に終了、稼働日2日を維持
+            self.test.pk: (date(2025, 5, 8), date(2025, 5, 9)),
+        })
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.planned_start_date, date(2025, 4, 28))
+    
+    def test_apply(self):
+        """一括更新され、履歴と変更理由が記録されること"""
+        self._slip_design(date(2025, 4, 28))
+        response = self.client.post(reverse('tasks:task_reschedule', args=[self.design.pk]))
+        self.assertRedirects(response, reverse('tasks:task_detail', args=[self.design.pk]))
+        
+        self.build.refresh_from_db()
+        self.assertEqual((self.build.planned_start_date, self.build.planned_end_date),
+                         (date(2025, 4, 30), date(2025, 5, 5)))
+        history = self.build.history.first()
+        self.assertEqual(history.history_change_reason, '前提タスクの日程変更に伴う自動リスケジュール')
+        self.assertEqual(history.history_user, self.user)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.planned_start_date, date(2025, 4, 28))
+        self.assertEqual(plan_reschedule([self.design.pk]), [])
+    
+    def test_update_redirects_to_preview(self):
+        """日程変更で後続に影響がある場合、更新後に確認画面へ遷移すること"""
+        data = {
+            'project': self.project.pk, 'title': '設計', 'status': 'NOT_STARTED', 'priority': 'MEDIUM',
+            'planned_start_date': '2025-04-21', 'planned_end_date': '2025-04-28', 'progress_rate': 0,
+        }
+        response = self.client.post(reverse('tasks:task_update', args=[self.design.pk]), data)
+        self.assertRedirects(response, reverse('tasks:task_reschedule', args=[self.design.pk]))
+        
+        response = self.client.get(response.url)
+        self.assertEqual(len(response.context['changes']), 2)
+    
+    def test_cycle(self):
+        """循環した依存関係はエラーになること"""
+        TaskDependency.objects.create(predecessor=self.test, successor=self.design)
+        with self.assertRaises(ScheduleCycleError):
+            plan_reschedule([self.design.pk])
+    
+    def test_successor_in_other_project(self):
+        """他のプロジェクトの後続タスクとその下流も再計算され、確認画面にプロジェクト名が表示されること"""
+        other_project = Project.objects.create(
+            project_code='PRJ002', name='連携先', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        integration = Task.objects.create(
+            project=other_project, title='結合', planned_start_date=date(2025, 5, 7), planned_end_date=date(2025, 5, 7)
+        )
+        release = Task.objects.create(
+            project=other_project, title='リリース', planned_start_date=date(2025, 5, 8), planned_end_date=date(2025, 5, 8)
+        )
+        TaskDependency.objects.create(predecessor=self.test, successor=integration)
+        TaskDependency.objects.create(predecessor=integration, successor=release)
+        self._slip_design(date(2025, 4, 28))
+        
+        changes = {change['task'].pk: change for change in plan_reschedule([self.design.pk])}
+        self.assertEqual(changes[integration.pk]['new_start'], date(2025, 5, 12))
+        self.assertEqual(changes[release.pk]['new_start'], date(2025, 5, 13))
+        
+        response = self.client.get(reverse('tasks:task_reschedule', args=[self.design.pk]))
+        self.assertContains(response, '連携先')
+    
+    def test_shift_from_non_working_day(self):
+        """移動前の開始日が非稼働日でも、移動の稼働日数は add_working_days と一致すること"""
+        # 2025-04-26（土）開始
+        self.build.planned_start_date = date(2025, 4, 26)
+        self.build.save()
+        self._slip_design(date(2025, 4, 28))
+        change = next(change for change in plan_reschedule([self.design.pk]) if change['task'].pk == self.build.pk)
+        self.assertEqual(change['new_start'], date(2025, 4, 30))
+        self.assertEqual(change['shift'], 2)
+        calendar = get_calendar(self.project.pk)
+        self.assertEqual(calendar.add_working_days(change['old_start'], change['shift']), change['new_start'])
+
+
+
+class GanttBatchTest(TestCase):
+    """ガントチャートの編集内容の一括保存のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123', employee_id='EMP001', display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='ガント編集', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        # 2025-04-29（火）は祝日
+        Holiday.objects.create(calendar=WorkCalendar.objects.get(project__isnull=True), date=date(2025, 4, 29))
+        self.phase = self._task('工程', date(2025, 4, 21), date(2025, 5, 9))
+        self.design = self._task('設計', date(2025, 4, 21), date(2025, 4, 25), parent=self.phase)
+        self.build = self._task('実装', date(2025, 4, 28), date(2025, 5, 2), parent=self.phase)  # 稼働日4日
+        self.other = self._task('無関係', date(2025, 4, 28), date(2025, 4, 30))
+        self.dependency = TaskDependency.objects.create(predecessor=self.design, successor=self.build)
+        self.url = reverse('tasks:task_gantt_batch') + f'?project={self.project.pk}'
+    
+    def _task(self, title, start, end, parent=None):
+        return Task.objects.create(
+            project=self.project, parent=parent, title=title, planned_start_date=start, planned_end_date=end
+        )
+    
+    def _post(self, **payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+    
+    def test_gantt_payload(self):
+        """プロジェクト選択時は親と依存関係を含み、編集可能になること"""
+        response = self.client.get(reverse('tasks:task_gantt') + f'?project={self.project.pk}')
+        self.assertTrue(response.context['editable'])
+        rows = {row['id']: row for row in json.loads(response.context['tasks_json'])}
+        self.assertEqual(rows[self.design.pk]['parent'], self.phase.pk)
+        self.assertEqual(rows[self.phase.pk]['parent'], 0)
+        self.assertEqual(json.loads(response.context['links_json']), [{
+            'id': self.dependency.pk, 'source': self.design.pk, 'target': self.build.pk, 'type': '0', 'lag': 0,
+        }])
+        
+        response = self.client.get(reverse('tasks:task_gantt'))
+        self.assertFalse(response.context['editable'])
+    
+    def test_apply(self):
+        """日程・進捗・依存関係の変更が一括保存され、再計算した行が返ること"""
+        response = self._post(
+            tasks=[{'id': self.design.pk, 'start_date': '2025-04-22', 'duration': 5, 'progress': 0.5}],
+            links={
+                'added': [{'id': 'tmp1', 'source': self.build.pk, 'target': self.other.pk, 'type': '1', 'lag': 2}],
+                'deleted': [self.dependency.pk],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        
+        self.design.refresh_from_db()
+        # 稼働日5日（4/22〜4/28）
+        self.assertEqual((self.design.planned_start_date, self.design.planned_end_date),
+                         (date(2025, 4, 22), date(2025, 4, 28)))
+        self.assertEqual(self.design.progress_rate, 50)
+        history = self.design.history.first()
+        self.assertEqual(history.history_change_reason, 'ガントチャートでの編集')
+        self.assertEqual(history.history_user, self.user)
+        
+        link = TaskDependency.objects.get()
+        self.assertEqual((link.predecessor, link.successor, link.dependency_type, link.lag_days),
+                         (self.build, self.other, 'SS', 2))
+        self.assertEqual(payload['links'], {'tmp1': link.pk})
+        self.assertEqual(payload['tasks']['id'], [self.design.pk])
+        self.assertEqual(payload['tasks']['duration'], [5])
+    
+    def test_reschedule_successors(self):
+        """reschedule 指定時は後続タスクも調整され、調整した行も返ること"""
+        response = self._post(
+            tasks=[{'id': self.design.pk, 'start_date': '2025-04-24', 'duration': 5}], reschedule=True
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['rescheduled'], 1)
+        self.assertEqual(sorted(payload['tasks']['id']), sorted([self.design.pk, self.build.pk]))
+        
+        self.build.refresh_from_db()
+        # 設計の終了 5/1 の翌稼働日から稼働日4日を維持
+        self.assertEqual((self.build.planned_start_date, self.build.planned_end_date),
+                         (date(2025, 5, 2), date(2025, 5, 7)))
+    
+    def test_invalid_batch_is_not_saved(self):
+        """1件でもエラーがあれば何も保存されず、変更ごとのエラーが返ること"""
+        response = self._post(
+            tasks=[
+                {'id': self.design.pk, 'start_date': '2025-04-22', 'duration': 5},
+                {'id': 999999, 'progress': 0.1},
+            ],
+            links={'added': [{'id': 'tmp1', 'source': self.build.pk, 'target': self.design.pk, 'type': '0'}]},
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertIn({'kind': 'task', 'id': 999999, 'message': 'タスクが見つかりません'}, errors)
+        self.assertIn({'kind': 'batch', 'id': None, 'message': 'タスクの依存関係が循環しています'}, errors)
+        
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.planned_start_date, date(2025, 4, 21))
+        self.assertEqual(TaskDependency.objects.count(), 1)
+        
+        response = self._post(tasks=[{'id': self.design.pk, 'progress': 2}])
+        self.assertEqual(response.json()['errors'][0]['message'], '進捗は0〜1の数値で指定してください')
+    
+    def test_parent_change(self):
+        """親の変更は循環を検出し、移動先の子の末尾に採番されること"""
+        response = self._post(tasks=[{'id': self.phase.pk, 'parent': self.design.pk}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['id'], self.phase.pk)
+        
+        response = self._post(tasks=[{'id': self.build.pk, 'parent': 0}])
+        self.assertEqual(response.status_code, 200)
+        self.build.refresh_from_db()
+        self.assertIsNone(self.build.parent)
+        self.assertEqual((self.build.wbs_code, self.build.level), ('0003', 1))
+    
+    def test_parent_swap(self):
+        """親子を入れ替える変更は、変更の並び順によらず同じ結果になること"""
+        payloads = (
+            [{'id': self.phase.pk, 'parent': self.design.pk}, {'id': self.design.pk, 'parent': 0}],
+            [{'id': self.design.pk, 'parent': 0}, {'id': self.phase.pk, 'parent': self.design.pk}],
+        )
+        for tasks in payloads:
+            with self.subTest(first=tasks[0]['id']):
+                Task.objects.filter(pk=self.design.pk).update(parent=self.phase, wbs_code='0001.0001', level=2)
+                Task.objects.filter(pk=self.phase.pk).update(parent=None, wbs_code='0001', level=1)
+                response = self._post(tasks=tasks)
+                self.assertEqual(response.status_code, 200)
+                rows = dict(Task.objects.values_list('id', 'wbs_code'))
+                self.assertEqual(rows, {
+                    self.design.pk: '0002', self.phase.pk: '0002.0001',
+                    self.build.pk: '0002.0001.0001', self.other.pk: '0001',
+                })
+                self.assertIsNone(Task.objects.get(pk=self.design.pk).parent_id)
+                self.assertEqual(Task.objects.get(pk=self.phase.pk).parent_id, self.design.pk)
+    
+    def test_cross_project_link_cycle(self):
+        """他のプロジェクトのタスクを経由する依存関係の循環も検出すること"""
+        other_project = Project.objects.create(
+            project_code='PRJ002', name='別プロジェクト', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        first = Task.objects.create(project=other_project, title='連携1', planned_start_date=date(2025, 5, 12),
+                                    planned_end_date=date(2025, 5, 13))
+        second = Task.objects.create(project=other_project, title='連携2', planned_start_date=date(2025, 5, 14),
+                                     planned_end_date=date(2025, 5, 15))
+        TaskDependency.objects.create(predecessor=self.build, successor=first)
+        TaskDependency.objects.create(predecessor=first, successor=second)
+        TaskDependency.objects.create(predecessor=second, successor=self.other)
+        
+        response = self._post(
+            links={'added': [{'id': 'tmp1', 'source': self.other.pk, 'target': self.design.pk, 'type': '0'}]}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {'kind': 'batch', 'id': None, 'message': 'タスクの依存関係が循環しています'},
+        ])
+        self.assertEqual(TaskDependency.objects.count(), 4)
+    
+    def test_category_consistency(self):
+        """Task.clean の分類の整合性チェックが適用されること"""
+        other_project = Project.objects.create(
+            project_code='PRJ002', name='別プロジェクト', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        category = SystemCategory.objects.create(project=other_project, code='SYS', name='別システム')
+        Task.objects.filter(pk=self.other.pk).update(system_category=category)
+        
+        response = self._post(tasks=[{'id': self.other.pk, 'progress': 0.3}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{
+            'kind': 'task', 'id': self.other.pk, 'message': 'システム名とプロジェクトの関係が正しくありません',
+        }])
+
+
+class MilestoneProgressTest(TestCase):
+    """マイルストーンの集計値（紐づくタスクから計算）のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123', employee_id='EMP001', display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.today = timezone.localdate()
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='マイルストーン', start_date=self.today,
+            end_date=self.today + timedelta(days=90)
+        )
+        self.milestone = Milestone.objects.create(
+            project=self.project, name='設計完了', target_date=self.today + timedelta(days=20)
+        )
+        self.basic = self._task('基本設計', 10, 10)
+        self.detail = self._task('詳細設計', 15, 30)
+    
+    def _task(self, title, days, hours, milestone=None):
+        return Task.objects.create(
+            project=self.project, title=title, milestone=milestone or self.milestone,
+            planned_start_date=self.today, planned_end_date=self.today + timedelta(days=days),
+            estimated_hours=hours,
+        )
+    
+    def _milestone(self):
+        return Milestone.objects.get(pk=self.milestone.pk)
+    
+    def test_updated_on_task_changes(self):
+        """タスクの保存ごとに進捗率（工数の加重平均）・達成見込日・ステータスが更新されること"""
+        milestone = self._milestone()
+        self.assertEqual((milestone.task_count, milestone.completed_task_count), (2, 0))
+        self.assertEqual(milestone.forecast_date, self.today + timedelta(days=15))
+        self.assertEqual(milestone.status, Milestone.StatusChoices.NOT_STARTED)
+        
+        self.basic.progress_rate = 50
+        self.basic.save()
+        self.assertEqual(self._milestone().progress_rate, Decimal('12.50'))
+        
+        self.detail.planned_end_date = self.today + timedelta(days=25)
+        self.detail.save()
+        milestone = self._milestone()
+        self.assertEqual(milestone.status, Milestone.StatusChoices.DELAYED)
+        self.assertEqual(milestone.delay_days, 5)
+        
+        for task, finished in ((self.basic, 3), (self.detail, 18)):
+            task.actual_start_date = self.today
+            task.actual_end_date = self.today + timedelta(days=finished)
+            task.save()
+        milestone = self._milestone()
+        self.assertEqual(milestone.status, Milestone.StatusChoices.ACHIEVED)
+        self.assertEqual(milestone.actual_date, self.today + timedelta(days=18))
+        self.assertEqual(milestone.progress_rate, 100)
+        self.assertTrue(MilestoneForm(instance=milestone).fields['status'].disabled)
+    
+    def test_relink_and_delete(self):
+        """紐づけの変更・削除で変更前のマイルストーンも更新されること"""
+        release = Milestone.objects.create(
+            project=self.project, name='リリース', target_date=self.today + timedelta(days=60)
+        )
+        self.detail.milestone = release
+        self.detail.save()
+        self.assertEqual(self._milestone().task_count, 1)
+        self.assertEqual(Milestone.objects.get(pk=release.pk).forecast_date, self.today + timedelta(days=15))
+        
+        self.basic.delete()
+        milestone = self._milestone()
+        self.assertEqual((milestone.task_count, milestone.forecast_date), (0, None))
+    
+    def test_bulk_updates(self):
+        """ガントチャートの一括保存（シグナルを経由しない更新）でも更新されること"""
+        url = reverse('tasks:task_gantt_batch') + f'?project={self.project.pk}'
+        start = self.today + timedelta(days=30)
+        response = self.client.post(url, json.dumps({
+            'tasks': [{'id': self.detail.pk, 'start_date': start.isoformat(), 'duration': 1, 'progress': 0.2}],
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        milestone = self._milestone()
+        self.assertGreaterEqual(milestone.forecast_date, start)
+        self.assertEqual(milestone.status, Milestone.StatusChoices.DELAYED)
+        self.assertEqual(milestone.progress_rate, Decimal('15.00'))
+    
+    def test_daily_refresh(self):
+        """日付の経過で未完了タスクの達成見込日が今日に繰り下がり、遅延になること"""
+        later = self.today + timedelta(days=30)
+        self.assertEqual(refresh_all_milestones(today=later), 1)
+        milestone = self._milestone()
+        self.assertEqual((milestone.forecast_date, milestone.status), (later, Milestone.StatusChoices.DELAYED))
+        
+        out = io.StringIO()
+        call_command('refresh_milestones', project=[self.project.pk], stdout=out)
+        self.assertIn('1 件', out.getvalue())
+        self.assertEqual(self._milestone().status, Milestone.StatusChoices.NOT_STARTED)
+    
+    def test_milestone_list(self):
+        """マイルストーン一覧に集計値が表示されること"""
+        response = self.client.get(reverse('projects:milestone_list', args=[self.project.pk]))
+        self.assertContains(response, 'タスク 0/2 完了')
+        self.assertContains(response, f'milestone={self.milestone.pk}')
+        
+        response = self.client.get(reverse('tasks:task_list') + f'?milestone={self.milestone.pk}')
+        self.assertEqual(len(response.context['tasks']), 2)
+
+
+class BaselineTest(TestCase):
+    """ベースラインのテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123', employee_id='EMP001', display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='ベースライン', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        self.design = Task.objects.create(
+            project=self.project, title='設計', planned_start_date=date(2025, 4, 1),
+            planned_end_date=date(2025, 4, 4), estimated_hours=32
+        )
+        self.build = Task.objects.create(
+            project=self.project, title='実装', planned_start_date=date(2025, 4, 7),
+            planned_end_date=date(2025, 4, 18), estimated_hours=80
+        )
+    
+    def _change_plan(self):
+        self.build.planned_end_date = date(2025, 4, 23)
+        self.build.estimated_hours = 96
+        self.build.save()
+        self.design.is_deleted = True
+        self.design.save()
+        Task.objects.create(
+            project=self.project, title='試験', planned_start_date=date(2025, 4, 24),
+            planned_end_date=date(2025, 4, 30)
+        )
+    
+    def test_variance_rows_and_blob(self):
+        """行形式・圧縮列形式のどちらでも同じ差異が算出されること"""
+        rows = capture_baseline(self.project, '計画承認時', user=self.user)
+        blob = capture_baseline(self.project, '計画承認時（圧縮）', storage=Baseline.StorageChoices.BLOB)
+        self.assertEqual(rows.entries.count(), 2)
+        self.assertEqual(blob.entries.count(), 0)
+        self.assertEqual(blob.task_count, 2)
+        self._change_plan()
+        
+        with self.assertNumQueries(2):
+            variance = compute_variance(rows)
+        self.assertEqual(compute_variance(blob), variance)
+        
+        build = next(row for row in variance['rows'] if row['task_id'] == self.build.pk)
+        self.assertEqual(build['start_variance'], 0)
+        self.assertEqual(build['end_variance'], 5)
+        self.assertEqual(build['hours_variance'], 16)
+        self.assertEqual(variance['summary']['delayed'], 1)
+        self.assertEqual(variance['summary']['deleted'], 1)
+        self.assertEqual(variance['summary']['added'], 1)
+    
+    def test_hard_deleted_task_is_kept(self):
+        """タスクを物理削除してもベースラインの行は残り、削除済みとして集計されること"""
+        rows = capture_baseline(self.project, '計画承認時')
+        blob = capture_baseline(self.project, '計画承認時（圧縮）', storage=Baseline.StorageChoices.BLOB)
+        design_pk = self.design.pk
+        self.client.post(reverse('tasks:task_delete', args=[design_pk]))
+        self.assertFalse(Task.all_objects.filter(pk=design_pk).exists())
+        self.assertEqual(rows.entries.count(), 2)
+        
+        variance = compute_variance(rows)
+        self.assertEqual(compute_variance(blob), variance)
+        self.assertEqual(variance['summary']['task_count'], 2)
+        self.assertEqual(variance['summary']['deleted'], 1)
+        self.assertEqual(variance['summary']['baseline_hours'], 112)
+        self.assertEqual(variance['summary']['current_hours'], 80)
+        removed = variance['rows'][-1]
+        self.assertEqual((removed['task_id'], removed['deleted'], removed['end_variance']), (design_pk, True, None))
+        
+        response = self.client.get(reverse('tasks:baseline_detail', args=[rows.pk]))
+        self.assertContains(response, f'タスクID {design_pk}')
+    
+    def test_views_and_gantt_overlay(self):
+        """取得画面から作成でき、ガントにベースラインの日程が出力されること"""
+        response = self.client.post(reverse('tasks:baseline_create'), {
+            'project': self.project.pk, 'name': '初版', 'description': '', 'storage': 'ROWS',
+        })
+        baseline = Baseline.objects.get()
+        self.assertRedirects(response, reverse('tasks:baseline_detail', args=[baseline.pk]))
+        self.assertEqual(baseline.created_by, self.user)
+        self._change_plan()
+        
+        response = self.client.get(reverse('tasks:baseline_detail', args=[baseline.pk]))
+        self.assertEqual(response.context['variance']['summary']['delayed'], 1)
+        
+        response = self.client.get(reverse('tasks:task_gantt'), {
+            'project': self.project.pk, 'baseline': baseline.pk
+        })
+        rows = {row['id']: row for row in json.loads(response.context['tasks_json'])}
+        self.assertEqual(rows[self.build.pk]['baseline_end'], '2025-04-18')
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all('baseline_start' in row for row in rows.values()))
+
+
+
+class AsOfTest(TestCase):
+    """変更履歴からの時点指定表示のテスト"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123', employee_id='EMP001', display_name='テストユーザー'
+        )
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(
+            project_code='PRJ001', name='監査', start_date=date(2025, 4, 1), end_date=date(2025, 6, 30)
+        )
+        self.design = Task.objects.create(
+            project=self.project, title='設計', planned_start_date=date(2025, 4, 1), planned_end_date=date(2025, 4, 4)
+        )
+        self.removed = Task.objects.create(
+            project=self.project, title='削除予定', planned_start_date=date(2025, 4, 7), planned_end_date=date(2025, 4, 8)
+        )
+        self.moment = timezone.now()
+        
+        self.design.planned_end_date = date(2025, 4, 11)
+        self.design.save()
+        Task.objects.create(
+            project=self.project, title='追加', planned_start_date=date(2025, 4, 14), planned_end_date=date(2025, 4, 15)
+        )
+        self.removed.is_deleted = True
+        self.removed.save()
+    
+    def test_as_of_queryset(self):
+        """時点の最新履歴が1クエリで取得されること"""
+        with self.assertNumQueries(1):
+            rows = dict(
+                as_of_queryset(Task, self.moment, project_id=self.project.pk)
+                .filter(is_deleted=False).values_list('title', 'planned_end_date')
+            )
+        self.assertEqual(rows, {'設計': date(2025, 4, 4), '削除予定': date(2025, 4, 8)})
+        
+        current = set(as_of_queryset(Task, timezone.now()).filter(is_deleted=False).values_list('title', flat=True))
+        self.assertEqual(current, {'設計', '追加'})
+    
+    def test_gantt_as_of(self):
+        """ガントで ?as_of= 指定時はその時点の計画が表示されること"""
+        response = self.client.get(reverse('tasks:task_gantt'), {
+            'project': self.project.pk, 'as_of': self.moment.isoformat(),
+        })
+        rows = {row['id']: row for row in json.loads(response.context['tasks_json'])}
+        self.assertEqual(set(rows), {self.design.pk, self.removed.pk})
+        self.assertEqual(rows[self.design.pk]['duration'], 4)
+        
+        response = self.client.get(reverse('tasks:task_gantt'), {'project': self.project.pk})
+        rows = {row['id']: row for row in json.loads(response.context['tasks_json'])}
+        self.assertEqual(rows[self.design.pk]['duration'], 9)
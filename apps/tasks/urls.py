@@ -7,20 +7,46 @@ urlpatterns = [
     # タスク一覧・詳細
     path('', views.TaskListView.as_view(), name='task_list'),
     path('create/', views.TaskCreateView.as_view(), name='task_create'),
+    path('export/csv/', views.TaskCsvExportView.as_view(), name='task_export_csv'),
+    path('history/export/csv/', views.TaskHistoryCsvExportView.as_view(), name='task_history_export_csv'),
     path('<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('<int:pk>/update/', views.TaskUpdateView.as_view(), name='task_update'),
     path('<int:pk>/duplicate/', views.TaskDuplicateView.as_view(), name='task_duplicate'),
     path('<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
+    path('<int:pk>/reschedule/', views.TaskRescheduleView.as_view(), name='task_reschedule'),
+    path('<int:pk>/move/', views.TaskMoveView.as_view(), name='task_move'),
     
     # カレンダー・ガントチャート
     path('calendar/', views.TaskCalendarView.as_view(), name='task_calendar'),
     path('gantt/', views.TaskGanttView.as_view(), name='task_gantt'),
+    path('calendar/api/', views.TaskCalendarApiView.as_view(), name='task_calendar_api'),
+    path('gantt/api/', views.TaskGanttApiView.as_view(), name='task_gantt_api'),
+    path('gantt/api/batch/', views.TaskGanttBatchView.as_view(), name='task_gantt_batch'),
+    
+    # WBS ツリー
+    path('tree/', views.TaskTreeView.as_view(), name='task_tree'),
+    path('tree/api/', views.TaskTreeApiView.as_view(), name='task_tree_api'),
+    path('tree/state/', views.TaskTreeStateView.as_view(), name='task_tree_state'),
+    path('tree/renumber/', views.WbsRenumberView.as_view(), name='wbs_renumber'),
+    
+    # ベースライン
+    path('baselines/', views.BaselineListView.as_view(), name='baseline_list'),
+    path('baselines/create/', views.BaselineCreateView.as_view(), name='baseline_create'),
+    path('baselines/<int:pk>/', views.BaselineDetailView.as_view(), name='baseline_detail'),
+    
+    # 担当者別負荷
+    path('resources/', views.ResourceLoadView.as_view(), name='resource_load'),
+    
+    # EVM
+    path('evm/', views.EvmView.as_view(), name='evm'),
+    path('evm/api/', views.EvmApiView.as_view(), name='evm_api'),
     
     # コメント
     path('<int:task_pk>/comments/add/', views.TaskCommentAddView.as_view(), name='comment_add'),
     
     # Ajax（連鎖選択用）
     path('ajax/load-system-categories/', views.LoadSystemCategoriesView.as_view(), name='ajax_load_system_categories'),
+    path('ajax/load-milestones/', views.LoadMilestonesView.as_view(), name='ajax_load_milestones'),
     path('ajax/load-major-categories/', views.LoadMajorCategoriesView.as_view(), name='ajax_load_major_categories'),
     path('ajax/load-minor-categories/', views.LoadMinorCategoriesView.as_view(), name='ajax_load_minor_categories'),
 ]
@@ -1,17 +1,150 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
-from django.http import JsonResponse
-from django.shortcuts import redirect, get_object_or_404
+from django.urls import reverse, reverse_lazy
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import redirect, get_object_or_404, render
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import ExpressionWrapper, FloatField, Max, Min, Q, Value
+from django.db.models.functions import Cast, Coalesce
 from django.views import View
-from apps.projects.models import Project
+from django.utils import timezone
+from apps.projects.calendars import RANGE_END, RANGE_START, get_calendar
+from apps.projects.models import Milestone, Project
 from apps.accounts.models import User
-from .models import Task, TaskComment, SystemCategory, MajorCategory, MinorCategory
+from apps.common.cache import aget_or_build, get_or_build
+from apps.common.csv_export import CsvExportView
+from apps.common.history import as_of_queryset, parse_as_of
+from apps.common.json_payload import dumps, dumps_for_html, encode_rows, iso_date, to_columnar
+from apps.common.mixins import AsyncLoginRequiredMixin, ReplicaReadMixin
+from .models import Baseline, Task, TaskComment, TaskDependency, SystemCategory, MajorCategory, MinorCategory
 from .forms import TaskForm, TaskCommentForm
+from .filters import filter_tasks
+from .exports import export_tasks, export_task_history
+from .baselines import baseline_dates, capture_baseline, compute_variance
+from .evm import clamp_as_of, compute_evm
+from .gantt_edits import GanttEditError, apply_changes, link_type, parse_changes
+from .resource_load import compute_resource_load
+from .numbering import WbsNumberingError, move_task, renumber_wbs
+from .scheduling import ScheduleCycleError, plan_reschedule, reschedule
+from .wbs import DEFAULT_EXPAND_DEPTH, MAX_NODES, NODE_COLUMNS, TreeState, get_wbs_tree
+from datetime import date, datetime, timedelta
 import json
-from datetime import datetime, timedelta
+import operator
+
+
+def _events_url(project_id):
+    """変更イベント配信のURL（プロジェクト未選択時は空文字）"""
+    if project_id and project_id.isdigit():
+        return reverse('projects:project_events', args=[project_id])
+    return ''
+
+
+def _progress_ratio():
+    """進捗率(%)を0〜1の浮動小数に変換する式（DB側で計算）"""
+    return ExpressionWrapper(
+        Cast(Coalesce('progress_rate', Value(0)), FloatField()) / Value(100.0),
+        output_field=FloatField()
+    )
+
+
+STATUS_COLORS = {
+    'NOT_STARTED': '#6c757d',
+    'IN_PROGRESS': '#0d6efd',
+    'COMPLETED': '#198754',
+    'ON_HOLD': '#ffc107',
+    'CANCELLED': '#dc3545'
+}
+
+GANTT_VALUES = (
+    'id', 'project_id', 'task_number', 'title', 'planned_start_date', 'planned_end_date', 'progress', 'status',
+    'parent_id',
+)
+
+
+CALENDAR_VALUES = ('id', 'task_number', 'title', 'planned_start_date', 'planned_end_date', 'progress', 'status')
+
+
+def _calendar_queryset(project_id, assignee_id):
+    """カレンダー表示対象（開始日・終了日があるもの）"""
+    queryset = Task.objects.filter(
+        is_deleted=False,
+        planned_start_date__isnull=False,
+        planned_end_date__isnull=False
+    )
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    if assignee_id:
+        queryset = queryset.filter(assignee_id=assignee_id)
+    return queryset.annotate(progress=_progress_ratio())
+
+
+def _calendar_event_row(values):
+    """CALENDAR_VALUES の行タプルをカレンダーイベント1行に変換（終了日は FullCalendar に合わせ翌日）"""
+    pk, task_number, title, start, end, progress, status = values
+    return (
+        pk,
+        f"{task_number} - {title}",
+        iso_date(start),
+        iso_date(end + timedelta(days=1)),
+        STATUS_COLORS.get(status, '#6c757d'),
+        progress,
+        status,
+    )
+
+
+def _gantt_queryset(project_id, status, as_of=None):
+    """ガント表示対象（開始日と終了日が両方あるもの）。as_of 指定時は変更履歴からその時点の状態"""
+    if as_of:
+        scope = {'project_id': project_id} if project_id else {}
+        queryset = as_of_queryset(Task, as_of, **scope)
+    else:
+        queryset = Task.objects.all()
+    queryset = queryset.filter(
+        is_deleted=False,
+        planned_start_date__isnull=False,
+        planned_end_date__isnull=False
+    )
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.annotate(progress=_progress_ratio())
+
+
+async def _aiter_rows(queryset, fields, chunk_size=2000):
+    """values_list(*fields) と同じ行タプルを aiterator で順に返す
+    
+    Django 4.2 の values_list().aiterator() はイベントループ上でクエリを実行してしまうため、
+    values() の aiterator から組み立てる。
+    """
+    row = operator.itemgetter(*fields)
+    async for values in queryset.values(*fields).aiterator(chunk_size=chunk_size):
+        yield row(values)
+
+
+def _gantt_row(values, calendar):
+    """GANTT_VALUES の行タプルを dhtmlxGantt の行（duration は稼働日数、1日以上。親なしは parent=0）に変換"""
+    pk, _, task_number, title, start, end, progress, status, parent_id = values
+    duration = max(calendar.working_days_between(start, end), 1)
+    return (pk, f"{task_number} - {title}", iso_date(start), duration, progress, status, parent_id or 0)
+
+
+def _root_hidden_parents(rows):
+    """親が表示対象外（日付なし・ステータスで除外）の行を parent=0（ルート）にする"""
+    ids = {row[0] for row in rows}
+    return [row if row[6] in ids else row[:6] + (0,) + row[7:] for row in rows]
+
+
+def _gantt_links(task_ids):
+    """task_ids のタスク間の依存関係を dhtmlxGantt のリンクの行に変換"""
+    queryset = TaskDependency.objects.filter(
+        predecessor_id__in=task_ids, successor_id__in=task_ids
+    ).values_list('id', 'predecessor_id', 'successor_id', 'dependency_type', 'lag_days')
+    return [
+        (pk, source, target, link_type(dependency_type), lag)
+        for pk, source, target, dependency_type, lag in queryset
+    ]
 
 
 class TaskListView(LoginRequiredMixin, ListView):
@@ -28,31 +161,7 @@ class TaskListView(LoginRequiredMixin, ListView):
         )
         
         # フィルター
-        project_id = self.request.GET.get('project')
-        if project_id:
-            queryset = queryset.filter(project_id=project_id)
-        
-        system_category_id = self.request.GET.get('system_category')
-        if system_category_id:
-            queryset = queryset.filter(system_category_id=system_category_id)
-        
-        major_category_id = self.request.GET.get('major_category')
-        if major_category_id:
-            queryset = queryset.filter(major_category_id=major_category_id)
-        
-        minor_category_id = self.request.GET.get('minor_category')
-        if minor_category_id:
-            queryset = queryset.filter(minor_category_id=minor_category_id)
-        
-        status = self.request.GET.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        assignee = self.request.GET.get('assignee')
-        if assignee == 'me':
-            queryset = queryset.filter(assignee=self.request.user)
-        elif assignee:
-            queryset = queryset.filter(assignee_id=assignee)
+        queryset = filter_tasks(queryset, self.request.GET, self.request.user)
         
         return queryset.order_by('planned_end_date')
     
@@ -79,6 +188,18 @@ class TaskListView(LoginRequiredMixin, ListView):
         return context
 
 
+class TaskCsvExportView(CsvExportView):
+    """タスク一覧CSV出力（一覧と同じ絞り込み条件）"""
+    filename_prefix = 'tasks'
+    export_function = staticmethod(export_tasks)
+
+
+class TaskHistoryCsvExportView(CsvExportView):
+    """タスク変更履歴CSV出力"""
+    filename_prefix = 'task_history'
+    export_function = staticmethod(export_task_history)
+
+
 class TaskDetailView(LoginRequiredMixin, DetailView):
     """タスク詳細"""
     model = Task
@@ -87,7 +208,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     
     def get_queryset(self):
         return Task.objects.select_related(
-            'project', 'assignee', 'parent'
+            'project', 'assignee', 'parent', 'milestone'
         ).prefetch_related('comments__user', 'subtasks')
 
 
@@ -111,14 +232,62 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'tasks/task_form.html'
     form_class = TaskForm
     
+    schedule_fields = {'planned_start_date', 'planned_end_date', 'actual_start_date', 'actual_end_date'}
+    
     def form_valid(self, form):
         form.instance.updated_by = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        
+        # 親タスクの変更: 移動先の末尾の WBS コードを振り、移動元の番号を詰める
+        if 'parent' in form.changed_data:
+            try:
+                move_task(
+                    self.object, self.object.parent, user=self.request.user,
+                    previous_parent_id=form.initial.get('parent'),
+                )
+            except WbsNumberingError as e:
+                messages.warning(self.request, str(e))
+        
+        # 日程の変更で後続タスクが依存関係を満たさなくなる場合は、リスケジュールの確認画面へ
+        if self.schedule_fields & set(form.changed_data):
+            try:
+                changes = plan_reschedule([self.object.pk])
+            except ScheduleCycleError as e:
+                messages.warning(self.request, str(e))
+                return response
+            if changes:
+                messages.info(self.request, f'後続タスク{len(changes)}件の日程に影響があります。内容を確認してください。')
+                return redirect('tasks:task_reschedule', pk=self.object.pk)
+        return response
     
     def get_success_url(self):
         return reverse_lazy('tasks:task_detail', kwargs={'pk': self.object.pk})
 
 
+class TaskRescheduleView(LoginRequiredMixin, View):
+    """後続タスクの自動リスケジュール（GET: 変更内容のプレビュー、POST: 一括更新）"""
+    template_name = 'tasks/task_reschedule.html'
+    
+    def get(self, request, pk):
+        task = get_object_or_404(Task, pk=pk)
+        try:
+            changes = reschedule([task.pk], dry_run=True)
+        except ScheduleCycleError as e:
+            messages.error(request, str(e))
+            return redirect('tasks:task_detail', pk=task.pk)
+        return render(request, self.template_name, {'task': task, 'changes': changes})
+    
+    def post(self, request, pk):
+        task = get_object_or_404(Task, pk=pk)
+        try:
+            changes = reschedule([task.pk], user=request.user)
+        except ScheduleCycleError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f'後続タスク{len(changes)}件の日程を更新しました。')
+        return redirect('tasks:task_detail', pk=task.pk)
+
+
 class TaskDeleteView(LoginRequiredMixin, DeleteView):
     """タスク削除"""
     model = Task
@@ -181,9 +350,10 @@ class TaskDuplicateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class TaskCalendarView(LoginRequiredMixin, TemplateView):
+class TaskCalendarView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     """タスクカレンダー"""
     template_name = 'tasks/task_calendar.html'
+    event_columns = ('id', 'title', 'start', 'end', 'color', 'progress', 'status')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -194,53 +364,32 @@ class TaskCalendarView(LoginRequiredMixin, TemplateView):
         context['selected_project'] = self.request.GET.get('project', '')
         context['selected_assignee'] = self.request.GET.get('assignee', '')
         
-        # タスクデータ取得
-        queryset = Task.objects.filter(is_deleted=False).select_related('project', 'assignee')
-        
-        # フィルター適用
         project_id = self.request.GET.get('project')
-        if project_id:
-            queryset = queryset.filter(project_id=project_id)
-        
         assignee_id = self.request.GET.get('assignee')
-        if assignee_id:
-            queryset = queryset.filter(assignee_id=assignee_id)
-        
-        # イベントデータ生成
-        events = []
-        for task in queryset:
-            if task.planned_start_date and task.planned_end_date:
-                color = self._get_status_color(task.status)
-                events.append({
-                    'title': f"{task.task_number} - {task.title}",
-                    'start': task.planned_start_date.isoformat(),
-                    'end': (task.planned_end_date + timedelta(days=1)).isoformat(),
-                    'url': f'/tasks/{task.pk}/',
-                    'backgroundColor': color,
-                    'borderColor': color,
-                    'extendedProps': {
-                        'progress': float(task.progress_rate or 0) / 100.0,
-                        'status': task.status
-                    }
-                })
-        
-        context['events_json'] = json.dumps(events)
+        context['events_url'] = _events_url(project_id)
+        context['events_json'] = get_or_build(
+            'calendar',
+            lambda: self._build_events_json(project_id, assignee_id),
+            params={'project': project_id, 'assignee': assignee_id},
+            project_id=project_id,
+        )
         return context
     
-    def _get_status_color(self, status):
-        colors = {
-            'NOT_STARTED': '#6c757d',
-            'IN_PROGRESS': '#0d6efd',
-            'COMPLETED': '#198754',
-            'ON_HOLD': '#ffc107',
-            'CANCELLED': '#dc3545'
-        }
-        return colors.get(status, '#6c757d')
+    def _build_events_json(self, project_id, assignee_id):
+        """カレンダーイベントJSONを生成"""
+        # 行データ生成（モデルインスタンスを作らずタプルで取得）
+        rows = [
+            _calendar_event_row(values)
+            for values in _calendar_queryset(project_id, assignee_id).values_list(*CALENDAR_VALUES)
+        ]
+        return encode_rows(rows, self.event_columns)
 
 
-class TaskGanttView(LoginRequiredMixin, TemplateView):
+class TaskGanttView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
     """ガントチャート"""
     template_name = 'tasks/task_gantt.html'
+    task_columns = ('id', 'text', 'start_date', 'duration', 'progress', 'status', 'parent')
+    link_columns = ('id', 'source', 'target', 'type', 'lag')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -251,46 +400,398 @@ class TaskGanttView(LoginRequiredMixin, TemplateView):
         context['selected_status'] = self.request.GET.get('status', '')
         context['scale'] = self.request.GET.get('scale', 'day')
         
-        # タスクデータ取得
-        queryset = Task.objects.filter(is_deleted=False).select_related('project', 'assignee', 'parent')
+        project_id = self.request.GET.get('project')
+        status = self.request.GET.get('status')
+        
+        # ベースライン表示（プロジェクト選択時のみ）
+        baseline = None
+        if project_id:
+            context['baselines'] = Baseline.objects.filter(project_id=project_id).defer('data')
+            baseline_id = self.request.GET.get('baseline')
+            if baseline_id and baseline_id.isdigit():
+                baseline = Baseline.objects.filter(pk=baseline_id, project_id=project_id).first()
+        context['selected_baseline'] = baseline
+        
+        # 時点指定（?as_of=YYYY-MM-DD）: 変更履歴からその時点の計画を表示
+        as_of = parse_as_of(self.request.GET.get('as_of'))
+        context['as_of'] = as_of
+        context['events_url'] = '' if as_of else _events_url(project_id)
+        # ドラッグでの編集はプロジェクト選択時・現在の計画表示時のみ
+        context['editable'] = bool(project_id) and not as_of
+        
+        context.update(get_or_build(
+            'gantt',
+            lambda: self._build_payload(project_id, status, baseline, as_of),
+            params={
+                'project': project_id, 'status': status,
+                'baseline': baseline.pk if baseline else None,
+                'as_of': as_of.isoformat() if as_of else None,
+            },
+            project_id=project_id,
+        ))
+        return context
+    
+    def _build_payload(self, project_id, status, baseline=None, as_of=None):
+        """ガントチャート用データを生成"""
+        queryset = _gantt_queryset(project_id, status, as_of)
+        
+        # dhtmlxGanttが期待する形式: start_date は "YYYY-MM-DD"、duration は稼働日数（1日以上）
+        calendars = {}
+        rows = []
+        for values in queryset.values_list(*GANTT_VALUES):
+            task_project_id = values[1]
+            if task_project_id not in calendars:
+                calendars[task_project_id] = get_calendar(task_project_id)
+            rows.append(_gantt_row(values, calendars[task_project_id]))
+        rows = _root_hidden_parents(rows)
+        
+        # 依存関係（変更履歴を持たないため、時点指定時は表示しない）
+        links = _gantt_links([row[0] for row in rows]) if project_id and not as_of else []
+        
+        columns = self.task_columns
+        if baseline is not None:
+            # ベースラインの開始日・終了日（ベースライン取得後に追加したタスクは null）
+            planned = baseline_dates(baseline)
+            columns += ('baseline_start', 'baseline_end')
+            rows = [row + tuple(iso_date(day) for day in planned.get(row[0], (None, None))) for row in rows]
+        
+        return {
+            'tasks_json': encode_rows(rows, columns),
+            'tasks_count': len(rows),
+            'links_json': encode_rows(links, self.link_columns),
+            'calendar_json': dumps_for_html(self._calendar_payload(project_id, queryset)),
+        }
+    
+    def _calendar_payload(self, project_id, queryset):
+        """画面表示用の稼働曜日とタスク期間内の休日（プロジェクト未指定時は標準カレンダー）"""
+        calendar = get_calendar(int(project_id) if project_id and project_id.isdigit() else None)
+        period = queryset.aggregate(first=Min('planned_start_date'), last=Max('planned_end_date'))
+        holidays = calendar.holidays_between(period['first'], period['last']) if period['first'] else []
+        return {
+            'working_weekdays': [int(c) for c in calendar.working_weekdays],
+            'holidays': [iso_date(day) for day in holidays],
+        }
+
+
+class WbsTreeMixin:
+    """WBS ツリー画面・API 共通（?project=, ?depth=（展開状態を保存していない行を展開する階層数））"""
+    depth_choices = [1, 2, 3, 99]
+    
+    def get_tree_params(self):
+        project_id = self.request.GET.get('project')
+        project = None
+        if project_id and project_id.isdigit():
+            project = Project.objects.filter(pk=project_id, is_deleted=False).first()
+        depth = self.request.GET.get('depth')
+        depth = int(depth) if depth and depth.isdigit() else DEFAULT_EXPAND_DEPTH
+        return project, depth
+    
+    def get_position(self, tree, name):
+        """?parent= などで指定したタスクの行番号（未指定は None、ツリーにない場合は False）"""
+        value = self.request.GET.get(name)
+        if not value:
+            return None
+        position = tree.position(int(value)) if value.isdigit() else None
+        return False if position is None else position
+    
+    def visible_nodes(self, tree, state, parent=None):
+        """表示する行と、MAX_NODES 件で打ち切ったかどうか"""
+        positions = tree.visible_positions(state, parent, limit=MAX_NODES + 1)
+        return tree.nodes(positions[:MAX_NODES]), len(positions) > MAX_NODES
+
+
+class TaskTreeView(LoginRequiredMixin, ReplicaReadMixin, WbsTreeMixin, TemplateView):
+    """WBS ツリー（アウトライン表示）
+    
+    展開済みの行だけを描画し、折りたたまれた行の子は展開時に API から読み込む。
+    ?focus=<タスクID> でそのタスクまでの祖先を展開して表示する。
+    """
+    template_name = 'tasks/task_tree.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        project, depth = self.get_tree_params()
+        context['projects'] = Project.objects.filter(is_deleted=False)
+        context['selected_project'] = project
+        context['depth'] = depth
+        context['depth_choices'] = self.depth_choices
+        context['max_nodes'] = MAX_NODES
+        if project is None:
+            return context
+        
+        tree = get_wbs_tree(project.pk)
+        state = TreeState.load(self.request.session, project.pk, depth)
+        focus = self.get_position(tree, 'focus')
+        if focus not in (None, False):
+            state.reveal(tree, focus)
+            context['focus'] = int(tree.ids[focus])
+        nodes, truncated = self.visible_nodes(tree, state)
+        context['nodes_json'] = encode_rows(nodes, NODE_COLUMNS)
+        context['tree_count'] = len(tree)
+        context['truncated'] = truncated
+        return context
+
+
+class TaskTreeApiView(LoginRequiredMixin, ReplicaReadMixin, WbsTreeMixin, View):
+    """WBS ツリー API（JSON）
+    
+    - ?project=            : 展開状態に従って表示する行
+    - ?project=&parent=ID  : 指定タスクの配下で表示する行（展開時の子の読み込み）
+    - ?project=&root=ID    : 指定タスクのサブツリー全体（展開状態によらない）
+    nodes は列指向形式（static/js/payload.js の expandColumnar で展開）。
+    """
+    
+    def get(self, request):
+        project, depth = self.get_tree_params()
+        if project is None:
+            return JsonResponse({'error': 'project を指定してください'}, status=400)
+        tree = get_wbs_tree(project.pk)
+        parent = self.get_position(tree, 'parent')
+        root = self.get_position(tree, 'root')
+        if parent is False or root is False:
+            return JsonResponse({'error': '指定したタスクが見つかりません'}, status=404)
+        
+        if root is not None:
+            positions = tree.subtree(root)
+            nodes, truncated = tree.nodes(positions[:MAX_NODES]), len(positions) > MAX_NODES
+        else:
+            state = TreeState.load(request.session, project.pk, depth)
+            nodes, truncated = self.visible_nodes(tree, state, parent)
+        return HttpResponse(
+            dumps({
+                'nodes': to_columnar(nodes, NODE_COLUMNS),
+                'count': len(nodes),
+                'total': len(tree),
+                'truncated': truncated,
+            }),
+            content_type='application/json',
+        )
+
+
+class TaskTreeStateView(LoginRequiredMixin, View):
+    """WBS ツリーの行の展開・折りたたみを保存（POST project, task, open=1/0）"""
+    
+    def post(self, request):
+        project_id = request.POST.get('project', '')
+        task_id = request.POST.get('task', '')
+        if not project_id.isdigit() or not task_id.isdigit():
+            return JsonResponse({'error': 'project と task を指定してください'}, status=400)
+        tree = get_wbs_tree(int(project_id))
+        position = tree.position(int(task_id))
+        if position is None:
+            return JsonResponse({'error': '指定したタスクが見つかりません'}, status=404)
         
-        # フィルター適用
+        depth = request.POST.get('depth', '')
+        state = TreeState.load(request.session, project_id, int(depth) if depth.isdigit() else DEFAULT_EXPAND_DEPTH)
+        is_open = request.POST.get('open') == '1'
+        state.toggle(tree, position, is_open)
+        state.save(request.session, project_id)
+        return JsonResponse({'task': int(task_id), 'open': is_open})
+
+
+class TaskMoveView(LoginRequiredMixin, View):
+    """WBS 上の移動・並べ替え（POST parent=親タスクID（空はルート）, index=兄弟内の位置（省略時は末尾））"""
+    
+    def post(self, request, pk):
+        task = get_object_or_404(Task, pk=pk)
+        parent_id = request.POST.get('parent', '')
+        index = request.POST.get('index', '')
+        parent = None
+        if parent_id:
+            parent = Task.objects.filter(pk=parent_id).first() if parent_id.isdigit() else None
+            if parent is None:
+                return JsonResponse({'error': '移動先の親タスクが見つかりません'}, status=404)
+        try:
+            updated = move_task(
+                task, parent, int(index) if index.isdigit() else None, user=request.user
+            )
+        except WbsNumberingError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'updated': updated})
+
+
+class WbsRenumberView(LoginRequiredMixin, View):
+    """プロジェクトの WBS コードを採番し直す（兄弟の順番は現在の WBS コード順）"""
+    
+    def post(self, request):
+        project = get_object_or_404(Project, pk=request.POST.get('project'), is_deleted=False)
+        try:
+            updated = renumber_wbs(project.pk, user=request.user)
+        except WbsNumberingError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f'WBSコードを採番し直しました（{updated}件）')
+        return redirect(f"{reverse('tasks:task_tree')}?project={project.pk}")
+
+
+class BaselineListView(LoginRequiredMixin, ListView):
+    """ベースライン一覧"""
+    model = Baseline
+    template_name = 'tasks/baseline_list.html'
+    context_object_name = 'baselines'
+    paginate_by = 50
+    
+    def get_queryset(self):
+        queryset = Baseline.objects.select_related('project', 'created_by').defer('data')
         project_id = self.request.GET.get('project')
         if project_id:
             queryset = queryset.filter(project_id=project_id)
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['projects'] = Project.objects.filter(is_deleted=False)
+        context['selected_project'] = self.request.GET.get('project', '')
+        return context
+
+
+class BaselineCreateView(LoginRequiredMixin, CreateView):
+    """ベースライン取得"""
+    model = Baseline
+    template_name = 'tasks/baseline_form.html'
+    fields = ['project', 'name', 'description', 'storage']
+    
+    def get_initial(self):
+        return {'project': self.request.GET.get('project')}
+    
+    def form_valid(self, form):
+        self.object = capture_baseline(
+            form.cleaned_data['project'],
+            form.cleaned_data['name'],
+            user=self.request.user,
+            storage=form.cleaned_data['storage'],
+            description=form.cleaned_data['description'],
+        )
+        messages.success(self.request, f'ベースライン「{self.object.name}」を取得しました（{self.object.task_count}件）。')
+        return redirect(self.get_success_url())
+    
+    def get_success_url(self):
+        return reverse_lazy('tasks:baseline_detail', kwargs={'pk': self.object.pk})
+
+
+class BaselineDetailView(LoginRequiredMixin, ReplicaReadMixin, DetailView):
+    """ベースライン差異レポート"""
+    model = Baseline
+    template_name = 'tasks/baseline_detail.html'
+    context_object_name = 'baseline'
+    
+    def get_queryset(self):
+        return Baseline.objects.select_related('project', 'created_by')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['variance'] = get_or_build(
+            'baseline',
+            lambda: compute_variance(self.object),
+            params={'baseline': self.object.pk},
+            project_id=self.object.project_id,
+        )
+        return context
+
+
+class EvmMixin:
+    """EVM 画面・API 共通（?project=, ?root=（WBS サブツリーの親タスク）, ?as_of=YYYY-MM-DD）
+
+    as_of はプロジェクトの期間の前後 evm.AS_OF_MARGIN に収める（系列の長さ・キャッシュの大きさを抑えるため）。
+    """
+    
+    def get_evm_params(self):
+        project_id = self.request.GET.get('project')
+        project = None
+        if project_id and project_id.isdigit():
+            project = Project.objects.filter(pk=project_id).first()
+        root = self.request.GET.get('root')
+        root = int(root) if root and root.isdigit() else None
+        try:
+            as_of = date.fromisoformat(self.request.GET.get('as_of', ''))
+        except ValueError:
+            as_of = timezone.localdate()
+        return project, root, as_of
+    
+    def get_evm(self, project, root, as_of):
+        return get_or_build(
+            'evm',
+            lambda: compute_evm(project, root, as_of),
+            params={'root': root, 'as_of': as_of.isoformat()},
+            project_id=project.pk,
+        )
+
+
+class EvmView(LoginRequiredMixin, ReplicaReadMixin, EvmMixin, TemplateView):
+    """EVM（出来高管理）"""
+    template_name = 'tasks/evm.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        project, root, as_of = self.get_evm_params()
+        projects = Project.objects.filter(is_deleted=False)
+        if project is None:
+            project = projects.first()
         
-        status = self.request.GET.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        # ガントチャート用データ生成
-        tasks_data = []
-        for task in queryset:
-            # 開始日と終了日が両方ある場合のみ表示
-            if task.planned_start_date and task.planned_end_date:
-                try:
-                    duration = (task.planned_end_date - task.planned_start_date).days
-                    if duration < 1:
-                        duration = 1
-                    
-                    # dhtmlxGanttが期待する形式: "YYYY-MM-DD"
-                    tasks_data.append({
-                        'id': task.id,  # 数値のまま
-                        'text': f"{task.task_number} - {task.title}",
-                        'start_date': task.planned_start_date.strftime('%Y-%m-%d'),
-                        'duration': duration,
-                        'progress': float(task.progress_rate or 0) / 100.0,
-                        'status': task.status
-                    })
-                except Exception as e:
-                    # エラーがあってもスキップして続行
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f"Error processing task {task.id}: {e}")
-                    continue
-        
-        context['tasks_json'] = json.dumps(tasks_data, ensure_ascii=False)
-        context['tasks_count'] = len(tasks_data)
+        context['projects'] = projects
+        context['selected_project'] = project
+        context['selected_root'] = root
+        context['as_of'] = as_of
+        if project is not None:
+            context['as_of'] = as_of = clamp_as_of(project, as_of)
+            evm = self.get_evm(project, root, as_of)
+            context['evm'] = evm
+            context['evm_json'] = dumps_for_html(evm)
+            context['root_tasks'] = Task.objects.filter(
+                project=project, subtasks__isnull=False
+            ).distinct().values_list('pk', 'wbs_code', 'task_number', 'title')
+        return context
+
+
+class EvmApiView(LoginRequiredMixin, ReplicaReadMixin, EvmMixin, View):
+    """EVM API（JSON）"""
+    
+    def get(self, request):
+        project, root, as_of = self.get_evm_params()
+        if project is None:
+            return JsonResponse({'error': 'project を指定してください'}, status=400)
+        return JsonResponse(self.get_evm(project, root, clamp_as_of(project, as_of)))
+
+
+class ResourceLoadView(LoginRequiredMixin, ReplicaReadMixin, TemplateView):
+    """担当者別負荷ヒートマップ"""
+    template_name = 'tasks/resource_load.html'
+    period_choices = [4, 12, 26, 52]
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        project_id = self.request.GET.get('project')
+        project_id = int(project_id) if project_id and project_id.isdigit() else None
+        department = self.request.GET.get('department') or None
+        scale = 'day' if self.request.GET.get('scale') == 'day' else 'week'
+        weeks = self.request.GET.get('weeks')
+        weeks = int(weeks) if weeks and weeks.isdigit() and int(weeks) in self.period_choices else 12
+        try:
+            date_from = date.fromisoformat(self.request.GET.get('start', ''))
+        except ValueError:
+            date_from = None
+        # 表示期間が稼働日カレンダーの計算対象期間に収まらない場合は今日から表示する
+        if date_from is None or not RANGE_START <= date_from <= RANGE_END - timedelta(weeks=weeks):
+            date_from = timezone.localdate()
+        date_to = date_from + timedelta(weeks=weeks) - timedelta(days=1)
+        
+        context['load_json'] = get_or_build(
+            'resource_load',
+            lambda: dumps_for_html(compute_resource_load(date_from, date_to, project_id, department, scale)),
+            params={'department': department, 'scale': scale, 'from': date_from.isoformat(), 'weeks': weeks},
+            project_id=project_id,
+        )
+        context['projects'] = Project.objects.filter(is_deleted=False)
+        context['departments'] = User.objects.filter(is_active=True).exclude(
+            department=''
+        ).order_by('department').values_list('department', flat=True).distinct()
+        context['selected_project'] = project_id
+        context['selected_department'] = department
+        context['scale'] = scale
+        context['period_choices'] = self.period_choices
+        context['selected_weeks'] = weeks
+        context['start'] = date_from
         return context
 
 
@@ -310,40 +811,141 @@ class TaskCommentAddView(LoginRequiredMixin, CreateView):
         return reverse_lazy('tasks:task_detail', kwargs={'pk': self.kwargs['task_pk']})
 
 
-class LoadSystemCategoriesView(LoginRequiredMixin, View):
+class LoadSystemCategoriesView(AsyncLoginRequiredMixin, View):
     """システム名読み込み（Ajax）"""
     
-    def get(self, request):
+    async def get(self, request):
         project_id = request.GET.get('project_id')
         system_categories = SystemCategory.objects.filter(
             project_id=project_id,
             is_deleted=False
         ).order_by('order', 'name').values('id', 'name', 'code')
         
-        return JsonResponse(list(system_categories), safe=False)
+        return JsonResponse([row async for row in system_categories], safe=False)
+
+
+class LoadMilestonesView(AsyncLoginRequiredMixin, View):
+    """マイルストーン読み込み（Ajax）"""
+    
+    async def get(self, request):
+        project_id = request.GET.get('project_id')
+        milestones = Milestone.objects.filter(
+            project_id=project_id
+        ).order_by('order', 'target_date').values('id', 'name', 'target_date')
+        
+        return JsonResponse([row async for row in milestones], safe=False)
 
 
-class LoadMajorCategoriesView(LoginRequiredMixin, View):
+class LoadMajorCategoriesView(AsyncLoginRequiredMixin, View):
     """大分類読み込み（Ajax）"""
     
-    def get(self, request):
+    async def get(self, request):
         system_category_id = request.GET.get('system_category_id')
         major_categories = MajorCategory.objects.filter(
             system_category_id=system_category_id,
             is_deleted=False
         ).order_by('order', 'name').values('id', 'name', 'code')
         
-        return JsonResponse(list(major_categories), safe=False)
+        return JsonResponse([row async for row in major_categories], safe=False)
 
 
-class LoadMinorCategoriesView(LoginRequiredMixin, View):
+class LoadMinorCategoriesView(AsyncLoginRequiredMixin, View):
     """中分類読み込み（Ajax）"""
     
-    def get(self, request):
+    async def get(self, request):
         major_category_id = request.GET.get('major_category_id')
         minor_categories = MinorCategory.objects.filter(
             major_category_id=major_category_id,
             is_deleted=False
         ).order_by('order', 'name').values('id', 'name', 'code')
         
-        return JsonResponse(list(minor_categories), safe=False)
+        return JsonResponse([row async for row in minor_categories], safe=False)
+
+
+class TaskCalendarApiView(AsyncLoginRequiredMixin, ReplicaReadMixin, View):
+    """カレンダーイベント API（JSON、async）
+    
+    ?project=&assignee= で絞り込む。events は列指向形式（static/js/payload.js の expandColumnar で展開）。
+    """
+    
+    async def get(self, request):
+        project_id = request.GET.get('project')
+        assignee_id = request.GET.get('assignee')
+        
+        async def build():
+            rows = [
+                _calendar_event_row(values)
+                async for values in _aiter_rows(_calendar_queryset(project_id, assignee_id), CALENDAR_VALUES)
+            ]
+            return dumps({'events': to_columnar(rows, TaskCalendarView.event_columns), 'count': len(rows)})
+        
+        payload = await aget_or_build(
+            'calendar', build,
+            params={'project': project_id, 'assignee': assignee_id, 'format': 'api'},
+            project_id=project_id,
+        )
+        return HttpResponse(payload, content_type='application/json')
+
+
+class TaskGanttApiView(AsyncLoginRequiredMixin, ReplicaReadMixin, View):
+    """ガントチャート API（JSON、async）
+    
+    ?project=&status=&as_of= で絞り込む。tasks は列指向形式、duration は稼働日数。
+    """
+    
+    async def get(self, request):
+        project_id = request.GET.get('project')
+        status = request.GET.get('status')
+        as_of = parse_as_of(request.GET.get('as_of'))
+        
+        async def build():
+            calendars = {}
+            rows = []
+            async for values in _aiter_rows(_gantt_queryset(project_id, status, as_of), GANTT_VALUES):
+                task_project_id = values[1]
+                if task_project_id not in calendars:
+                    calendars[task_project_id] = await sync_to_async(get_calendar)(task_project_id)
+                rows.append(_gantt_row(values, calendars[task_project_id]))
+            rows = _root_hidden_parents(rows)
+            return dumps({'tasks': to_columnar(rows, TaskGanttView.task_columns), 'count': len(rows)})
+        
+        payload = await aget_or_build(
+            'gantt', build,
+            params={
+                'project': project_id, 'status': status,
+                'as_of': as_of.isoformat() if as_of else None, 'format': 'api',
+            },
+            project_id=project_id,
+        )
+        return HttpResponse(payload, content_type='application/json')
+
+
+class TaskGanttBatchView(LoginRequiredMixin, View):
+    """ガントチャートの編集内容の一括保存 API（POST、JSON）
+    
+    ?project= のタスク・依存関係の変更（形式は apps.tasks.gantt_edits）をまとめて検証し、1トランザクションで保存する。
+    成功時は差し替える行（tasks、列指向形式）と追加した依存関係のID（links: {画面上の仮ID: ID}）を返す。
+    検証エラー時は何も保存せず、400 で変更ごとのエラー（errors）を返す。
+    """
+    
+    def post(self, request):
+        project = get_object_or_404(Project, pk=request.GET.get('project') or 0, is_deleted=False)
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            error = {'kind': 'batch', 'id': None, 'message': 'JSON の形式が正しくありません'}
+            return JsonResponse({'errors': [error]}, status=400)
+        try:
+            changes, added, deleted, reschedule = parse_changes(payload)
+            result = apply_changes(project.pk, changes, added, deleted, reschedule, user=request.user)
+        except GanttEditError as e:
+            return JsonResponse({'errors': e.errors}, status=400)
+        
+        calendar = get_calendar(project.pk)
+        queryset = _gantt_queryset(str(project.pk), None).filter(pk__in=result['task_ids'])
+        rows = [_gantt_row(values, calendar) for values in queryset.values_list(*GANTT_VALUES)]
+        return HttpResponse(dumps({
+            'tasks': to_columnar(rows, TaskGanttView.task_columns),
+            'links': result['links'],
+            'rescheduled': result['rescheduled'],
+        }), content_type='application/json')
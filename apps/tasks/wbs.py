@@ -0,0 +1,265 @@
+"""
+WBS ツリー（アウトライン表示用のメモリ上の木構造）
+
+プロジェクトのタスクを values_list の1クエリで読み込み、モデルインスタンスを作らずに
+列ごとの並列配列として保持する（数万件でもタスク1件あたり数百バイト程度）。
+- 行は WBS の表示順（先行順。兄弟は WBS コード（数字部分は数値比較）→ 開始予定日 → ID）に並べる
+- subtree_ends[i] は行 i の配下の最終行の次の行番号。行 i のサブツリーは行 i〜subtree_ends[i]-1 の連続区間
+- 折りたたまれた行の配下は subtree_ends まで読み飛ばすため、表示行の列挙は表示する行数に比例する
+- 親が削除済み・別プロジェクトのタスクと、親子が循環しているタスクはルートとして扱う
+ツリーはペイロードキャッシュ（apps.common.cache）にプロジェクト版数付きで保存し、タスク更新時に作り直す。
+展開・折りたたみの状態はセッションにプロジェクトごとに保存する。
+"""
+import re
+from datetime import date
+
+import numpy as np
+
+from apps.common.cache import get_or_build
+from apps.common.json_payload import iso_date
+from .models import Task
+
+TREE_VALUES = (
+    'id', 'parent_id', 'wbs_code', 'task_number', 'title', 'status', 'progress_rate',
+    'planned_start_date', 'planned_end_date', 'assignee__display_name',
+)
+
+# 画面・API に返す1行の列（children は子タスク数）
+NODE_COLUMNS = (
+    'id', 'parent_id', 'depth', 'children', 'wbs_code', 'task_number', 'title', 'status',
+    'progress', 'start_date', 'end_date', 'assignee',
+)
+
+# 展開状態を保存していない行を、何階層目まで展開して表示するか
+DEFAULT_EXPAND_DEPTH = 1
+
+# 1回の応答に含める最大行数
+MAX_NODES = 5000
+
+SESSION_KEY = 'wbs_tree_state'
+
+# WBS コードの1階層の桁数（保存時はゼロ埋め: 0001.0002 → 表示 1.2）
+WBS_SEGMENT_WIDTH = 4
+
+_NUMBER = re.compile(r'(\d+)')
+_PADDED_CODE = re.compile(r'^\d{%d}(\.\d{%d})*$' % (WBS_SEGMENT_WIDTH, WBS_SEGMENT_WIDTH))
+
+
+def is_padded_wbs_code(code):
+    """自動採番したゼロ埋め形式の WBS コードかどうか"""
+    return bool(code) and bool(_PADDED_CODE.match(code))
+
+
+def format_wbs_code(code):
+    """表示用の WBS コード（ゼロ埋め形式の場合はゼロを除く: 0001.0010 → 1.10）"""
+    if not is_padded_wbs_code(code):
+        return code or ''
+    return '.'.join(str(int(segment)) for segment in code.split('.'))
+
+
+def wbs_sort_key(code):
+    """WBS コードの並び順キー（数字部分は数値として比較: 1.2 < 1.10。未設定は末尾）"""
+    parts = tuple(
+        (0, int(part), '') if part.isdigit() else (1, 0, part)
+        for part in _NUMBER.split(code or '') if part
+    )
+    return (not parts, parts)
+
+
+class WbsTree:
+    """先行順に並べたタスクの並列配列"""
+
+    __slots__ = ('ids', 'parents', 'depths', 'subtree_ends', 'child_counts', 'values', 'positions')
+
+    def __init__(self, ids, parents, depths, subtree_ends, child_counts, values):
+        self.ids = ids
+        self.parents = parents
+        self.depths = depths
+        self.subtree_ends = subtree_ends
+        self.child_counts = child_counts
+        self.values = values
+        self.positions = {task_id: index for index, task_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, rows):
+        """TREE_VALUES の行タプルから構築する"""
+        count = len(rows)
+        source = {row[0]: index for index, row in enumerate(rows)}
+        keys = [(wbs_sort_key(row[2]), row[7] or date.max, row[0]) for row in rows]
+
+        # 子の一覧（末尾の要素はルートの一覧）
+        children = [[] for _ in range(count + 1)]
+        for index, row in enumerate(rows):
+            children[source.get(row[1], count)].append(index)
+        for siblings in children:
+            if len(siblings) > 1:
+                siblings.sort(key=keys.__getitem__)
+
+        order = []
+        parent_of = [-1] * count
+        depth_of = [0] * count
+        visited = [False] * count
+
+        def walk(roots):
+            stack = [(index, -1, 0) for index in reversed(roots)]
+            while stack:
+                index, parent, depth = stack.pop()
+                if visited[index]:
+                    continue
+                visited[index] = True
+                parent_of[index] = parent
+                depth_of[index] = depth
+                order.append(index)
+                stack.extend((child, index, depth + 1) for child in reversed(children[index]))
+
+        walk(children[count])
+        if len(order) < count:
+            # 親子が循環していてルートから辿れないタスク
+            walk(sorted((index for index in range(count) if not visited[index]), key=keys.__getitem__))
+
+        new_position = [0] * count
+        for position, index in enumerate(order):
+            new_position[index] = position
+        parents = [new_position[parent_of[index]] if parent_of[index] >= 0 else -1 for index in order]
+
+        # 子は親より後ろにあるため、後ろから親へ区間の終わりを伝える
+        subtree_ends = list(range(1, count + 1))
+        for position in range(count - 1, -1, -1):
+            parent = parents[position]
+            if parent >= 0 and subtree_ends[position] > subtree_ends[parent]:
+                subtree_ends[parent] = subtree_ends[position]
+        parents = np.array(parents, dtype=np.int64)
+        child_counts = np.bincount(parents[parents >= 0], minlength=count)
+
+        values = []
+        for index in order:
+            _, _, wbs_code, task_number, title, status, progress, start, end, assignee = rows[index]
+            values.append((
+                wbs_code, task_number, title, status, float(progress or 0),
+                iso_date(start), iso_date(end), assignee or '',
+            ))
+        return cls(
+            np.array([rows[index][0] for index in order], dtype=np.int64),
+            parents,
+            np.array([depth_of[index] for index in order], dtype=np.int64),
+            np.array(subtree_ends, dtype=np.int64),
+            child_counts,
+            values,
+        )
+
+    def position(self, task_id):
+        """タスクIDの行番号（ツリーにない場合は None）"""
+        return self.positions.get(task_id)
+
+    def subtree(self, position):
+        """行 position とその配下の行番号の範囲"""
+        return range(position, int(self.subtree_ends[position]))
+
+    def child_positions(self, position=None):
+        """直下の子（position が None の場合はルート）の行番号"""
+        if position is None:
+            index, end = 0, len(self)
+        else:
+            index, end = position + 1, int(self.subtree_ends[position])
+        while index < end:
+            yield index
+            index = int(self.subtree_ends[index])
+
+    def ancestor_ids(self, position):
+        """行 position の祖先のタスクID（近い順）"""
+        ids = []
+        parent = int(self.parents[position])
+        while parent >= 0:
+            ids.append(int(self.ids[parent]))
+            parent = int(self.parents[parent])
+        return ids
+
+    def is_open(self, position, state):
+        task_id = int(self.ids[position])
+        if task_id in state.expanded:
+            return True
+        return self.depths[position] < state.expand_depth and task_id not in state.collapsed
+
+    def visible_positions(self, state, parent=None, limit=MAX_NODES):
+        """展開状態に従って表示する行番号（parent 指定時はその配下のみ）
+
+        折りたたまれた行の配下は読み飛ばす。limit 件で打ち切る。
+        """
+        if parent is None:
+            index, end = 0, len(self)
+        else:
+            index, end = parent + 1, int(self.subtree_ends[parent])
+        positions = []
+        while index < end and len(positions) < limit:
+            positions.append(index)
+            if self.child_counts[index] and self.is_open(index, state):
+                index += 1
+            else:
+                index = int(self.subtree_ends[index])
+        return positions
+
+    def code(self, position):
+        """行 position の保存されている WBS コード"""
+        return self.values[position][0]
+
+    def node(self, position):
+        """NODE_COLUMNS の行タプル（WBS コードは表示用）"""
+        parent = int(self.parents[position])
+        wbs_code, *values = self.values[position]
+        return (
+            int(self.ids[position]),
+            int(self.ids[parent]) if parent >= 0 else None,
+            int(self.depths[position]),
+            int(self.child_counts[position]),
+            format_wbs_code(wbs_code),
+            *values,
+        )
+
+    def nodes(self, positions):
+        return [self.node(position) for position in positions]
+
+
+def build_wbs_tree(project_id):
+    """プロジェクトの WBS ツリーを1クエリで構築する"""
+    rows = Task.objects.filter(project_id=project_id).order_by().values_list(*TREE_VALUES)
+    return WbsTree.build(list(rows))
+
+
+def get_wbs_tree(project_id):
+    """キャッシュ済みの WBS ツリー（タスク更新でプロジェクト版数が変わると作り直す）"""
+    return get_or_build('wbs_tree', lambda: build_wbs_tree(project_id), project_id=project_id)
+
+
+class TreeState:
+    """WBS ツリーの展開・折りたたみ状態（明示的に開閉したタスクID）"""
+
+    def __init__(self, expanded=(), collapsed=(), expand_depth=DEFAULT_EXPAND_DEPTH):
+        self.expanded = set(expanded)
+        self.collapsed = set(collapsed)
+        self.expand_depth = expand_depth
+
+    @classmethod
+    def load(cls, session, project_id, expand_depth=DEFAULT_EXPAND_DEPTH):
+        saved = session.get(SESSION_KEY, {}).get(str(project_id), {})
+        return cls(saved.get('expanded', ()), saved.get('collapsed', ()), expand_depth)
+
+    def save(self, session, project_id):
+        states = session.get(SESSION_KEY, {})
+        states[str(project_id)] = {'expanded': sorted(self.expanded), 'collapsed': sorted(self.collapsed)}
+        session[SESSION_KEY] = states
+
+    def toggle(self, tree, position, is_open):
+        """1件の開閉を記録する（既定の展開状態と同じになる場合は記録を消すだけ）"""
+        task_id = int(tree.ids[position])
+        self.expanded.discard(task_id)
+        self.collapsed.discard(task_id)
+        if tree.is_open(position, self) != is_open:
+            (self.expanded if is_open else self.collapsed).add(task_id)
+
+    def reveal(self, tree, position):
+        """行 position が表示されるよう祖先を展開する"""
+        self.expanded.update(tree.ancestor_ids(position))
+        self.collapsed.difference_update(self.expanded)
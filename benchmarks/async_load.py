@@ -0,0 +1,125 @@
+"""
+低速クライアント混在時の同時処理性能の計測（WSGI と ASGI の比較用）
+
+起動済みのサーバーに対して、次の2種類のクライアントを同時に接続する。
+- 低速クライアント: リクエストヘッダーを少しずつ送る（回線の遅い端末を想定）
+- 通常クライアント: JSON API を繰り返し取得し、応答時間を記録する
+同期ワーカー（gunicorn -w N）は低速クライアントの受信待ちでワーカーが埋まり、通常クライアントが待たされる。
+ASGI（uvicorn --workers N）では受信待ちがイベントループ上で行われるため、同じワーカー数でも影響を受けにくい。
+標準ライブラリのみで動作する。
+
+使い方（同じワーカー数で起動して比較する）:
+    gunicorn config.wsgi:application -w 4 -b 127.0.0.1:8000
+    uvicorn config.asgi:application --workers 4 --port 8000
+
+    python benchmarks/async_load.py http://127.0.0.1:8000/tasks/gantt/api/?project=1 \
+        --cookie sessionid=... --clients 50 --slow 200 --duration 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def build_request(url, cookie):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    headers = [f'GET {path} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: close']
+    if cookie:
+        headers.append(f'Cookie: {cookie}')
+    return parts.hostname, parts.port or 80, ('\r\n'.join(headers) + '\r\n\r\n').encode('ascii')
+
+
+async def slow_client(host, port, request, interval, deadline):
+    """ヘッダーを1バイトずつ interval 秒間隔で送り続ける（期限まで接続を保持する）"""
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(interval)
+            continue
+        try:
+            for byte in request[:-4]:
+                if time.monotonic() >= deadline:
+                    break
+                writer.write(bytes([byte]))
+                await writer.drain()
+                await asyncio.sleep(interval)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+async def fast_client(host, port, request, deadline, timeout, latencies, errors):
+    """応答を最後まで受信するまでの時間を記録する"""
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.write(request)
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            await asyncio.wait_for(reader.read(), timeout)
+            writer.close()
+            if b' 200 ' not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+                continue
+            latencies.append(time.monotonic() - started)
+        except (OSError, asyncio.TimeoutError) as e:
+            errors.append(type(e).__name__)
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+async def run(args):
+    host, port, request = build_request(args.url, args.cookie)
+    deadline = time.monotonic() + args.duration
+    latencies = []
+    errors = []
+    tasks = [
+        asyncio.create_task(slow_client(host, port, request, args.slow_interval, deadline))
+        for _ in range(args.slow)
+    ]
+    # 低速クライアントが接続し終えてから計測を始める
+    await asyncio.sleep(min(1.0, args.duration / 10))
+    tasks += [
+        asyncio.create_task(fast_client(host, port, request, deadline, args.timeout, latencies, errors))
+        for _ in range(args.clients)
+    ]
+    await asyncio.gather(*tasks)
+
+    print(f'URL: {args.url}')
+    print(f'低速クライアント: {args.slow}  通常クライアント: {args.clients}  計測時間: {args.duration}秒')
+    print(f'成功: {len(latencies)}件 ({len(latencies) / args.duration:.1f} req/s)  失敗: {len(errors)}件')
+    if latencies:
+        print(
+            f'応答時間  平均: {statistics.mean(latencies) * 1000:.0f} ms  '
+            f'p50: {percentile(latencies, 0.5) * 1000:.0f} ms  '
+            f'p95: {percentile(latencies, 0.95) * 1000:.0f} ms  '
+            f'最大: {max(latencies) * 1000:.0f} ms'
+        )
+    if errors:
+        print('失敗の内訳:', {error: errors.count(error) for error in set(errors)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='低速クライアント混在時の同時処理性能を計測します')
+    parser.add_argument('url', help='計測する URL（例: http://127.0.0.1:8000/tasks/gantt/api/?project=1）')
+    parser.add_argument('--cookie', default='', help='ログイン済みセッションの Cookie（例: sessionid=...）')
+    parser.add_argument('--clients', type=int, default=50, help='通常クライアント数（既定: 50）')
+    parser.add_argument('--slow', type=int, default=200, help='低速クライアント数（既定: 200）')
+    parser.add_argument('--slow-interval', type=float, default=0.5, help='低速クライアントの送信間隔（秒）')
+    parser.add_argument('--duration', type=float, default=20, help='計測時間（秒、既定: 20）')
+    parser.add_argument('--timeout', type=float, default=10, help='1リクエストのタイムアウト（秒）')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+DB 接続の再利用による応答時間の比較（ダッシュボード・タスク一覧）
+
+同じプロセス内で WSGI ハンドラーを直接呼び出し、次の方式ごとに応答時間（p50 / p95 / p99）を計測する。
+テストクライアントはリクエスト終了時の接続の整理を行わないため使わない。
+- close     : リクエストごとに接続・切断する（CONN_MAX_AGE=0、従来の設定）
+- persistent: 接続を保持し、リクエスト開始時に死活確認する（CONN_MAX_AGE + CONN_HEALTH_CHECKS）
+- pool      : psycopg 3 の接続プール（Django 5.1 以降かつ psycopg_pool がある場合のみ）
+接続の確立と search_path の送信にかかる時間はネットワーク越しの DB ほど大きくなるため、
+本番と同じ構成の PostgreSQL（.env の DATABASE_*）で計測する。
+
+使い方:
+    python benchmarks/db_connections.py --username admin
+    python benchmarks/db_connections.py --username admin --requests 500 --url /dashboard/ --url /tasks/?project=1
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client, RequestFactory  # noqa: E402
+
+DEFAULT_URLS = ['/dashboard/', '/tasks/']
+
+
+def available_modes():
+    modes = ['close', 'persistent']
+    if django.VERSION >= (5, 1) and importlib.util.find_spec('psycopg_pool'):
+        modes.append('pool')
+    return modes
+
+
+def configure(mode, pool_size):
+    """接続設定を切り替え、既存の接続（プール）を閉じる"""
+    connection = connections['default']
+    connection.close()
+    if hasattr(connection, 'close_pool'):
+        connection.close_pool()
+    settings_dict = connection.settings_dict
+    settings_dict['OPTIONS'].pop('pool', None)
+    if mode == 'close':
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict['CONN_HEALTH_CHECKS'] = False
+    elif mode == 'persistent':
+        settings_dict['CONN_MAX_AGE'] = 600
+        settings_dict['CONN_HEALTH_CHECKS'] = True
+    else:
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict['CONN_HEALTH_CHECKS'] = False
+        settings_dict['OPTIONS']['pool'] = {'min_size': pool_size, 'max_size': pool_size}
+
+
+def session_cookie(username):
+    """ログイン済みセッションの Cookie ヘッダー"""
+    user = get_user_model().objects.get(username=username)
+    client = Client()
+    client.force_login(user)
+    return '; '.join(f'{key}={morsel.value}' for key, morsel in client.cookies.items())
+
+
+def request_once(handler, environ):
+    """WSGI サーバーと同様に呼び出し、応答を読み終えて close する（ここで接続が整理される）"""
+    status = []
+    response = handler(dict(environ), lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+def measure(handler, environ, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        status = request_once(handler, environ)
+        latencies.append(time.perf_counter() - started)
+        if not status.startswith('200'):
+            raise SystemExit(f"{environ['PATH_INFO']} の応答が {status} でした")
+    return latencies
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DB 接続の再利用方式ごとの応答時間を計測します')
+    parser.add_argument('--username', required=True, help='ログインに使うユーザー名')
+    parser.add_argument('--url', action='append', default=[], help='計測する URL（複数指定可）')
+    parser.add_argument('--requests', type=int, default=200, help='URL・方式ごとのリクエスト数（既定: 200）')
+    parser.add_argument('--warmup', type=int, default=10, help='計測前のリクエスト数（既定: 10）')
+    parser.add_argument('--host', default='localhost', help='Host ヘッダー（ALLOWED_HOSTS に含まれるもの）')
+    parser.add_argument('--pool-size', type=int, default=4, help='pool 方式の接続数（既定: 4）')
+    args = parser.parse_args()
+
+    cookie = session_cookie(args.username)
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    print(f"接続先: {connections['default'].settings_dict['HOST']}  Django {django.get_version()}")
+    print(f"{'方式':<12}{'URL':<28}{'平均':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for mode in available_modes():
+        configure(mode, args.pool_size)
+        for url in args.url or DEFAULT_URLS:
+            path, _, query = url.partition('?')
+            environ = factory._base_environ(
+                PATH_INFO=path, QUERY_STRING=query, HTTP_COOKIE=cookie, HTTP_HOST=args.host
+            )
+            measure(handler, environ, args.warmup)
+            latencies = measure(handler, environ, args.requests)
+            print(
+                f'{mode:<12}{url:<28}'
+                f'{statistics.mean(latencies) * 1000:>8.1f}ms'
+                f'{percentile(latencies, 0.5) * 1000:>8.1f}ms'
+                f'{percentile(latencies, 0.95) * 1000:>8.1f}ms'
+                f'{percentile(latencies, 0.99) * 1000:>8.1f}ms'
+            )
+    configure('close', args.pool_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+EVM 計算の性能計測
+
+apps.tasks.evm の日別配分（NumPy 差分配列）とプロジェクト別指標の算出時間を計測する。
+DBは使用せず、load_task_arrays 相当の配列を合成して計測する。
+
+使い方:
+    python benchmarks/evm.py [件数]
+"""
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import os  # noqa: E402
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django  # noqa: E402
+
+django.setup()
+
+from apps.tasks import evm  # noqa: E402
+
+
+def make_arrays(count, projects=50):
+    """タスク配列を生成"""
+    rng = np.random.default_rng(0)
+    base = date(2025, 1, 6).toordinal()
+    planned_start = base + rng.integers(0, 365, count)
+    planned_end = planned_start + rng.integers(0, 30, count)
+    started = rng.random(count) < 0.6
+    finished = started & (rng.random(count) < 0.5)
+    actual_start = np.where(started, planned_start + rng.integers(-3, 5, count), evm.NO_DATE)
+    actual_end = np.where(finished, actual_start + rng.integers(0, 30, count), evm.NO_DATE)
+    return {
+        'id': np.arange(1, count + 1, dtype=np.int64),
+        'parent_id': np.zeros(count, dtype=np.int64),
+        'project_id': rng.integers(1, projects + 1, count),
+        'estimated_hours': rng.integers(1, 80, count).astype(np.float64),
+        'actual_hours': np.where(started, rng.integers(0, 100, count), 0).astype(np.float64),
+        'progress_rate': np.where(finished, 100, np.where(started, rng.integers(0, 100, count), 0)).astype(np.float64),
+        'planned_start': planned_start,
+        'planned_end': planned_end,
+        'actual_start': actual_start,
+        'actual_end': actual_end,
+    }
+
+
+def measure(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    arrays = make_arrays(count)
+    as_of = date(2025, 7, 1).toordinal()
+
+    print(f'件数: {count:,}')
+    elapsed = measure(lambda: evm.evm_series(arrays, as_of))
+    print(f'日別系列（PV/EV/AC）: {elapsed * 1000:.1f} ms')
+    # 階層: 1000件ごとに同じ親を持つ
+    arrays['parent_id'] = np.where(arrays['id'] % 1000 == 1, 0, (arrays['id'] - 1) // 1000 * 1000 + 1)
+    elapsed = measure(lambda: evm.subtree_mask(arrays['id'], arrays['parent_id'], 1))
+    print(f'WBSサブツリー抽出: {elapsed * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
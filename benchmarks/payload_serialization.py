@@ -0,0 +1,105 @@
+"""
+ガント用ペイロードのシリアライズ性能比較
+
+従来方式（辞書リスト + strftime + float(Decimal) + 標準json）と
+apps.common.json_payload による行形式・列指向形式を比較する。
+DBは使用せず、values_list 相当のタプルを合成して計測する。
+
+使い方:
+    python benchmarks/payload_serialization.py [件数]
+"""
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from apps.common import json_payload  # noqa: E402
+
+COLUMNS = ('id', 'text', 'start_date', 'duration', 'progress', 'status')
+STATUSES = ('NOT_STARTED', 'IN_PROGRESS', 'COMPLETED', 'ON_HOLD')
+
+
+def make_rows(count):
+    """values_list 相当のタプルを生成"""
+    random.seed(0)
+    base = date(2025, 1, 6)
+    rows = []
+    for pk in range(1, count + 1):
+        start = base + timedelta(days=random.randint(0, 365))
+        end = start + timedelta(days=random.randint(0, 30))
+        progress = Decimal(random.randint(0, 10000)) / 100
+        rows.append((pk, f'{pk:05d}', f'タスク{pk}', start, end, progress, random.choice(STATUSES)))
+    return rows
+
+
+def legacy(rows):
+    """従来方式"""
+    tasks_data = []
+    for pk, number, title, start, end, progress, status in rows:
+        duration = (end - start).days
+        if duration < 1:
+            duration = 1
+        tasks_data.append({
+            'id': pk,
+            'text': f'{number} - {title}',
+            'start_date': start.strftime('%Y-%m-%d'),
+            'duration': duration,
+            'progress': float(progress or 0) / 100.0,
+            'status': status,
+        })
+    return json.dumps(tasks_data, ensure_ascii=False)
+
+
+def _tuples(rows):
+    # 進捗率はDB側で float に変換済みの想定
+    return [
+        (pk, f'{number} - {title}', json_payload.iso_date(start), max((end - start).days, 1), progress, status)
+        for pk, number, title, start, end, progress, status in rows
+    ]
+
+
+def records(rows):
+    """新方式（行形式）"""
+    return json_payload.dumps_for_html(json_payload.to_records(_tuples(rows), COLUMNS))
+
+
+def columnar(rows):
+    """新方式（列指向形式）"""
+    return json_payload.dumps_for_html(json_payload.to_columnar(_tuples(rows), COLUMNS))
+
+
+def measure(func, rows, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = func(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(payload.encode('utf-8'))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = make_rows(count)
+    # DB側で float 化した進捗率を模擬
+    float_rows = [row[:5] + (float(row[5]) / 100.0,) + row[6:] for row in rows]
+
+    encoder = 'orjson' if json_payload.orjson is not None else 'json (stdlib)'
+    print(f'件数: {count:,}  エンコーダ: {encoder}')
+    print(f'{"方式":<24}{"時間(ms)":>12}{"サイズ(KB)":>14}')
+    for label, func, data in (
+        ('従来（dict + json）', legacy, rows),
+        ('行形式', records, float_rows),
+        ('列指向形式', columnar, float_rows),
+    ):
+        elapsed, size = measure(func, data)
+        print(f'{label:<24}{elapsed * 1000:>12.1f}{size / 1024:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+担当者別負荷の性能計測
+
+apps.tasks.resource_load.distribute_hours（差分配列による稼働日配分）と週単位集計の時間を計測する。
+DBは使用せず、担当者・タスクの配列を合成して計測する。
+
+使い方:
+    python benchmarks/resource_load.py [担当者数] [タスク数]
+"""
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.projects.calendars import BusinessCalendar  # noqa: E402
+from apps.tasks import resource_load  # noqa: E402
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    weeks = 52
+    length = weeks * 7
+    origin = date(2025, 1, 6).toordinal()  # 月曜
+
+    rng = np.random.default_rng(0)
+    user_index = rng.integers(0, users, count)
+    start = rng.integers(0, length - 30, count)
+    end = start + rng.integers(0, 30, count)
+    hours = rng.integers(1, 80, count).astype(np.float64)
+
+    # カレンダーはプロセス内でキャッシュされるため、構築時間は計測に含めない
+    calendar = BusinessCalendar()
+
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        workdays = calendar.workday_mask(origin, length)
+        load = resource_load.distribute_hours(user_index, start, end, hours, users, origin, length, workdays)
+        load.reshape(users, weeks, 7).sum(axis=2)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'担当者: {users:,}  タスク: {count:,}  期間: {weeks}週')
+    print(f'配分・週集計: {best * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+起動例（SSE の常時接続と async の JSON API はこちらで動作させる）:
+    uvicorn config.asgi:application --workers 4
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -w 4
 """
 
 import os
@@ -12,5 +16,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# 設定で DB 接続を保持しない（CONN_MAX_AGE=0）ようにする。Django 4.2 の ASGI では保持した接続が閉じられない
+os.environ.setdefault('DJANGO_SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
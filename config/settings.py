@@ -3,6 +3,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
+import django
 import environ
 
 # Build paths
@@ -36,16 +37,19 @@ INSTALLED_APPS = [
     'debug_toolbar',
     
     # Local apps
+    'apps.common',
     'apps.accounts',
     'apps.projects',
     'apps.tasks',
     'apps.quality',
     'apps.reviews',
     'apps.dashboard',
+    'apps.jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.common.db_router.replica_stickiness_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,8 +79,33 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# ASGI サーバー（uvicorn など）で起動する場合のエントリポイント
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
+# 接続の再利用
+#   DATABASE_CONN_MAX_AGE : 接続を保持する秒数（0 はリクエストごとに切断、既定: 60）。WSGI での起動時のみ有効。
+#                           保持した接続はリクエスト開始時に死活確認（CONN_HEALTH_CHECKS）してから使う。
+#                           ASGI では async ビューの同期処理がリクエストごとに別スレッドで動き、スレッドごとの接続が
+#                           閉じられずに残るため、config.asgi から起動した場合は常に 0 にする
+#   DATABASE_POOL         : psycopg 3 の接続プールを使う（Django 5.1 以降、要 psycopg[pool]）。
+#                           Django 4.2 では何の効果もない（プールは作られず、上記の接続の保持のみ行う）
+#   DATABASE_POOL_MIN_SIZE / DATABASE_POOL_MAX_SIZE / DATABASE_POOL_TIMEOUT: プールの最小・最大接続数と取得待ち秒数
+# search_path は新しい接続ごとに送信される。ロールに設定済みの場合は DATABASE_SCHEMA を空にすると送信しない
+#   ALTER ROLE <ユーザー> SET search_path = <スキーマ>, public;
+database_options = {}
+if env('DATABASE_SCHEMA', default=''):
+    database_options['options'] = f'-c search_path={env("DATABASE_SCHEMA")},public'
+database_pool = env.bool('DATABASE_POOL', default=False) and django.VERSION >= (5, 1)
+# config.asgi が設定する（ASGI サーバーから起動されたか）
+serving_asgi = env('DJANGO_SERVER_INTERFACE', default='wsgi') == 'asgi'
+if database_pool:
+    database_options['pool'] = {
+        'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+        'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+        'timeout': env.int('DATABASE_POOL_TIMEOUT', default=10),
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -85,12 +114,59 @@ DATABASES = {
         'PASSWORD': env('DATABASE_PASSWORD'),
         'HOST': env('DATABASE_HOST'),
         'PORT': env('DATABASE_PORT'),
-        'OPTIONS': {
-            'options': f'-c search_path={env("DATABASE_SCHEMA")},public'
-        },
+        # プール使用時は接続の保持をプールに任せる（Django の制約で 0 にする）。ASGI では接続を保持しない
+        'CONN_MAX_AGE': 0 if database_pool or serving_asgi else env.int('DATABASE_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': database_options,
+    }
+}
+
+# 読み取り専用レプリカ（任意）
+# DATABASE_REPLICA_HOST を設定すると、ダッシュボード・ガント・帳票・CSV出力などの読み取りをレプリカで行う
+# （apps.common.db_router）。NAME / PORT / USER / PASSWORD は省略時プライマリと同じ。
+# 同じサーバーを指定すれば、レプリカなしでも振り分けの動作を確認できる
+if env('DATABASE_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env('DATABASE_REPLICA_HOST'),
+        'PORT': env('DATABASE_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'NAME': env('DATABASE_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': env('DATABASE_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': env('DATABASE_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(database_options),
+        # テスト時はプライマリの複製として扱う（テスト用 DB を作らない）
+        'TEST': {'MIRROR': 'default'},
     }
+    REPLICA_DATABASE = 'replica'
+else:
+    REPLICA_DATABASE = None
+DATABASE_ROUTERS = ['apps.common.db_router.ReplicaRouter']
+# 更新リクエスト後にそのブラウザの読み取りをプライマリで行う秒数（レプリカの遅延より長くする）
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=10)
+
+# Cache
+# CACHE_URL で切り替え（例）
+#   locmemcache://                   プロセス内メモリ（既定）
+#   filecache:///var/tmp/prjmng_cache ファイル
+#   rediscache://127.0.0.1:6379/1    Redis 互換サーバー（要 redis パッケージ）
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
 }
 
+# 画面ペイロード（ガント・カレンダー・ダッシュボード）のキャッシュ設定
+PAYLOAD_CACHE_ALIAS = 'default'
+PAYLOAD_CACHE_TIMEOUT = env.int('PAYLOAD_CACHE_TIMEOUT', default=300)
+
+# 変更イベント配信（Server-Sent Events）
+# 複数プロセス構成では共有キャッシュ（CACHE_URL）と apps.common.events.CacheBroker を使う
+EVENT_BROKER = env('EVENT_BROKER', default='apps.common.events.InMemoryBroker')
+EVENT_STREAM_TIMEOUT = env.int('EVENT_STREAM_TIMEOUT', default=300)  # 1接続の最大秒数
+EVENT_STREAM_KEEPALIVE = 15  # 秒
+
+# バックグラウンド処理（apps.jobs、ワーカーは manage.py run_jobs）
+JOB_RETRY_DELAY = env.int('JOB_RETRY_DELAY', default=60)  # 初回再試行までの秒数（以降は倍々）
+JOB_STALE_TIMEOUT = env.int('JOB_STALE_TIMEOUT', default=600)  # 応答が途絶えたとみなす秒数
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -29,6 +29,7 @@ urlpatterns = [
     path('tasks/', include('apps.tasks.urls')),
     path('quality/', include('apps.quality.urls')),
     path('reviews/', include('apps.reviews.urls')),
+    path('jobs/', include('apps.jobs.urls')),
     
     # マニュアル
     path('manual/', TemplateView.as_view(template_name='manual.html'), name='manual'),
@@ -0,0 +1,20 @@
+/**
+ * 列指向JSON（{"id": [...], "text": [...]}）を行オブジェクトの配列に展開する。
+ * 配列が渡された場合はそのまま返す。
+ */
+function expandColumnar(payload) {
+    if (Array.isArray(payload)) {
+        return payload;
+    }
+    var keys = Object.keys(payload);
+    var size = keys.length ? payload[keys[0]].length : 0;
+    var rows = new Array(size);
+    for (var i = 0; i < size; i++) {
+        var row = {};
+        for (var k = 0; k < keys.length; k++) {
+            row[keys[k]] = payload[keys[k]][i];
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
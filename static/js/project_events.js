@@ -0,0 +1,18 @@
+/**
+ * プロジェクトの変更イベント（Server-Sent Events）を購読する。
+ * handlers は {task: function(event) {...}, bug: ..., review: ...} の形式で、
+ * event は {id, type, action: "saved" | "deleted", data: {...}}。
+ * EventSource 非対応のブラウザでは何もしない。
+ */
+function subscribeProjectEvents(url, handlers) {
+    if (!window.EventSource || !url) {
+        return null;
+    }
+    var source = new EventSource(url);
+    Object.keys(handlers).forEach(function(type) {
+        source.addEventListener(type, function(message) {
+            handlers[type](JSON.parse(message.data));
+        });
+    });
+    return source;
+}